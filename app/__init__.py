@@ -7,7 +7,7 @@ from flask import Flask, request, render_template, current_app, session, has_app
 from werkzeug.exceptions import HTTPException
 # import flask_monitoringdashboard as dashboard
 from flask_login import current_user
-from app.core.lib.object import getProperty
+from app.core.main.PermissionTable import permission_tables
 from app import commands
 from app.exceptions import InvalidUsage
 from app.extensions import db, login_manager, cors, bcrypt, toolbar, cache, limiter
@@ -100,6 +100,7 @@ def createApp(config_object):
     registerExtensions(app)
     registerBlueprints(app)
     registerErrorHandlers(app)
+    registerMetrics(app)
     registerShellcontext(app)
     registerCommands(app)
     # importlib: "import app.core..." would shadow local Flask variable "app"
@@ -397,37 +398,11 @@ def check_page_access(request):
     if _is_public_endpoint(request):
         return True
 
+    # _permissions.blueprint:<bp> / _permissions.<bp>:<endpoint> - скомпилированная таблица решений
     endpoint = request.endpoint.replace(".", ":")
-    permissions = None
-
-    blueprint_permissions = getProperty("_permissions.blueprint:" + blueprint_name)
-    if blueprint_permissions and isinstance(blueprint_permissions, dict):
-        permissions = blueprint_permissions
-
-    endpoint_permissions = getProperty("_permissions." + endpoint)
-    if endpoint_permissions and isinstance(endpoint_permissions, dict):
-        permissions = endpoint_permissions
-
-    if permissions:
-        permissions = permissions.get(request.method.lower(), None)
-
-    if permissions:
-        denied_users = permissions.get("denied_users",None)
-        if denied_users:
-            if username in denied_users or "*" in denied_users:
-                return False
-        access_users = permissions.get("access_users",None)
-        if access_users:
-            if username in access_users or "*" in access_users:
-                return True
-        denied_roles = permissions.get("denied_roles",None)
-        if denied_roles:
-            if role in denied_roles or "*" in denied_roles:
-                return False
-        access_roles = permissions.get("access_roles",None)
-        if access_roles:
-            if role in access_roles or "*" in access_roles:
-                return True
+    decision = permission_tables.page_decision(blueprint_name, endpoint, request.method.lower(), username, role)
+    if decision is not None:
+        return decision
 
     view_func = current_app.view_functions.get(request.endpoint)
     required_roles = _resolve_required_roles(view_func, request.method)
@@ -557,6 +532,24 @@ def registerErrorHandlers(app):
         return _render_server_error_response()
 
 
+def registerMetrics(app):
+    """Register /metrics: OpenMetrics / Prometheus text of core runtime metrics (admin, session or API key)."""
+    from app.api.decorators import api_key_required
+    from app.core.main.RuntimeMetrics import register_runtime_collectors, render_metrics
+
+    register_runtime_collectors()
+
+    @app.route('/metrics')
+    @public_endpoint
+    @api_key_required
+    def metrics():
+        # маршрут вне blueprint api: ключ проверяет api_key_required, роль - здесь
+        if getattr(current_user, 'role', None) not in ('admin', 'root'):
+            abort(403)
+        text, content_type = render_metrics(request.headers.get('Accept', ''))
+        return text, 200, {'Content-Type': content_type}
+
+
 def _render_server_error_response():
     """Ответ 500 для HTML-страниц и API."""
     if request.blueprint == 'api':
@@ -583,3 +576,5 @@ def registerCommands(app):
     app.cli.add_command(commands.clean)
     app.cli.add_command(commands.urls)
     app.cli.add_command(commands.create_user)
+    app.cli.add_command(commands.snapshot)
+    app.cli.add_command(commands.history)
@@ -221,9 +221,11 @@ def get_available_widgets():
         
         # Get available objects
         available_objects = []
-        for key, obj in sorted(objects_storage.items(), key=lambda x: x[0].lower()):
+        for key in sorted(objects_storage.getObjectNames(), key=str.lower):
             try:
-                if obj.has_render_template():
+                # выгруженные по бюджету памяти объекты загружаются по имени
+                obj = dict.get(objects_storage.objects, key) or objects_storage.getObjectByName(key)
+                if obj and obj.has_render_template():
                     available_objects.append({
                         'key': key,
                         'title': obj.name,
@@ -87,9 +87,7 @@ class ObjectList(Resource):
         """
         Get dictionary of objects description.
         """
-        result = {}
-        for key,obj in objects_storage.items():
-            result[key] = obj.description
+        result = objects_storage.getObjectDescriptions()
         return {'success': True,
                 'result': result}, 200
     
@@ -105,7 +103,11 @@ class ObjectListDetails(Resource):
         Get dictionary objects with properties and methods descriptions
         """
         result = {}
-        for name,item in objects_storage.items():
+        for name in objects_storage.getObjectNames():
+            # выгруженные по бюджету памяти объекты загружаются по имени
+            item = dict.get(objects_storage.objects, name) or objects_storage.getObjectByName(name)
+            if item is None:
+                continue
             obj = {}
             obj['description'] = item.description
             obj['properties'] = {"description": "Description object"}
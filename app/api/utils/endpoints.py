@@ -412,3 +412,33 @@ class AnalyticsSettings(Resource):
             return {"success": False, "msg": "enabled must be disabled, basic or extended"}, 400
         setProperty("SystemVar.analytics_enabled", enabled, "api")
         return {"success": True, "analytics_enabled": enabled}, 200
+
+
+@utils_ns.route("/permissions/stats")
+class PermissionStats(Resource):
+    @api_key_required
+    @handle_admin_required
+    @utils_ns.doc(security="apikey")
+    def get(self):
+        """
+        Compiled permission tables: size, revision and check latency percentiles (microseconds)
+        """
+        from app.core.main.PermissionTable import permission_tables
+        from app.core.main.ObjectsStorage import objects_storage
+
+        objects = list(dict.values(objects_storage.objects))
+        return {"success": True, "result": permission_tables.getStats(objects)}, 200
+
+
+@utils_ns.route("/dispatcher/stats")
+class ChangeDispatcherStats(Resource):
+    @api_key_required
+    @handle_admin_required
+    @utils_ns.doc(security="apikey")
+    def get(self):
+        """
+        Proxy change queues: depth, lag, delivered/dropped/coalesced per subscriber plugin
+        """
+        from app.core.main.ChangeDispatcher import change_dispatcher
+
+        return {"success": True, "result": change_dispatcher.get_stats()}, 200
@@ -101,3 +101,93 @@ def create_user(username, password):
         click.echo("User {} exists! Updated password.".format(username))
     else:
         click.echo('User {} successfully created'.format(username))
+
+@click.group()
+def snapshot():
+    """Warm-start snapshot of the object runtime cache."""
+
+@snapshot.command('build')
+@click.option('--path', default=None, help='Snapshot file (default: object_snapshot_path)')
+@with_appcontext
+def snapshot_build(path):
+    """Hydrate all objects from DB (without onInit) and write snapshot."""
+    from app.database import session_scope
+    from app.core.models.Clasess import Object
+    from app.core.main.ObjectsStorage import objects_storage
+
+    managers = []
+    chunk_size = objects_storage.HYDRATE_CHUNK_SIZE
+    with session_scope() as session:
+        ids = [object_id for (object_id,) in session.query(Object.id).order_by(Object.id).all()]
+        for i in range(0, len(ids), chunk_size):
+            objs = session.query(Object).filter(Object.id.in_(ids[i:i + chunk_size])).all()
+            managers.extend(objects_storage._createObjectManagers(session, objs).values())
+    report = objects_storage.write_snapshot(path, managers=managers)
+    click.echo('Snapshot {path}: {objects} objects, {properties} properties, {bytes} bytes, {seconds}s'.format(**report))
+
+@snapshot.command('inspect')
+@click.option('--path', default=None, help='Snapshot file (default: object_snapshot_path)')
+@click.option('--verify', is_flag=True, help='Compare snapshot with current DB')
+@with_appcontext
+def snapshot_inspect(path, verify):
+    """Show snapshot header and, with --verify, what a restore would re-read from DB."""
+    from app.configuration import Config
+    from app.database import session_scope
+    from app.core.main import ObjectsSnapshot
+
+    path = path or Config.OBJECT_SNAPSHOT_PATH
+    if not os.path.exists(path):
+        click.echo('Snapshot {} not found'.format(path))
+        return
+    try:
+        header, payload = ObjectsSnapshot.read_snapshot_file(path, header_only=not verify)
+    except ValueError as ex:
+        click.echo('Invalid snapshot: {}'.format(ex))
+        return
+    click.echo('File:        {} ({} bytes)'.format(path, os.path.getsize(path)))
+    click.echo('Version:     {}'.format(header.get('version')))
+    click.echo('Created:     {}'.format(header.get('created')))
+    click.echo('Objects:     {}'.format(header.get('objects')))
+    click.echo('Properties:  {}'.format(header.get('properties')))
+    click.echo('Schema hash: {}'.format(header.get('schema_hash')))
+    for name, marker in (header.get('markers') or {}).items():
+        click.echo('  {:<11} {}'.format(name, ', '.join('{}={}'.format(k, v) for k, v in marker.items())))
+    if not verify:
+        return
+
+    with session_scope() as session:
+        markers = ObjectsSnapshot.db_markers(session)
+        hashes = ObjectsSnapshot.structure_hashes(session)
+        states = ObjectsSnapshot.value_states(session)
+    usable, rehydrate, stale_ids, dropped = ObjectsSnapshot.reconcile(payload.get('objects', []), hashes, states)
+    schema_hash = ObjectsSnapshot.schema_hash(hashes)
+    click.echo('DB:')
+    click.echo('  schema     {}'.format('same' if schema_hash == header.get('schema_hash') else 'changed'))
+    click.echo('  markers    {}'.format('same' if markers == header.get('markers') else 'changed'))
+    click.echo('Restore would use {} object(s) from snapshot, hydrate {} from DB, '
+               'refresh {} value(s), skip {} deleted; {} DB object(s) not in snapshot'.format(
+                   len(usable), len(rehydrate), len(stale_ids), dropped,
+                   len(set(hashes) - {entry['id'] for entry in payload.get('objects', [])})))
+
+@click.group()
+def history():
+    """Maintenance of the history table."""
+
+@history.command('dedup')
+@click.option('--dry-run', is_flag=True, help='Only count duplicate rows')
+@with_appcontext
+def history_dedup(dry_run):
+    """Remove duplicate (value_id, added, source) rows and create the unique index used by BatchWriter upserts."""
+    from app.core.main.HistoryDedup import migrate, HISTORY_UNIQUE_INDEX
+
+    report = migrate(dry_run=dry_run)
+    click.echo('Duplicate keys: {groups}, extra rows: {removed}'.format(**report))
+    if report['already_present']:
+        click.echo('Index {} already exists'.format(HISTORY_UNIQUE_INDEX))
+    elif report['refused']:
+        click.echo('Index {} not created: {}'.format(HISTORY_UNIQUE_INDEX, report['refused']))
+    elif report['index_created']:
+        click.echo('Removed {} row(s), index {} created in {}s'.format(
+            report['removed'], HISTORY_UNIQUE_INDEX, report['seconds']))
+    else:
+        click.echo('Dry run: nothing changed')
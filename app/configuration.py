@@ -145,12 +145,40 @@ class ConfigLoader(object):
         self.POOL_MAX_SIZE = None  # Максимальный размер пула потоков (по умолчанию 5*POOL_SIZE)
         self.POOL_TIMEOUT_THRESHOLD = 60.0  # Порог таймаута задач в секундах
         self.BATCH_WRITER_FLUSH_INTERVAL = 0.5  # Интервал записи батча в секундах
+        self.BATCH_WRITER_JOURNAL_ENABLED = False  # Журнал упреждающей записи BatchWriter
+        self.BATCH_WRITER_JOURNAL_PATH = os.path.join(self.APP_DIR, 'batch.journal')  # Каталог сегментов журнала
+        self.BATCH_WRITER_JOURNAL_FSYNC_INTERVAL = 0.05  # Групповой fsync журнала, сек (0 - после каждой записи)
+        self.BATCH_WRITER_HIGH_WATERMARK = 5000  # Досрочная запись батча при таком числе записей (0 - только по таймеру)
+        self.BATCH_WRITER_MAX_BYTES = 8 * 1024 * 1024  # Досрочная запись при таком объёме буфера, байт (0 - без ограничения)
+        self.BATCH_WRITER_CHUNK_SIZE = 2000  # Максимум записей в одной транзакции (0 - без ограничения)
+        self.BATCH_WRITER_MAX_PENDING = 50000  # Порог очереди для backpressure (0 - без ограничения)
+        self.BATCH_WRITER_LOW_WATERMARK = 10000  # Уровень очереди, ниже которого снимается backpressure
+        self.BATCH_WRITER_BACKPRESSURE = 'block'  # Политика переполнения: block, drop, spill
+        self.BATCH_WRITER_BLOCK_TIMEOUT = 5.0  # Максимальное ожидание производителя в политике block, сек
+        self.BATCH_WRITER_SPILL_PATH = os.path.join(self.APP_DIR, 'batch.spill')  # Каталог файлов политики spill
+        self.BATCH_WRITER_BULK_STRATEGY = 'auto'  # Способ массовой записи: auto (по диалекту БД), orm, sqlite, postgresql, mysql
+        self.BATCH_WRITER_PIPELINES = False  # Раздельные пайплайны записи значений и истории
+        self.BATCH_WRITER_SHARDS = 1  # Шардов каждого пайплайна по value_id (PostgreSQL/MySQL)
+        self.BATCH_WRITER_HISTORY_FLUSH_INTERVAL = 0.0  # Накопление истории в пайплайне перед записью, сек (0 - сразу)
+        self.BATCH_WRITER_HISTORY_CHUNK_SIZE = 0  # Максимум записей истории в транзакции (0 - как batch_writer_chunk_size)
+        self.CHANGE_DISPATCHER_QUEUE_SIZE = 10000  # Размер очереди изменений на proxy-плагин
+        self.CHANGE_DISPATCHER_BATCH_SIZE = 200  # Максимум изменений в одной доставке плагину
+        self.CHANGE_DISPATCHER_OVERFLOW = 'coalesce'  # Политика переполнения: coalesce, drop_oldest, drop_newest
+        self.SYSTEM_STATS_PROJECTION_INTERVAL = 60.0  # Период записи метрик ядра в SystemStats, сек (0 - не записывать)
+        self.CODE_CACHE_SIZE = 2048  # Максимум скомпилированных кодов методов/задач в кэше (0 - компилировать каждый раз)
 
         self.REACTIVE_MAX_DEPTH = 20
         self.REACTIVE_LOOP_NOTIFY = True
         self.OBJECT_PRELOAD_ENABLED = True
         self.OBJECT_PRELOAD_BATCH_SIZE = 10
         self.OBJECT_PRELOAD_INTERVAL_SEC = 0.5
+        self.OBJECT_PRELOAD_WORKERS = 2
+        self.OBJECT_INDEX_PROBE_INTERVAL_SEC = 5.0
+        self.OBJECT_SNAPSHOT_ENABLED = False
+        self.OBJECT_SNAPSHOT_PATH = os.path.join(self.APP_DIR, 'objects.snapshot')
+        self.OBJECT_SNAPSHOT_INTERVAL_SEC = 900
+        self.OBJECT_MEMORY_BUDGET_OBJECTS = 0
+        self.OBJECT_MEMORY_BUDGET_MB = 0
 
         # DB settings
         self.SQLALCHEMY_ECHO = False  # SQL log
@@ -287,11 +315,42 @@ class ConfigLoader(object):
         self.POOL_MAX_SIZE = app_config.get('pool_max_size', None)
         self.POOL_TIMEOUT_THRESHOLD = app_config.get('pool_timeout_threshold', 60.0)
         self.BATCH_WRITER_FLUSH_INTERVAL = app_config.get('batch_writer_flush_interval', 0.5)
+        self.BATCH_WRITER_JOURNAL_ENABLED = app_config.get('batch_writer_journal_enabled', False)
+        self.BATCH_WRITER_JOURNAL_PATH = os.path.abspath(os.path.join(
+            self.APP_DIR, app_config.get('batch_writer_journal_path', 'batch.journal')))
+        self.BATCH_WRITER_JOURNAL_FSYNC_INTERVAL = app_config.get('batch_writer_journal_fsync_interval', 0.05)
+        self.BATCH_WRITER_HIGH_WATERMARK = app_config.get('batch_writer_high_watermark', 5000)
+        self.BATCH_WRITER_MAX_BYTES = app_config.get('batch_writer_max_bytes', 8 * 1024 * 1024)
+        self.BATCH_WRITER_CHUNK_SIZE = app_config.get('batch_writer_chunk_size', 2000)
+        self.BATCH_WRITER_MAX_PENDING = app_config.get('batch_writer_max_pending', 50000)
+        self.BATCH_WRITER_LOW_WATERMARK = app_config.get('batch_writer_low_watermark', 10000)
+        self.BATCH_WRITER_BACKPRESSURE = app_config.get('batch_writer_backpressure', 'block')
+        self.BATCH_WRITER_BLOCK_TIMEOUT = app_config.get('batch_writer_block_timeout', 5.0)
+        self.BATCH_WRITER_SPILL_PATH = os.path.abspath(os.path.join(
+            self.APP_DIR, app_config.get('batch_writer_spill_path', 'batch.spill')))
+        self.BATCH_WRITER_BULK_STRATEGY = app_config.get('batch_writer_bulk_strategy', 'auto')
+        self.BATCH_WRITER_PIPELINES = app_config.get('batch_writer_pipelines', False)
+        self.BATCH_WRITER_SHARDS = app_config.get('batch_writer_shards', 1)
+        self.BATCH_WRITER_HISTORY_FLUSH_INTERVAL = app_config.get('batch_writer_history_flush_interval', 0.0)
+        self.BATCH_WRITER_HISTORY_CHUNK_SIZE = app_config.get('batch_writer_history_chunk_size', 0)
+        self.CHANGE_DISPATCHER_QUEUE_SIZE = app_config.get('change_dispatcher_queue_size', 10000)
+        self.CHANGE_DISPATCHER_BATCH_SIZE = app_config.get('change_dispatcher_batch_size', 200)
+        self.CHANGE_DISPATCHER_OVERFLOW = app_config.get('change_dispatcher_overflow', 'coalesce')
+        self.SYSTEM_STATS_PROJECTION_INTERVAL = app_config.get('system_stats_projection_interval', 60.0)
+        self.CODE_CACHE_SIZE = app_config.get('code_cache_size', 2048)
         self.REACTIVE_MAX_DEPTH = app_config.get('reactive_max_depth', 20)
         self.REACTIVE_LOOP_NOTIFY = app_config.get('reactive_loop_notify', True)
         self.OBJECT_PRELOAD_ENABLED = app_config.get('object_preload_enabled', True)
         self.OBJECT_PRELOAD_BATCH_SIZE = app_config.get('object_preload_batch_size', 10)
         self.OBJECT_PRELOAD_INTERVAL_SEC = app_config.get('object_preload_interval_sec', 0.5)
+        self.OBJECT_PRELOAD_WORKERS = app_config.get('object_preload_workers', 2)
+        self.OBJECT_INDEX_PROBE_INTERVAL_SEC = app_config.get('object_index_probe_interval_sec', 5.0)
+        self.OBJECT_SNAPSHOT_ENABLED = app_config.get('object_snapshot_enabled', False)
+        self.OBJECT_SNAPSHOT_PATH = os.path.abspath(os.path.join(
+            self.APP_DIR, app_config.get('object_snapshot_path', 'objects.snapshot')))
+        self.OBJECT_SNAPSHOT_INTERVAL_SEC = app_config.get('object_snapshot_interval_sec', 900)
+        self.OBJECT_MEMORY_BUDGET_OBJECTS = app_config.get('object_memory_budget_objects', 0)
+        self.OBJECT_MEMORY_BUDGET_MB = app_config.get('object_memory_budget_mb', 0)
 
         # Session lifetime configuration
         self.SESSION_LIFETIME_DAYS = app_config.get('session_lifetime_days', 31)
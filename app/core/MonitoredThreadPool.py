@@ -1,6 +1,8 @@
 import concurrent.futures
+import heapq
 import threading
 import time
+import weakref
 from typing import Dict, Optional, Callable
 from dataclasses import dataclass
 from datetime import datetime
@@ -10,6 +12,20 @@ from app.logging_config import getLogger
 
 _logger = getLogger('thread_pools')
 
+# Созданные пулы и роутеры процесса (для /metrics); weak - остановленные пулы не удерживаются
+_pools = weakref.WeakSet()
+_routers = weakref.WeakSet()
+
+
+def get_pools() -> list:
+    """MonitoredThreadPool instances of the process, sorted by name"""
+    return sorted(list(_pools), key=lambda pool: pool.name)
+
+
+def get_routers() -> list:
+    """AdaptiveThreadPoolRouter instances of the process, sorted by name"""
+    return sorted(list(_routers), key=lambda router: router.name)
+
 @dataclass
 class PoolStats:
     """Статистика использования пула потоков"""
@@ -72,6 +88,7 @@ class MonitoredThreadPool:
         self._peak_active = 0
         self._peak_active_at: Optional[datetime] = None
         self._execution_history = deque(maxlen=100)
+        _pools.add(self)
 
         # Health checker control
         self._stop_health_checker = threading.Event()
@@ -122,7 +139,8 @@ class MonitoredThreadPool:
                         _logger.critical(f"Pool {self._thread_name_prefix} is completely stuck — replacing executor")
                         with self._lock:
                             old_executor = self._executor
-                            old_executor.shutdown(wait=False)  # не ждём зависшие задачи
+                            # не ждём зависшие задачи; очередь старого пула отменяем (всё равно была бы пропущена)
+                            old_executor.shutdown(wait=False, cancel_futures=True)
                             self._create_executor()
                 except Exception as e:
                     _logger.error(f"Error in health checker: {e}")
@@ -312,6 +330,23 @@ class MonitoredThreadPool:
                 rejected_tasks=self._rejected_tasks
             )
 
+    @property
+    def name(self) -> str:
+        return self._thread_name_prefix
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def count_stuck_tasks(self) -> int:
+        """Active tasks running longer than task_timeout_threshold"""
+        now = datetime.now()
+        with self._lock:
+            return sum(
+                1 for start_time in self._active_tasks.values()
+                if (now - start_time).total_seconds() > self._task_timeout_threshold
+            )
+
     def get_monitoring_stats(self):
         """Получение полной статистики мониторинга"""
         with self._lock:
@@ -378,6 +413,20 @@ class OwnerPoolState:
     duration_samples: int = 0
 
 
+@dataclass
+class LatestValueSlot:
+    """Latest-value-wins state of one key (submit_latest): newest pending call, in-flight flag."""
+    owner: str
+    fn: Optional[Callable] = None
+    args: tuple = ()
+    task_id: Optional[str] = None
+    min_interval: float = 0.0
+    pending: bool = False
+    inflight: bool = False
+    scheduled: bool = False
+    last_start: float = 0.0
+
+
 class AdaptiveThreadPoolRouter:
     """
     Routes tasks between trusted, medium and quarantine pools.
@@ -416,6 +465,7 @@ class AdaptiveThreadPoolRouter:
         safe_queue_size = safe_queue_size if safe_queue_size is not None else max(5, base_queue // 4)
 
         self._name = pool_name
+        _routers.add(self)
         self._safe_pool = MonitoredThreadPool(
             max_workers=safe_workers,
             thread_name_prefix=f"{pool_name}.safe",
@@ -465,6 +515,16 @@ class AdaptiveThreadPoolRouter:
         self._owner_states: Dict[str, OwnerPoolState] = {}
         self._lock = threading.Lock()
 
+        # latest-value-wins (submit_latest): key -> slot, отложенные по min_interval ключи
+        self._latest: Dict[tuple, LatestValueSlot] = {}
+        self._latest_lock = threading.Lock()
+        self._latest_cond = threading.Condition(self._latest_lock)
+        self._latest_delayed = []  # heap (due, seq, key)
+        self._latest_seq = 0
+        self._latest_thread = None
+        self._latest_stopped = False
+        self._latest_counts: Dict[str, Dict[str, int]] = {}
+
     @staticmethod
     def _percentile(sorted_values: list[float], percentile: float) -> float:
         if not sorted_values:
@@ -658,6 +718,177 @@ class AdaptiveThreadPoolRouter:
                 state.preferred_pool = "safe"
             raise
 
+    def submit_latest(
+        self,
+        key: tuple,
+        fn: Callable,
+        task_id: Optional[str] = None,
+        owner: Optional[str] = None,
+        *args,
+        min_interval: float = 0.0,
+    ) -> bool:
+        """Latest-value-wins submit: at most one in-flight call per key.
+
+        While a call for the key is running (or waiting for min_interval since the previous
+        start), a new call replaces the pending one instead of being queued; when the running
+        call finishes, only the newest pending call is started.
+
+        Returns:
+            bool: True if a task was submitted now, False if it is pending/coalesced
+        """
+        owner_key = owner or "unknown"
+        with self._latest_lock:
+            counts = self._latest_owner_counts(owner_key)
+            counts["submitted"] += 1
+            slot = self._latest.get(key)
+            if slot is None:
+                slot = LatestValueSlot(owner=owner_key)
+                self._latest[key] = slot
+            if slot.pending:
+                counts["coalesced"] += 1
+            slot.fn = fn
+            slot.args = args
+            slot.task_id = task_id
+            slot.min_interval = max(0.0, float(min_interval or 0.0))
+            slot.pending = True
+            job = self._take_latest(key, slot)
+        if job is None:
+            return False
+        return self._run_latest(key, job)
+
+    def _latest_owner_counts(self, owner: str) -> Dict[str, int]:
+        counts = self._latest_counts.get(owner)
+        if counts is None:
+            counts = {"submitted": 0, "delivered": 0, "coalesced": 0, "throttled": 0, "rejected": 0}
+            self._latest_counts[owner] = counts
+        return counts
+
+    def _take_latest(self, key: tuple, slot: LatestValueSlot):
+        """Start the pending call of a slot if possible (called with _latest_lock held)"""
+        if slot.inflight or slot.scheduled or not slot.pending:
+            return None
+        now_ts = time.monotonic()
+        if slot.min_interval and slot.last_start and now_ts < slot.last_start + slot.min_interval:
+            self._schedule_latest(key, slot.last_start + slot.min_interval)
+            slot.scheduled = True
+            self._latest_owner_counts(slot.owner)["throttled"] += 1
+            return None
+        slot.pending = False
+        slot.inflight = True
+        slot.last_start = now_ts
+        return slot.fn, slot.args, slot.task_id, slot.owner
+
+    def _run_latest(self, key: tuple, job) -> bool:
+        fn, args, task_id, owner = job
+        started = []
+
+        def latest_wrapper():
+            started.append(True)
+            return fn(*args)
+
+        try:
+            future = self.submit(latest_wrapper, task_id, owner)
+        except Exception as ex:
+            # значение остаётся ожидающим, повтор - через min_interval (не реже раза в секунду)
+            with self._latest_lock:
+                slot = self._latest.get(key)
+                if slot is not None:
+                    slot.inflight = False
+                    slot.pending = True
+                    slot.scheduled = True
+                    self._schedule_latest(key, time.monotonic() + max(slot.min_interval, 1.0))
+                    self._latest_owner_counts(owner)["rejected"] += 1
+            _logger.warning(f"Latest-value task '{task_id}' for owner '{owner}' postponed: {ex}")
+            return False
+        # слот освобождается по завершении future, даже если fn не запускалась
+        # (задача пропущена после замены зависшего пула или отменена)
+        future.add_done_callback(lambda _: self._finish_latest(key, delivered=bool(started)))
+        return True
+
+    def _finish_latest(self, key: tuple, delivered: bool = True):
+        with self._latest_lock:
+            slot = self._latest.get(key)
+            if slot is None:
+                return
+            slot.inflight = False
+            if not delivered:
+                # значение не доставлено: в слоте оно же или более новое - отправляем снова из потока
+                # отложенного запуска (отмена выполняет колбэк под замком пула, submit здесь нельзя)
+                slot.pending = True
+                if not slot.scheduled:
+                    slot.scheduled = True
+                    self._schedule_latest(key, time.monotonic())
+                return
+            self._latest_owner_counts(slot.owner)["delivered"] += 1
+            job = self._take_latest(key, slot)
+        if job is not None:
+            self._run_latest(key, job)
+
+    def _schedule_latest(self, key: tuple, due: float):
+        """Start key at `due` (called with _latest_lock held)"""
+        self._latest_seq += 1
+        heapq.heappush(self._latest_delayed, (due, self._latest_seq, key))
+        if self._latest_thread is None:
+            self._latest_thread = threading.Thread(
+                target=self._latest_loop, name=f"{self._name}.latest", daemon=True
+            )
+            self._latest_thread.start()
+        self._latest_cond.notify()
+
+    def _latest_loop(self):
+        while True:
+            with self._latest_lock:
+                while True:
+                    if self._latest_stopped:
+                        return
+                    if not self._latest_delayed:
+                        self._latest_cond.wait()
+                        continue
+                    due = self._latest_delayed[0][0]
+                    wait = due - time.monotonic()
+                    if wait <= 0:
+                        _, _, key = heapq.heappop(self._latest_delayed)
+                        break
+                    self._latest_cond.wait(wait)
+                job = None
+                slot = self._latest.get(key)
+                if slot is not None:
+                    slot.scheduled = False
+                    job = self._take_latest(key, slot)
+            if job is not None:
+                self._run_latest(key, job)
+
+    def get_latest_stats(self) -> dict:
+        """Counters of latest-value-wins delivery: totals, per owner and current keys"""
+        with self._latest_lock:
+            owners = {name: dict(counts) for name, counts in self._latest_counts.items()}
+            slots = list(self._latest.values())
+            delayed = len(self._latest_delayed)
+        totals = {"submitted": 0, "delivered": 0, "coalesced": 0, "throttled": 0, "rejected": 0}
+        for counts in owners.values():
+            for name, value in counts.items():
+                totals[name] += value
+        return {
+            "keys": len(slots),
+            "inflight": sum(1 for slot in slots if slot.inflight),
+            "pending": sum(1 for slot in slots if slot.pending),
+            "scheduled": delayed,
+            **totals,
+            "owners": owners,
+        }
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def get_owner_stats(self) -> dict:
+        """Owner (plugin) -> (inflight, success, fail, avg duration ms, preferred pool)"""
+        with self._lock:
+            return {
+                name: (s.inflight, s.success_count, s.fail_count, s.avg_duration_ms, s.preferred_pool)
+                for name, s in self._owner_states.items()
+            }
+
     def get_stats(self):
         with self._lock:
             owners = {
@@ -690,9 +921,13 @@ class AdaptiveThreadPoolRouter:
             "medium_pool": self._medium_pool.get_monitoring_stats(),
             "trusted_pool": self._trusted_pool.get_monitoring_stats(),
             "owners": owners,
+            "latest": self.get_latest_stats(),
         }
 
     def shutdown(self, wait: bool = True):
+        with self._latest_lock:
+            self._latest_stopped = True
+            self._latest_cond.notify_all()
         self._safe_pool.shutdown(wait=wait)
         self._medium_pool.shutdown(wait=wait)
         self._trusted_pool.shutdown(wait=wait)
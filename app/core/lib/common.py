@@ -23,6 +23,7 @@ from ..main.PluginsHelper import plugins
 from ..models.Tasks import Task
 from ..models.Plugins import Notify
 from app.core.MonitoredThreadPool import MonitoredThreadPool
+from .metrics import metrics_registry
 
 _logger = getLogger("common")
 
@@ -917,9 +918,10 @@ def writeSystemStatsMetric(
     prop_type: PropertyType = PropertyType.Float,
     source: str = "",
 ) -> bool:
-    """Write plugin metric to SystemStats with forced ``track_stats=False``.
+    """Set plugin gauge in the metrics registry (projected to ``SystemStats.plugin_<plugin>_<metric>``).
 
-    This function is event-driven and does not rely on cron collectors.
+    Numbers only update memory and are written with ``track_stats=False`` by the
+    SystemStats projection; other values are written to the property at once.
     """
     from .object import updateProperty
     if not _is_system_stats_enabled():
@@ -931,9 +933,14 @@ def writeSystemStatsMetric(
         history=history,
         prop_type=prop_type,
     )
-    full_name = f"{SYSTEM_STATS_OBJECT}.{property_key}"
     metric_source = source or f"{SYSTEM_STATS_SOURCE}:{plugin_name}"
-    return updateProperty(full_name, value, source=metric_source, track_stats=False)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        # не число (строка, словарь) - не метрика реестра
+        full_name = f"{SYSTEM_STATS_OBJECT}.{property_key}"
+        return updateProperty(full_name, value, source=metric_source, track_stats=False)
+    _plugin_metric_gauge(plugin_name, property_key, description or f"{plugin_name}: {metric_name}",
+                         metric_source).set(value)
+    return True
 
 
 def incrementSystemStatsMetric(
@@ -945,37 +952,72 @@ def incrementSystemStatsMetric(
     history: int = 30,
     source: str = "",
 ) -> bool:
-    """Increment numeric metric with forced ``track_stats=False``."""
+    """Increment plugin gauge in the metrics registry (projected to ``SystemStats.plugin_<plugin>_<metric>``).
+
+    The gauge starts from the stored property value on first use, so the metric
+    keeps growing across restarts; the step may be negative.
+    """
     if not _is_system_stats_enabled():
         return False
-    property_key = _system_stats_metric_key(plugin_name, metric_name)
-    current = _read_system_stats_property_value(property_key)
-    if current is None:
-        current = 0
-    try:
-        current_val = float(current)
-    except Exception:
-        current_val = 0.0
-    new_val = current_val + step
-    return writeSystemStatsMetric(
+    property_key = registerSystemStatsMetric(
         plugin_name,
         metric_name,
-        new_val,
         description=description,
         history=history,
-        prop_type=PropertyType.Float if isinstance(new_val, float) else PropertyType.Integer,
-        source=source,
+        prop_type=PropertyType.Float,
     )
+    gauge = _plugin_metric_gauge(
+        plugin_name,
+        property_key,
+        description or f"{plugin_name}: {metric_name}",
+        source or f"{SYSTEM_STATS_SOURCE}:{plugin_name}",
+    )
+    if gauge.value() is None:
+        with _plugin_metrics_lock:
+            if gauge.value() is None:
+                try:
+                    gauge.set(float(_read_system_stats_property_value(property_key) or 0))
+                except (TypeError, ValueError):
+                    gauge.set(0.0)
+    gauge.inc(step)
+    return True
+
+
+def _plugin_metric_gauge(plugin_name: str, property_key: str, description: str, source: str):
+    gauge = metrics_registry.get(property_key)
+    if gauge is None:
+        gauge = metrics_registry.gauge(property_key, description)
+        _core_stats_projection.track(property_key, source=source)
+        with _plugin_metrics_lock:
+            _plugin_metrics.setdefault(plugin_name, set()).add(property_key)
+    return gauge
 
 
 def unregisterSystemStatsMetric(plugin_name: str, metric_name: str) -> None:
-    # No in-memory registry anymore; metric keys remain in SystemStats object.
-    return None
+    """Drop plugin gauge from the metrics registry and the projection (its last value is projected first).
+
+    The property stays in `SystemStats`.
+    """
+    property_key = _system_stats_metric_key(plugin_name, metric_name)
+    with _plugin_metrics_lock:
+        keys = _plugin_metrics.get(plugin_name)
+        if keys is None or property_key not in keys:
+            return
+        keys.discard(property_key)
+    _drop_plugin_metric(property_key)
 
 
 def unregisterSystemStatsPlugin(plugin_name: str) -> None:
-    """No-op in event-driven mode without registry."""
-    return None
+    """Drop all gauges of a plugin (e.g. on unload); properties stay in `SystemStats`."""
+    with _plugin_metrics_lock:
+        keys = _plugin_metrics.pop(plugin_name, set())
+    for property_key in sorted(keys):
+        _drop_plugin_metric(property_key)
+
+
+def _drop_plugin_metric(property_key: str) -> None:
+    _core_stats_projection.untrack(property_key)
+    metrics_registry.unregister(property_key)
 
 
 def _system_stats_metric_key(plugin_name: str, metric_name: str) -> str:
@@ -985,14 +1027,6 @@ def _system_stats_metric_key(plugin_name: str, metric_name: str) -> str:
     return f"{SYSTEM_STATS_PLUGIN_METRIC_PREFIX}{plugin_name}_{safe_metric}"
 
 
-# Hot-path core metrics: accumulate in memory, flush with BatchWriter (~flush_interval).
-_BUFFERED_CORE_METRICS = frozenset({
-    "property_reads",
-    "property_writes",
-    "methods_executed",
-    "reactive_loops",
-})
-
 _SYSTEM_STATS_ENABLED_CACHE_TTL = 2.0
 _system_stats_enabled_cache: Optional[bool] = None
 _system_stats_enabled_cache_at: float = 0.0
@@ -1005,37 +1039,103 @@ _system_stats_ws_timer: Optional[threading.Timer] = None
 
 _registered_system_stats_metrics: set[str] = set()
 _registered_system_stats_metrics_lock = threading.Lock()
+# Gauge плагинов в реестре (плагин -> ключи свойств) и начальное значение из SystemStats (первый инкремент)
+_plugin_metrics: dict[str, set[str]] = {}
+_plugin_metrics_lock = threading.Lock()
 
-# Serializes buffered flush + DB increment (per process); row lock covers multi-worker.
-_stats_apply_lock = threading.Lock()
+# Serializes projection + DB increment (per process); row lock covers multi-worker.
+_stats_apply_lock = threading.RLock()
 
 
-class _CoreSystemStatsBuffer:
-    """In-memory deltas for high-frequency core metrics."""
+class _CoreSystemStatsProjection:
+    """Projects core and plugin metrics of the registry onto SystemStats properties at a low cadence.
+
+    Counters: the growth since the previous projection is added in the DB with a row
+    lock (`_apply_core_system_stats_delta`), so values keep growing across restarts and
+    worker processes. Gauges: the current value is written when it changed.
+    """
 
     def __init__(self) -> None:
         self._lock = threading.Lock()
-        self._pending: dict[str, Union[int, float]] = {}
-
-    def increment(self, metric_name: str, step: Union[int, float] = 1) -> None:
-        with self._lock:
-            self._pending[metric_name] = self._pending.get(metric_name, 0) + step
-
-    def flush(self) -> None:
-        if not _is_system_stats_enabled():
+        self._metrics: set[str] = set()
+        self._sources: dict[str, str] = {}
+        self._projected: dict[str, Union[int, float]] = {}
+        self._last_at = time.monotonic()
+        self.projections = 0
+        self.writes = 0
+
+    def track(self, metric_name: str, source: str = SYSTEM_STATS_SOURCE) -> None:
+        if metric_name not in self._metrics:
             with self._lock:
-                self._pending.clear()
-            return
-        with self._lock:
-            pending = self._pending
-            self._pending = {}
-        for metric_name, delta in pending.items():
-            if not delta:
-                continue
-            _apply_core_system_stats_delta(metric_name, delta)
-
+                self._sources[metric_name] = source
+                self._metrics.add(metric_name)
+
+    def project(self, force: bool = False) -> int:
+        """Write changed metrics to SystemStats; without force - only when the interval passed"""
+        from app.configuration import Config
+        interval = Config.SYSTEM_STATS_PROJECTION_INTERVAL
+        now = time.monotonic()
+        if not force and (not interval or interval <= 0 or now - self._last_at < interval):
+            return 0
+        if not self._lock.acquire(blocking=force):
+            return 0
+        try:
+            self._last_at = now
+            names = sorted(self._metrics)
+        finally:
+            self._lock.release()
+        # при выключенной статистике базу сдвигаем без записи: отключённый период не учитывается
+        enabled = _is_system_stats_enabled()
+        written = 0
+        with _stats_apply_lock:
+            for metric_name in names:
+                if self._project_metric(metric_name, enabled):
+                    written += 1
+        self.projections += 1
+        self.writes += written
+        return written
+
+    def untrack(self, metric_name: str) -> None:
+        """Stop projecting a metric; its pending value is written first"""
+        with _stats_apply_lock:
+            with self._lock:
+                if metric_name not in self._metrics:
+                    return
+            if self._project_metric(metric_name, _is_system_stats_enabled()):
+                self.writes += 1
+            with self._lock:
+                self._metrics.discard(metric_name)
+                self._sources.pop(metric_name, None)
+                self._projected.pop(metric_name, None)
 
-_core_stats_buffer = _CoreSystemStatsBuffer()
+    def _project_metric(self, metric_name: str, enabled: bool) -> bool:
+        """Write one metric if it changed (called with _stats_apply_lock held)"""
+        if metric_name not in self._metrics:
+            return False
+        metric = metrics_registry.get(metric_name)
+        if metric is None:
+            return False
+        value = metric.value()
+        if value is None:
+            return False
+        previous = self._projected.get(metric_name)
+        source = self._sources.get(metric_name, SYSTEM_STATS_SOURCE)
+        written = False
+        if metric.type == "counter":
+            delta = value - (previous or 0)
+            if enabled and delta:
+                _apply_core_system_stats_delta(metric_name, delta, source=source)
+                written = True
+        elif value != previous and enabled:
+            _write_core_system_stats_value(metric_name, value, source=source)
+            written = True
+        self._projected[metric_name] = value
+        return written
+
+
+_core_stats_projection = _CoreSystemStatsProjection()
+# Счётчики ядра по имени: hot path без поиска в реестре и без track()
+_core_counters: dict[str, Any] = {}
 
 
 def scheduleSystemStatsWsNotify(object_name: str, property_name: str, value: Any) -> None:
@@ -1072,9 +1172,15 @@ def flushSystemStatsWsNotifications() -> None:
             _logger.exception(ex)
 
 
+def projectCoreSystemStats(force: bool = False) -> int:
+    """Project core and plugin metrics to SystemStats (called from BatchWriter tick; cadence
+    ``system_stats_projection_interval``). Returns number of properties written."""
+    return _core_stats_projection.project(force=force)
+
+
 def flushBufferedCoreSystemStatsMetrics() -> None:
-    """Flush buffered core metric deltas (called from BatchWriter tick)."""
-    _core_stats_buffer.flush()
+    """Project core metrics to SystemStats now (e.g. before shutdown)."""
+    _core_stats_projection.project(force=True)
 
 
 def invalidateSystemStatsEnabledCache() -> None:
@@ -1152,6 +1258,12 @@ def _apply_core_system_stats_delta(
     return True
 
 
+def _write_core_system_stats_value(metric_name: str, value: Any, source: str = SYSTEM_STATS_SOURCE) -> bool:
+    from .object import updateProperty
+    full_name = f"{SYSTEM_STATS_OBJECT}.{metric_name}"
+    return updateProperty(full_name, value, source=source, track_stats=False)
+
+
 def writeCoreSystemStatsMetric(
     metric_name: str,
     value: Any,
@@ -1161,13 +1273,10 @@ def writeCoreSystemStatsMetric(
     prop_type: PropertyType = PropertyType.Float,
     source: str = "core",
 ) -> bool:
-    """Write core metric to `SystemStats.<metric_name>` with track_stats=False."""
-    from .object import updateProperty
-    if not _is_system_stats_enabled():
-        return False
-    full_name = f"{SYSTEM_STATS_OBJECT}.{metric_name}"
-    metric_source = source or SYSTEM_STATS_SOURCE
-    return updateProperty(full_name, value, source=metric_source, track_stats=False)
+    """Set core gauge `metric_name` in the metrics registry (projected to `SystemStats.<metric_name>`)."""
+    metrics_registry.gauge(metric_name, description).set(value)
+    _core_stats_projection.track(metric_name)
+    return True
 
 
 def incrementCoreSystemStatsMetric(
@@ -1178,13 +1287,27 @@ def incrementCoreSystemStatsMetric(
     history: int = 30,
     source: str = "core",
 ) -> bool:
-    """Increment numeric core metric in `SystemStats.<metric_name>`."""
-    if not _is_system_stats_enabled():
-        return False
-    if metric_name in _BUFFERED_CORE_METRICS:
-        _core_stats_buffer.increment(metric_name, step)
-        return True
-    return _apply_core_system_stats_delta(metric_name, step, source=source)
+    """Increment core counter `metric_name` in the metrics registry (projected to `SystemStats.<metric_name>`)."""
+    counter = _core_counters.get(metric_name)
+    if counter is None:
+        counter = metrics_registry.counter(metric_name, description)
+        _core_stats_projection.track(metric_name)
+        _core_counters[metric_name] = counter
+    counter.inc(step)
+    return True
+
+
+def getCoreMetricsStats() -> dict:
+    """Metrics registry snapshot and SystemStats projection counters"""
+    from app.configuration import Config
+    return {
+        "projection": {
+            "interval": Config.SYSTEM_STATS_PROJECTION_INTERVAL,
+            "projections": _core_stats_projection.projections,
+            "writes": _core_stats_projection.writes,
+        },
+        "metrics": metrics_registry.snapshot(),
+    }
 
 
 def _is_system_stats_enabled() -> bool:
@@ -2,8 +2,11 @@ import io
 import re
 import sys
 import threading
+import time
 import traceback
-from typing import Any, Dict, Optional, Tuple
+import types
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
 
 MODULE_NAMES = [
     "app.core.lib.common",
@@ -22,6 +25,26 @@ _base_environment: Optional[Dict[str, Any]] = None
 _runtime_environment: Optional[Dict[str, Any]] = None
 _runtime_cf_revision: int = -1
 
+# Кэш скомпилированного кода: ключ (("method", id) или (имя файла, исходник)) -> _CompiledCode
+_code_cache: "OrderedDict[Hashable, _CompiledCode]" = OrderedDict()
+_code_cache_lock = threading.Lock()
+_code_cache_totals = {'hits': 0, 'misses': 0, 'evictions': 0, 'compile_ms': 0.0, 'saved_ms': 0.0}
+# Копий кода с именами файлов вызывающих объектов на одну запись (LRU); копия - code.replace, без компиляции
+CODE_CACHE_VARIANTS = 16
+
+
+class _CompiledCode:
+    """Code object of one source with per-filename copies (LRU, CODE_CACHE_VARIANTS) and lookup counters."""
+    __slots__ = ("source", "variants", "compile_ms", "hits", "misses", "saved_ms")
+
+    def __init__(self, source: str, filename: str, code_obj: types.CodeType, compile_ms: float):
+        self.source = source
+        self.variants = OrderedDict({filename: code_obj})
+        self.compile_ms = compile_ms
+        self.hits = 0
+        self.misses = 1
+        self.saved_ms = 0.0
+
 
 def invalidate_execution_environment_cache() -> None:
     """Drop merged runtime env; base module imports stay cached."""
@@ -72,6 +95,109 @@ def _get_runtime_environment() -> Dict[str, Any]:
         return _runtime_environment
 
 
+def _with_filename(code_obj: types.CodeType, filename: str) -> types.CodeType:
+    """Copy of a code object (and nested functions) reporting another filename in tracebacks."""
+    consts = tuple(
+        _with_filename(const, filename) if isinstance(const, types.CodeType) else const
+        for const in code_obj.co_consts
+    )
+    return code_obj.replace(co_filename=filename, co_consts=consts)
+
+
+def get_compiled_code(code: str, code_filename: str = '<string>', cache_key: Optional[Hashable] = None) -> types.CodeType:
+    """Compiled `code`, cached by key and source (`Config.CODE_CACHE_SIZE` entries, LRU).
+
+    Args:
+        code: Python source.
+        code_filename: Virtual filename for tracebacks.
+        cache_key: Identity of the code shared by several callers, e.g. ("method", id) -
+            one entry for all objects of a class; the entry is recompiled when the
+            source changes. By default the code is keyed by filename and source.
+
+    Raises:
+        SyntaxError: as compile(); failed sources are not cached.
+    """
+    from app.configuration import Config
+    size = Config.CODE_CACHE_SIZE
+    if not size or size <= 0:
+        return compile(code, code_filename, 'exec')
+
+    key = cache_key if cache_key is not None else (code_filename, code)
+    with _code_cache_lock:
+        entry = _code_cache.get(key)
+        if entry is not None and (entry.source is code or entry.source == code):
+            _code_cache.move_to_end(key)
+            entry.hits += 1
+            entry.saved_ms += entry.compile_ms
+            _code_cache_totals['hits'] += 1
+            _code_cache_totals['saved_ms'] += entry.compile_ms
+            variants = entry.variants
+            code_obj = variants.get(code_filename)
+            if code_obj is None:
+                # общий код класса, вызванный от другого объекта
+                code_obj = variants[code_filename] = _with_filename(next(iter(variants.values())), code_filename)
+                while len(variants) > CODE_CACHE_VARIANTS:
+                    variants.popitem(last=False)
+            else:
+                variants.move_to_end(code_filename)
+            return code_obj
+
+    started = time.perf_counter()
+    code_obj = compile(code, code_filename, 'exec')
+    compile_ms = (time.perf_counter() - started) * 1000.0
+    compiled = _CompiledCode(code, code_filename, code_obj, compile_ms)
+    with _code_cache_lock:
+        previous = _code_cache.get(key)
+        if previous is not None:
+            # исходник изменился (метод отредактирован): счётчики ключа сохраняются
+            compiled.hits = previous.hits
+            compiled.misses += previous.misses
+            compiled.saved_ms = previous.saved_ms
+        _code_cache[key] = compiled
+        _code_cache.move_to_end(key)
+        _code_cache_totals['misses'] += 1
+        _code_cache_totals['compile_ms'] += compile_ms
+        while len(_code_cache) > size:
+            _code_cache.popitem(last=False)
+            _code_cache_totals['evictions'] += 1
+    return code_obj
+
+
+def method_cache_key(method_id: int) -> tuple:
+    """Compiled code cache key of a Method row (shared by all objects of its class)."""
+    return ("method", method_id)
+
+
+def invalidate_code_cache(cache_key: Optional[Hashable] = None) -> None:
+    """Drop one compiled code entry (e.g. ("method", id) of a deleted method) or all."""
+    with _code_cache_lock:
+        if cache_key is None:
+            _code_cache.clear()
+        else:
+            _code_cache.pop(cache_key, None)
+
+
+def get_code_cache_entry_stats(cache_key: Hashable) -> Optional[dict]:
+    """hits, misses (compilations) and compile time saved (ms) of one key, None if not cached."""
+    with _code_cache_lock:
+        entry = _code_cache.get(cache_key)
+        if entry is None:
+            return None
+        return {'hits': entry.hits, 'misses': entry.misses, 'saved_ms': entry.saved_ms}
+
+
+def get_code_cache_stats() -> dict:
+    """Totals of the compiled code cache."""
+    with _code_cache_lock:
+        stats = dict(_code_cache_totals)
+        stats['entries'] = len(_code_cache)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups * 100, 2) if lookups else 0
+    stats['compile_ms'] = round(stats['compile_ms'], 3)
+    stats['saved_ms'] = round(stats['saved_ms'], 3)
+    return stats
+
+
 def format_runtime_error(
     output: str,
     method_context: Optional[dict] = None,
@@ -132,6 +258,7 @@ def execute_and_capture_output(
     variables: dict,
     code_filename: str = '<string>',
     method_context: Optional[dict] = None,
+    cache_key: Optional[Hashable] = None,
 ) -> Tuple[str, bool]:
     """Execute Python code with provided variables and capture output/errors.
 
@@ -140,6 +267,7 @@ def execute_and_capture_output(
         variables: Locals/globals overlay (self, params, etc.).
         code_filename: Virtual filename for compile/traceback.
         method_context: Optional dict for format_runtime_error on failure.
+        cache_key: Key of the compiled code cache (see get_compiled_code).
 
     Returns:
         Captured output (possibly formatted) and error flag.
@@ -170,7 +298,7 @@ def execute_and_capture_output(
     environment['print'] = custom_print
 
     try:
-        code_obj = compile(code, code_filename, 'exec')
+        code_obj = get_compiled_code(code, code_filename, cache_key)
         exec(code_obj, environment)
         output = buffer.getvalue()
     except Exception as e:
@@ -0,0 +1,400 @@
+"""
+In-process metrics registry of the core: counters, gauges and histograms with labels.
+
+Hot paths (property reads/writes, method calls, BatchWriter flushes) only update
+memory: counters add to per-thread cells without a shared lock (`ShardedCounter`),
+gauges and histograms take a short per-metric lock; nothing is written to the
+database here.
+`SystemStats` properties are projected from the registry at a low cadence
+(`system_stats_projection_interval`, see `projectCoreSystemStats` in
+`app/core/lib/common.py`).
+
+    from app.core.lib.metrics import metrics_registry
+
+    requests = metrics_registry.counter("api_requests", "API requests", labels=("method",))
+    requests.inc(method="GET")
+    metrics_registry.gauge("queue_size", "Queue size").set(12)
+    metrics_registry.histogram("flush_ms", "Flush duration, ms", buckets=(1, 10, 100)).observe(4.2)
+
+`metrics_registry.collect()` returns a consistent snapshot of all metrics.
+Values owned by other components (queue depths, pool sizes) are read at scrape
+time by collectors (`register_collector`); `render()` formats the registry and
+collectors as OpenMetrics / Prometheus text (see `/metrics`).
+"""
+import bisect
+import functools
+import math
+import re
+import threading
+from typing import Callable, Iterable, Optional, Union
+
+from app.logging_config import getLogger
+
+_logger = getLogger('metrics')
+
+Number = Union[int, float]
+
+# Границы корзин гистограммы по умолчанию (мс)
+DEFAULT_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class _Metric():
+    """Metric with a value per combination of label values"""
+    type = ""
+
+    def __init__(self, name: str, description: str = "", labels: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if not self.labelnames and not labels:
+            return ()
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels):
+        """Current value for the label values (None if never updated)"""
+        key = self._key(labels)
+        with self._lock:
+            return self._copy(self._values.get(key))
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def samples(self) -> list:
+        """[(labels dict, value)] for every label combination"""
+        with self._lock:
+            items = [(key, self._copy(value)) for key, value in self._values.items()]
+        return [(dict(zip(self.labelnames, key)), value) for key, value in items]
+
+    def family(self) -> "MetricFamily":
+        return MetricFamily(self.name, self.type, self.description, self.samples())
+
+
+class ShardedCounter():
+    """Counters by key without a shared lock on increment.
+
+    Every thread adds to its own cells (a dict written only by the owner thread);
+    reads sum the cells of all threads (dict copy is atomic under the GIL, an
+    increment racing with a read is seen by the next one). Cells of finished
+    threads are folded into a common total by `totals()` and when new threads
+    register, so short-lived threads (a thread per HTTP request) do not
+    accumulate shards while nobody reads the counter.
+    """
+    # минимальный порог числа ячеек для свёртки завершившихся потоков при регистрации
+    PRUNE_MIN_SHARDS = 64
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []       # [(thread, cells)]
+        self._finished = {}     # суммы завершившихся потоков
+        self._prune_at = self.PRUNE_MIN_SHARDS
+
+    def add(self, amount: Number = 1, key=()) -> None:
+        cells = getattr(self._local, "cells", None)
+        if cells is None:
+            cells = self._register()
+        cells[key] = cells.get(key, 0) + amount
+
+    def _register(self) -> dict:
+        cells = self._local.cells = {}
+        with self._lock:
+            if len(self._shards) >= self._prune_at:
+                self._fold_finished()
+                # порог растёт вместе с живыми потоками: свёртка амортизированно O(1) на регистрацию
+                self._prune_at = max(self.PRUNE_MIN_SHARDS, 2 * len(self._shards))
+            self._shards.append((threading.current_thread(), cells))
+        return cells
+
+    def _fold_finished(self) -> None:
+        """Move cells of finished threads into the common total (under _lock)"""
+        alive = []
+        for thread, cells in self._shards:
+            if thread.is_alive():
+                alive.append((thread, cells))
+            else:
+                for key, count in cells.copy().items():
+                    self._finished[key] = self._finished.get(key, 0) + count
+        self._shards = alive
+
+    def value(self, key=()) -> Optional[Number]:
+        """Sum for the key (None if never incremented)"""
+        return self.totals().get(key)
+
+    def totals(self) -> dict:
+        """key -> sum over all threads"""
+        with self._lock:
+            self._fold_finished()
+            totals = dict(self._finished)
+            for _, cells in self._shards:
+                for key, count in cells.copy().items():
+                    totals[key] = totals.get(key, 0) + count
+        return totals
+
+    @property
+    def shards(self) -> int:
+        return len(self._shards)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value (per-thread cells, see ShardedCounter)"""
+    type = "counter"
+
+    def __init__(self, name: str, description: str = "", labels: Iterable[str] = ()):
+        super().__init__(name, description, labels)
+        self._cells = ShardedCounter()
+
+    def inc(self, amount: Number = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError(f"Counter '{self.name}' can't decrease")
+        self._cells.add(amount, self._key(labels) if labels or self.labelnames else ())
+
+    def value(self, **labels):
+        return self._cells.value(self._key(labels))
+
+    def samples(self) -> list:
+        return [(dict(zip(self.labelnames, key)), value) for key, value in self._cells.totals().items()]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    type = "gauge"
+
+    def set(self, value: Number, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: Number = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: Number = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets
+
+    Value of a label combination: dict with buckets [(upper bound, cumulative count)],
+    sum and count.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, description: str = "", labels: Iterable[str] = (),
+                 buckets: Optional[Iterable[Number]] = None):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(set(buckets or DEFAULT_BUCKETS)))
+
+    def observe(self, value: Number, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # счётчики по корзинам (последняя - +Inf), сумма, количество
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _copy(self, state):
+        if state is None:
+            return None
+        counts, total, count = state
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+class MetricFamily():
+    """Metric with its samples, produced at scrape time by a collector"""
+    __slots__ = ("name", "type", "description", "samples")
+
+    def __init__(self, name: str, type: str, description: str = "", samples: Optional[list] = None):
+        self.name = name
+        self.type = type
+        self.description = description
+        self.samples = samples if samples is not None else []
+
+    def add(self, value, **labels) -> "MetricFamily":
+        self.samples.append((labels, value))
+        return self
+
+
+class MetricsRegistry():
+    """Named metrics of the process; `counter()`/`gauge()`/`histogram()` return existing ones"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = {}
+
+    def _get_or_create(self, cls, name: str, description: str, labels: Iterable[str], **options):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, description, labels, **options)
+        if type(metric) is not cls:
+            raise ValueError(f"Metric '{name}' is already registered as {metric.type}")
+        return metric
+
+    def counter(self, name: str, description: str = "", labels: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, description, labels)
+
+    def gauge(self, name: str, description: str = "", labels: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, description, labels)
+
+    def histogram(self, name: str, description: str = "", labels: Iterable[str] = (),
+                  buckets: Optional[Iterable[Number]] = None) -> Histogram:
+        return self._get_or_create(Histogram, name, description, labels, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def collect(self) -> list:
+        """Metrics sorted by name"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return sorted(metrics, key=lambda metric: metric.name)
+
+    def register_collector(self, name: str, collector: Callable) -> None:
+        """Collector: callable() -> iterable of MetricFamily, called on every scrape"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def unregister_collector(self, name: str) -> None:
+        with self._lock:
+            self._collectors.pop(name, None)
+
+    def families(self) -> list:
+        """Registry metrics and collector families (a failing collector is skipped)"""
+        with self._lock:
+            collectors = list(self._collectors.items())
+        families = [metric.family() for metric in self.collect()]
+        for name, collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception as ex:  # noqa: BLE001 - один сборщик не должен ломать весь вывод
+                _logger.exception("Metrics collector '%s' failed: %s", name, ex)
+        return families
+
+    def render(self, openmetrics: bool = True, prefix: str = "") -> str:
+        return render(self.families(), openmetrics=openmetrics, prefix=prefix)
+
+    def snapshot(self) -> dict:
+        """name -> {type, description, samples: [{labels, value}]} (JSON-friendly)"""
+        return {
+            metric.name: {
+                "type": metric.type,
+                "description": metric.description,
+                "samples": [{"labels": labels, "value": value} for labels, value in metric.samples()],
+            }
+            for metric in self.collect()
+        }
+
+
+metrics_registry = MetricsRegistry()
+
+
+# Типы содержимого ответа /metrics
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_INVALID_NAME = re.compile(r"[^a-zA-Z0-9_]")
+
+
+@functools.lru_cache(maxsize=4096)
+def _name(name: str) -> str:
+    name = _INVALID_NAME.sub("_", name)
+    return name if not name[:1].isdigit() else f"_{name}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value) -> str:
+    if type(value) is int:
+        return str(value)
+    if value is True or value is False:
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(value)
+
+
+# Пары label="value" и границы корзин повторяются от scrape к scrape - кэшируем их текст
+@functools.lru_cache(maxsize=8192)
+def _label(key: str, value) -> str:
+    return f'{_name(key)}="{_escape(value)}"'
+
+
+@functools.lru_cache(maxsize=1024)
+def _bound(bound) -> str:
+    return f'le="{_number(bound)}"'
+
+
+def _labels(labels: dict) -> str:
+    """Label values joined without braces"""
+    if not labels:
+        return ""
+    return ",".join([_label(key, value) for key, value in labels.items()])
+
+
+def render(families: Iterable[MetricFamily], openmetrics: bool = True, prefix: str = "") -> str:
+    """Text exposition of metric families
+
+    Args:
+        openmetrics: OpenMetrics 1.0 (counter family without `_total`, `# EOF`) or Prometheus 0.0.4 text
+        prefix: Prefix of every metric name
+    """
+    lines = []
+    for family in families:
+        name = _name(prefix + family.name)
+        kind = family.type
+        if kind == "counter" and name.endswith("_total"):
+            name = name[:-6]
+        type_name = name if openmetrics or kind != "counter" else f"{name}_total"
+        lines.append(f"# TYPE {type_name} {kind}")
+        if family.description:
+            lines.append(f"# HELP {type_name} {_escape(family.description)}")
+        for labels, value in family.samples:
+            if value is None:
+                continue
+            body = _labels(labels)
+            braced = "{" + body + "}" if body else ""
+            if kind == "counter":
+                lines.append(f"{name}_total{braced} {_number(value)}")
+            elif kind == "histogram":
+                bucket = f"{name}_bucket{{{body}," if body else f"{name}_bucket{{"
+                for bound, count in value["buckets"]:
+                    lines.append(f"{bucket}{_bound(bound)}}} {count}")
+                lines.append(f"{name}_count{braced} {value['count']}")
+                lines.append(f"{name}_sum{braced} {_number(value['sum'])}")
+            else:
+                lines.append(f"{name}{braced} {_number(value)}")
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
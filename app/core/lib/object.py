@@ -8,13 +8,20 @@ from app.logging_config import getLogger
 from app.database import session_scope, row2dict
 from app.core.models.Clasess import Class, Object, Property, Value, Method, History
 from app.core.main.ObjectManager import ObjectManager, PropertyManager, ObjectLoggerAdapter
+from app.core.main.WriteBatch import batch  # noqa: F401
+from app.core.main.PropertyCodecs import PropertyCodec, register_property_type  # noqa: F401
 from app.core.lib.constants import PropertyType
 from app.core.lib.object_tree import invalidate_objects_tree_cache
+from app.core.lib.execute import invalidate_code_cache, method_cache_key
 
 _logger = getLogger('object')
 _UNSET = object()
 
 
+def _type_value(type) -> str:
+    """Stored type name: PropertyType or name of a type registered by register_property_type"""
+    return type.value if isinstance(type, PropertyType) else type
+
 def _get_object_logger(object_name: str):
     """Create a logger adapter with object name context"""
     return ObjectLoggerAdapter(_logger, {'object_name': object_name})
@@ -109,7 +116,7 @@ def addClassProperty(
         class_name (str): Class name
         description (str, optional): Description property. Defaults to ''.
         history (int, optional): Save history (days). Defaults to 0.
-        type (PropertyType, optional): Type property. Defaults to PropertyType.Empty.
+        type (PropertyType | str, optional): Type property (str - custom type registered by plugin). Defaults to PropertyType.Empty.
         method_name (str, optional): Call method on change value property. Defaults to None.
         params (dict, optional): Property params JSON (icon, color, validation and UI metadata). Defaults to None.
         update (bool, optional): Update existing property if it exists. Defaults to False.
@@ -129,7 +136,7 @@ def addClassProperty(
                 prop.description = description
             prop.class_id = cls.id
             prop.history = 0 if history is _UNSET else history
-            prop.type = (PropertyType.Empty if type is _UNSET else type).value
+            prop.type = _type_value(PropertyType.Empty if type is _UNSET else type)
             if params is not _UNSET:
                 prop.params = json.dumps(params)
             if method_name is not _UNSET and method_name:
@@ -145,7 +152,7 @@ def addClassProperty(
             if history is not _UNSET:
                 prop.history = history
             if type is not _UNSET:
-                prop.type = type.value
+                prop.type = _type_value(type)
             if params is not _UNSET:
                 prop.params = json.dumps(params)
             if method_name is not _UNSET:
@@ -271,7 +278,7 @@ def addObjectProperty(
         object_name (str): Object name
         description (str, optional): Description. Defaults to ''.
         history (int, optional): Save history (days). Defaults to 0.
-        type (PropertyType, optional): Type property. Defaults to PropertyType.Empty.
+        type (PropertyType | str, optional): Type property (str - custom type registered by plugin). Defaults to PropertyType.Empty.
         method_name (str, optional): Call method on change value property. Defaults to None.
         params (dict, optional): Parameters property. Defaults to None.
         update (bool, optional): Update existing property if it exists. Defaults to False.
@@ -291,7 +298,7 @@ def addObjectProperty(
                 prop.description = description
             prop.object_id = obj.id
             prop.history = 0 if history is _UNSET else history
-            prop.type = (PropertyType.Empty if type is _UNSET else type).value
+            prop.type = _type_value(PropertyType.Empty if type is _UNSET else type)
             if params is not _UNSET:
                 prop.params = json.dumps(params)
             if method_name is not _UNSET and method_name:
@@ -313,7 +320,7 @@ def addObjectProperty(
             if history is not _UNSET:
                 prop.history = history
             if type is not _UNSET:
-                prop.type = type.value
+                prop.type = _type_value(type)
             if params is not _UNSET:
                 prop.params = json.dumps(params)
             if method_name is not _UNSET:
@@ -494,6 +501,7 @@ def deleteObjectMethod(object_method: str) -> bool:
         method = session.query(Method).filter(Method.name == method_name, Method.object_id == obj.id).one_or_none()
         if not method:
             return False
+        invalidate_code_cache(method_cache_key(method.id))
         session.delete(method)
         session.commit()
         objects_storage.reload_object(obj.id)
@@ -521,6 +529,7 @@ def deleteClassMethod(class_method: str) -> bool:
         method = session.query(Method).filter(Method.name == method_name, Method.class_id == cls.id).one_or_none()
         if not method:
             return False
+        invalidate_code_cache(method_cache_key(method.id))
         session.delete(method)
         session.commit()
         objects_storage.reload_objects_by_class(cls.id)
@@ -543,35 +552,29 @@ def getObject(name:str) -> ObjectManager:
         logger.exception('getObject %s: %s',name,e)
         return None
 
-def getObjectsByClass(class_name:str, subclasses:bool=True) -> list[ObjectManager]:
+def getObjectsByClass(class_name:str, subclasses:bool=True, names_only:bool=False) -> list[ObjectManager]:
     """get list object by class
 
+    Answered from the in-memory class index of ObjectsStorage (no SQL per call).
+
     Args:
         class_name (str): Class name
         subclasses (bool, optional): Subclasses. Defaults to True.
+        names_only (bool, optional): Return object names instead of objects (objects are not loaded). Defaults to False.
 
     Returns:
-        list[ObjectManager]: List objects
+        list[ObjectManager]: List objects (list[str] with names_only), None if class not found
     """
     try:
+        names = objects_storage.getObjectNamesByClass(class_name, subclasses)
+        if names is None or names_only:
+            return names
         objects = []
-        with session_scope() as session:
-            cls = session.query(Class).filter(Class.name == class_name).one_or_none()
-            if cls:
-                objs = session.query(Object).filter(Object.class_id == cls.id).all()
-                for obj in objs:
-                    res = getObject(obj.name)
-                    if res:
-                        objects.append(res)
-                if subclasses:
-                    res = session.query(Class).filter(Class.parent_id == cls.id).all()
-                    for subclass in res:
-                        childs = getObjectsByClass(subclass.name,subclasses)
-                        if childs:
-                            objects += childs
-                return objects
-            else:
-                return None
+        for name in names:
+            res = getObject(name)
+            if res:
+                objects.append(res)
+        return objects
     except Exception as e:
         _logger.exception('getObjectsByClass %s: %s',class_name,e)
     return None
@@ -1011,12 +1014,13 @@ def clearLinkedObjects(link:str):
     Args:
         link (str): Name module
     """
+    # объекты со связанными свойствами не выгружаются по бюджету памяти - достаточно загруженных
     with session_scope() as session:
         for obj in objects_storage.values():
-            for _, prop in obj.properties:
+            for _, prop in obj.properties.items():
                 if prop.linked and link in prop.linked:
                     prop.linked.remove(link)
-                    id = prop._value_id
+                    id = prop.value_id
                     rec = session.query(Value).where(Value.id == id).one_or_none()
                     if rec:
                         rec.linked = ','.join(prop.linked)
@@ -689,10 +689,10 @@ class PylspClient:
             # Проверяем кэш объектов
             if self._object_completions_cache is None:
                 items = []
-                for name, obj in objects_storage.items():
+                for name, desc in objects_storage.getObjectDescriptions().items():
                     if not isinstance(name, str):
                         continue
-                    desc = getattr(obj, "description", "") or ""
+                    desc = desc or ""
                     items.append({
                         "name": name,
                         "type": "object",
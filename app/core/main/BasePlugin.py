@@ -2,15 +2,23 @@
 
 import os
 import json
+import time
 from threading import Thread, Event
 from flask import Blueprint, request, render_template
 from app.configuration import Config
 from app.core.models.Plugins import Plugin
 from app.core.lib.common import sendDataToWebsocket
+from app.core.lib.metrics import metrics_registry
+from app.core.main.SubscriptionIndex import subscription_index
 from app.database import session_scope, get_now_to_utc
 from app.authentication.handlers import handle_admin_required
 from app.logging_config import getLogger
 
+# Длительность итераций cyclic_task и ошибки по плагинам (/metrics)
+_cycle_duration_ms = metrics_registry.histogram(
+    "plugin_cycle_duration_ms", "Duration of a plugin cyclic_task iteration (ms)", labels=("plugin",))
+_cycle_errors = metrics_registry.counter("plugin_cycle_errors", "Exceptions in plugin cyclic_task", labels=("plugin",))
+
 
 class BasePlugin:
     """
@@ -96,6 +104,9 @@ class BasePlugin:
         # "proxy": Property change monitoring
         #     - Handler: changeProperty(obj, prop, value)
         #     - Receives all system property changes
+        #     - Delivered from the plugin's own queue (ChangeDispatcher);
+        #       override changeProperties(changes) to handle a batch in one call
+        #     - With subscribeChanges(...) only matching changes are delivered
         # "playsound": Audio playback
         #     - Handler: playSound(file_name: str, level: int=0)
         #     - Manages sound effects output
@@ -190,10 +201,13 @@ class BasePlugin:
             if self.event.is_set():
                 break
 
+            started = time.perf_counter()
             try:
                 self.cyclic_task()
             except Exception as ex:
+                _cycle_errors.inc(plugin=self.name)
                 self.logger.error(f"Error in cyclic task: {ex}", exc_info=True)
+            _cycle_duration_ms.observe((time.perf_counter() - started) * 1000.0, plugin=self.name)
 
             self.dtUpdated = get_now_to_utc()
 
@@ -275,6 +289,9 @@ class BasePlugin:
             - Can trigger additional updates or callback functions.
             - May emit property-change events for observers.
             - Handles cases where the property does not exist or is read-only.
+            - Set class attributes `linked_delivery = "latest"` and/or `linked_min_interval`
+              (seconds) to receive only the newest value per property, one call at a time
+              (property params of the same names take precedence).
 
         """
         pass
@@ -319,7 +336,7 @@ class BasePlugin:
             - This is a read-only observer - modifying properties here may cause infinite loops
             - For performance reasons, frequent property changes may be batched
             - The function should return quickly to avoid system delays
-            - Use filters or conditions inside the function to handle only relevant changes
+            - Use subscribeChanges() to receive only relevant changes instead of filtering here
 
         Typical usage patterns:
             1. Logging/auditing property changes
@@ -335,6 +352,84 @@ class BasePlugin:
         """
         pass
 
+    def changeProperties(self, changes: list) -> None:
+        """Receives a batch of property changes when module has `actions="proxy"`.
+
+        Changes are delivered from the plugin's own bounded queue (see
+        `app/core/main/ChangeDispatcher.py`) by a dedicated worker thread, up to
+        `change_dispatcher_batch_size` changes per call, in the order of writes.
+        The default implementation calls `changeProperty` for each change; override
+        it to process many changes at once (one publish, one transaction, ...).
+
+        Args:
+            changes (list): List of tuples (obj, prop, value)
+
+        Notes:
+            - Queue size, batch size and overflow policy may be set per plugin with
+              the attributes `proxy_queue_size`, `proxy_batch_size` and `proxy_overflow`
+              (`coalesce`, `drop_oldest`, `drop_newest`)
+            - Under overload intermediate values may be coalesced or dropped
+
+        Example:
+            >>> def changeProperties(self, changes):
+            ...     self.client.publish_many(
+            ...         (f"home/{obj}/{prop}", value) for obj, prop, value in changes)
+        """
+        for obj, prop, value in changes:
+            try:
+                self.changeProperty(obj, prop, value)
+            except Exception as ex:
+                self.logger.exception(ex)
+
+    def subscribeChanges(self, pattern: str = None, object_name: str = None, class_name: str = None,
+                         property_name: str = None) -> str:
+        """Subscribes the plugin to property changes matching a filter.
+
+        Once a plugin has subscriptions, `changeProperties`/`changeProperty` receive only
+        matching changes (with or without `actions="proxy"`); the filter runs in the core
+        index (`app/core/main/SubscriptionIndex.py`) instead of the plugin.
+
+        Args:
+            pattern (str, optional): "Object.property" with globs (`*`, `?`, `[...]`),
+                e.g. "Kitchen.temperature", "Kitchen.*", "*.temperature", "Sensor*.temp*"
+            object_name (str, optional): Object name (all properties, or property_name)
+            class_name (str, optional): Class name - objects of the class and its descendants
+            property_name (str, optional): Property name (with object_name/class_name or alone)
+
+        Returns:
+            str: Normalized subscription
+
+        Raises:
+            ValueError: Invalid combination of arguments
+
+        Example:
+            >>> def initialization(self):
+            ...     self.subscribeChanges("Sensor*.temperature")
+            ...     self.subscribeChanges(class_name="Light", property_name="state")
+        """
+        return subscription_index.subscribe(self.name, pattern, object_name, class_name, property_name)
+
+    def unsubscribeChanges(self, pattern: str = None, object_name: str = None, class_name: str = None,
+                           property_name: str = None) -> bool:
+        """Removes a subscription added by subscribeChanges (same arguments).
+
+        Returns:
+            bool: True if the subscription existed
+        """
+        return subscription_index.unsubscribe(self.name, pattern, object_name, class_name, property_name)
+
+    def clearSubscriptions(self) -> int:
+        """Removes all subscriptions of the plugin (a proxy plugin receives all changes again).
+
+        Returns:
+            int: Count of removed subscriptions
+        """
+        return subscription_index.clear(self.name)
+
+    def getSubscriptions(self) -> list:
+        """Returns normalized subscriptions of the plugin"""
+        return subscription_index.get_subscriptions(self.name)
+
     def changeObject(self, event: str, object_name: str, property_name: str = None, method_name: str = None, new_value: str = None) -> None:
         """Handles object structure change notifications propagated through the system.
 
@@ -0,0 +1,262 @@
+"""
+Dialect-specific bulk writes of BatchWriter (Value updates and History inserts).
+
+    orm         session.bulk_update_mappings / bulk_insert_mappings (any backend)
+    sqlite      one prepared UPDATE and one INSERT via executemany
+    postgresql  UPDATE ... FROM (VALUES ...) for Value, COPY ... FROM STDIN for History
+    mysql       multi-row INSERT ... ON DUPLICATE KEY UPDATE for Value, multi-row INSERT for History
+
+With the unique history index (HistoryDedup) history rows are written by
+`upsert_history`: INSERT ... ON CONFLICT DO UPDATE (SQLite, PostgreSQL) or
+ON DUPLICATE KEY UPDATE (MySQL).
+
+The strategy is chosen from the engine dialect (`app.database.get_engine_dialect`)
+or forced with `batch_writer_bulk_strategy`. All statements run on the connection
+of the session, inside the transaction of the flush.
+"""
+import io
+from typing import Optional
+
+from sqlalchemy import insert, text
+
+from app.core.models.Clasess import Value, History
+from app.database import get_engine_dialect
+from app.logging_config import getLogger
+
+_logger = getLogger('bulk_write')
+
+# Строк в одном многострочном запросе (ограничения параметров/размера пакета СУБД)
+STATEMENT_ROWS = 500
+
+_VALUE_COLUMNS = ("id", "value", "changed", "source")
+_HISTORY_COLUMNS = ("value_id", "value", "added", "source")
+
+
+def _chunks(rows: list, size: int = STATEMENT_ROWS):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class BulkWriteStrategy():
+    """Portable ORM bulk operations (the slowest path, works on any backend)"""
+    name = "orm"
+    dialect = None
+
+    def update_values(self, session, rows: list) -> None:
+        """Update Value rows
+
+        Args:
+            rows (list): dicts with id, value, changed, source
+        """
+        session.bulk_update_mappings(Value, rows)
+
+    def insert_history(self, session, rows: list) -> None:
+        """Insert History rows
+
+        Args:
+            rows (list): dicts with value_id, value, added, source
+        """
+        session.bulk_insert_mappings(History, rows)
+
+    def update_history(self, session, rows: list) -> None:
+        """Replace values of existing History rows
+
+        Args:
+            rows (list): dicts with id, value
+        """
+        session.bulk_update_mappings(History, rows)
+
+    def upsert_history(self, session, rows: list) -> None:
+        """Insert History rows, replacing the value of rows with the same (value_id, added, source)
+
+        Requires the unique index of HistoryDedup; without upsert support - lookup, update and insert.
+        """
+        from app.core.main.HistoryDedup import find_existing
+
+        existing = find_existing(session, ((row["value_id"], row["added"], row["source"]) for row in rows))
+        updates = []
+        inserts = []
+        for row in rows:
+            history_id = existing.get((row["value_id"], row["added"], row["source"]))
+            if history_id is None:
+                inserts.append(row)
+            else:
+                updates.append({"id": history_id, "value": row["value"]})
+        if updates:
+            self.update_history(session, updates)
+        if inserts:
+            self.insert_history(session, inserts)
+
+
+class SQLiteBulkWrite(BulkWriteStrategy):
+    """Prepared UPDATE/INSERT executed once per flush with executemany"""
+    name = "sqlite"
+    dialect = "sqlite"
+
+    _update_sql = 'UPDATE "values" SET value = ?, changed = ?, source = ? WHERE id = ?'
+    _insert_sql = 'INSERT INTO history (value_id, value, added, source) VALUES (?, ?, ?, ?)'
+    _upsert_sql = _insert_sql + ' ON CONFLICT (value_id, added, source) DO UPDATE SET value = excluded.value'
+    _update_history_sql = 'UPDATE history SET value = ? WHERE id = ?'
+
+    def __init__(self):
+        self._datetime = None
+
+    def _to_db(self, session):
+        # формат дат как у SQLAlchemy (сравнения в SQLite - строковые)
+        if self._datetime is None:
+            dialect = session.get_bind().dialect
+            processor = Value.__table__.c.changed.type.dialect_impl(dialect).bind_processor(dialect)
+            self._datetime = processor or (lambda value: value)
+        return self._datetime
+
+    def update_values(self, session, rows: list) -> None:
+        to_db = self._to_db(session)
+        session.connection().exec_driver_sql(
+            self._update_sql,
+            [(row["value"], to_db(row["changed"]), row["source"], row["id"]) for row in rows],
+        )
+
+    def insert_history(self, session, rows: list) -> None:
+        to_db = self._to_db(session)
+        session.connection().exec_driver_sql(
+            self._insert_sql,
+            [(row["value_id"], row["value"], to_db(row["added"]), row["source"]) for row in rows],
+        )
+
+    def update_history(self, session, rows: list) -> None:
+        session.connection().exec_driver_sql(self._update_history_sql, [(row["value"], row["id"]) for row in rows])
+
+    def upsert_history(self, session, rows: list) -> None:
+        to_db = self._to_db(session)
+        session.connection().exec_driver_sql(
+            self._upsert_sql,
+            [(row["value_id"], row["value"], to_db(row["added"]), row["source"]) for row in rows],
+        )
+
+
+def _copy_field(value) -> str:
+    """Field of COPY text format"""
+    if value is None:
+        return "\\N"
+    if not isinstance(value, str):
+        value = value.isoformat(" ") if hasattr(value, "isoformat") else str(value)
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class PostgreSQLBulkWrite(BulkWriteStrategy):
+    """UPDATE ... FROM (VALUES ...) and COPY into History"""
+    name = "postgresql"
+    dialect = "postgresql"
+
+    _copy_sql = "COPY history (value_id, value, added, source) FROM STDIN"
+
+    def update_values(self, session, rows: list) -> None:
+        connection = session.connection()
+        for chunk in _chunks(rows):
+            params = {}
+            tuples = []
+            for index, row in enumerate(chunk):
+                tuples.append(f"(CAST(:i{index} AS INTEGER), CAST(:v{index} AS TEXT), "
+                              f"CAST(:c{index} AS TIMESTAMP), CAST(:s{index} AS TEXT))")
+                params[f"i{index}"] = row["id"]
+                params[f"v{index}"] = row["value"]
+                params[f"c{index}"] = row["changed"]
+                params[f"s{index}"] = row["source"]
+            connection.execute(text(
+                'UPDATE "values" AS v SET value = d.value, changed = d.changed, source = d.source '
+                f'FROM (VALUES {", ".join(tuples)}) AS d(id, value, changed, source) WHERE v.id = d.id'
+            ), params)
+
+    def insert_history(self, session, rows: list) -> None:
+        data = "".join(
+            "\t".join(_copy_field(row[column]) for column in _HISTORY_COLUMNS) + "\n" for row in rows
+        )
+        cursor = session.connection().connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):  # psycopg2
+                cursor.copy_expert(self._copy_sql, io.StringIO(data))
+            elif hasattr(cursor, "copy"):  # psycopg 3
+                with cursor.copy(self._copy_sql) as copy:
+                    copy.write(data)
+            else:
+                # драйвер без COPY - многострочный INSERT
+                for chunk in _chunks(rows):
+                    session.connection().execute(insert(History.__table__).values(chunk))
+        finally:
+            cursor.close()
+
+    def upsert_history(self, session, rows: list) -> None:
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        connection = session.connection()
+        for chunk in _chunks(rows):
+            statement = pg_insert(History.__table__).values(
+                [{column: row[column] for column in _HISTORY_COLUMNS} for row in chunk])
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=["value_id", "added", "source"],
+                set_={"value": statement.excluded.value},
+            ))
+
+
+class MySQLBulkWrite(BulkWriteStrategy):
+    """Multi-row INSERT ... ON DUPLICATE KEY UPDATE for Value, multi-row INSERT for History"""
+    name = "mysql"
+    dialect = "mysql"
+
+    def update_values(self, session, rows: list) -> None:
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        connection = session.connection()
+        table = Value.__table__
+        for chunk in _chunks(rows):
+            # строки, удалённые до записи, не должны появиться снова без объекта
+            existing = {
+                row[0] for row in connection.execute(
+                    table.select().with_only_columns(table.c.id).where(table.c.id.in_([row["id"] for row in chunk]))
+                )
+            }
+            chunk = [{column: row[column] for column in _VALUE_COLUMNS} for row in chunk if row["id"] in existing]
+            if not chunk:
+                continue
+            statement = mysql_insert(table).values(chunk)
+            connection.execute(statement.on_duplicate_key_update(
+                value=statement.inserted.value,
+                changed=statement.inserted.changed,
+                source=statement.inserted.source,
+            ))
+
+    def insert_history(self, session, rows: list) -> None:
+        connection = session.connection()
+        for chunk in _chunks(rows):
+            connection.execute(insert(History.__table__).values(chunk))
+
+    def upsert_history(self, session, rows: list) -> None:
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        connection = session.connection()
+        for chunk in _chunks(rows):
+            statement = mysql_insert(History.__table__).values(
+                [{column: row[column] for column in _HISTORY_COLUMNS} for row in chunk])
+            connection.execute(statement.on_duplicate_key_update(value=statement.inserted.value))
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (BulkWriteStrategy, SQLiteBulkWrite, PostgreSQLBulkWrite, MySQLBulkWrite)
+}
+
+
+def create_bulk_writer(name: str = "auto", dialect: Optional[str] = None) -> BulkWriteStrategy:
+    """Bulk write strategy by name or ('auto') by the engine dialect
+
+    A strategy for another dialect than the engine's falls back to 'orm'.
+    """
+    dialect = dialect or get_engine_dialect()
+    name = (name or "auto").lower()
+    if name == "auto":
+        name = dialect if dialect in STRATEGIES else "orm"
+    strategy = STRATEGIES.get(name)
+    if strategy is None or (strategy.dialect is not None and strategy.dialect != dialect):
+        _logger.warning("Bulk write strategy '%s' is not available for %s, using 'orm'", name, dialect)
+        strategy = BulkWriteStrategy
+    return strategy()
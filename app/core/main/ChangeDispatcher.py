@@ -0,0 +1,375 @@
+"""
+Central dispatcher of property changes for proxy plugins (`"proxy" in plugin.actions`).
+
+Instead of one thread pool task per (write, plugin), every subscribing plugin has a bounded
+queue drained by its own worker thread. The worker takes up to `change_dispatcher_batch_size`
+changes at once and hands them to `plugin.changeProperties(changes)` (BasePlugin calls
+`changeProperty` for each change; plugins may override it to process a batch in one call).
+A slow plugin delays only its own queue.
+
+When a queue is full the overflow policy of the subscriber applies:
+
+    coalesce     - a change of a property already waiting in the queue replaces its value
+                   (latest value wins); otherwise the oldest change is dropped
+    drop_oldest  - the oldest change is dropped
+    drop_newest  - the new change is dropped
+
+Plugins with subscriptions (BasePlugin.subscribeChanges, SubscriptionIndex) receive only
+matching changes, proxy or not; proxy plugins without subscriptions receive every change.
+
+Queue depth, lag (time a change waits in the queue), delivered/dropped/coalesced counters per
+subscriber: `change_dispatcher.get_stats()` and `GET /api/utils/dispatcher/stats`.
+"""
+import threading
+import time
+from collections import deque
+
+from app.configuration import Config
+from app.core.lib.common import getModule
+from app.core.main.PluginsHelper import plugins as _registry
+from app.core.main.SubscriptionIndex import subscription_index
+from app.logging_config import getLogger
+
+_logger = getLogger('dispatcher')
+
+OVERFLOW_POLICIES = ("coalesce", "drop_oldest", "drop_newest")
+
+# предупреждение о переполнении очереди - не чаще раза в N секунд на подписчика
+_OVERFLOW_LOG_INTERVAL = 60.0
+
+# список proxy-плагинов без подписок перечитывается не реже раза в N секунд
+_BROADCAST_REFRESH_INTERVAL = 1.0
+
+
+class Change():
+    """Queued property change"""
+    __slots__ = ("object_name", "property_name", "value", "enqueued")
+
+    def __init__(self, object_name, property_name, value, enqueued):
+        self.object_name = object_name
+        self.property_name = property_name
+        self.value = value
+        self.enqueued = enqueued
+
+
+def _has_batch_handler(plugin) -> bool:
+    """Plugin overrides BasePlugin.changeProperties"""
+    from app.core.main.BasePlugin import BasePlugin
+    handler = getattr(type(plugin), "changeProperties", None)
+    return handler is not None and handler is not BasePlugin.changeProperties
+
+
+class SubscriberQueue():
+    """Bounded queue and worker thread of one proxy plugin"""
+
+    def __init__(self, plugin, capacity: int, batch_size: int, overflow: str):
+        self.name = plugin.name
+        self.plugin = plugin
+        self.capacity = max(1, int(capacity))
+        self.batch_size = max(1, int(batch_size))
+        if overflow not in OVERFLOW_POLICIES:
+            _logger.warning("Unknown overflow policy '%s' for '%s', using 'coalesce'", overflow, self.name)
+            overflow = "coalesce"
+        self.overflow = overflow
+        self._items = deque()
+        self._pending = {}  # (object, property) -> Change in queue (coalesce)
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)   # worker: есть изменения
+        self._idle = threading.Condition(self._lock)   # flush: очередь пуста
+        self._stopped = False
+        self._busy = False
+        self.enqueued = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.errors = 0
+        self.high_watermark = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_delivery = None
+        self._last_overflow_log = 0.0
+        self._thread = threading.Thread(target=self._run, name=f"dispatcher.{self.name}", daemon=True)
+        self._thread.start()
+
+    def put(self, object_name: str, property_name: str, value) -> bool:
+        """Queue a change; False if it was dropped by the overflow policy"""
+        coalesce = self.overflow == "coalesce"
+        with self._cond:
+            if self._stopped:
+                return False
+            items = self._items
+            if len(items) >= self.capacity:
+                if coalesce:
+                    queued = self._pending.get((object_name, property_name))
+                    if queued is not None:
+                        queued.value = value
+                        self.coalesced += 1
+                        return True
+                if self.overflow == "drop_newest":
+                    self.dropped += 1
+                    self._overflow_warning()
+                    return False
+                oldest = items.popleft()
+                if coalesce:
+                    key = (oldest.object_name, oldest.property_name)
+                    if self._pending.get(key) is oldest:
+                        del self._pending[key]
+                self.dropped += 1
+                self._overflow_warning()
+            change = Change(object_name, property_name, value, time.monotonic())
+            items.append(change)
+            if coalesce:
+                self._pending[(object_name, property_name)] = change
+            self.enqueued += 1
+            if len(items) > self.high_watermark:
+                self.high_watermark = len(items)
+            self._cond.notify()
+        return True
+
+    def _overflow_warning(self):
+        now = time.monotonic()
+        if now - self._last_overflow_log >= _OVERFLOW_LOG_INTERVAL:
+            self._last_overflow_log = now
+            _logger.warning("Change queue of '%s' is full (%s), policy '%s': dropped %s, coalesced %s",
+                            self.name, self.capacity, self.overflow, self.dropped, self.coalesced)
+
+    def _take(self) -> list:
+        with self._cond:
+            while not self._items and not self._stopped:
+                self._cond.wait()
+            items = self._items
+            count = min(len(items), self.batch_size)
+            batch = [items.popleft() for _ in range(count)]
+            if self.overflow == "coalesce":
+                pending = self._pending
+                for change in batch:
+                    key = (change.object_name, change.property_name)
+                    if pending.get(key) is change:
+                        del pending[key]
+            self._busy = bool(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                return
+            try:
+                self._deliver(batch)
+            finally:
+                with self._lock:
+                    self._busy = False
+                    if not self._items:
+                        self._idle.notify_all()
+
+    def _deliver(self, batch: list):
+        lag = time.monotonic() - batch[0].enqueued
+        changes = [(change.object_name, change.property_name, change.value) for change in batch]
+        plugin = self.plugin
+        try:
+            handler = getattr(plugin, "changeProperties", None)
+            if handler is not None:
+                handler(changes)
+            else:
+                for object_name, property_name, value in changes:
+                    try:
+                        plugin.changeProperty(object_name, property_name, value)
+                    except Exception as ex:
+                        self.errors += 1
+                        _logger.exception(ex)
+        except Exception as ex:
+            self.errors += 1
+            _logger.exception(ex)
+        self.batches += 1
+        self.delivered += len(changes)
+        self.last_lag = lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+        self.last_delivery = time.time()
+
+    def depth(self) -> int:
+        return len(self._items)
+
+    def idle(self) -> bool:
+        return not self._items and not self._busy
+
+    def wait_idle(self, deadline: float) -> bool:
+        with self._lock:
+            while self._items or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stop(self, timeout: float) -> None:
+        """Deliver queued changes and stop the worker"""
+        self.wait_idle(time.monotonic() + timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            depth = len(self._items)
+            current_lag = time.monotonic() - self._items[0].enqueued if depth else 0.0
+        return {
+            "depth": depth,
+            "capacity": self.capacity,
+            "high_watermark": self.high_watermark,
+            "overflow": self.overflow,
+            "batch_size": self.batch_size,
+            "batch_handler": _has_batch_handler(self.plugin),
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "avg_batch": round(self.delivered / self.batches, 2) if self.batches else 0,
+            "errors": self.errors,
+            "lag_ms": round(current_lag * 1000.0, 3),
+            "last_lag_ms": round(self.last_lag * 1000.0, 3),
+            "max_lag_ms": round(self.max_lag * 1000.0, 3),
+            "last_delivery": self.last_delivery,
+            "worker_alive": self._thread.is_alive(),
+        }
+
+
+class ChangeDispatcher():
+    """Fan-out of property changes to per-subscriber queues"""
+
+    def __init__(self, queue_size: int = 10000, batch_size: int = 200, overflow: str = "coalesce"):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.overflow = overflow
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._published = 0
+        self._delivered_to = 0
+        self._broadcast = []
+        self._broadcast_key = None
+        self._broadcast_checked = 0.0
+
+    def _queue(self, plugin) -> SubscriberQueue:
+        queue = self._queues.get(plugin.name)
+        if queue is None:
+            with self._lock:
+                queue = self._queues.get(plugin.name)
+                if queue is None:
+                    # плагин может задать свои размер очереди и политику
+                    queue = SubscriberQueue(
+                        plugin,
+                        getattr(plugin, "proxy_queue_size", None) or self.queue_size,
+                        getattr(plugin, "proxy_batch_size", None) or self.batch_size,
+                        getattr(plugin, "proxy_overflow", None) or self.overflow,
+                    )
+                    self._queues[plugin.name] = queue
+        elif queue.plugin is not plugin:
+            # плагин перезагружен - доставляем новому экземпляру
+            queue.plugin = plugin
+        return queue
+
+    def _broadcast_plugins(self) -> list:
+        """Proxy plugins without subscriptions (receive every change)"""
+        now = time.monotonic()
+        key = (len(_registry), subscription_index.version)
+        if key != self._broadcast_key or now - self._broadcast_checked >= _BROADCAST_REFRESH_INTERVAL:
+            self._broadcast = [
+                module["instance"] for module in list(_registry.values())
+                if "proxy" in module["instance"].actions and not subscription_index.is_subscribed(module["instance"].name)
+            ]
+            self._broadcast_key = key
+            self._broadcast_checked = now
+        return self._broadcast
+
+    def _targets(self, object_name: str, property_name: str, parents=None) -> list:
+        """Plugins receiving the change: proxy plugins without subscriptions and matching subscribers"""
+        targets = self._broadcast_plugins()
+        names = subscription_index.match(object_name, property_name, parents)
+        if names:
+            targets = list(targets)
+            for name in names:
+                plugin = getModule(name)
+                if plugin is not None:
+                    targets.append(plugin)
+        return targets
+
+    def publish(self, object_name: str, property_name: str, value, parents=None) -> int:
+        """Queue a change for every receiving plugin
+
+        Args:
+            parents (list, optional): Class names of the object (class subscriptions)
+
+        Returns:
+            int: Count of subscribers
+        """
+        plugins = self._targets(object_name, property_name, parents)
+        for plugin in plugins:
+            try:
+                self._queue(plugin).put(object_name, property_name, value)
+            except Exception as ex:
+                _logger.exception(ex)
+        self._published += 1
+        self._delivered_to += len(plugins)
+        return len(plugins)
+
+    def publish_many(self, changes: list, parents: dict = None) -> int:
+        """Queue [(object, property, value), ...] for every receiving plugin
+
+        Args:
+            parents (dict, optional): Object name -> class names (class subscriptions)
+
+        Returns:
+            int: Count of subscribers
+        """
+        receivers = set()
+        for object_name, property_name, value in changes:
+            plugins = self._targets(object_name, property_name, parents.get(object_name) if parents else None)
+            for plugin in plugins:
+                try:
+                    self._queue(plugin).put(object_name, property_name, value)
+                except Exception as ex:
+                    _logger.exception(ex)
+                receivers.add(plugin.name)
+            self._delivered_to += len(plugins)
+        self._published += len(changes)
+        return len(receivers)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until all queued changes are delivered"""
+        deadline = time.monotonic() + timeout
+        return all(queue.wait_idle(deadline) for queue in list(self._queues.values()))
+
+    def shutdown(self, timeout: float = 2.0) -> None:
+        """Deliver queued changes and stop workers"""
+        with self._lock:
+            queues = list(self._queues.values())
+            self._queues = {}
+        for queue in queues:
+            queue.stop(timeout)
+
+    def get_stats(self) -> dict:
+        subscribers = {name: queue.get_stats() for name, queue in list(self._queues.items())}
+        return {
+            "queue_size": self.queue_size,
+            "batch_size": self.batch_size,
+            "overflow": self.overflow,
+            "published": self._published,
+            "fan_out": round(self._delivered_to / self._published, 3) if self._published else 0,
+            "broadcast": [plugin.name for plugin in self._broadcast_plugins()],
+            "subscriptions": subscription_index.get_stats(),
+            "depth": sum(item["depth"] for item in subscribers.values()),
+            "dropped": sum(item["dropped"] for item in subscribers.values()),
+            "coalesced": sum(item["coalesced"] for item in subscribers.values()),
+            "max_lag_ms": max((item["lag_ms"] for item in subscribers.values()), default=0.0),
+            "subscribers": subscribers,
+        }
+
+
+change_dispatcher = ChangeDispatcher(
+    queue_size=Config.CHANGE_DISPATCHER_QUEUE_SIZE,
+    batch_size=Config.CHANGE_DISPATCHER_BATCH_SIZE,
+    overflow=Config.CHANGE_DISPATCHER_OVERFLOW,
+)
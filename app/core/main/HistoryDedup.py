@@ -0,0 +1,173 @@
+"""
+Exact de-duplication of History rows written by BatchWriter.
+
+A history row is identified by (value_id, added, source); a record with the key
+of an existing row replaces its value (re-import of history with explicit dates,
+journal replay).
+
+  - in a batch: records with the same key collapse in memory (last value wins);
+  - in the DB, with the unique index `ux_history_value_added_source`: every row is
+    written by an upsert of the bulk strategy (INSERT ... ON CONFLICT DO UPDATE /
+    ON DUPLICATE KEY UPDATE), no lookup, so a repeated key (coarse clock, re-flushed
+    journal segment) does not fail the transaction;
+  - without the index: only records with explicit dates are looked up, by a
+    row-value IN `(value_id, added, source) IN (...)` in chunks (uses
+    ix_value_id_added), so the cost grows linearly with the batch and there are no
+    false positives of separate IN lists.
+
+Existing databases get the index with `flask history dedup` (removes duplicate
+rows, keeping the latest one, then creates the index); see `migrate()`. The
+migration is refused when `history.added` keeps whole seconds (MySQL DATETIME
+without fractional precision): there samples of one source within a second share
+a key, so the index would merge distinct rows.
+"""
+import threading
+import time
+
+from sqlalchemy import Index, func, inspect, select, text, tuple_
+
+from app.core.models.Clasess import History
+from app.logging_config import getLogger
+
+_logger = getLogger('history_dedup')
+
+HISTORY_UNIQUE_INDEX = "ux_history_value_added_source"
+# Ключей в одном запросе поиска
+LOOKUP_CHUNK = 500
+
+_state_lock = threading.Lock()
+_unique_index = None  # None - ещё не проверялось
+_fractional_seconds = None
+
+
+def unique_index() -> Index:
+    """Unique index on history (value_id, added, source); TEXT source is indexed by prefix on MySQL"""
+    index = Index(HISTORY_UNIQUE_INDEX, History.value_id, History.added, History.source, unique=True,
+                  mysql_length={"source": 191})
+    # индекс не входит в модель (create_all): создаётся только миграцией
+    History.__table__.indexes.discard(index)
+    return index
+
+
+def has_unique_index(engine=None, refresh: bool = False) -> bool:
+    """The history table has the unique index (cached; refresh after migration)"""
+    global _unique_index
+    with _state_lock:
+        if _unique_index is None or refresh:
+            if engine is None:
+                from app.database import engine
+            try:
+                indexes = inspect(engine).get_indexes(History.__tablename__)
+            except Exception as ex:  # noqa: BLE001 - нет таблицы/прав: работаем без индекса
+                _logger.warning("Can't read indexes of history: %s", ex)
+                indexes = []
+            _unique_index = any(index["name"] == HISTORY_UNIQUE_INDEX and index.get("unique") for index in indexes)
+            if _unique_index and not _has_fractional_seconds(engine):
+                _logger.warning("Index %s is on history.added without fractional seconds: history rows of one "
+                                "source within a second overwrite each other; drop the index or alter the column "
+                                "to DATETIME(6)", HISTORY_UNIQUE_INDEX)
+        return _unique_index
+
+
+def has_fractional_seconds(engine=None) -> bool:
+    """history.added keeps fractions of a second (false for MySQL DATETIME without precision; cached)"""
+    with _state_lock:
+        return _has_fractional_seconds(engine)
+
+
+def _has_fractional_seconds(engine=None) -> bool:
+    global _fractional_seconds
+    if _fractional_seconds is None:
+        if engine is None:
+            from app.database import engine
+        _fractional_seconds = True
+        # SQLite хранит микросекунды в строке, PostgreSQL TIMESTAMP - 6 знаков по умолчанию
+        if engine.dialect.name in ("mysql", "mariadb"):
+            try:
+                columns = inspect(engine).get_columns(History.__tablename__)
+            except Exception as ex:  # noqa: BLE001 - нет таблицы/прав: точность как в модели (секунды)
+                _logger.warning("Can't read columns of history: %s", ex)
+                columns = []
+            added = next((column for column in columns if column["name"] == "added"), None)
+            _fractional_seconds = bool(added is not None and getattr(added["type"], "fsp", None))
+    return _fractional_seconds
+
+
+def find_existing(session, keys) -> dict:
+    """Ids of history rows with the given keys
+
+    Args:
+        keys: iterable of (value_id, added, source)
+
+    Returns:
+        dict: key -> History.id
+    """
+    keys = [key for key in dict.fromkeys(keys) if key[2] is not None]
+    found = {}
+    columns = tuple_(History.value_id, History.added, History.source)
+    for start in range(0, len(keys), LOOKUP_CHUNK):
+        chunk = keys[start:start + LOOKUP_CHUNK]
+        rows = session.execute(
+            select(History.id, History.value_id, History.added, History.source).where(columns.in_(chunk))
+        )
+        for history_id, value_id, added, source in rows:
+            found[(value_id, added, source)] = history_id
+    return found
+
+
+def duplicate_groups(session) -> tuple:
+    """(groups of duplicate keys, rows that would be removed)"""
+    groups = (
+        select(func.count().label("rows"))
+        .select_from(History)
+        .where(History.source.is_not(None))
+        .group_by(History.value_id, History.added, History.source)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    count, rows = session.execute(select(func.count(), func.coalesce(func.sum(groups.c.rows), 0))).one()
+    return int(count or 0), int(rows or 0) - int(count or 0)
+
+
+def migrate(engine=None, dry_run: bool = False) -> dict:
+    """Removes duplicate history rows (the row with the highest id stays) and creates the unique index
+
+    Refused (nothing removed, no index) when history.added keeps whole seconds.
+
+    Returns:
+        dict: groups, removed, index_created, already_present, refused, seconds
+    """
+    from app.database import session_scope
+
+    if engine is None:
+        from app.database import engine
+    started = time.time()
+    result = {"groups": 0, "removed": 0, "index_created": False,
+              "already_present": has_unique_index(engine, refresh=True), "refused": None, "seconds": 0}
+    if not has_fractional_seconds(engine):
+        # DATETIME(0): одинаковый ключ у разных замеров одной секунды - удаление и upsert теряли бы строки
+        result["refused"] = "history.added keeps whole seconds; alter it to DATETIME(6) first"
+    with session_scope() as session:
+        result["groups"], result["removed"] = duplicate_groups(session)
+    if result["refused"] and not dry_run and not result["already_present"]:
+        _logger.warning("History de-duplication migration refused: %s", result["refused"])
+    if dry_run or result["already_present"] or result["refused"]:
+        result["seconds"] = round(time.time() - started, 3)
+        return result
+    if result["removed"]:
+        # производная таблица нужна MySQL (нельзя читать изменяемую таблицу в подзапросе)
+        with engine.begin() as connection:
+            connection.execute(text(
+                "DELETE FROM history WHERE id IN (SELECT id FROM ("
+                "SELECT h.id AS id FROM history h JOIN ("
+                "SELECT value_id, added, source, MAX(id) AS keep_id FROM history "
+                "WHERE source IS NOT NULL GROUP BY value_id, added, source HAVING COUNT(*) > 1"
+                ") d ON h.value_id = d.value_id AND h.added = d.added AND h.source = d.source "
+                "AND h.id <> d.keep_id) doomed)"
+            ))
+    unique_index().create(bind=engine)
+    result["index_created"] = True
+    has_unique_index(engine, refresh=True)
+    result["seconds"] = round(time.time() - started, 3)
+    _logger.info("History de-duplication migration: %s", result)
+    return result
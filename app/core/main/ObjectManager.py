@@ -1,12 +1,12 @@
 import datetime
+import functools
 import time
 from enum import Enum
-from dateutil import parser
 from dateutil.parser._parser import ParserError
 import json
 from sqlalchemy import delete
 from flask_login import current_user
-from app.database import session_scope,row2dict, convert_utc_to_local, convert_local_to_utc, get_now_to_utc
+from app.database import session_scope,row2dict, convert_utc_to_local, convert_local_to_utc, get_now_to_utc, get_engine_dialect
 from app.core.lib.common import (
     getModule,
     getModulesByAction,
@@ -14,32 +14,34 @@ from app.core.lib.common import (
     writeCoreSystemStatsMetric,
     incrementCoreSystemStatsMetric,
     flushBufferedCoreSystemStatsMetrics,
+    projectCoreSystemStats,
     scheduleSystemStatsWsNotify,
     invalidateSystemStatsEnabledCache,
 )
 from app.core.lib.constants import CategoryNotify, SYSTEM_STATS_OBJECT, PropertyType
+from app.core.lib.metrics import metrics_registry, ShardedCounter
 from app.core.main.reactive_chain import chain_enter, chain_exit, chain_format
+from app.core.main.PermissionTable import permission_tables
+from app.core.main.PropertyCodecs import bind_codec
+from app.core.main.ChangeDispatcher import change_dispatcher
+from app.core.main.WriteJournal import open_journal, open_spill_queue, read_segment
+from app.core.main.BulkWrite import create_bulk_writer
+from app.core.main.WritePipeline import FlushTicket, WritePipeline
+from app.core.main.HistoryDedup import has_unique_index as has_history_unique_index, find_existing as find_existing_history
+from app.core.main.WriteBatch import BatchEntry, current_batch, write_collector, collect_writes, count_stat, getWriteBatchStats
 from app.core.models.Clasess import Object, Property, Value, History
 from app.core.lib.common import setTimeout
-from app.core.lib.execute import execute_and_capture_output
+from app.core.lib.execute import execute_and_capture_output, get_code_cache_entry_stats, method_cache_key
 from app.logging_config import getLogger
 from app.core.MonitoredThreadPool import AdaptiveThreadPoolRouter
 from app.configuration import Config
 from app.core.lib.constants import SYSTEM_STATS_SOURCE
 import threading
+import weakref
 from collections import deque
 from dataclasses import dataclass
 from typing import Optional
 import logging
-from app.core.lib.converters.color_value import (
-    parse as parse_color_value,
-    to_universal as to_universal_color,
-    from_universal as from_universal_color,
-    encode as encode_color_value,
-    decode as decode_color_value,
-    detect_format as detect_color_format,
-    merge_xy_luminance,
-)
 
 _logger = getLogger('object')
 
@@ -65,6 +67,12 @@ _poolLinkedProperty = AdaptiveThreadPoolRouter(
 )
 
 
+# Метрики BatchWriter, не проецируемые в SystemStats
+_batch_flush_ms = metrics_registry.histogram("batch_flush_duration_ms", "Batch write transaction duration (ms)")
+_batch_rows_written = metrics_registry.counter("batch_rows_written", "Rows written by BatchWriter", labels=("table",))
+_method_duration_ms = metrics_registry.histogram("method_duration_ms", "Execution time of object methods (ms)")
+
+
 @dataclass
 class ValueUpdate:
     """Структура для хранения обновления значения"""
@@ -79,19 +87,77 @@ class ValueUpdate:
     internal: bool = False  # Если True, запись от SystemStats — не учитывается во внешней статистике
 
 
+# Политики BatchWriter при переполнении очереди записи
+BACKPRESSURE_POLICIES = ('block', 'drop', 'spill')
+
+
 class BatchWriter:
     """Батчер для групповой записи значений и истории в БД"""
 
-    def __init__(self, flush_interval: float = 0.5):
+    def __init__(self, flush_interval: float = 0.5, journal=None, high_watermark: int = 0, max_bytes: int = 0,
+                 chunk_size: int = 0, max_pending: int = 0, low_watermark: int = 0, backpressure: str = 'block',
+                 block_timeout: float = 5.0, spill=None, bulk_strategy: str = 'auto', pipelines: bool = False,
+                 shards: int = 1, history_flush_interval: float = 0.0, history_chunk_size: int = 0):
         """
         Args:
             flush_interval: Интервал в секундах для принудительной записи батча
+            journal: WriteJournal - журнал упреждающей записи (None - без журнала)
+            high_watermark: Досрочная запись, когда в буфере столько записей (0 - только по таймеру)
+            max_bytes: Досрочная запись при таком примерном объёме буфера в байтах (0 - без ограничения)
+            chunk_size: Максимум записей в одной транзакции (0 - весь буфер одной транзакцией)
+            max_pending: Порог ожидающих записи записей для backpressure (0 - без ограничения)
+            low_watermark: Уровень, ниже которого снимается backpressure (0 - половина max_pending)
+            backpressure: Политика при переполнении: block, drop или spill
+            block_timeout: Максимальное ожидание производителя в политике block, сек
+            spill: SpillQueue для политики spill
+            bulk_strategy: Способ записи в БД (auto - по диалекту, orm, sqlite, postgresql, mysql)
+            pipelines: Раздельные пайплайны значений и истории (свои поток, буфер, транзакции, соединение)
+            shards: Шардов каждого пайплайна по value_id (параллельная запись для PostgreSQL/MySQL)
+            history_flush_interval: Сколько части истории ждут следующих перед записью, сек (0 - сразу)
+            history_chunk_size: Максимум записей истории в транзакции (0 - как chunk_size)
         """
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy '{backpressure}', expected one of {BACKPRESSURE_POLICIES}")
         self.flush_interval = flush_interval
+        self.high_watermark = max(0, int(high_watermark or 0))
+        self.max_bytes = max(0, int(max_bytes or 0))
+        self.chunk_size = max(0, int(chunk_size or 0))
+        self.max_pending = max(0, int(max_pending or 0))
+        self.low_watermark = min(int(low_watermark or 0) or self.max_pending // 2, self.max_pending)
+        self.backpressure = backpressure
+        self.block_timeout = block_timeout
+        self._journal = journal
+        self._bulk = create_bulk_writer(bulk_strategy)
+        self._spill = spill if backpressure == 'spill' else None
+        self._recovered_spill = spill
         self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)  # ожидание производителей (backpressure)
+        # С пайплайнами батч берётся и раздаётся под одним замком: параллельные flush
+        # (тик, flush_sync/shutdown, replay_journal) не меняют порядок записей значения
+        self._dispatch_lock = threading.Lock()
+        self._wake = threading.Event()  # досрочная запись
         self._batch: list[ValueUpdate] = []
+        self._batch_bytes = 0
+        self._inflight: list[list[ValueUpdate]] = []  # батчи, которые сейчас пишутся в БД
+        self._inflight_records = 0  # записи в _inflight, ещё не записанные в БД
         self._stop_event = threading.Event()
         self._worker_thread: Optional[threading.Thread] = None
+        self._pipelines: dict[str, list[WritePipeline]] = {}
+        if pipelines:
+            shards = max(1, int(shards or 1))
+            self._pipelines = {
+                "values": [
+                    WritePipeline(f"values-{shard}", functools.partial(self._write_chunk, history=False),
+                                  chunk_size=self.chunk_size)
+                    for shard in range(shards)
+                ],
+                "history": [
+                    WritePipeline(f"history-{shard}", functools.partial(self._write_chunk, values=False),
+                                  flush_interval=history_flush_interval,
+                                  chunk_size=history_chunk_size or self.chunk_size)
+                    for shard in range(shards)
+                ],
+            }
         # Статистика
         self._total_added = 0  # Всего добавлено записей
         self._total_flushed = 0  # Всего выполнено записей в БД
@@ -106,38 +172,170 @@ class BatchWriter:
         self._last_flush_time: Optional[datetime.datetime] = None
         self._last_error: Optional[str] = None
         self._last_error_time: Optional[datetime.datetime] = None
+        # Статистика размера буфера и backpressure
+        self._max_depth = 0
+        self._early_flushes = 0
+        self._blocked = 0
+        self._block_wait_total = 0.0
+        self._block_wait_max = 0.0
+        self._block_timeouts = 0
+        self._dropped = 0
+        self._spilled = 0
+        self._refilled = 0
+        self._last_drop_warning = 0.0
+        self._chunk_rows_last = 0
+        self._chunk_rows_total = 0
         self._start_worker()
 
     def _start_worker(self):
-        """Запускает фоновый поток для периодической записи батчей"""
+        """Запускает фоновый поток для периодической и досрочной записи батчей"""
         def worker():
             while not self._stop_event.is_set():
-                self._stop_event.wait(timeout=self.flush_interval)
-                if not self._stop_event.is_set():
-                    # Выполняем запись напрямую в этом потоке
-                    self._flush_internal()
+                self._wake.wait(timeout=self.flush_interval)
+                self._wake.clear()
+                if self._stop_event.is_set():
+                    break
+                # Выполняем запись напрямую в этом потоке (с пайплайнами - раздаём им); при всплеске - до опустошения буфера
+                while True:
+                    self._flush_internal(wait=False)
+                    # Проекция метрик ядра в SystemStats (редко, system_stats_projection_interval)
+                    try:
+                        projectCoreSystemStats()
+                    except Exception as ex:
+                        _logger.exception("SystemStats projection failed: %s", ex)
+                    if self._stop_event.is_set() or not (self._over_watermark() or self._refill_from_spill()):
+                        break
 
         self._worker_thread = threading.Thread(target=worker, daemon=True, name="BatchWriter")
         self._worker_thread.start()
 
+    @staticmethod
+    def _record_size(update: ValueUpdate) -> int:
+        """Примерный размер записи в буфере, байт"""
+        size = 64 + len(update.source or "")
+        for value in (update.value, update.history_value):
+            # значение может быть не строкой (bool/число из setProperty)
+            size += len(value) if isinstance(value, str) else 16
+        return size
+
+    def pending_records(self) -> int:
+        """Записи, ещё не записанные в БД (буфер и текущая запись)"""
+        return len(self._batch) + self._inflight_records
+
+    def _over_watermark(self) -> bool:
+        with self._lock:
+            return bool((self.high_watermark and len(self._batch) >= self.high_watermark)
+                        or (self.max_bytes and self._batch_bytes >= self.max_bytes))
+
+    def _notify_space(self):
+        """Будит производителей, ожидающих места (вызывается под self._lock)"""
+        if not self.max_pending or self.pending_records() <= self.low_watermark:
+            self._space.notify_all()
+
+    def _refill_from_spill(self) -> bool:
+        """Возвращает в буфер самый старый файл spill, когда очередь опустилась ниже low_watermark"""
+        spill = self._spill
+        if spill is None or not spill.pending:
+            return False
+        with self._lock:
+            if self.pending_records() >= self.low_watermark:
+                return False
+            updates = [ValueUpdate(**record) for record in spill.take()]
+            if updates:
+                if self._journal is not None:
+                    self._journal.append(updates)
+                self._batch.extend(updates)
+                self._batch_bytes += sum(self._record_size(update) for update in updates)
+                self._refilled += len(updates)
+        return True
+
+    def _enqueue(self, updates):
+        internal = all(update.internal for update in updates)
+        size = sum(self._record_size(update) for update in updates)
+        count = len(updates)
+        with self._lock:
+            # SystemStats и сам поток записи не ждут (иначе поток записи заблокирует сам себя)
+            limited = bool(self.max_pending) and not internal \
+                and threading.current_thread() is not self._worker_thread
+            if limited and self.pending_records() + count > self.max_pending:
+                if self.backpressure == 'block':
+                    started = time.monotonic()
+                    self._blocked += 1
+                    self._wake.set()
+                    deadline = started + self.block_timeout
+                    while self.pending_records() + count > self.max_pending \
+                            and not self._stop_event.is_set():
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            # БД не успевает - запись принимается, чтобы не потерять данные
+                            self._block_timeouts += 1
+                            break
+                        self._space.wait(timeout=remaining)
+                    waited = time.monotonic() - started
+                    self._block_wait_total += waited
+                    self._block_wait_max = max(self._block_wait_max, waited)
+                elif self.backpressure == 'drop':
+                    self._dropped += count
+                    self._total_added += count
+                    now = time.monotonic()
+                    if now - self._last_drop_warning > 10.0:
+                        self._last_drop_warning = now
+                        _logger.warning("BatchWriter queue is full (%s records), dropped %s updates so far",
+                                        self.pending_records(), self._dropped)
+                    return
+                elif self._spill is not None and self._spill.append(updates):
+                    self._spilled += count
+                    self._total_added += count
+                    self._wake.set()
+                    return
+            elif limited and self._spill is not None and self._spill.pending:
+                # пока на диске есть более старые записи, новые идут за ними (порядок изменений)
+                if self._spill.append(updates):
+                    self._spilled += count
+                    self._total_added += count
+                    self._wake.set()
+                    return
+            if self._journal is not None:
+                self._journal.append(updates)
+            self._batch.extend(updates)
+            self._batch_bytes += size
+            self._total_added += count
+            self._total_internal_added += sum(1 for update in updates if update.internal)
+            depth = self.pending_records()
+            if depth > self._max_depth:
+                self._max_depth = depth
+            if (self.high_watermark and len(self._batch) >= self.high_watermark) \
+                    or (self.max_bytes and self._batch_bytes >= self.max_bytes):
+                if not self._wake.is_set():
+                    self._early_flushes += 1
+                    self._wake.set()
+
     def add(self, value_update: ValueUpdate):
         """Добавляет запись в батч"""
-        with self._lock:
-            self._batch.append(value_update)
-            self._total_added += 1
-            if value_update.internal:
-                self._total_internal_added += 1
+        self._enqueue((value_update,))
+
+    def add_many(self, value_updates: list):
+        """Добавляет набор записей одним блоком (одна запись в БД, если блок не больше chunk_size)"""
+        if not value_updates:
+            return
+        self._enqueue(list(value_updates))
 
     def flush(self):
-        """Принудительно записывает текущий батч (асинхронно)"""
-        # Запускаем запись в отдельном потоке, чтобы не блокировать вызывающий поток
-        thread = threading.Thread(target=self._flush_internal, daemon=True, name="BatchWriterFlush")
-        thread.start()
+        """Принудительно записывает текущий батч (асинхронно, в фоновом потоке)"""
+        self._wake.set()
 
     def flush_sync(self):
         """Принудительно и синхронно записывает текущий батч (для init-сценариев)"""
         self._flush_internal()
 
+    def pending_value_ids(self) -> set:
+        """value_id, которые ещё не записаны в БД (в очереди или в текущей записи)"""
+        with self._lock:
+            ids = {update.value_id for update in self._batch}
+            for batch in self._inflight:
+                ids.update(update.value_id for update in batch)
+        return ids
+
     def _append_flush_history(
         self,
         *,
@@ -158,40 +356,137 @@ class BatchWriter:
             "timestamp": convert_utc_to_local(get_now_to_utc()).isoformat(),
         })
 
-    def _flush_internal(self):
-        """Внутренний метод для записи батча (вызывается в отдельном потоке)"""
-        start_time = time.time()
-        values_count = 0
-        history_count = 0
+    def _flush_internal(self, replay: list = None, wait: bool = True) -> bool:
+        """Внутренний метод для записи батча (вызывается в отдельном потоке)
+
+        Буфер записывается частями не больше chunk_size записей, каждая часть - своей транзакцией
+        (короткие блокировки SQLite при больших всплесках). С пайплайнами буфер раздаётся
+        пайплайнам значений и истории (_dispatch).
+
+        Args:
+            replay: Записи из журнала (replay_journal) вместо текущего батча
+            wait: С пайплайнами - ждать записи всех частей
+
+        Returns:
+            bool: False при ошибке записи в БД
+        """
+        if self._pipelines:
+            urgent = wait or replay is not None
+            with self._dispatch_lock:
+                batch, segment = self._take_batch(replay)
+                if not batch:
+                    return True
+                ticket = self._dispatch(batch, segment, urgent)
+            if not urgent:
+                return True
+            ticket.wait()
+            return ticket.ok
+
+        batch, segment = self._take_batch(replay)
+        if not batch:
+            return True
 
+        ok = True
         try:
+            chunk_size = self.chunk_size or len(batch)
+            for start in range(0, len(batch), chunk_size):
+                chunk = batch[start:start + chunk_size]
+                try:
+                    if not self._write_chunk(chunk):
+                        ok = False
+                finally:
+                    with self._lock:
+                        self._inflight_records -= len(chunk)
+                        self._notify_space()
+        finally:
+            if segment is not None:
+                if ok:
+                    self._journal.discard(segment)
+                else:
+                    # запись в БД не прошла - сегмент остаётся для replay при старте
+                    self._journal.retain(segment)
             with self._lock:
-                if not self._batch:
-                    execution_time = time.time() - start_time
-                    self._append_flush_history(
-                        duration_seconds=execution_time,
-                        batch_size=0,
-                        values_count=0,
-                        history_count=0,
-                        success=True,
-                    )
-                    return
-                batch = self._batch[:]
-                self._batch.clear()
+                self._inflight = [item for item in self._inflight if item is not batch]
+        return ok
 
-            batch_size = len(batch)
+    def _take_batch(self, replay: list = None) -> tuple:
+        """Забирает буфер (или записи replay) в запись: (батч, сегмент журнала); пустой батч - только в историю flush"""
+        start_time = time.time()
+        segment = None
+        with self._lock:
+            if replay is not None:
+                batch = replay
+            else:
+                batch = self._batch
+                self._batch = []
+                self._batch_bytes = 0
+                # записи буфера - ровно в запечатанном сегменте журнала
+                if batch and self._journal is not None:
+                    segment = self._journal.seal()
             if not batch:
-                execution_time = time.time() - start_time
-                with self._lock:
-                    self._append_flush_history(
-                        duration_seconds=execution_time,
-                        batch_size=0,
-                        values_count=0,
-                        history_count=0,
-                        success=True,
-                    )
-                return
+                self._append_flush_history(
+                    duration_seconds=time.time() - start_time,
+                    batch_size=0,
+                    values_count=0,
+                    history_count=0,
+                    success=True,
+                )
+                return batch, None
+            self._inflight.append(batch)
+            self._inflight_records += len(batch)
+        return batch, segment
+
+    def _dispatch(self, batch: list, segment, urgent: bool) -> FlushTicket:
+        """Раздаёт батч пайплайнам: значения и история, по шардам value_id % shards
+
+        Вызывается под _dispatch_lock; ожидание записи - у вызывающего (ticket.wait()).
+        """
+        shards = len(self._pipelines["values"])
+        values = [[] for _ in range(shards)]
+        history = [[] for _ in range(shards)]
+        for update in batch:
+            shard = update.value_id % shards
+            if not update.history_only:
+                values[shard].append(update)
+            if update.save_history and update.history_value is not None:
+                history[shard].append(update)
+        parts = [
+            (pipeline, part)
+            for kind, split in (("values", values), ("history", history))
+            for pipeline, part in zip(self._pipelines[kind], split)
+            if part
+        ]
+
+        def done(ticket):
+            if segment is not None:
+                if ticket.ok:
+                    self._journal.discard(segment)
+                else:
+                    # запись в БД не прошла - сегмент остаётся для replay при старте
+                    self._journal.retain(segment)
+            with self._lock:
+                self._inflight = [item for item in self._inflight if item is not batch]
+                self._inflight_records -= len(batch)
+                self._notify_space()
+
+        ticket = FlushTicket(len(batch), len(parts), done)
+        for pipeline, part in parts:
+            pipeline.submit(ticket, part, urgent=urgent)
+        return ticket
+
+    def _write_chunk(self, batch: list, values: bool = True, history: bool = True) -> bool:
+        """Записывает часть буфера одной транзакцией
 
+        Args:
+            values: Записывать значения (Value)
+            history: Записывать историю (History)
+        """
+        start_time = time.time()
+        values_count = 0
+        history_count = 0
+        batch_size = len(batch)
+
+        try:
             with session_scope() as session:
                 # Группируем обновления по value_id (последнее значение для каждого value_id)
                 value_updates = {}
@@ -201,7 +496,7 @@ class BatchWriter:
 
                 for update_item in batch:
                     # Сохраняем последнее значение для каждого value_id только если не history_only
-                    if not update_item.history_only:
+                    if values and not update_item.history_only:
                         value_updates[update_item.value_id] = {
                             'value': update_item.value,
                             'changed': update_item.changed,
@@ -210,7 +505,7 @@ class BatchWriter:
                         internal_by_value_id[update_item.value_id] = update_item.internal
 
                     # Собираем записи истории
-                    if update_item.save_history and update_item.history_value is not None:
+                    if history and update_item.save_history and update_item.history_value is not None:
                         history_records.append({
                             'value_id': update_item.value_id,
                             'value': update_item.history_value,
@@ -221,90 +516,60 @@ class BatchWriter:
                         if update_item.internal:
                             internal_history_count += 1
 
-                # Bulk update для значений
+                # Bulk update для значений (стратегия по диалекту БД)
                 if value_updates:
                     values_count = len(value_updates)
-                    # Используем bulk_update_mappings для эффективности
-                    # Если не поддерживается, используем цикл с update
-                    try:
-                        update_mappings = [
-                            {
-                                'id': value_id,
-                                'value': data['value'],
-                                'changed': data['changed'],
-                                'source': data['source']
-                            }
-                            for value_id, data in value_updates.items()
-                        ]
-                        session.bulk_update_mappings(Value, update_mappings)
-                    except (AttributeError, TypeError):
-                        # Fallback для старых версий SQLAlchemy
-                        from sqlalchemy import update
-                        for value_id, data in value_updates.items():
-                            stmt = update(Value).where(Value.id == value_id).values(
-                                value=data['value'],
-                                changed=data['changed'],
-                                source=data['source']
-                            )
-                            session.execute(stmt)
+                    update_mappings = [
+                        {
+                            'id': value_id,
+                            'value': data['value'],
+                            'changed': data['changed'],
+                            'source': data['source']
+                        }
+                        for value_id, data in value_updates.items()
+                    ]
+                    self._bulk.update_values(session, update_mappings)
 
                 # Bulk insert/update для истории
                 if history_records:
-                    history_count = 0
-                    # Группируем по (value_id, added, source) для проверки дубликатов
+                    # Дубликаты в батче схлопываются по (value_id, added, source) - побеждает последняя запись
                     history_by_key = {}
                     history_with_explicit_date = []
                     for record in history_records:
                         key = (record['value_id'], record['added'], record['source'])
                         history_by_key[key] = record
-                        # Сохраняем информацию о том, была ли дата указана явно
-                        # Проверяем дубликаты только для записей с явно указанной датой
+                        # Проверяем дубликаты в БД только для записей с явно указанной датой
+                        # Если дата не указана явно (используется текущее время), вероятность дубликата крайне мала
                         if record.get('explicit_date', False):
                             history_with_explicit_date.append(key)
-                    
-                    # Проверяем существующие записи только для записей с явно указанной датой
-                    # Если дата не указана явно (используется текущее время), вероятность дубликата крайне мала
-                    existing_history = {}
-                    if history_with_explicit_date:
-                        # Собираем только записи с явно указанными датами для проверки
-                        explicit_records = [history_by_key[key] for key in history_with_explicit_date]
-                        value_ids = set(r['value_id'] for r in explicit_records)
-                        added_dates = set(r['added'] for r in explicit_records)
-                        sources = set(r['source'] for r in explicit_records)
-                        existing_records = session.query(History).filter(
-                            History.value_id.in_(value_ids),
-                            History.added.in_(added_dates),
-                            History.source.in_(sources)
-                        ).all()
-                        for record in existing_records:
-                            key = (record.value_id, record.added, record.source)
-                            existing_history[key] = record
-                    
-                    # Разделяем на обновления и вставки
-                    history_inserts = []
-                    
-                    for key, record in history_by_key.items():
-                        if key in existing_history:
-                            # Обновляем существующую запись только если source совпадает
-                            existing_record = existing_history[key]
-                            existing_record.value = record['value']
-                            # source уже совпадает, так как он в ключе
-                            # Обновление применяется напрямую к объекту, будет сохранено при commit
-                            history_count += 1
-                        else:
-                            # Вставляем новую запись (удаляем explicit_date из записи перед вставкой)
-                            insert_record = {k: v for k, v in record.items() if k != 'explicit_date'}
-                            history_inserts.append(insert_record)
-                            history_count += 1
-                    
-                    # Выполняем bulk insert для новых записей
-                    if history_inserts:
-                        session.bulk_insert_mappings(History, history_inserts)
-                    
-                    # Обновления уже применены к объектам, они будут сохранены при commit
+                    rows = [
+                        {k: v for k, v in record.items() if k != 'explicit_date'}
+                        for record in history_by_key.values()
+                    ]
+                    history_count = len(rows)
+
+                    if has_history_unique_index():
+                        # уникальный индекс: upsert без поиска существующих строк; и строки без явной даты -
+                        # совпадение ключа (грубые часы, повторная запись сегмента) не должно валить транзакцию
+                        self._bulk.upsert_history(session, rows)
+                    else:
+                        # точный поиск по кортежам (value_id, added, source), линейно по размеру батча
+                        existing_history = find_existing_history(session, history_with_explicit_date) \
+                            if history_with_explicit_date else {}
+                        history_updates = []
+                        history_inserts = []
+                        for key, row in zip(history_by_key, rows):
+                            if key in existing_history:
+                                history_updates.append({'id': existing_history[key], 'value': row['value']})
+                            else:
+                                history_inserts.append(row)
+                        if history_updates:
+                            self._bulk.update_history(session, history_updates)
+                        if history_inserts:
+                            self._bulk.insert_history(session, history_inserts)
 
                 session.commit()
-                
+
                 # Обновляем статистику при успехе
                 execution_time = time.time() - start_time
                 internal_values = sum(
@@ -317,6 +582,9 @@ class BatchWriter:
                     self._total_internal_values_updated += internal_values
                     self._total_internal_history_inserted += internal_history_count
                     self._last_flush_time = get_now_to_utc()
+                    self._chunk_rows_last = batch_size
+                    self._chunk_rows_total += batch_size
+                    block_wait_ms = self._block_wait_total * 1000.0
                     self._append_flush_history(
                         duration_seconds=execution_time,
                         batch_size=batch_size,
@@ -326,9 +594,14 @@ class BatchWriter:
                     )
                 ext_values = values_count - internal_values
                 ext_history = history_count - internal_history_count
+                _batch_flush_ms.observe(execution_time * 1000.0)
+                if values_count:
+                    _batch_rows_written.inc(values_count, table="values")
+                if history_count:
+                    _batch_rows_written.inc(history_count, table="history")
                 writeCoreSystemStatsMetric(
                     "batch_queue_size",
-                    0,
+                    self.pending_records(),
                     description="Current batch queue size",
                     prop_type=PropertyType.Integer,
                     source=SYSTEM_STATS_SOURCE,
@@ -340,6 +613,21 @@ class BatchWriter:
                     prop_type=PropertyType.Float,
                     source=SYSTEM_STATS_SOURCE,
                 )
+                writeCoreSystemStatsMetric(
+                    "batch_rows_per_flush",
+                    batch_size,
+                    description="Records written by the last batch transaction",
+                    prop_type=PropertyType.Integer,
+                    source=SYSTEM_STATS_SOURCE,
+                )
+                if self.max_pending and self.backpressure == 'block':
+                    writeCoreSystemStatsMetric(
+                        "batch_producer_wait_ms",
+                        round(block_wait_ms, 2),
+                        description="Total time producers waited on a full batch queue (ms)",
+                        prop_type=PropertyType.Float,
+                        source=SYSTEM_STATS_SOURCE,
+                    )
                 if ext_values > 0:
                     incrementCoreSystemStatsMetric(
                         "batch_values_updated",
@@ -354,6 +642,7 @@ class BatchWriter:
                         description="External history inserts",
                         source=SYSTEM_STATS_SOURCE,
                     )
+            return True
 
         except Exception as ex:
             error_msg = str(ex)
@@ -381,31 +670,137 @@ class BatchWriter:
                     success=False,
                     error=error_msg,
                 )
-        finally:
-            flushBufferedCoreSystemStatsMetrics()
+            return False
 
     def shutdown(self, wait: bool = True):
         """Корректное завершение работы батчера"""
         self._stop_event.set()
-        # Принудительно записываем оставшиеся данные
+        # Будим фоновый поток и ожидающих производителей
         self.flush()
+        with self._lock:
+            self._space.notify_all()
         # Ждем завершения всех задач записи
         if wait:
             # Даем время на завершение текущей записи
             time.sleep(0.1)
-            # Выполняем финальную запись синхронно, если есть данные
-            with self._lock:
-                if self._batch:
-                    batch = self._batch[:]
-                    self._batch.clear()
-                else:
-                    batch = []
-            if batch:
+            # Последняя проекция метрик: её записи попадают в финальный flush
+            try:
+                flushBufferedCoreSystemStatsMetrics()
+            except Exception as ex:
+                _logger.exception("SystemStats projection failed: %s", ex)
+            # Выполняем финальную запись синхронно, если есть данные (включая вытесненные на диск)
+            self._flush_internal()
+            while self._refill_from_spill():
                 self._flush_internal()
         # Ждем завершения фонового потока
         if self._worker_thread and self._worker_thread.is_alive():
             self._worker_thread.join(timeout=2.0)
+        for pipelines in self._pipelines.values():
+            for pipeline in pipelines:
+                # без wait незаписанные части остаются в журнале
+                pipeline.stop(drain=wait)
+        if self._spill is not None:
+            # невозвращённые файлы spill записываются при следующем запуске (replay_journal)
+            self._spill.close()
+        if self._journal is not None:
+            # незаписанное (ошибка БД, wait=False) остаётся в журнале до следующего запуска
+            self._journal.close()
+
+    def replay_journal(self) -> dict:
+        """Записывает в БД записи журнала и файлы spill, оставшиеся от предыдущего запуска (до загрузки объектов)
+
+        Повтор идемпотентен: значение обновляется, только если оно новее записанного в БД,
+        история проверяется на дубликаты по (value_id, added, source).
+
+        Returns:
+            dict: segments, spilled, records, applied, skipped, torn, success
+        """
+        result = {"segments": 0, "spilled": 0, "records": 0, "applied": 0, "skipped": 0, "torn": 0, "success": True}
+        journal = self._journal
+        spill = self._recovered_spill
+        journal_paths = list(journal.recovered) if journal is not None else []
+        spill_paths = list(spill.recovered) if spill is not None else []
+        if not journal_paths and not spill_paths:
+            return result
+        updates = []
+        for path in journal_paths + spill_paths:
+            try:
+                records, torn = read_segment(path)
+            except (OSError, ValueError) as ex:
+                _logger.error("Journal segment %s is unreadable: %s", path, ex)
+                result["success"] = False
+                return result
+            if torn:
+                result["torn"] += 1
+                _logger.warning("Journal segment %s ends with an incomplete record", path)
+            updates.extend(ValueUpdate(**record) for record in records)
+        result["segments"] = len(journal_paths)
+        result["spilled"] = len(spill_paths)
+        result["records"] = len(updates)
+        if spill_paths:
+            # журнал и spill пересекаются по времени - последним должно записаться самое новое значение
+            updates.sort(key=lambda update: update.changed or datetime.datetime.min)
+
+        # значения новее записанных в БД; строки Value, которых больше нет, пропускаются
+        stored = {}
+        value_ids = list({update.value_id for update in updates})
+        with session_scope() as session:
+            for start in range(0, len(value_ids), 500):
+                chunk = value_ids[start:start + 500]
+                for value_id, changed in session.query(Value.id, Value.changed).filter(Value.id.in_(chunk)):
+                    stored[value_id] = changed
+        batch = []
+        for update in updates:
+            if update.value_id not in stored:
+                result["skipped"] += 1
+                continue
+            changed = stored[update.value_id]
+            if not update.history_only and changed is not None and update.changed is not None \
+                    and changed >= update.changed:
+                if not (update.save_history and update.history_value is not None):
+                    result["skipped"] += 1
+                    continue
+                update.history_only = True
+            # дубликаты истории проверяются только для явных дат
+            update.explicit_date = True
+            batch.append(update)
+        result["applied"] = len(batch)
+
+        if batch and not self._flush_internal(replay=batch):
+            result["success"] = False
+            _logger.error("Journal replay failed, segments are kept: %s", journal_paths + spill_paths)
+            return result
+        if journal is not None:
+            journal.remove(journal_paths)
+            journal.recovered = []
+            journal.replayed += len(batch)
+            journal.torn += result["torn"]
+        if spill is not None:
+            spill.remove(spill_paths)
+            spill.recovered = []
+        _logger.info("Journal replayed: %s", result)
+        return result
     
+    def get_metrics(self) -> dict:
+        """Счётчики для /metrics без истории flush и форматирования дат"""
+        with self._lock:
+            last_flush = self._last_flush_time
+            stats = {
+                "pending": self.pending_records(),
+                "pending_bytes": self._batch_bytes,
+                "flushed": self._total_flushed,
+                "errors": self._total_errors + self._total_internal_errors,
+                "dropped": self._dropped,
+                "spilled": self._spilled,
+                "block_wait": self._block_wait_total,
+            }
+        stats["since_flush"] = (get_now_to_utc() - last_flush).total_seconds() if last_flush else None
+        stats["pipelines"] = {
+            pipeline.name: pipeline.get_stats()
+            for pipelines in self._pipelines.values() for pipeline in pipelines
+        }
+        return stats
+
     def get_stats(self):
         """Возвращает статистику работы батчера"""
         with self._lock:
@@ -426,8 +821,40 @@ class BatchWriter:
             ext_flushed = max(self._total_flushed, 1)
             ext_errors = self._total_errors
 
+            spill_pending = self._spill.pending if self._spill is not None else 0
+            backpressure = {
+                "policy": self.backpressure if self.max_pending else None,
+                "high_watermark": self.high_watermark,
+                "max_bytes": self.max_bytes,
+                "chunk_size": self.chunk_size,
+                "max_pending": self.max_pending,
+                "low_watermark": self.low_watermark,
+                "pending": self.pending_records(),
+                "pending_bytes": self._batch_bytes,
+                "max_depth": self._max_depth,
+                "early_flushes": self._early_flushes,
+                "blocked": self._blocked,
+                "block_wait_total_ms": round(self._block_wait_total * 1000.0, 2),
+                "block_wait_max_ms": round(self._block_wait_max * 1000.0, 2),
+                "block_timeouts": self._block_timeouts,
+                "dropped": self._dropped,
+                "spilled": self._spilled,
+                "spill_pending": spill_pending,
+                "refilled": self._refilled,
+                "spill": self._spill.get_stats() if self._spill is not None else None,
+                "rows_per_flush_last": self._chunk_rows_last,
+                "rows_per_flush_avg": round(self._chunk_rows_total / self._total_flushed, 1) if self._total_flushed else 0,
+            }
+
             return {
                 "flush_interval": self.flush_interval,
+                "bulk_strategy": self._bulk.name,
+                "pipelines": {
+                    pipeline.name: pipeline.get_stats()
+                    for pipelines in self._pipelines.values() for pipeline in pipelines
+                },
+                "backpressure": backpressure,
+                "journal": self._journal.get_stats() if self._journal is not None else {"enabled": False},
                 "current_batch_size": current_batch_size,
                 "worker_thread_alive": self._worker_thread.is_alive() if self._worker_thread else False,
                 "total_added": self._total_added,
@@ -450,6 +877,11 @@ class BatchWriter:
                     "avg_batch_size": round(ext_added / ext_flushed, 2) if self._total_flushed > 0 else 0,
                     "error_rate": round((ext_errors / ext_flushed * 100), 2) if self._total_flushed > 0 else 0
                 },
+                "scoped_batches": getWriteBatchStats(),
+                "history_policy": {
+                    "written": _history_policy_totals.value('written') or 0,
+                    "suppressed": _history_policy_totals.value('suppressed') or 0,
+                },
                 "external": {
                     "total_added": ext_added,
                     "total_values_updated": ext_values,
@@ -459,8 +891,36 @@ class BatchWriter:
             }
 
 
+def _writer_shards(shards: int) -> int:
+    """Шарды пайплайнов из конфигурации: у SQLite один писатель, параллельная запись не ускоряет"""
+    if shards and shards > 1 and get_engine_dialect() == 'sqlite':
+        _logger.warning("batch_writer_shards=%s ignored for SQLite (single writer), using 1", shards)
+        return 1
+    return shards or 1
+
+
 # Глобальный экземпляр батчера
-_batch_writer = BatchWriter(flush_interval=Config.BATCH_WRITER_FLUSH_INTERVAL)
+_batch_writer = BatchWriter(
+    flush_interval=Config.BATCH_WRITER_FLUSH_INTERVAL,
+    journal=open_journal(
+        Config.BATCH_WRITER_JOURNAL_ENABLED,
+        Config.BATCH_WRITER_JOURNAL_PATH,
+        Config.BATCH_WRITER_JOURNAL_FSYNC_INTERVAL,
+    ),
+    high_watermark=Config.BATCH_WRITER_HIGH_WATERMARK,
+    max_bytes=Config.BATCH_WRITER_MAX_BYTES,
+    chunk_size=Config.BATCH_WRITER_CHUNK_SIZE,
+    max_pending=Config.BATCH_WRITER_MAX_PENDING,
+    low_watermark=Config.BATCH_WRITER_LOW_WATERMARK,
+    backpressure=Config.BATCH_WRITER_BACKPRESSURE,
+    block_timeout=Config.BATCH_WRITER_BLOCK_TIMEOUT,
+    spill=open_spill_queue(Config.BATCH_WRITER_BACKPRESSURE, Config.BATCH_WRITER_SPILL_PATH),
+    bulk_strategy=Config.BATCH_WRITER_BULK_STRATEGY,
+    pipelines=Config.BATCH_WRITER_PIPELINES,
+    shards=_writer_shards(Config.BATCH_WRITER_SHARDS),
+    history_flush_interval=Config.BATCH_WRITER_HISTORY_FLUSH_INTERVAL,
+    history_chunk_size=Config.BATCH_WRITER_HISTORY_CHUNK_SIZE,
+)
 
 
 def shutdown_batch_writer():
@@ -468,6 +928,11 @@ def shutdown_batch_writer():
     _batch_writer.shutdown(wait=True)
 
 
+def replay_batch_journal() -> dict:
+    """Повтор журнала BatchWriter после сбоя (вызывается при старте до загрузки объектов)"""
+    return _batch_writer.replay_journal()
+
+
 class TypeOperation(Enum):
     """ Type operation """
     Get = "get"
@@ -475,9 +940,237 @@ class TypeOperation(Enum):
     Call = "call"
     Edit = "edit"
 
-_USERS_ADMIN_SET_PROPERTIES = frozenset({
-    'role', 'password', 'apikey', 'home_page', 'timezone', 'image', 'lastLogin',
-})
+# Ключи params политики записи истории
+HISTORY_POLICY_PARAMS = ('history_deadband', 'history_deadband_percent', 'history_min_interval', 'history_heartbeat')
+
+# Суммарные счётчики политик истории (по всем свойствам): 'written', 'suppressed'
+_history_policy_totals = ShardedCounter()
+
+
+@dataclass(frozen=True)
+class HistoryPolicy:
+    """History persistence policy of a property (params: history_deadband, history_deadband_percent,
+    history_min_interval, history_heartbeat). Applied in memory before a history row is queued."""
+    deadband: float = 0.0
+    deadband_percent: float = 0.0
+    min_interval: float = 0.0
+    heartbeat: float = 0.0
+
+    @classmethod
+    def from_params(cls, params):
+        """Policy from property params or None if no policy is set"""
+        if not isinstance(params, dict) or not any(params.get(key) for key in HISTORY_POLICY_PARAMS):
+            return None
+        values = []
+        for key in HISTORY_POLICY_PARAMS:
+            try:
+                value = float(params.get(key) or 0)
+            except (TypeError, ValueError):
+                _logger.warning("Invalid history policy param %s=%r", key, params.get(key))
+                value = 0.0
+            values.append(max(value, 0.0))
+        if not any(values):
+            return None
+        return cls(*values)
+
+    def allows(self, state, value, changed) -> bool:
+        """Decide whether a history row is written; state = [last_value, last_changed, written, suppressed]"""
+        last_value, last_changed = state[0], state[1]
+        if last_changed is None or changed is None:
+            return True
+        elapsed = (changed - last_changed).total_seconds()
+        if self.heartbeat and elapsed >= self.heartbeat:
+            return True
+        if self.min_interval and elapsed < self.min_interval:
+            return False
+        if (self.deadband or self.deadband_percent) and _is_number(value) and _is_number(last_value):
+            threshold = max(self.deadband, abs(last_value) * self.deadband_percent / 100.0)
+            if abs(value - last_value) < threshold:
+                return False
+        return True
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# Ключи params режима доставки в связанные плагины
+LINKED_DELIVERY_PARAMS = ('linked_delivery', 'linked_min_interval')
+LINKED_DELIVERY_MODES = ('all', 'latest')
+
+
+@dataclass(frozen=True)
+class LinkedDelivery:
+    """Delivery mode of linked-property notifications (params: linked_delivery, linked_min_interval;
+    or plugin attributes of the same names).
+
+    latest - latest value wins: one in-flight changeLinkedProperty per (plugin, object, property),
+    values written meanwhile replace the pending one; min_interval - minimum seconds between calls."""
+    latest: bool = False
+    min_interval: float = 0.0
+
+    @classmethod
+    def from_params(cls, params, owner=None):
+        """Mode from a params dict (or plugin attributes) or None if not set"""
+        if not isinstance(params, dict) or not any(params.get(key) for key in LINKED_DELIVERY_PARAMS):
+            return None
+        mode = params.get('linked_delivery')
+        if mode and mode not in LINKED_DELIVERY_MODES:
+            _logger.warning("Invalid linked_delivery=%r (%s), expected one of %s", mode, owner, LINKED_DELIVERY_MODES)
+            mode = None
+        try:
+            min_interval = max(float(params.get('linked_min_interval') or 0), 0.0)
+        except (TypeError, ValueError):
+            _logger.warning("Invalid linked_min_interval=%r (%s)", params.get('linked_min_interval'), owner)
+            min_interval = 0.0
+        # интервал без режима подразумевает latest; 'all' - явная доставка каждого значения
+        latest = mode == 'latest' or (mode is None and min_interval > 0)
+        if mode is None and not latest:
+            return None
+        return cls(latest, min_interval if latest else 0.0)
+
+    @classmethod
+    def for_plugin(cls, plugin):
+        """Default mode of a plugin (attributes linked_delivery / linked_min_interval)"""
+        params = {key: getattr(plugin, key, None) for key in LINKED_DELIVERY_PARAMS}
+        return cls.from_params(params, getattr(plugin, 'name', None))
+
+
+def _linked_delivery(descriptor, plugin):
+    """Effective delivery mode: property params override the plugin default"""
+    delivery = descriptor.linked_delivery
+    if delivery is None:
+        delivery = LinkedDelivery.for_plugin(plugin)
+    return delivery if delivery is not None and delivery.latest else None
+
+
+class PropertyDescriptor():
+    """
+    Immutable class-level metadata of a property.
+
+    One descriptor is shared by every PropertyManager built from the same Property row
+    (same id, type, params, history and bound method), so params are parsed once per
+    class property instead of once per object. Descriptors are interned by
+    PropertyDescriptor.get; params dict is shared and must be treated as read-only.
+    """
+    __slots__ = (
+        'property_id', 'name', 'description', 'history', 'type', 'params', 'method',
+        'icon', 'color', 'sort_order', 'default_value', 'read_only', 'internal', 'history_policy', 'codec',
+        'linked_delivery', '_key', '__weakref__',
+    )
+
+    _cache = weakref.WeakValueDictionary()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, key, property_id, name, description, history, type, params, method):
+        setattr_ = object.__setattr__
+        setattr_(self, '_key', key)
+        setattr_(self, 'property_id', property_id)
+        setattr_(self, 'name', name)
+        setattr_(self, 'description', description)
+        setattr_(self, 'history', history or 0)
+        setattr_(self, 'type', type)
+        setattr_(self, 'params', params)
+        setattr_(self, 'method', method)
+        # Extract common parameters
+        is_dict = isinstance(params, dict)
+        setattr_(self, 'icon', params.get('icon') if is_dict else None)
+        setattr_(self, 'color', params.get('color') if is_dict else None)
+        setattr_(self, 'sort_order', params.get('sort_order') if is_dict else None)
+        setattr_(self, 'default_value', params.get('default_value') if is_dict else None)
+        setattr_(self, 'read_only', params.get('read_only', False) if is_dict else False)
+        setattr_(self, 'internal', bool(params.get('internal')) if is_dict else False)
+        setattr_(self, 'history_policy', HistoryPolicy.from_params(params))
+        # decode/encode/validate with params prepared once (PropertyCodecs)
+        setattr_(self, 'codec', bind_codec(type, params, name))
+        setattr_(self, 'linked_delivery', LinkedDelivery.from_params(params, name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"PropertyDescriptor is immutable (attribute '{name}')")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"PropertyDescriptor is immutable (attribute '{name}')")
+
+    @staticmethod
+    def _params_key(params):
+        if params is None or isinstance(params, str):
+            return params
+        try:
+            return json.dumps(params, sort_keys=True, default=str)
+        except (TypeError, ValueError):
+            return repr(params)
+
+    @staticmethod
+    def _parse_params(params):
+        # Parse params from JSON if exists
+        if not params:
+            return None
+        try:
+            return json.loads(params) if isinstance(params, str) else params
+        except Exception:
+            return None
+
+    @classmethod
+    def get(cls, property, method=None):
+        """Shared descriptor for a Property row (model, detached row or namespace)
+
+        Args:
+            property (Property): Property row (id, name, description, history, type, params)
+            method (str, optional): Name of the bound method. Defaults to None.
+
+        Returns:
+            PropertyDescriptor: Interned descriptor
+        """
+        key = (property.id, property.name, property.description, property.history or 0,
+               property.type, cls._params_key(property.params), method)
+        descriptor = cls._cache.get(key)
+        if descriptor is not None:
+            return descriptor
+        with cls._cache_lock:
+            descriptor = cls._cache.get(key)
+            if descriptor is None:
+                descriptor = cls(key, property.id, property.name, property.description, property.history,
+                                 property.type, cls._parse_params(property.params), method)
+                cls._cache[key] = descriptor
+        return descriptor
+
+    def with_method(self, method):
+        """Same descriptor bound to another method"""
+        if method == self.method:
+            return self
+        key = self._key[:-1] + (method,)
+        cls = type(self)
+        with cls._cache_lock:
+            descriptor = cls._cache.get(key)
+            if descriptor is None:
+                descriptor = cls.__new__(cls)
+                for slot in cls.__slots__[:-1]:
+                    object.__setattr__(descriptor, slot, getattr(self, slot))
+                object.__setattr__(descriptor, 'method', method)
+                object.__setattr__(descriptor, '_key', key)
+                cls._cache[key] = descriptor
+        return descriptor
+
+    @classmethod
+    def cache_size(cls) -> int:
+        return len(cls._cache)
+
+    @classmethod
+    def rebind_codecs(cls, type_name: str) -> int:
+        """Bind codecs again for loaded descriptors of a type (codec registered by a plugin)"""
+        count = 0
+        with cls._cache_lock:
+            descriptors = list(cls._cache.values())
+        for descriptor in descriptors:
+            if descriptor.type == type_name:
+                object.__setattr__(descriptor, 'codec', bind_codec(type_name, descriptor.params, descriptor.name))
+                count += 1
+        return count
+
+
+def _descriptor_attribute(name):
+    return property(lambda self: getattr(self.descriptor, name), doc=f"{name} (from shared PropertyDescriptor)")
+
 
 class PropertyManager():
     """
@@ -487,8 +1180,15 @@ class PropertyManager():
         object_id (int): The ID of the object.
         property (Property): The property object containing property details.
         value (Value): The value object containing value details or None.
+        object_name (str): Name of the object (for logging).
+        method (str): Name of the bound method or None.
+
+    Class-level metadata (property_id, name, description, history, type, params, method,
+    icon, color, sort_order, default_value, read_only) is read from the shared
+    PropertyDescriptor; per-object state is kept in __slots__.
 
     Attributes:
+        descriptor: Shared PropertyDescriptor.
         property_id: ID of the property.
         value_id: ID of the value if exists, otherwise None.
         name: Name of the property.
@@ -505,282 +1205,92 @@ class PropertyManager():
         count_read: Count of read operations (initialized to 0).
         count_write: Count of write operations (initialized to 0).
         readed: Timestamp of when the property was last read (UTC).
+        history_state: History policy state (last written value/time, written/suppressed counters) or None.
     """
-    def __init__(self, object_id:int, property: Property, value: Value, object_name: str = None):
-        self.property_id = property.id
+    __slots__ = (
+        'descriptor', 'value_id', 'object_id', 'object_name', 'changed', 'source', 'linked',
+        '__value', 'count_read', 'count_write', 'readed', 'history_state',
+    )
+
+    # class-level metadata lives in the shared descriptor
+    property_id = _descriptor_attribute('property_id')
+    name = _descriptor_attribute('name')
+    description = _descriptor_attribute('description')
+    history = _descriptor_attribute('history')
+    type = _descriptor_attribute('type')
+    params = _descriptor_attribute('params')
+    icon = _descriptor_attribute('icon')
+    color = _descriptor_attribute('color')
+    sort_order = _descriptor_attribute('sort_order')
+    default_value = _descriptor_attribute('default_value')
+    read_only = _descriptor_attribute('read_only')
+
+    def __init__(self, object_id:int, property: Property, value: Value, object_name: str = None, method: str = None):
+        self.descriptor = PropertyDescriptor.get(property, method)
         self.value_id = value.id if value else None
-        self.name = property.name
-        self.description = property.description
         self.object_id = object_id
         self.object_name = object_name or 'Unknown'
-        self.history = property.history or 0
         self.changed = value.changed if value else None
-        self.method = None
         self.linked = None
         self.source = value.source if value else None
         if value and value.linked:
             links = value.linked.split(',')
             self.linked = links
         self.__value = None
-        self.type = property.type
-        self.params = None
-        # Parse params from JSON if exists
-        if property.params:
-            try:
-                self.params = json.loads(property.params) if isinstance(property.params, str) else property.params
-            except:
-                self.params = None
-        
-        # Extract common parameters
-        self.icon = None
-        self.color = None
-        self.sort_order = None
-        self.default_value = None
-        self.read_only = False
-        
-        if self.params and isinstance(self.params, dict):
-            self.icon = self.params.get('icon')
-            self.color = self.params.get('color')
-            self.sort_order = self.params.get('sort_order')
-            self.default_value = self.params.get('default_value')
-            self.read_only = self.params.get('read_only', False)
-        
         if value:
             self.__value = self._decodeValue(value.value, True)
         # Note: if value is None (no record in DB), default_value will be used in getValue()
-            
+
         self.count_read = 0
         self.count_write = 0
         self.readed = get_now_to_utc()
+        # [last written value, its changed, written, suppressed] - only with history policy
+        self.history_state = None
 
-    def _get_color_scales(self):
-        return {
-            "hue_scale": self.params.get("hue_scale", 360) if self.params else 360,
-            "sat_scale": self.params.get("sat_scale", 100) if self.params else 100,
-            "color_temp_unit": self.params.get("color_temp_unit", "kelvin") if self.params else "kelvin",
-        }
-
-    def _get_color_read_format(self):
-        if self.params and self.params.get("read_format"):
-            return str(self.params.get("read_format")).lower()
-        return "canonical"
+    @property
+    def method(self):
+        return self.descriptor.method
 
-    def _ensure_universal_color(self, value):
-        """Приводит legacy/строковое значение к универсальному dict для type=color."""
-        if value is None or value == "None" or value == "":
-            return None
-        if isinstance(value, dict):
-            try:
-                return to_universal_color(value)
-            except Exception:
-                return value
-        try:
-            return decode_color_value(value)
-        except Exception:
-            parsed_color = parse_color_value(value, write_format="auto", scales=self._get_color_scales())
-            return to_universal_color(parsed_color)
+    @method.setter
+    def method(self, name):
+        self.bindMethod(name)
 
-    def _color_to_output(self, value, read_format=None):
-        if value is None:
-            return None
-        if isinstance(value, str) or (isinstance(value, dict) and "rgb" not in value and "xy" not in value):
-            value = self._ensure_universal_color(value)
-        target_format = (read_format or self._get_color_read_format() or "canonical").lower()
-        return from_universal_color(value, target_format, scales=self._get_color_scales())
+    @property
+    def codec(self):
+        """Value codec bound to the property type and params (shared PropertyDescriptor)"""
+        return self.descriptor.codec
 
     def getColorValue(self, read_format=None):
-        return self._color_to_output(self.__value, read_format=read_format)
+        return self.descriptor.codec.to_output(self.__value, read_format=read_format)
 
     def _format_output_value(self, value):
         """Форматирует внутреннее значение для выдачи наружу (get/history)."""
         if value is None:
             return None
-        if self.type == 'color':
-            return self._color_to_output(value)
-        if self.type == 'datetime':
-            try:
-                return convert_utc_to_local(value)
-            except Exception as ex:
-                _logger.exception(ex)
-        return value
+        return self.descriptor.codec.format_output(value)
 
     def _decodeValue(self, value, init=False):
         if value is None:
             return None
-        converted_value = None
+        codec = self.descriptor.codec
         # Конвертация строки в указанный тип
         try:
             if value == 'None':
                 converted_value = None
-            elif self.type == "int":
-                if value != '':
-                    try:
-                        converted_value = int(value)
-                    except ValueError:
-                        if init:
-                            try:
-                                converted_value = int(float(value))
-                            except (TypeError, ValueError):
-                                _logger.warning(
-                                    f"Error parsing int during initialization ({self.object_name}.{self.name}, value={value})",
-                                    exc_info=True,
-                                )
-                                converted_value = value
-                        else:
-                            raise
-                    # Validate min/max if specified
-                    if not init and self.params:
-                        min_val = self.params.get('min')
-                        max_val = self.params.get('max')
-                        if min_val is not None and converted_value < min_val:
-                            raise ValueError(f"Value {converted_value} is less than minimum {min_val}")
-                        if max_val is not None and converted_value > max_val:
-                            raise ValueError(f"Value {converted_value} is greater than maximum {max_val}")
-                        # Validate step/discreteness if specified
-                        if 'step' in self.params:
-                            step = self.params['step']
-                            if step > 0:
-                                base = self.params.get('min', 0)
-                                if (converted_value - base) % step != 0:
-                                    raise ValueError(
-                                        f"Value {converted_value} is not aligned with step {step} "
-                                        f"(base: {base}). Allowed values: {base}, {base+step}, {base+2*step}..."
-                                    )
-                else:
-                    converted_value = None
-            elif self.type == "float":
-                if value != '':
-                    converted_value = float(value)
-                    # Apply decimals rounding if specified
-                    if self.params and 'decimals' in self.params:
-                        decimals = int(self.params['decimals'])
-                        converted_value = round(converted_value, decimals)
-                    # Validate min/max if specified
-                    if not init and self.params:
-                        min_val = self.params.get('min')
-                        max_val = self.params.get('max')
-                        if min_val is not None and converted_value < float(min_val):
-                            raise ValueError(f"Value {converted_value} is less than minimum {min_val}")
-                        if max_val is not None and converted_value > float(max_val):
-                            raise ValueError(f"Value {converted_value} is greater than maximum {max_val}")
-                        # Validate step/discreteness if specified
-                        if 'step' in self.params:
-                            step = float(self.params['step'])
-                            if step > 0:
-                                base = float(self.params.get('min', 0.0))
-                                remainder = abs((converted_value - base) % step)
-                                # Account for floating point precision errors
-                                if remainder > 1e-9 and abs(remainder - step) > 1e-9:
-                                    raise ValueError(
-                                        f"Value {converted_value} is not aligned with step {step} (base: {base})"
-                                    )
-                else:
-                    converted_value = None
-            elif self.type == "str":
-                converted_value = value
-                # Validate regexp if specified
-                if not init and self.params and 'regexp' in self.params:
-                    import re
-                    pattern = self.params['regexp']
-                    if not re.match(pattern, str(converted_value)):
-                        raise ValueError(f"Value '{converted_value}' does not match pattern '{pattern}'")
-            elif self.type == "datetime":
-                if isinstance(value, str):
-                    converted_value = parser.parse(value)
-                else:
-                    converted_value = value
-                if converted_value and not init:
-                    converted_value = convert_local_to_utc(converted_value)
-            elif self.type == "dict":
-                if isinstance(value, dict):
-                    converted_value = value
-                else:
-                    converted_value = json.loads(value)
-            elif self.type == "list":
-                if isinstance(value, list):
-                    converted_value = value
-                else:
-                    converted_value = json.loads(value)
-            elif self.type == "bool":
-                if isinstance(value, str):
-                    if value.lower() in ['true', '1', 't', 'y', 'yes', 'on']:
-                        converted_value = True
-                    elif value.lower() in ['false', '0', 'f', 'n', 'no', 'off']:
-                        converted_value = False
-                    else:
-                        raise ValueError(f"Invalid boolean value: {value}")
-                else:
-                    converted_value = bool(value)
-            elif self.type == "enum":
-                # For enum, validate against allowed values
-                converted_value = value
-                if not init and self.params and 'enum_values' in self.params:
-                    enum_values = self.params['enum_values']
-                    if enum_values and isinstance(enum_values, dict):
-                        if str(converted_value) not in enum_values:
-                            raise ValueError(f"Value '{converted_value}' is not in allowed enum values: {list(enum_values.keys())}")
-                    else:
-                        _logger.warning(f"Property {self.name}: enum_values is not a dict or empty")
-            elif self.type == "color":
-                if init:
-                    converted_value = self._ensure_universal_color(value)
-                else:
-                    write_format = "auto"
-                    if self.params and self.params.get("write_format"):
-                        write_format = str(self.params.get("write_format")).lower()
-                    if write_format != "auto":
-                        detected = detect_color_format(value)
-                        if detected not in ("canonical", write_format):
-                            raise ValueError(
-                                f"Color write format mismatch for '{self.name}': expected '{write_format}', got '{detected}'"
-                            )
-                    parsed_color = parse_color_value(value, write_format=write_format, scales=self._get_color_scales())
-                    if not init and self.__value not in (None, 'None', ''):
-                        try:
-                            existing_color = self._ensure_universal_color(self.__value)
-                            parsed_color = merge_xy_luminance(parsed_color, existing_color)
-                        except Exception:
-                            pass
-                    converted_value = to_universal_color(parsed_color)
             else:
-                converted_value = value
-            
-            # Universal validation - allowed_values (works for any type except enum which has enum_values)
-            if not init and self.params and 'allowed_values' in self.params and self.type != 'enum':
-                allowed = self.params['allowed_values']
-                if not isinstance(allowed, list):
-                    _logger.warning(f"Property {self.name}: allowed_values must be a list, got {type(allowed)}")
-                else:
-                    # For numeric/bool types, compare values directly
-                    if self.type in ['int', 'float', 'bool']:
-                        if converted_value not in allowed:
-                            raise ValueError(
-                                f"Value {converted_value} is not in allowed values: {allowed}"
-                            )
-                    else:
-                        # For string-like types and others, compare as strings
-                        if str(converted_value) not in [str(v) for v in allowed]:
-                            raise ValueError(
-                                f"Value '{converted_value}' is not in allowed values: {allowed}"
-                            )
+                converted_value = codec.decode(value, init, self.__value)
+            if not init:
+                # Validation (min/max/step, regexp, enum_values, allowed_values) only for writes
+                codec.validate(converted_value)
         except (ParserError, json.JSONDecodeError) as ex:
             # Parsing errors (datetime, JSON) should be handled gracefully during init
-            if init and self.type == "color":
-                try:
-                    converted_value = self._ensure_universal_color(value)
-                except Exception as color_ex:
-                    _logger.warning(
-                        f"Error parsing color during initialization ({self.object_name}.{self.name}, value={value}): {color_ex}",
-                        exc_info=True,
-                    )
-                    converted_value = value
-            elif init:
+            if init:
                 _logger.warning(
                     f"Error parsing value during initialization ({self.object_name}.{self.name}, type={self.type}, value={value}): {str(ex)}",
                     exc_info=True
                 )
                 # During initialization, return the original value if parsing fails
-                converted_value = value
+                converted_value = codec.recover(value)
             else:
                 # During set operations, raise the exception to prevent invalid values
                 _logger.error(
@@ -794,28 +1304,19 @@ class PropertyManager():
                     f"Error validating value during initialization ({self.object_name}.{self.name}, type={self.type}, value={value}): {str(ex)}",
                     exc_info=True,
                 )
-                converted_value = value
+                converted_value = codec.recover(value)
             else:
                 raise
         except Exception as ex:
             # Other errors (parsing, type conversion) are logged but we don't want to silently fail
             # If init=True, we might want to be more lenient (e.g., during initialization from DB)
-            if init and self.type == "color":
-                try:
-                    converted_value = self._ensure_universal_color(value)
-                except Exception as color_ex:
-                    _logger.warning(
-                        f"Error decoding color during initialization ({self.object_name}.{self.name}, value={value}): {color_ex}",
-                        exc_info=True,
-                    )
-                    converted_value = value
-            elif init:
+            if init:
                 _logger.warning(
                     f"Error decoding value during initialization ({self.object_name}.{self.name}, value={value}): {str(ex)}",
                     exc_info=True
                 )
                 # During initialization, return the original value if conversion fails
-                converted_value = value
+                converted_value = codec.recover(value)
             else:
                 # During set operations, raise the exception to prevent invalid values
                 _logger.error(
@@ -832,24 +1333,7 @@ class PropertyManager():
         if value is None:
             return 'None'
         try:
-            if self.type == "int":
-                return str(value)
-            elif self.type == "float":
-                return str(value)
-            elif self.type == "str":
-                return str(value)
-            elif self.type == "datetime":
-                return value.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-            elif self.type == "dict":
-                return json.dumps(value)
-            elif self.type == "list":
-                return json.dumps(value)
-            elif self.type == "enum":
-                return str(value)
-            elif self.type == "color":
-                return encode_color_value(value)
-            else:
-                return value
+            return self.descriptor.codec.encode(value)
         except Exception as ex:
             _logger.exception(ex, exc_info=True)
         return str(value)
@@ -881,6 +1365,11 @@ class PropertyManager():
            (self.history < 0 and save_history is not None and save_history):
             should_save_history = True
 
+        # Политика истории (deadband / min interval / heartbeat) - только для автоматической записи
+        policy = self.descriptor.history_policy
+        if should_save_history and policy is not None and not history_only and save_history is None:
+            should_save_history = self._applyHistoryPolicy(policy, self.__value, changed_dt)
+
         is_internal = (source_str == SYSTEM_STATS_SOURCE)
 
         value_update = ValueUpdate(
@@ -895,8 +1384,26 @@ class PropertyManager():
             internal=is_internal
         )
 
-        # Добавляем в батчер (асинхронная запись)
-        _batch_writer.add(value_update)
+        # Добавляем в батчер (асинхронная запись); при применении batch() - в общий блок
+        collector = write_collector()
+        if collector is not None:
+            collector.append(value_update)
+        else:
+            _batch_writer.add(value_update)
+
+    def _applyHistoryPolicy(self, policy: HistoryPolicy, value, changed) -> bool:
+        state = self.history_state
+        if state is None:
+            state = self.history_state = [None, None, 0, 0]
+        if policy.allows(state, value, changed):
+            state[0] = value
+            state[1] = changed
+            state[2] += 1
+            _history_policy_totals.add(1, 'written')
+            return True
+        state[3] += 1
+        _history_policy_totals.add(1, 'suppressed')
+        return False
 
     def cleanHistory(self):
         with session_scope() as session:
@@ -989,7 +1496,7 @@ class PropertyManager():
 
         if not history_only and track_stats:
             self.count_write = self.count_write + 1
-            if not (self.params and self.params.get("internal")):
+            if not self.descriptor.internal:
                 incrementCoreSystemStatsMetric(
                     "property_writes",
                     1,
@@ -1001,7 +1508,7 @@ class PropertyManager():
         if track_stats:
             self.readed = get_now_to_utc()
             self.count_read = self.count_read + 1
-            if not (self.params and self.params.get("internal")):
+            if not self.descriptor.internal:
                 incrementCoreSystemStatsMetric(
                     "property_reads",
                     1,
@@ -1028,7 +1535,7 @@ class PropertyManager():
         self.setValue(value)
 
     def bindMethod(self, name):
-        self.method = name
+        self.descriptor = self.descriptor.with_method(name)
 
     def to_dict(self):
         result = {
@@ -1048,6 +1555,10 @@ class PropertyManager():
             "readed": str(convert_utc_to_local(self.readed))
         }
         
+        if self.history_state is not None:
+            result["history_written"] = self.history_state[2]
+            result["history_suppressed"] = self.history_state[3]
+
         # Add common parameters
         if self.icon:
             result["icon"] = self.icon
@@ -1085,6 +1596,9 @@ class PropertyManager():
                 result["rate_limit"] = self.params['rate_limit']
             if 'depends_on' in self.params:
                 result["depends_on"] = self.params['depends_on']
+            for key in HISTORY_POLICY_PARAMS + LINKED_DELIVERY_PARAMS:
+                if key in self.params:
+                    result[key] = self.params[key]
             if self.type == 'color':
                 if 'read_format' in self.params:
                     result["read_format"] = self.params['read_format']
@@ -1148,6 +1662,24 @@ class MethodManager():
             "exec_time": self.exec_time
         }
 
+    def getCodeCacheStats(self) -> dict:
+        """Compiled code cache of the method and its parents (shared by all objects of a class)"""
+        hits = misses = 0
+        saved_ms = 0.0
+        for method in self.methods:
+            if method.get('id') is None:
+                continue
+            stats = get_code_cache_entry_stats(method_cache_key(method['id']))
+            if stats:
+                hits += stats['hits']
+                misses += stats['misses']
+                saved_ms += stats['saved_ms']
+        return {
+            'code_cache_hits': hits,
+            'code_cache_hit_rate': round(hits / (hits + misses) * 100, 2) if hits + misses else 0,
+            'compile_saved_ms': round(saved_ms, 3),
+        }
+
     def __str__(self):
         return f"MethodManager(name='{self.name}', description='{self.description}')"
 
@@ -1179,6 +1711,7 @@ class ObjectManager:
     def __init__(self, obj: Object):
         object.__setattr__(self, "__inited", False)
         object.__setattr__(self, "__permissions", None)
+        object.__setattr__(self, "__decisions", None)
         object.__setattr__(self, "__templates", {})
         object.__setattr__(self, "_current_execution_source", None)
         object.__setattr__(self, "_runtime", {})
@@ -1236,8 +1769,19 @@ class ObjectManager:
 
     def set_permission(self, permissions):
         object.__setattr__(self, "__permissions", permissions)
+        object.__setattr__(self, "__decisions", permission_tables.object_table(
+            object.__getattribute__(self, "name"), getattr(self, 'parents', []), permissions))
         object.__setattr__(self, "__inited", True)
 
+    def _permission_table(self):
+        """Decision table for the current permissions revision (re-merged from _permissions if it changed)"""
+        table = object.__getattribute__(self, "__decisions")
+        if table is None or table.revision != permission_tables.revision:
+            from app.core.main.ObjectsStorage import objects_storage
+            self.set_permission(objects_storage.get_permissions(self))
+            table = object.__getattribute__(self, "__decisions")
+        return table
+
     def _check_permissions(self, operation:TypeOperation, property_name:str=None, method_name:str=None):
         if not object.__getattribute__(self, "__inited"):
             return True
@@ -1257,72 +1801,14 @@ class ObjectManager:
         if role == 'root':
             return True
 
-        if property_name and 'Users' in getattr(self, 'parents', []):
-            if property_name == 'password' and operation == TypeOperation.Get:
-                raise PermissionError(
-                    f"User {username}({role}) don't have permission to {operation.name} "
-                    f"obj:{name} property:{property_name} (sensitive)"
-                )
-            if operation == TypeOperation.Set and role == 'admin':
-                if property_name in _USERS_ADMIN_SET_PROPERTIES:
-                    return True
-            if property_name == 'password' and operation == TypeOperation.Set and role != 'admin':
-                raise PermissionError(
-                    f"User {username}({role}) don't have permission to {operation.name} "
-                    f"obj:{name} property:{property_name} (sensitive)"
-                )
-            if property_name == 'apikey' and operation in (TypeOperation.Get, TypeOperation.Set):
-                if role != 'admin' and username != name:
-                    raise PermissionError(
-                        f"User {username}({role}) don't have permission to {operation.name} "
-                        f"obj:{name} property:{property_name} (sensitive)"
-                    )
-
-        _permissions = object.__getattribute__(self, "__permissions")
-        if _permissions is None:
-            if role in ["user","editor","admin"]:
-                return True
-            else:
-                raise PermissionError(f"User {username}({role}) don't have permission to {operation.name} obj:{name} property:{property_name} method:{method_name} permissions:None")
-
-        permissions = None
-
-        if "self" in _permissions:
-            permissions = _permissions["self"]
-
-        if property_name:
-            if "properties" in _permissions and property_name in _permissions["properties"]:
-                permissions = _permissions["properties"][property_name]
-
-        if method_name:
-            if "methods" in _permissions and method_name in _permissions["methods"]:
-                permissions = _permissions["methods"][method_name]
-
-        if permissions:
-            permissions = permissions.get(operation.value, None)
-
-        if permissions:
-            denied_users = permissions.get("denied_users",None)
-            if denied_users:
-                if username in denied_users or "*" in denied_users:
-                    raise PermissionError(f"User {username}({role}) don't have permission to {operation.name} obj:{name} property:{property_name} method:{method_name} permissions:{json.dumps(permissions)}")
-            access_users = permissions.get("access_users",None)
-            if access_users:
-                if username in access_users or "*" in access_users:
-                    return True
-            denied_roles = permissions.get("denied_roles",None)
-            if denied_roles:
-                if role in denied_roles or "*" in denied_roles:
-                    raise PermissionError(f"User {username}({role}) don't have permission to {operation.name} obj:{name} property:{property_name} method:{method_name} permissions:{json.dumps(permissions)}")
-            access_roles = permissions.get("access_roles",None)
-            if access_roles:
-                if role in access_roles or "*" in access_roles:
-                    return True
-
-        if role in ["user","editor","admin"]:
+        # решение из скомпилированной таблицы: (operation, property, method, user, role)
+        started = permission_tables.sample_start()
+        decision = self._permission_table().decide((operation, property_name, method_name, username, role))
+        if started:
+            permission_tables.sample_end(started)
+        if decision is True:
             return True
-
-        raise PermissionError(f"User {username}({role}) don't have permission to {operation.name} obj:{name} property:{property_name} method:{method_name} permissions:{json.dumps(permissions)}")
+        raise PermissionError(decision)
 
     def _validate_dependencies(self, property_name: str, new_value, depends_on):
         """
@@ -1447,6 +1933,10 @@ class ObjectManager:
             if prop.params and 'depends_on' in prop.params:
                 self._validate_dependencies(name, value, prop.params['depends_on'])
 
+            scope = current_batch()
+            if scope is not None and self.name != SYSTEM_STATS_OBJECT and not str(source or "").startswith(SYSTEM_STATS_SOURCE):
+                return self._bufferProperty(scope, prop, name, value, source, save_history, changed, track_stats)
+
             if not chain_enter(self.name, name):
                 self._record_reactive_loop(chain_format())
                 return False
@@ -1457,6 +1947,8 @@ class ObjectManager:
                     if self._current_execution_source is not None:
                         source = self._current_execution_source
                 prop.setValue(value, source, changed=changed, save_history=save_history, track_stats=track_stats)
+                if self.name == '_permissions':
+                    permission_tables.bump(f"_permissions.{name}")
                 value = prop.getValue()
                 if prop.method:
                     args = {
@@ -1487,6 +1979,20 @@ class ObjectManager:
 
                             # _poolLinkedProperty.submit(task_wrapper(plugin, self.name, name, value), task_id=f"{self.name, name}")
 
+                            delivery = _linked_delivery(prop.descriptor, plugin)
+                            if delivery is not None:
+                                # latest value wins: не более одного вызова на (плагин, объект, свойство)
+                                _poolLinkedProperty.submit_latest(
+                                    (link, self.name, name),
+                                    plugin.changeLinkedProperty,
+                                    f"{link}_{self.name}.{name}",
+                                    link,
+                                    self.name,
+                                    name,
+                                    value,
+                                    min_interval=delivery.min_interval,
+                                )
+                                continue
                             _poolLinkedProperty.submit(
                                 plugin.changeLinkedProperty,
                                 f"{link}_{self.name}.{name}",
@@ -1504,26 +2010,8 @@ class ObjectManager:
                 # skip generic proxy fan-out to avoid thread-pool overload.
                 scheduleSystemStatsWsNotify(self.name, name, value)
             else:
-                plugins = getModulesByAction("proxy")
-                for plugin in plugins:
-                    try:
-                        # def task_wrapper(plugin, object_name, property_name, property_value):
-                        #     def wrapper():
-                        #         plugin.changeProperty(object_name, property_name, property_value)
-                        #     return wrapper
-                        # _poolLinkedProperty.submit(task_wrapper(plugin, self.name, name, value), task_id=f"proxy_{self.name, name}")
-                        _poolLinkedProperty.submit(
-                            plugin.changeProperty,
-                            f"proxy_{plugin.name}_{self.name}.{name}",
-                            f"proxy:{plugin.name}",
-                            self.name,
-                            name,
-                            value,
-                            ignore_owner_limit=True,
-                        )
-
-                    except Exception as e:
-                        _logger.exception(e)
+                # очереди proxy-плагинов и подписчиков по индексу подписок (ChangeDispatcher)
+                change_dispatcher.publish(self.name, name, value, self.__dict__.get('parents'))
             if self.name == "SystemVar" and name == "system_stats":
                 invalidateSystemStatsEnabledCache()
             return True
@@ -1541,6 +2029,19 @@ class ObjectManager:
             self._logger.exception(ex, exc_info=True)
             return False
 
+    def _bufferProperty(self, scope, prop, name, value, source, save_history, changed, track_stats) -> bool:
+        """Validate and buffer a write inside batch() (applied by applyWriteBatch)"""
+        if prop.read_only:
+            raise PermissionError(f"Property '{name}' is read-only and cannot be modified")
+        decoded = prop._decodeValue(value)
+        if source is None or source == '':
+            if self._current_execution_source is not None:
+                source = self._current_execution_source
+        pending = scope.get(self.name, name)
+        old = pending.old if pending is not None else prop.getValue()
+        scope.put(BatchEntry(self, name, value, decoded, source, save_history, changed, track_stats, old))
+        return True
+
     def updateProperty(self, name:str, value, source:str='', track_stats:bool=True) -> bool:
         """Update property
 
@@ -1591,6 +2092,12 @@ class ObjectManager:
 
         if name in self.properties:
             prop = self.properties[name]
+            # незаписанное значение из batch() текущего потока
+            scope = current_batch()
+            if scope is not None and data == 'value':
+                pending = scope.get(self.name, name)
+                if pending is not None:
+                    return prop._format_output_value(pending.decoded)
             # For enum type, handle 'text' data request
             if data == 'text' and prop.type == 'enum':
                 current_value = prop.getValue()
@@ -1706,6 +2213,7 @@ class ObjectManager:
                     variables,
                     code_filename=f"<Method:{self.name}.{name}>",
                     method_context=method_context,
+                    cache_key=method_cache_key(method['id']) if method.get('id') is not None else None,
                 )
                 if error:
                     self._logger.error(
@@ -1738,6 +2246,8 @@ class ObjectManager:
 
             end = time.perf_counter()
             self.methods[name].exec_time = int((end - start) * 1000)  # в миллисекунды
+            if self.name != SYSTEM_STATS_OBJECT:
+                _method_duration_ms.observe((end - start) * 1000.0)
 
             # send event to proxy
             plugins = getModulesByAction('proxy')
@@ -1992,6 +2502,9 @@ class ObjectManager:
                 'last_read': prop.readed,
                 'last_write': prop.changed,
             }
+            if prop.history_state is not None:
+                stat_props[name]['history_written'] = prop.history_state[2]
+                stat_props[name]['history_suppressed'] = prop.history_state[3]
         for name, method in self.methods.items():
             stat_methods[name] = {
                 'count_executed': method.count_executed,
@@ -1999,6 +2512,7 @@ class ObjectManager:
                 'exec_time': method.exec_time,
                 'source': method.source,
                 'params': method.exec_params,
+                **method.getCodeCacheStats(),
             }
         return {
             "stat_properties": stat_props,
@@ -2026,3 +2540,111 @@ class ObjectManager:
 
     def __repr__(self):
         return self.__str__()
+
+
+def _deliver_linked(plugin, changes: list):
+    """Coalesced linked-property notification: all changes of one batch() for one plugin"""
+    for object_name, property_name, value in changes:
+        try:
+            plugin.changeLinkedProperty(object_name, property_name, value)
+        except Exception as ex:
+            _logger.exception(ex)
+
+
+def applyWriteBatch(scope) -> int:
+    """Apply writes buffered by batch(): values, one BatchWriter block, bound methods, notifications
+
+    Args:
+        scope (WriteBatch): Buffered writes
+
+    Returns:
+        int: Count of applied properties
+    """
+    # 1. значения в памяти одним проходом, записи в БД - одним блоком
+    applied = []
+    updates = []
+    with collect_writes(updates):
+        for entry in scope.entries.values():
+            om = entry.om
+            prop = om.properties.get(entry.name)
+            if prop is None:
+                continue
+            try:
+                prop.setValue(entry.value, entry.source, changed=entry.changed,
+                              save_history=entry.save_history, track_stats=entry.track_stats)
+            except Exception as ex:
+                om._logger.warning("Batch write %s.%s failed: %s", om.name, entry.name, str(ex))
+                continue
+            applied.append((entry, prop))
+    _batch_writer.add_many(updates)
+    count_stat("applied", len(applied))
+    if any(entry.om.name == '_permissions' for entry, _ in applied):
+        permission_tables.bump("_permissions batch")
+
+    # 2. привязанные методы - один раз на свойство, с итоговым значением
+    changes = []
+    for entry, prop in applied:
+        om = entry.om
+        name = entry.name
+        value = prop.getValue()
+        changes.append((entry, prop, value))
+        if om.name == "SystemVar" and name == "system_stats":
+            invalidateSystemStatsEnabledCache()
+        if not prop.method:
+            continue
+        if not chain_enter(om.name, name):
+            om._record_reactive_loop(chain_format())
+            continue
+        try:
+            args = {
+                'VALUE': value, 'NEW_VALUE': value, 'OLD_VALUE': entry.old, 'PROPERTY': name, 'SOURCE': entry.source,
+            }
+            om.callMethod(prop.method, args, entry.source)
+            count_stat("methods")
+        except Exception as ex:
+            om._logger.exception(ex)
+        finally:
+            chain_exit()
+
+    # 3. уведомления - одна задача пула на связанный плагин, proxy-плагинам и подписчикам - в их очереди
+    linked = {}
+    proxy = []
+    parents = {}
+    for entry, prop, value in changes:
+        item = (entry.om.name, entry.name, value, prop.descriptor)
+        proxy.append(item[:3])
+        parents[entry.om.name] = entry.om.__dict__.get('parents')
+        for link in prop.linked or []:
+            if link == entry.source:
+                continue
+            linked.setdefault(link, []).append(item)
+    for link, items in linked.items():
+        plugin = getModule(link)
+        if not plugin:
+            continue
+        try:
+            grouped = []
+            for object_name, property_name, value, descriptor in items:
+                delivery = _linked_delivery(descriptor, plugin)
+                if delivery is None:
+                    grouped.append((object_name, property_name, value))
+                    continue
+                _poolLinkedProperty.submit_latest(
+                    (link, object_name, property_name), plugin.changeLinkedProperty,
+                    f"{link}_{object_name}.{property_name}", link, object_name, property_name, value,
+                    min_interval=delivery.min_interval,
+                )
+                count_stat("notifications")
+            if not grouped:
+                continue
+            items = grouped
+            _poolLinkedProperty.submit(_deliver_linked, f"{link}_batch[{len(items)}]", link, plugin, items)
+            count_stat("notifications")
+        except Exception as ex:
+            _logger.exception(ex)
+    if proxy:
+        try:
+            count_stat("notifications", change_dispatcher.publish_many(proxy, parents))
+        except Exception as ex:
+            _logger.exception(ex)
+    return len(applied)
@@ -0,0 +1,352 @@
+"""
+Warm-start snapshot of the object runtime cache.
+
+The snapshot keeps hydrated object managers (properties with decoded values,
+methods, templates, parents) in one versioned file so that the next start does
+not have to rebuild every object from the database.
+
+File layout::
+
+    MAGIC (8 bytes) | version (uint16) | header length (uint32) | header (JSON) | zlib(pickle(payload))
+
+The JSON header holds DB markers (counts, max ids, last value change) and the
+schema hash (hash of all object structure hashes); it can be inspected without
+unpacking the payload. The payload is read with a restricted unpickler that
+only accepts plain data and date/time types.
+
+Validation on restore:
+- every entry carries a structure hash of the manager (properties, methods,
+  templates, parents); the same hash is recomputed from class/property/method
+  rows of the DB and objects whose hash differs are hydrated from the DB as usual;
+- values are compared by (id, changed, source, linked); only differing rows are
+  re-read and decoded.
+"""
+import hashlib
+import io
+import json
+import os
+import pickle
+import struct
+import zlib
+from collections import defaultdict
+from datetime import datetime, time, timezone
+from types import SimpleNamespace
+from sqlalchemy import func, select
+from app.core.main.ObjectManager import ObjectManager, PropertyManager, MethodManager
+from app.core.models.Clasess import Class, Property, Method, Object, Value
+
+MAGIC = b"OSYSSNAP"
+SNAPSHOT_VERSION = 1
+_PREFIX = struct.Struct(">HI")
+
+_PLAIN_SCALARS = (str, int, float, bool, type(None))
+
+# Разрешённые при распаковке классы (всё остальное — ошибка формата)
+_SAFE_GLOBALS = {
+    ("datetime", "datetime"),
+    ("datetime", "date"),
+    ("datetime", "time"),
+    ("datetime", "timedelta"),
+    ("datetime", "timezone"),
+    ("builtins", "set"),
+    ("builtins", "frozenset"),
+}
+
+
+class _SafeUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if (module, name) not in _SAFE_GLOBALS:
+            raise pickle.UnpicklingError(f"Forbidden global in snapshot: {module}.{name}")
+        return super().find_class(module, name)
+
+
+def _is_plain(value, depth: int = 0) -> bool:
+    """Value can be stored in the snapshot and read back by _SafeUnpickler.
+
+    Types are checked exactly: subclasses (IntEnum, str subclasses) and tzinfo other
+    than datetime.timezone (ZoneInfo, dateutil) pickle through globals the reader rejects.
+    """
+    kind = type(value)
+    if kind in _PLAIN_SCALARS:
+        return True
+    if depth > 32:
+        return False
+    if kind in (list, tuple, set, frozenset):
+        return all(_is_plain(item, depth + 1) for item in value)
+    if kind is dict:
+        return all(type(key) in _PLAIN_SCALARS and _is_plain(item, depth + 1) for key, item in value.items())
+    if kind in (datetime, time):
+        return value.tzinfo is None or type(value.tzinfo) is timezone
+    return (kind.__module__, kind.__name__) in _SAFE_GLOBALS
+
+
+def _hash(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _params_key(params):
+    if params is None:
+        return None
+    if isinstance(params, str):
+        try:
+            params = json.loads(params) if params else None
+        except ValueError:
+            return None
+    if params is None:
+        return None
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+_METHOD_FIELDS = ("id", "name", "description", "class_id", "object_id", "code", "call_parent", "params", "owner")
+
+
+def _structure_hash(object_id, name, description, properties, methods, templates, parents) -> str:
+    """Hash of everything hydration builds except values.
+
+    Args:
+        properties: (property_id, name, description, history, type, params, method name) tuples
+        methods: Method dicts (row2dict + owner)
+    """
+    return _hash(
+        (object_id, name, description),
+        sorted((pid, pname, pdesc, history or 0, ptype, _params_key(params), method)
+               for pid, pname, pdesc, history, ptype, params, method in properties),
+        sorted(tuple(item.get(field) for field in _METHOD_FIELDS) for item in methods),
+        sorted(templates.items(), key=lambda item: str(item[0])),
+        tuple(parents),
+    )
+
+
+def manager_hash(om: ObjectManager) -> str:
+    """Structure hash of a hydrated object manager."""
+    return _structure_hash(
+        om.object_id, om.name, om.description,
+        [(pm.property_id, pm.name, pm.description, pm.history, pm.type, pm.params, pm.method)
+         for pm in list(om.properties.values())],
+        [item for mm in list(om.methods.values()) for item in mm.methods],
+        om.__dict__.get("__templates") or {},
+        getattr(om, "parents", []),
+    )
+
+
+def db_markers(session) -> dict:
+    """Cheap DB markers: row counts, max ids and last value change."""
+    markers = {}
+    for key, model in (("classes", Class), ("objects", Object), ("properties", Property), ("methods", Method)):
+        count, max_id = session.execute(select(func.count(model.id), func.max(model.id))).one()
+        markers[key] = {"count": count, "max_id": max_id}
+    count, max_id, changed = session.execute(
+        select(func.count(Value.id), func.max(Value.id), func.max(Value.changed))).one()
+    markers["values"] = {"count": count, "max_id": max_id, "max_changed": str(changed) if changed else None}
+    return markers
+
+
+def structure_hashes(session) -> dict:
+    """Structure hash of every DB object, computed the same way as manager_hash()
+    but from class/property/method rows (values are not read).
+
+    Returns:
+        dict[int, tuple[str, str]]: (object name, hash) by object id
+    """
+    classes = {row.id: row for row in session.execute(
+        select(Class.id, Class.name, Class.parent_id, Class.template))}
+    method_names = {}
+    class_methods = defaultdict(list)
+    object_methods = defaultdict(list)
+    for row in session.execute(select(
+            Method.id, Method.name, Method.description, Method.class_id, Method.object_id,
+            Method.code, Method.call_parent, Method.params).order_by(Method.id)):
+        method_names[row.id] = row.name
+        if row.class_id in classes:
+            class_methods[row.class_id].append(dict(row._mapping, owner=classes[row.class_id].name))
+        if row.object_id:
+            object_methods[row.object_id].append(dict(row._mapping))
+    class_props = defaultdict(list)
+    object_props = defaultdict(list)
+    for row in session.execute(select(
+            Property.id, Property.name, Property.description, Property.class_id, Property.object_id,
+            Property.history, Property.type, Property.params, Property.method_id).order_by(Property.id)):
+        item = (row.id, row.name, row.description, row.history, row.type, row.params, method_names.get(row.method_id))
+        if row.class_id:
+            class_props[row.class_id].append(item)
+        if row.object_id:
+            object_props[row.object_id].append(item)
+
+    chains = {}
+
+    def chain(class_id):
+        if class_id not in chains:
+            result, seen = [], set()
+            current = class_id
+            while current and current in classes and current not in seen:
+                seen.add(current)
+                result.append(classes[current])
+                current = classes[current].parent_id
+            chains[class_id] = result
+        return chains[class_id]
+
+    result = {}
+    for row in session.execute(select(Object.id, Object.name, Object.description, Object.class_id, Object.template)):
+        class_chain = chain(row.class_id)
+        # same override order as ObjectStorage._buildClassSchemas / _hydrateChunk
+        properties = {}
+        for cls in class_chain:
+            for item in class_props.get(cls.id, []):
+                properties[item[1]] = item
+        for item in object_props.get(row.id, []):
+            properties[item[1]] = item
+        methods = [item for cls in class_chain for item in class_methods.get(cls.id, [])]
+        methods.extend(dict(item, owner=row.name) for item in object_methods.get(row.id, []))
+        templates = {cls.name: cls.template for cls in class_chain}
+        templates[row.name] = row.template
+        result[row.id] = (row.name, _structure_hash(
+            row.id, row.name, row.description, properties.values(), methods, templates,
+            [cls.name for cls in class_chain]))
+    return result
+
+
+def schema_hash(hashes: dict) -> str:
+    """Single hash over all object structure hashes (see structure_hashes)."""
+    return _hash(sorted(hashes.items()))
+
+
+def value_states(session) -> dict:
+    """(changed, source, linked) of every Value row by id (value column is not read)."""
+    return {row.id: (row.changed, row.source, row.linked or None) for row in session.execute(
+        select(Value.id, Value.changed, Value.source, Value.linked))}
+
+
+def reconcile(entries, hashes: dict, states: dict):
+    """Split snapshot entries by what has to be re-read from DB.
+
+    Args:
+        entries (list[dict]): Snapshot entries
+        hashes (dict): structure_hashes() of the DB
+        states (dict): value_states() of the DB
+    Returns:
+        tuple: (usable entries, object ids to hydrate from DB, stale value ids, count of deleted objects)
+    """
+    usable = []
+    rehydrate = []
+    stale_ids = set()
+    dropped = 0
+    for entry in entries:
+        current = hashes.get(entry["id"])
+        if current is None:
+            dropped += 1
+            continue
+        if current != (entry["name"], entry["hash"]):
+            rehydrate.append(entry["id"])
+            continue
+        stale = []
+        for prop in entry["properties"]:
+            state = states.get(prop[7])
+            if state is None:
+                # Value row is gone - hydration recreates it
+                rehydrate.append(entry["id"])
+                break
+            if not prop[11] or state != (prop[8], prop[9], prop[10]):
+                stale.append(prop[7])
+        else:
+            stale_ids.update(stale)
+            usable.append(entry)
+    return usable, rehydrate, stale_ids, dropped
+
+
+def dump_manager(om: ObjectManager) -> dict:
+    """Plain-data image of a hydrated object manager."""
+    properties = []
+    for pm in list(om.properties.values()):
+        value = pm._PropertyManager__value
+        plain = _is_plain(value)
+        properties.append((
+            pm.property_id, pm.name, pm.description, pm.history, pm.type, pm.params, pm.method,
+            pm.value_id, pm.changed, pm.source, ",".join(pm.linked) if pm.linked else None,
+            plain, value if plain else None,
+        ))
+    return {
+        "id": om.object_id,
+        "name": om.name,
+        "description": om.description,
+        "hash": manager_hash(om),
+        "properties": properties,
+        "methods": [mm.methods for mm in list(om.methods.values())],
+        "templates": dict(om.__dict__.get("__templates") or {}),
+        "parents": list(getattr(om, "parents", [])),
+    }
+
+
+def restore_manager(entry: dict, stale_values: dict) -> ObjectManager:
+    """Build object manager from snapshot entry.
+
+    Args:
+        entry (dict): Snapshot entry (see dump_manager)
+        stale_values (dict): Fresh Value rows by value id for values that differ from the snapshot
+    """
+    om = ObjectManager(SimpleNamespace(id=entry["id"], name=entry["name"], description=entry["description"]))
+    for (property_id, name, description, history, type_, params, method, value_id,
+         changed, source, linked, plain, value) in entry["properties"]:
+        prop = SimpleNamespace(id=property_id, name=name, description=description,
+                               history=history, type=type_, params=params)
+        fresh = stale_values.get(value_id)
+        if fresh is not None:
+            pm = PropertyManager(entry["id"], prop, fresh, entry["name"], method=method)
+        else:
+            pm = PropertyManager(entry["id"], prop, None, entry["name"], method=method)
+            pm.value_id = value_id
+            pm.changed = changed
+            pm.source = source
+            pm.linked = linked.split(",") if linked else None
+            pm._PropertyManager__value = value
+        om._addProperty(pm)
+    for methods in entry["methods"]:
+        om._addMethod(MethodManager(methods))
+    om._setTemplates(dict(entry["templates"]))
+    om.parents = list(entry["parents"])
+    return om
+
+
+def write_snapshot_file(path: str, header: dict, payload: dict) -> int:
+    """Atomically write snapshot file. Returns file size in bytes."""
+    header = dict(header, version=SNAPSHOT_VERSION)
+    header_bytes = json.dumps(header, ensure_ascii=False, default=str).encode("utf-8")
+    body = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_PREFIX.pack(SNAPSHOT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(body)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def read_snapshot_file(path: str, header_only: bool = False):
+    """Read snapshot file.
+
+    Returns:
+        tuple[dict, dict]: (header, payload); payload is None when header_only
+
+    Raises:
+        ValueError: File is not a snapshot or has unsupported version
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an object snapshot")
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) != _PREFIX.size:
+            raise ValueError(f"{path}: truncated snapshot header")
+        version, header_size = _PREFIX.unpack(prefix)
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"{path}: unsupported snapshot version {version} (expected {SNAPSHOT_VERSION})")
+        header = json.loads(f.read(header_size).decode("utf-8"))
+        if header_only:
+            return header, None
+        body = f.read()
+    try:
+        payload = _SafeUnpickler(io.BytesIO(zlib.decompress(body))).load()
+    except (zlib.error, pickle.UnpicklingError, EOFError) as ex:
+        raise ValueError(f"{path}: corrupted snapshot payload ({ex})") from ex
+    return header, payload
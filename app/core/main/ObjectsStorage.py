@@ -26,19 +26,41 @@ The class provides methods for:
 Note:
     This class is designed to be thread-safe and includes background maintenance tasks.
 """
+import os
+import queue
+import re
+import sys
 import threading
-from contextlib import nullcontext
-from datetime import datetime
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import func, insert
 from app.configuration import Config
 from app.database import row2dict, session_scope, get_now_to_utc
-from app.core.main.ObjectManager import ObjectManager, PropertyManager, MethodManager
+from app.core.main.ObjectManager import ObjectManager, PropertyManager, MethodManager, _batch_writer
+from app.core.main import ObjectsSnapshot as snapshot
+from app.core.main.PermissionTable import permission_tables
 from app.core.models.Clasess import Class, Property, Method, Object, Value, History
+from app.core.models.Tasks import Task
+from app.core.lib.constants import SYSTEM_STATS_OBJECT
 from app.logging_config import getLogger
 from app.core.main.PluginsHelper import plugins
 
 
 class _RuntimeObjectMap(dict):
-    """Runtime cache map; full enumeration syncs missing objects from DB."""
+    """Runtime cache map of resident object managers.
+
+    Full enumeration loads objects known to the in-memory object index but not
+    yet hydrated (no SQL unless the periodic probe detects out-of-band changes);
+    objects unloaded by the memory budget are not reloaded and are not
+    enumerated - `keys()`, `len()`, `items()` and `values()` all see the same
+    resident managers. Names of all objects: `ObjectStorage.getObjectNames()`.
+
+    Enumeration returns a list copy: objects may be evicted concurrently
+    (memory budget), eviction is paused while the copy is taken.
+    """
 
     __slots__ = ("_storage",)
 
@@ -47,43 +69,194 @@ class _RuntimeObjectMap(dict):
         self._storage = storage
 
     def _sync_for_enumeration(self) -> None:
-        self._storage.sync_missing()
+        self._storage.sync_index()
 
+    # только загруженные менеджеры: выгруженные по бюджету объекты
+    # не поднимаются ради перечисления (иначе бюджет памяти "пилит")
     def keys(self):
-        self._sync_for_enumeration()
-        return super().keys()
+        with self._storage.eviction_paused():
+            self._sync_for_enumeration()
+            return list(super().keys())
 
     def values(self):
-        self._sync_for_enumeration()
-        return super().values()
+        with self._storage.eviction_paused():
+            self._sync_for_enumeration()
+            return list(super().values())
 
     def items(self):
-        self._sync_for_enumeration()
-        return super().items()
+        with self._storage.eviction_paused():
+            self._sync_for_enumeration()
+            return list(super().items())
+
+    def __setitem__(self, name, om):
+        super().__setitem__(name, om)
+        if name == '_permissions':
+            permission_tables.bump("_permissions loaded")
+
+    def __delitem__(self, name):
+        super().__delitem__(name)
+        if name == '_permissions':
+            permission_tables.bump("_permissions removed")
 
     def __iter__(self):
-        self._sync_for_enumeration()
-        return super().__iter__()
+        return iter(self.keys())
 
     def __len__(self):
         self._sync_for_enumeration()
         return super().__len__()
 
 
+# Примерный размер Jinja-окружения объекта (создаётся при первом render)
+_RENDER_ENV_BYTES = 64 * 1024
+
+# Объекты, упомянутые в коде активных задач: setProperty("Obj.prop", ...), callMethod('Obj.method')
+_TASK_OBJECT_RE = re.compile(r"""(?:setProperty|updateProperty|callMethod|getProperty)\(\s*['"]([^'".]+)\.""")
+
+
+def _value_size(value) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(key) + sys.getsizeof(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+def _estimate_size(om: ObjectManager) -> int:
+    """Rough resident size of an object manager in bytes (shallow, one level into values)."""
+    size = sys.getsizeof(om) + sys.getsizeof(om.__dict__) + sys.getsizeof(om.properties)
+    for pm in list(om.properties.values()):
+        # metadata lives in the shared PropertyDescriptor and is not counted per object
+        size += sys.getsizeof(pm) + _value_size(pm._PropertyManager__value)
+    for mm in list(om.methods.values()):
+        size += sys.getsizeof(mm) + sys.getsizeof(mm.__dict__)
+        for item in mm.methods:
+            size += sys.getsizeof(item) + len(item.get('code') or '')
+    for template in (om.__dict__.get('__templates') or {}).values():
+        size += len(template or '')
+    if om.__dict__.get('_render_env') is not None:
+        size += _RENDER_ENV_BYTES
+    return size
+
+
+def _detach_row(row) -> SimpleNamespace:
+    """Copy ORM row columns into a plain namespace (safe to keep after the session is closed)."""
+    return SimpleNamespace(**{column.name: getattr(row, column.name) for column in row.__table__.columns})
+
+
+class _ClassSchema:
+    """Resolved class schema shared by all objects of a class.
+
+    Attributes:
+        properties (dict): Flattened class properties by name (detached rows)
+        methods (list[dict]): Class methods from root class to own class, with owner
+        bound_methods (dict): Method name by id for methods bound to class properties
+        templates (dict): Templates by class name (own class first)
+        parents (list[str]): Class names from own class to root
+    """
+    __slots__ = ("class_id", "revision", "properties", "methods", "bound_methods", "templates", "parents")
+
+    def __init__(self, class_id, revision: int, chain: list):
+        self.class_id = class_id
+        self.revision = revision
+        self.properties = {}
+        self.methods = []
+        self.bound_methods = {}
+        self.templates = {cls.name: cls.template for cls in chain}
+        self.parents = [cls.name for cls in chain]
+
+
+class _AccessBuffer:
+    """Per-thread cumulative access counters of the getObjectByName fast path."""
+    __slots__ = ("thread", "counts", "last", "merged", "hits")
+
+    def __init__(self, thread: threading.Thread):
+        self.thread = thread
+        self.hits = 0       # попадания в загруженный объект (для hit rate)
+        self.counts = {}
+        self.last = {}      # name -> time.monotonic() последнего обращения
+        self.merged = {}    # name -> значение counts на момент прошлого слияния
+
+
 class ObjectStorage():
+    # Максимум объектов в одном наборе IN-запросов при bulk-гидратации
+    HYDRATE_CHUNK_SIZE = 500
+
+    # Приоритеты фоновой предзагрузки (меньше — раньше)
+    PRELOAD_PRIORITY_RECENT = 0     # недавно запрошенные объекты
+    PRELOAD_PRIORITY_REACTIVE = 1   # методы на свойствах или связанные плагины
+    PRELOAD_PRIORITY_RENDERED = 2   # шаблоны / панель управления
+    PRELOAD_PRIORITY_OTHER = 3
+    _PRELOAD_PRIORITY_NAMES = {0: "recent", 1: "reactive", 2: "rendered", 3: "other"}
+
     def __init__(self):
         self.logger = getLogger('object_storage')
         self.objects = _RuntimeObjectMap(self)
-        self.stats = {}
+        self._stats = {}
+        # Буферы статистики доступа по потокам (fast path getObjectByName без блокировок)
+        self._access_local = threading.local()
+        self._access_lock = threading.Lock()
+        self._access_buffers = []
+        self._access_merges = 0
         self.name_lock_global = threading.Lock()
         self.name_lock = {}
         self.clean_objects = {}
         self.reactive_loop_count = 0
         self.preload_progress = None
+        # Кеш схем классов; сбрасывается при изменении классов (class_revision)
+        self.class_revision = 0
+        self._class_schemas = {}
+        self._class_schema_lock = threading.Lock()
+        # Создание недостающих Value: проверка и вставка атомарны для всех путей гидратации
+        self._missing_values_lock = threading.Lock()
+        self._class_schema_hits = 0
+        self._class_schema_misses = 0
+        # Индекс name -> id всех объектов БД; обновляется при create/rename/delete,
+        # внешние изменения БД ловит периодическая проба (max id, count)
+        self._index_lock = threading.Lock()
+        self._object_ids = {}
+        self._index_ready = False
+        # Индекс классов: name -> id, id -> дочерние классы, id -> объекты класса
+        # (dict name -> None в порядке id); дерево классов перестраивается после bump_class_revision
+        self._class_ids = {}
+        self._class_children = {}
+        self._class_members = defaultdict(dict)
+        self._object_class = {}
+        self._class_tree_ready = False
+        self._class_queries = 0
+        self._index_probe_at = 0.0
+        self._index_probes = 0
+        self._index_resyncs = 0
 
         self._stop_event = threading.Event()
         self._preload_stop_event = threading.Event()
         self._preload_thread = None
+        self._preload_lock = threading.Lock()
+        self._preload_stats = None
+        # Количество текущих foreground-загрузок (getObjectByName miss); предзагрузка уступает им
+        self._foreground_loads = 0
+        # getObjectByName: промахи (загрузка из БД) и попадания буферов завершившихся потоков
+        self._lookup_misses = 0
+        self._lookup_hits_finished = 0
+        # Warm-start снимок (ObjectsSnapshot): последние отчёты restore/write
+        self._snapshot_stop_event = threading.Event()
+        self._snapshot_thread = None
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_stats = {'last_restore': None, 'last_write': None, 'writes': 0, 'errors': 0}
+        # Бюджет памяти: часы second-chance (name -> referenced), оценка размера,
+        # выгруженные объекты (name -> info) и счётчики
+        self._clock = OrderedDict()
+        self._resident_bytes = {}
+        self._resident_total = 0
+        self._evicted = {}
+        self._object_evictions = defaultdict(int)
+        self._object_rehydrations = defaultdict(int)
+        self._evict_lock = threading.Lock()
+        self._resident_lock = threading.Lock()
+        self._pinned_timers = (0.0, None)
+        self._eviction_pause = 0
+        self._eviction_sweep_at = None
+        self._eviction_stats = {'runs': 0, 'evicted': 0, 'rehydrated': 0, 'pinned_skipped': 0, 'last_run': None}
         self.cleaner_thread = threading.Thread(target=self.clean_task, daemon=True)
         self.cleaner_thread.start()
 
@@ -102,25 +275,36 @@ class ObjectStorage():
         for _, om in list(dict.items(self.objects)):
             self._invoke_lifecycle(om, hook)
 
-    def _replace_object_manager(self, session, obj: Object) -> ObjectManager:
+    def _get_name_condition(self, name: str) -> threading.Condition:
+        with self.name_lock_global:
+            if name not in self.name_lock:
+                self.name_lock[name] = threading.Condition()
+            return self.name_lock[name]
+
+    def _replace_object_manager(self, session, obj: Object, om: ObjectManager = None) -> ObjectManager:
         old_om = self.objects.get(obj.name)
         if old_om:
             self._invoke_lifecycle(old_om, "onStop")
-        om = self._createObjectManager(session, obj)
+        if om is None:
+            om = self._createObjectManager(session, obj)
         self.objects[obj.name] = om
+        self._track_resident(om)
         om.clear_runtime()
         self._invoke_lifecycle(om, "onInit")
         return om
 
-    def _load_or_reload_object(self, session, obj: Object) -> ObjectManager:
+    def _load_or_reload_object(self, session, obj: Object, om: ObjectManager = None) -> ObjectManager:
         if obj.name in self.objects:
-            om = self._replace_object_manager(session, obj)
+            om = self._replace_object_manager(session, obj, om)
         else:
-            om = self._createObjectManager(session, obj)
+            if om is None:
+                om = self._createObjectManager(session, obj)
             self.objects[obj.name] = om
+            self._track_resident(om)
             self._invoke_lifecycle(om, "onInit")
-        if obj.name not in self.stats:
-            self.stats[obj.name] = {
+        self._index_add(obj.name, obj.id, obj.class_id)
+        if obj.name not in self._stats:
+            self._stats[obj.name] = {
                 'count_get': 1,
                 'last_get': get_now_to_utc(),
             }
@@ -132,6 +316,8 @@ class ObjectStorage():
 
         while not self._stop_event.is_set():
             try:
+                # оценки размера дрейфуют вместе со значениями - периодически проверяем бюджет
+                self.enforce_memory_budget()
                 now = datetime.now()
 
                 object_keys = list(dict.keys(self.objects))
@@ -141,7 +327,7 @@ class ObjectStorage():
 
                 self.logger.debug("Check objects for clean history")
 
-                for key, obj in dict.items(self.objects):
+                for key, obj in list(dict.items(self.objects)):
                     if self.clean_objects.get(key) is None or now.date() > self.clean_objects.get(key,{}).get("dt").date():
                         res = obj.cleanHistory()
                         count_deleted = 0
@@ -155,30 +341,128 @@ class ObjectStorage():
                 self.logger.exception(f'Error in clean task: {e}', exc_info=True)
             self._stop_event.wait(60.0)
 
-    def getObjectByName(self, name: str) -> ObjectManager:
-        with self.name_lock_global:
-            if name not in self.name_lock:
-                self.name_lock[name] = threading.Condition()
-            condition = self.name_lock[name]
+    def _publish_object_manager(self, om: ObjectManager) -> ObjectManager:
+        """Register hydrated manager unless another thread has already loaded the object."""
+        condition = self._get_name_condition(om.name)
+        with condition:
+            current = dict.get(self.objects, om.name)
+            if current is not None:
+                return current
+            self.objects[om.name] = om
+            self._index_add(om.name, om.object_id)
+            if om.name not in self._stats:
+                self._stats[om.name] = {'count_get': 1, 'last_get': get_now_to_utc()}
+            if not self._track_resident(om):
+                self._invoke_lifecycle(om, "onInit")
+            condition.notify_all()
+        self.enforce_memory_budget()
+        return om
 
+    def getObjectByName(self, name: str) -> ObjectManager:
+        # fast path: загруженный объект - чтение dict без блокировок,
+        # статистика доступа в буфер текущего потока
+        om = dict.get(self.objects, name)
+        if om is not None:
+            buffer = getattr(self._access_local, 'buffer', None)
+            if buffer is None:
+                buffer = self._register_access_buffer()
+            buffer.counts[name] = buffer.counts.get(name, 0) + 1
+            buffer.last[name] = time.monotonic()
+            buffer.hits += 1
+            return om
+        return self._loadObjectByName(name)
+
+    def _loadObjectByName(self, name: str) -> ObjectManager:
+        """Miss path of getObjectByName: single-flight load under the per-name condition."""
+        condition = self._get_name_condition(name)
+
+        om = None
         with condition:
-            if name in self.objects:
-                self.stats[name]['count_get'] = self.stats[name]['count_get'] + 1
-                self.stats[name]['last_get'] = get_now_to_utc()
-                return self.objects[name]
+            current = dict.get(self.objects, name)
+            if current is not None:
+                # загружен другим потоком, пока ждали condition
+                self._stats[name]['count_get'] += 1
+                self._stats[name]['last_get'] = get_now_to_utc()
+                return current
+
+            with self._preload_lock:
+                self._foreground_loads += 1
+                self._lookup_misses += 1
+            try:
+                with session_scope() as session:
+                    obj = session.query(Object).filter_by(name=name).one_or_none()
+                    if obj:
+                        om = self._createObjectManager(session, obj)
+                        self.objects[obj.name] = om
+                        self._index_add(obj.name, obj.id, obj.class_id)
+                        if obj.name in self._stats:
+                            self._stats[obj.name]['count_get'] += 1
+                            self._stats[obj.name]['last_get'] = get_now_to_utc()
+                        else:
+                            self._stats[obj.name] = {'count_get':1, 'last_get': get_now_to_utc()}
+                        # выгруженный по бюджету объект возвращается без onInit
+                        if not self._track_resident(om, referenced=True):
+                            self._invoke_lifecycle(om, "onInit")
+                        condition.notify_all()
+            finally:
+                with self._preload_lock:
+                    self._foreground_loads -= 1
+
+        if om is not None:
+            self.enforce_memory_budget()
+            return om
+
+        self.logger.warning(f'Object "{name}" not found')
+        return None
+
+    def _register_access_buffer(self) -> "_AccessBuffer":
+        buffer = _AccessBuffer(threading.current_thread())
+        self._access_local.buffer = buffer
+        with self._access_lock:
+            self._access_buffers.append(buffer)
+        return buffer
+
+    def _merge_access_stats(self) -> None:
+        """Fold per-thread access counters of the fast path into object stats.
+
+        Counters in a buffer are cumulative and written only by the owner
+        thread; the merge applies the delta since the previous merge (dict
+        copy is atomic under the GIL, an increment racing with the copy is
+        picked up next time). Buffers of finished threads are dropped.
+        """
+        with self._access_lock:
+            now_mono = time.monotonic()
+            now = get_now_to_utc()
+            alive = []
+            for buffer in self._access_buffers:
+                counts = buffer.counts.copy()
+                last = buffer.last.copy()
+                merged = buffer.merged
+                for name, count in counts.items():
+                    delta = count - merged.get(name, 0)
+                    if not delta:
+                        continue
+                    merged[name] = count
+                    stat = self._stats.get(name)
+                    if stat is None:
+                        # объект удалён
+                        continue
+                    stat['count_get'] += delta
+                    last_get = now - timedelta(seconds=max(0.0, now_mono - last.get(name, now_mono)))
+                    if stat['last_get'] is None or last_get > stat['last_get']:
+                        stat['last_get'] = last_get
+                if buffer.thread.is_alive():
+                    alive.append(buffer)
+                else:
+                    self._lookup_hits_finished += buffer.hits
+            self._access_buffers = alive
+            self._access_merges += 1
 
-            with session_scope() as session:
-                obj = session.query(Object).filter_by(name=name).one_or_none()
-                if obj:
-                    om = self._createObjectManager(session, obj)
-                    self.objects[obj.name] = om
-                    self.stats[obj.name] = {'count_get':1, 'last_get': get_now_to_utc()}
-                    self._invoke_lifecycle(om, "onInit")
-                    condition.notify_all()
-                    return self.objects[name]
-
-            self.logger.warning(f'Object "{name}" not found')
-            return None
+    @property
+    def stats(self) -> dict:
+        """Access stats by object name: count_get, last_get (UTC, ~1 ms precision)."""
+        self._merge_access_stats()
+        return self._stats
 
     def items(self):
         return self.objects.items()
@@ -186,6 +470,20 @@ class ObjectStorage():
     def values(self):
         return self.objects.values()
 
+    def getObjectNames(self) -> list:
+        """Names of all objects, including objects unloaded by the memory budget (not reloaded)."""
+        names = self.objects.keys()
+        resident = set(names)
+        names.extend(name for name in list(self._evicted) if name not in resident)
+        return names
+
+    def getObjectDescriptions(self) -> dict:
+        """name -> description of all objects; objects unloaded by the memory budget are not reloaded."""
+        result = {name: om.description for name, om in self.objects.items()}
+        for name, info in list(self._evicted.items()):
+            result.setdefault(name, info['description'])
+        return result
+
     def getCleanerStat(self):
         stats = []
         for key, item in self.clean_objects.items():
@@ -209,6 +507,7 @@ class ObjectStorage():
         return True
 
     def getStats(self, exclude_internal: bool = False):
+        self._merge_access_stats()
         stats = {}
         for name,obj in self.objects.items():
             if exclude_internal:
@@ -228,8 +527,8 @@ class ObjectStorage():
                 'id': obj.object_id,
                 'name': obj.name,
                 'description': obj.description,
-                'getObject':self.stats[name]['count_get'],
-                'lastGetObject':self.stats[name]['last_get'],
+                'getObject':self._stats[name]['count_get'],
+                'lastGetObject':self._stats[name]['last_get'],
                 'getProperty':count_read,
                 'setProperty':count_write,
                 'callMethod':count_exec,
@@ -237,36 +536,106 @@ class ObjectStorage():
         return stats
 
     def getAdvancedStats(self):
+        self._merge_access_stats()
         stats = {}
-        for name,obj in self.objects.items():
+        # при заданном бюджете памяти не загружаем выгруженные объекты ради статистики
+        items = list(dict.items(self.objects)) if self._budget_enabled() else self.objects.items()
+        for name,obj in items:
             stats[name] = {
                 'id': obj.object_id,
                 'name': obj.name,
                 'description': obj.description,
-                'count_get':self.stats[name]['count_get'],
-                'last_get':self.stats[name]['last_get'],
-                **self.stats[name],
-                **obj.getStats()
+                'count_get':self._stats[name]['count_get'],
+                'last_get':self._stats[name]['last_get'],
+                **self._stats[name],
+                **obj.getStats(),
+                'resident': True,
+                'resident_bytes': self._resident_bytes.get(name, 0),
+                'evictions': self._object_evictions.get(name, 0),
+                'rehydrations': self._object_rehydrations.get(name, 0),
+            }
+        for name, info in list(self._evicted.items()):
+            if name in stats:
+                continue
+            stat = self._stats.get(name, {})
+            stats[name] = {
+                'id': info['id'],
+                'name': name,
+                'description': info['description'],
+                'count_get': stat.get('count_get', 0),
+                'last_get': stat.get('last_get'),
+                'stat_properties': {},
+                'stat_methods': {},
+                'resident': False,
+                'resident_bytes': 0,
+                'evicted': info['evicted'],
+                'evictions': self._object_evictions.get(name, 0),
+                'rehydrations': self._object_rehydrations.get(name, 0),
             }
         return stats
 
+    def getLookupStats(self) -> dict:
+        """getObjectByName hits (loaded object) and misses (load from DB), without merging access stats."""
+        with self._access_lock:
+            hits = self._lookup_hits_finished + sum(buffer.hits for buffer in self._access_buffers)
+        misses = self._lookup_misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses) * 100, 2) if hits + misses else 0,
+        }
+
+    def getStorageStats(self) -> dict:
+        """Runtime cache counters of the storage itself (not per object)."""
+        with self._class_schema_lock:
+            hits = self._class_schema_hits
+            misses = self._class_schema_misses
+            class_schema = {
+                'revision': self.class_revision,
+                'cached': len(self._class_schemas),
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses) * 100, 2) if hits + misses else 0,
+            }
+        with self._index_lock:
+            index = {
+                'size': len(self._object_ids),
+                'ready': self._index_ready,
+                'probes': self._index_probes,
+                'resyncs': self._index_resyncs,
+                'probe_interval_sec': Config.OBJECT_INDEX_PROBE_INTERVAL_SEC,
+                'classes': len(self._class_ids),
+                'class_tree_ready': self._class_tree_ready,
+                'class_queries': self._class_queries,
+            }
+        return {
+            'objects': dict.__len__(self.objects),
+            'lookups': self.getLookupStats(),
+            'class_schema': class_schema,
+            'index': index,
+            'preload': self.getPreloadStats(),
+            'snapshot': self.getSnapshotStats(),
+            'eviction': self.getEvictionStats(),
+        }
+
     def methodsSort(self, methods):
         """Sort methods by hierarchy
 
         Args:
-            methods (list[Method]): List of methods
+            methods (list[Method|dict]): List of methods (rows or row dicts)
 
         Returns:
-            list[Method]: Sorted list of methods
+            list[Method|dict]: Sorted list of methods
         """
         result = []
         for method in methods[:]:
-            if method.call_parent is None or method.call_parent == -1:
+            call_parent = method['call_parent'] if isinstance(method, dict) else method.call_parent
+            if call_parent is None or call_parent == -1:
                 result.append(method)
-            elif method.call_parent == 0:
+            elif call_parent == 0:
                 result = []
                 result.append(method)
-            elif method.call_parent == 1:
+            elif call_parent == 1:
                 result.insert(-1, method)
         return result
 
@@ -303,25 +672,209 @@ class ObjectStorage():
         key = "object:*"
         if key in properties_dict:
             property_manager = properties_dict[key]
-            _permissions = property_manager.__dict__.get('_PropertyManager__value')
+            _permissions = property_manager._PropertyManager__value
         for className in om.__dict__.get('parents',[]):
             _permissionsClass = None
             key = "class:" + className
             if key in properties_dict:
                 property_manager = properties_dict[key]
-                _permissionsClass = property_manager.__dict__.get('_PropertyManager__value')
+                _permissionsClass = property_manager._PropertyManager__value
             if _permissionsClass:
                 _permissions = self.merge_dicts(_permissions, _permissionsClass)
         _permissionsObject = None
         key = "object:" + name
         if key in properties_dict:
             property_manager = properties_dict[key]
-            _permissionsObject = property_manager.__dict__.get('_PropertyManager__value')
+            _permissionsObject = property_manager._PropertyManager__value
         if _permissionsObject:
             _permissions = self.merge_dicts(_permissions, _permissionsObject)
 
         return _permissions
 
+    def _budget_enabled(self) -> bool:
+        return bool(Config.OBJECT_MEMORY_BUDGET_OBJECTS or Config.OBJECT_MEMORY_BUDGET_MB)
+
+    def _over_budget(self) -> bool:
+        max_objects = Config.OBJECT_MEMORY_BUDGET_OBJECTS or 0
+        max_bytes = (Config.OBJECT_MEMORY_BUDGET_MB or 0) * 1024 * 1024
+        if max_objects and dict.__len__(self.objects) > max_objects:
+            return True
+        return bool(max_bytes and self._resident_total > max_bytes)
+
+    def _track_resident(self, om: ObjectManager, referenced: bool = False) -> bool:
+        """Register loaded manager in the eviction clock.
+
+        Returns:
+        bool: True if the object was evicted before (rehydration - no onInit)
+        """
+        name = om.name
+        size = _estimate_size(om)
+        self._set_resident_size(name, size)
+        self._clock[name] = referenced
+        rehydrated = self._evicted.pop(name, None) is not None
+        if rehydrated:
+            self._object_rehydrations[name] += 1
+            self._eviction_stats['rehydrated'] += 1
+        return rehydrated
+
+    def _set_resident_size(self, name: str, size: int) -> None:
+        with self._resident_lock:
+            self._resident_total += size - self._resident_bytes.get(name, 0)
+            self._resident_bytes[name] = size
+
+    def _untrack_resident(self, name: str, forget: bool = False) -> None:
+        with self._resident_lock:
+            self._resident_total -= self._resident_bytes.pop(name, 0)
+        self._clock.pop(name, None)
+        if forget:
+            self._evicted.pop(name, None)
+            self._object_evictions.pop(name, None)
+            self._object_rehydrations.pop(name, None)
+
+    @contextmanager
+    def eviction_paused(self):
+        """Suspend budget eviction (e.g. while enumerating all objects)."""
+        with self._preload_lock:
+            self._eviction_pause += 1
+        try:
+            yield
+        finally:
+            with self._preload_lock:
+                self._eviction_pause -= 1
+                resume = self._eviction_pause == 0
+            if resume:
+                self.enforce_memory_budget()
+
+    def _pinned_context(self) -> dict:
+        """Data for pin checks, collected once per eviction run."""
+        now = time.monotonic()
+        cached_at, timers = self._pinned_timers
+        if timers is None or now - cached_at > 5.0:
+            timers = set()
+            try:
+                with session_scope() as session:
+                    for (code,) in session.query(Task.code).filter(Task.active.is_(True)).all():
+                        timers.update(_TASK_OBJECT_RE.findall(code or ''))
+            except Exception:
+                self.logger.exception("Failed to read active tasks for eviction pinning")
+            self._pinned_timers = (now, timers)
+        return {'values': _batch_writer.pending_value_ids(), 'timers': timers}
+
+    def _pin_reason(self, om: ObjectManager, context: dict):
+        """Why the object must stay resident (None - may be evicted)."""
+        if om.name in ('_permissions', 'SystemVar', SYSTEM_STATS_OBJECT):
+            return 'system'
+        if om._lifecycle_running or om._current_execution_source is not None:
+            return 'running'
+        if om.runtime:
+            return 'runtime'
+        if om.name in context['timers']:
+            return 'timer'
+        pending = context['values']
+        for pm in list(om.properties.values()):
+            if pm.linked:
+                return 'linked'
+            if pm.value_id in pending:
+                return 'pending_write'
+        return None
+
+    def _evict(self, om: ObjectManager) -> bool:
+        condition = self._get_name_condition(om.name)
+        # не ждём: объект сейчас загружается/читается другим потоком
+        if not condition.acquire(blocking=False):
+            return False
+        try:
+            if dict.get(self.objects, om.name) is not om:
+                return False
+            dict.__delitem__(self.objects, om.name)
+            self._untrack_resident(om.name)
+            self._evicted[om.name] = {
+                'id': om.object_id,
+                'description': om.description,
+                'evicted': get_now_to_utc(),
+            }
+            self._object_evictions[om.name] += 1
+            return True
+        finally:
+            condition.release()
+
+    def enforce_memory_budget(self) -> int:
+        """Evict cold objects until the memory budget is met (second-chance LRU).
+
+        Referenced objects get a second chance, pinned objects (pending writes,
+        active timers, linked plugins, running methods, runtime state) are
+        skipped. Evicted objects are rehydrated by getObjectByName without onInit.
+
+        Returns:
+        int: Number of evicted objects
+        """
+        if not self._budget_enabled() or self._eviction_pause or not self._over_budget():
+            return 0
+        if not self._evict_lock.acquire(blocking=False):
+            return 0
+        started = time.perf_counter()
+        evicted = 0
+        pinned = defaultdict(int)
+        try:
+            # обращения через fast path видны только после слияния буферов
+            self._merge_access_stats()
+            since = self._eviction_sweep_at
+            self._eviction_sweep_at = get_now_to_utc()
+            context = self._pinned_context()
+            # не больше двух оборотов часов за один проход
+            moves = 2 * len(self._clock)
+            while moves > 0 and not self._eviction_pause and self._over_budget():
+                moves -= 1
+                try:
+                    name, referenced = self._clock.popitem(last=False)
+                except KeyError:
+                    break
+                om = dict.get(self.objects, name)
+                if om is None:
+                    self._untrack_resident(name)
+                    continue
+                last_get = self._stats.get(name, {}).get('last_get')
+                if referenced or (since is not None and last_get is not None and last_get > since):
+                    # second chance; заодно обновляем оценку размера
+                    self._set_resident_size(name, _estimate_size(om))
+                    self._clock[name] = False
+                    continue
+                reason = self._pin_reason(om, context)
+                if reason is None and self._evict(om):
+                    evicted += 1
+                    continue
+                if reason is not None:
+                    pinned[reason] += 1
+                self._clock[name] = False
+        finally:
+            stats = self._eviction_stats
+            stats['runs'] += 1
+            stats['evicted'] += evicted
+            stats['pinned_skipped'] += sum(pinned.values())
+            stats['last_run'] = {
+                'at': get_now_to_utc(),
+                'evicted': evicted,
+                'pinned': dict(pinned),
+                'seconds': round(time.perf_counter() - started, 4),
+            }
+            self._evict_lock.release()
+        if evicted:
+            self.logger.debug("Evicted %s object(s) over memory budget", evicted)
+        return evicted
+
+    def getEvictionStats(self) -> dict:
+        """Memory budget, resident estimate and eviction/rehydration counters."""
+        stats = dict(self._eviction_stats)
+        stats.update({
+            'enabled': self._budget_enabled(),
+            'budget_objects': Config.OBJECT_MEMORY_BUDGET_OBJECTS,
+            'budget_mb': Config.OBJECT_MEMORY_BUDGET_MB,
+            'resident_objects': dict.__len__(self.objects),
+            'resident_bytes': self._resident_total,
+            'evicted_objects': len(self._evicted),
+        })
+        return stats
+
     def _createObjectManager(self, session, obj):
         """Create object manager for given object
         Args:
@@ -330,125 +883,265 @@ class ObjectStorage():
         Returns:
         ObjectManager: Object manager for given object
         """
-        self.logger.debug(f"Create object manager - {obj.name}")
-        om = ObjectManager(obj)
-        # load properties
-        properties = self._getPropertiesClass(session, obj.class_id, [])
-        property_obj = session.query(Property).filter(Property.object_id == obj.id).all()
-        properties = properties + property_obj
-        for prop in properties:
-            values = session.query(Value).filter(Value.object_id == obj.id, Value.name == prop.name).all()
-            if values:
-                value = values[0]
-                if len(values) > 1:
-                    self.logger.warning(f"Warning! More than one value with same name and object id. {obj.name}.{prop.name}")
-                    for item in values[1:]:
-                        # move history
-                        session.query(History).filter(History.value_id == item.id).update({History.value_id: value.id}, synchronize_session='fetch')
-                        # delete clone
-                        session.query(Value).filter(Value.id == item.id).delete()
-                    session.commit()
-                    self.logger.info(f"Fixed! Remove dublicate {obj.name}.{prop.name}")
-            else:
-                value = None
+        return self._createObjectManagers(session, [obj])[obj.name]
 
-            pm = PropertyManager(obj.id, prop, value, obj.name)
-            if prop.method_id:
-                method = session.query(Method).filter(Method.id == prop.method_id).one_or_none()
-                if method:
-                    pm.bindMethod(method.name)
-                else:
-                    self.logger.warning(
-                        "Property %s.%s references missing method id %s",
-                        obj.name, prop.name, prop.method_id,
-                    )
-            om._addProperty(pm)
-        # load methods
-        methods = self._getMethodsClass(session, obj.class_id, [])
-        methods = methods + session.query(Method).filter(Method.object_id == obj.id).all()
-        group_methods = {}
-        for method in methods:
-            if method.name not in group_methods:
-                group_methods[method.name] = []
-            group_methods[method.name].append(method)
-        for _, group in group_methods.items():
-            if len(group) > 1:
-                group = self.methodsSort(group)
-            group = [row2dict(item) for item in group]
-            for item in group:
-                if item['class_id']:
-                    cls = session.query(Class).filter(Class.id == item['class_id']).one_or_none()
-                    if cls:
-                        item['owner'] = cls.name
+    def _createObjectManagers(self, session, objs) -> dict:
+        """Bulk create object managers for a batch of objects
+
+        Class part (properties, methods, templates, parents) comes from the class
+        schema cache; per-object properties, methods and values of the batch are
+        loaded with a fixed number of set-based queries per chunk of
+        HYDRATE_CHUNK_SIZE objects; missing Value rows are created with one bulk insert.
+
+        Args:
+        session (Session): Session object
+        objs (list[Object]): Objects to create object managers for
+        Returns:
+        dict[str, ObjectManager]: Object managers by object name (input order)
+        """
+        objs = list(objs)
+        result = {}
+        if not objs:
+            return result
+        schemas = self._getClassSchemas(session, {obj.class_id for obj in objs})
+        chunk_size = max(1, self.HYDRATE_CHUNK_SIZE)
+        for i in range(0, len(objs), chunk_size):
+            result.update(self._hydrateChunk(session, objs[i:i + chunk_size], schemas))
+        return result
+
+    def bump_class_revision(self) -> int:
+        """Invalidate cached class schemas (class, class property or class method changed)"""
+        with self._index_lock:
+            self._class_tree_ready = False
+        with self._class_schema_lock:
+            self.class_revision += 1
+            self._class_schemas.clear()
+            return self.class_revision
+
+    def _getClassSchemas(self, session, class_ids) -> dict:
+        """Resolved class schemas by class id (cached until class revision changes)"""
+        schemas = {}
+        missing = set()
+        with self._class_schema_lock:
+            revision = self.class_revision
+            for class_id in class_ids:
+                schema = self._class_schemas.get(class_id)
+                if schema is not None and schema.revision == revision:
+                    schemas[class_id] = schema
+                    self._class_schema_hits += 1
                 else:
-                    item['owner'] = obj.name
-            mm = MethodManager(group)
-            om._addMethod(mm)
-
-        # get templates from class
-        templates = self._getTemplateClass(session, obj.class_id,{})
-        templates[obj.name] = obj.template
-        om._setTemplates(templates)
-
-        parents = []
-        parents = self._getParents(session, obj.class_id, parents)
-        om.parents = parents
-        om.set_permission(self.get_permissions(om))
-        return om
+                    missing.add(class_id)
+                    self._class_schema_misses += 1
+        if not missing:
+            return schemas
+
+        built = self._buildClassSchemas(session, missing, revision)
+        schemas.update(built)
+        with self._class_schema_lock:
+            if self.class_revision == revision:
+                self._class_schemas.update(built)
+        return schemas
+
+    def _buildClassSchemas(self, session, class_ids, revision) -> dict:
+        if not any(class_ids):
+            return {class_id: _ClassSchema(class_id, revision, []) for class_id in class_ids}
+        classes = {cls.id: _detach_row(cls) for cls in session.query(Class).all()}
+        chains = {class_id: self._classChain(classes, class_id) for class_id in class_ids}
+        chain_ids = {cls.id for chain in chains.values() for cls in chain}
+
+        class_props = defaultdict(list)
+        for prop in session.query(Property).filter(Property.class_id.in_(chain_ids)).order_by(Property.id).all():
+            class_props[prop.class_id].append(_detach_row(prop))
+        class_methods = defaultdict(list)
+        for method in session.query(Method).filter(Method.class_id.in_(chain_ids)).order_by(Method.id).all():
+            item = row2dict(method)
+            item['owner'] = classes[method.class_id].name
+            class_methods[method.class_id].append(item)
+        bound_ids = {prop.method_id for props in class_props.values() for prop in props if prop.method_id}
+        bound_methods = {}
+        if bound_ids:
+            bound_methods = dict(session.query(Method.id, Method.name).filter(Method.id.in_(bound_ids)).all())
+
+        schemas = {}
+        for class_id, chain in chains.items():
+            schema = _ClassSchema(class_id, revision, chain)
+            # own class first, then parents (later overrides value, order of first)
+            for cls in chain:
+                for prop in class_props.get(cls.id, []):
+                    schema.properties[prop.name] = prop
+                    if prop.method_id in bound_methods:
+                        schema.bound_methods[prop.method_id] = bound_methods[prop.method_id]
+            # root class methods first
+            for cls in reversed(chain):
+                schema.methods.extend(class_methods.get(cls.id, []))
+            schemas[class_id] = schema
+        return schemas
+
+    def _classChain(self, classes, class_id):
+        """Цепочка классов от собственного до корневого (по загруженной карте классов)"""
+        chain = []
+        seen = set()
+        while class_id and class_id not in seen:
+            cls = classes.get(class_id)
+            if cls is None:
+                break
+            seen.add(class_id)
+            chain.append(cls)
+            class_id = cls.parent_id
+        return chain
+
+    def _hydrateChunk(self, session, objs, schemas):
+        object_ids = {obj.id for obj in objs}
+
+        object_props = defaultdict(list)
+        for prop in session.query(Property).filter(Property.object_id.in_(object_ids)).order_by(Property.id).all():
+            object_props[prop.object_id].append(prop)
+
+        object_methods = defaultdict(list)
+        for method in session.query(Method).filter(Method.object_id.in_(object_ids)).order_by(Method.id).all():
+            object_methods[method.object_id].append(method)
+
+        values = defaultdict(list)
+        for value in session.query(Value).filter(Value.object_id.in_(object_ids)).order_by(Value.id).all():
+            values[(value.object_id, value.name)].append(value)
+
+        plan = []
+        bound_ids = set()
+        duplicates = {}
+        missing = []
+        for obj in objs:
+            schema = schemas[obj.class_id]
+            properties = dict(schema.properties)
+            for prop in object_props.get(obj.id, []):
+                properties[prop.name] = prop
+                if prop.method_id and prop.method_id not in schema.bound_methods:
+                    bound_ids.add(prop.method_id)
+            for prop in properties.values():
+                key = (obj.id, prop.name)
+                rows = values.get(key)
+                if not rows:
+                    missing.append({'object_id': obj.id, 'name': prop.name})
+                elif len(rows) > 1:
+                    self.logger.warning(f"Warning! More than one value with same name and object id. {obj.name}.{prop.name}")
+                    duplicates[(obj.name, prop.name)] = rows
+                    values[key] = rows[:1]
+            plan.append((obj, schema, properties))
+
+        if duplicates:
+            self._fixDuplicateValues(duplicates)
+
+        created_ids = self._insertMissingValues(missing) if missing else {}
+
+        bound_methods = {}
+        if bound_ids:
+            bound_methods = dict(session.query(Method.id, Method.name).filter(Method.id.in_(bound_ids)).all())
+
+        result = {}
+        for obj, schema, properties in plan:
+            om = ObjectManager(obj)
+            # load properties
+            for prop in properties.values():
+                rows = values.get((obj.id, prop.name))
+                method_name = None
+                if prop.method_id:
+                    method_name = schema.bound_methods.get(prop.method_id) or bound_methods.get(prop.method_id)
+                    if not method_name:
+                        self.logger.warning(
+                            "Property %s.%s references missing method id %s",
+                            obj.name, prop.name, prop.method_id,
+                        )
+                pm = PropertyManager(obj.id, prop, rows[0] if rows else None, obj.name, method=method_name)
+                if pm.value_id is None:
+                    pm.value_id = created_ids.get((obj.id, prop.name))
+                om._addProperty(pm)
+            # load methods (class methods from schema, then object methods)
+            group_methods = {}
+            for item in schema.methods:
+                group_methods.setdefault(item['name'], []).append(dict(item))
+            for method in object_methods.get(obj.id, []):
+                item = row2dict(method)
+                item['owner'] = obj.name
+                group_methods.setdefault(item['name'], []).append(item)
+            for _, group in group_methods.items():
+                if len(group) > 1:
+                    group = self.methodsSort(group)
+                mm = MethodManager(group)
+                om._addMethod(mm)
+
+            # get templates from class
+            templates = dict(schema.templates)
+            templates[obj.name] = obj.template
+            om._setTemplates(templates)
+
+            om.parents = list(schema.parents)
+            om.set_permission(self.get_permissions(om))
+            result[obj.name] = om
+        self.logger.debug("Hydrated %s object manager(s)", len(result))
+        return result
 
-    def _getParents(self, session, id, parents):
-        if id:
-            cls = session.query(Class).filter(Class.id == id).one_or_none()
-            if cls:
-                parents.append(cls.name)
-                if cls.parent_id:
-                    return self._getParents(session, cls.parent_id, parents)
-        return parents
-
-    def _getPropertiesClass(self, session, id, properties):
-        if id:
-            props = session.query(Property).filter(Property.class_id == id).all()
-            properties = properties + props
-            cls = session.query(Class).filter(Class.id == id).one_or_none()
-            if cls and cls.parent_id:
-                return self._getPropertiesClass(session, cls.parent_id, properties)
-        return properties
-
-    def _getMethodsClass(self, session, id, methods):
-        if id:
-            meth = session.query(Method).filter(Method.class_id == id).all()
-            methods = meth + methods
-            cls = session.query(Class).filter(Class.id == id).one_or_none()
-            if cls and cls.parent_id:
-                return self._getMethodsClass(session, cls.parent_id, methods)
-        return methods
-
-    def _getTemplateClass(self, session, id, templates):
-        if id:
-            cls = session.query(Class).filter(Class.id == id).one_or_none()
-            templates[cls.name] = cls.template
-            if cls and cls.parent_id:
-                return self._getTemplateClass(session, cls.parent_id, templates)
-        return templates
+    def _fixDuplicateValues(self, duplicates) -> None:
+        """Merge duplicate Value rows: move history to the first row and delete clones"""
+        with session_scope() as session:
+            for rows in duplicates.values():
+                value_id = rows[0].id
+                clone_ids = [item.id for item in rows[1:]]
+                # move history
+                session.query(History).filter(History.value_id.in_(clone_ids)).update({History.value_id: value_id}, synchronize_session=False)
+                # delete clones
+                session.query(Value).filter(Value.id.in_(clone_ids)).delete(synchronize_session=False)
+        for object_name, name in duplicates:
+            self.logger.info(f"Fixed! Remove dublicate {object_name}.{name}")
+
+    def _insertMissingValues(self, rows) -> dict:
+        """Bulk insert missing Value rows
+
+        Bulk loads (sync_missing, enumeration, background preload) hydrate outside
+        the per-name condition, so rows inserted by a concurrent hydration of the
+        same object are re-queried under a lock and only the still missing ones
+        are inserted.
+
+        Args:
+        rows (list[dict]): Mappings with object_id and name
+        Returns:
+        dict[tuple, int]: Value id by (object_id, name)
+        """
+        object_ids = {row['object_id'] for row in rows}
+        names = {row['name'] for row in rows}
+        created = {}
+        with self._missing_values_lock, session_scope() as session:
+            query = session.query(Value.id, Value.object_id, Value.name).filter(
+                Value.object_id.in_(object_ids), Value.name.in_(names))
+            for value_id, object_id, name in query.order_by(Value.id).all():
+                created.setdefault((object_id, name), value_id)
+            rows = [row for row in rows if (row['object_id'], row['name']) not in created]
+            if rows:
+                session.execute(insert(Value), rows)
+                for value_id, object_id, name in query.order_by(Value.id).all():
+                    created.setdefault((object_id, name), value_id)
+        return created
 
     # remove object
     def remove_object(self, object_name):
         self.logger.debug(f"Remove object - name:{object_name}")
+        self._index_remove(object_name)
+        self._untrack_resident(object_name, forget=True)
         if object_name in self.objects:
             self._invoke_lifecycle(self.objects[object_name], "onStop")
             del self.objects[object_name]
-            if object_name in self.stats:
-                del self.stats[object_name]
+            if object_name in self._stats:
+                del self._stats[object_name]
             if object_name in self.clean_objects:
                 del self.clean_objects[object_name]
 
     def rename_object(self, old_name: str, new_name: str, object_id: int) -> None:
         self.logger.debug(f"Rename object - {old_name} -> {new_name}")
+        self._index_remove(old_name)
+        self._untrack_resident(old_name, forget=True)
         if old_name in self.objects:
             self._invoke_lifecycle(self.objects[old_name], "onStop")
             del self.objects[old_name]
-        if old_name in self.stats:
-            del self.stats[old_name]
+        if old_name in self._stats:
+            del self._stats[old_name]
         if old_name in self.clean_objects:
             del self.clean_objects[old_name]
         self.reload_object(object_id)
@@ -456,6 +1149,7 @@ class ObjectStorage():
 
     def remove_objects_by_class(self, class_id):
         self.logger.debug(f"Remove objects by class - id:{class_id}")
+        self.bump_class_revision()
         with session_scope() as session:
             objs = session.query(Object).filter(Object.class_id == class_id).all()
             for obj in objs:
@@ -464,33 +1158,161 @@ class ObjectStorage():
             for child in childs:
                 self.remove_objects_by_class(child.id)
 
-    def sync_missing(self) -> int:
-        """Load objects that exist in DB but are not yet in runtime cache."""
-        loaded = 0
+    def _index_add(self, name: str, object_id: int, class_id=False) -> None:
+        """Add object to the index; class_id=False keeps the known class membership."""
+        with self._index_lock:
+            self._object_ids[name] = object_id
+            if class_id is False:
+                return
+            old_class = self._object_class.get(name, False)
+            if old_class is not False and old_class != class_id:
+                self._class_members[old_class].pop(name, None)
+            self._object_class[name] = class_id
+            self._class_members[class_id][name] = None
+
+    def _index_remove(self, name: str) -> None:
+        with self._index_lock:
+            self._object_ids.pop(name, None)
+            class_id = self._object_class.pop(name, False)
+            if class_id is not False:
+                self._class_members[class_id].pop(name, None)
+
+    def _rebuild_index(self) -> None:
         with session_scope() as session:
-            objs = session.query(Object).order_by(Object.name).all()
-            for obj in objs:
-                if obj.name in self.objects:
+            rows = session.query(Object.id, Object.name, Object.class_id).order_by(Object.id).all()
+            classes = session.query(Class.id, Class.name, Class.parent_id).order_by(Class.id).all()
+        members = defaultdict(dict)
+        for _, name, class_id in rows:
+            members[class_id][name] = None
+        with self._index_lock:
+            self._object_ids = {name: object_id for object_id, name, _ in rows}
+            self._object_class = {name: class_id for _, name, class_id in rows}
+            self._class_members = members
+            self._set_class_tree(classes)
+            self._index_ready = True
+            self._index_probe_at = time.monotonic()
+
+    def _set_class_tree(self, classes) -> None:
+        # вызывается под _index_lock
+        children = defaultdict(list)
+        for class_id, _, parent_id in classes:
+            children[parent_id].append(class_id)
+        self._class_ids = {name: class_id for class_id, name, _ in classes}
+        self._class_children = dict(children)
+        self._class_tree_ready = True
+
+    def _refresh_class_tree(self) -> None:
+        with session_scope() as session:
+            classes = session.query(Class.id, Class.name, Class.parent_id).order_by(Class.id).all()
+        with self._index_lock:
+            self._set_class_tree(classes)
+
+    def getObjectNamesByClass(self, class_name: str, subclasses: bool = True) -> list:
+        """Names of objects of a class (and its subclasses) from the in-memory class index.
+
+        Order: objects of the class by id, then subclasses depth-first.
+
+        Returns:
+        list[str]: Object names, None if the class does not exist
+        """
+        self._refresh_index()
+        if not self._class_tree_ready:
+            self._refresh_class_tree()
+        with self._index_lock:
+            self._class_queries += 1
+            class_id = self._class_ids.get(class_name)
+            if class_id is None:
+                return None
+            names = []
+            stack = [class_id]
+            seen = set()
+            while stack:
+                current = stack.pop()
+                if current in seen:
                     continue
-                om = self._createObjectManager(session, obj)
-                self.objects[obj.name] = om
-                if obj.name not in self.stats:
-                    self.stats[obj.name] = {'count_get': 1, 'last_get': get_now_to_utc()}
-                self._invoke_lifecycle(om, "onInit")
-                loaded += 1
+                seen.add(current)
+                names.extend(self._class_members.get(current, ()))
+                if subclasses:
+                    stack.extend(reversed(self._class_children.get(current, [])))
+            return names
+
+    def _probe_index(self) -> bool:
+        """Cheap change detection: compare DB max id / row count with the index."""
+        with session_scope() as session:
+            max_id, count = session.query(func.max(Object.id), func.count(Object.id)).one()
+        with self._index_lock:
+            self._index_probes += 1
+            ids = self._object_ids.values()
+            return max_id == (max(ids) if ids else None) and count == len(ids)
+
+    def _load_unloaded(self) -> int:
+        """Hydrate objects present in the index but missing in runtime cache (not evicted ones)."""
+        with self._index_lock:
+            names = [
+                name for name in self._object_ids
+                if not dict.__contains__(self.objects, name) and name not in self._evicted
+            ]
+        if not names:
+            return 0
+        loaded = 0
+        chunk_size = max(1, self.HYDRATE_CHUNK_SIZE)
+        for i in range(0, len(names), chunk_size):
+            chunk = names[i:i + chunk_size]
+            with session_scope() as session:
+                objs = session.query(Object).filter(Object.name.in_(chunk)).order_by(Object.name).all()
+                for om in self._createObjectManagers(session, objs).values():
+                    if self._publish_object_manager(om) is om:
+                        loaded += 1
+            found = {obj_name for obj_name in chunk if dict.__contains__(self.objects, obj_name)}
+            for obj_name in chunk:
+                if obj_name not in found:
+                    self._index_remove(obj_name)
+        return loaded
+
+    def _evict_unindexed(self) -> int:
+        with self._index_lock:
+            names = [name for name in dict.keys(self.objects) if name not in self._object_ids]
+        for name in names:
+            self.remove_object(name)
+        return len(names)
+
+    def sync_index(self) -> None:
+        """Align runtime cache with the in-memory object index (used on enumeration).
+
+        SQL is issued only for the first build of the index, for the rate limited
+        probe (OBJECT_INDEX_PROBE_INTERVAL_SEC) and when a real resync is needed.
+        """
+        self._refresh_index()
+        self._load_unloaded()
+
+    def _refresh_index(self) -> None:
+        """Build the index on first use; resync it when the probe sees out-of-band changes."""
+        if not self._index_ready:
+            self._rebuild_index()
+        else:
+            interval = Config.OBJECT_INDEX_PROBE_INTERVAL_SEC
+            now = time.monotonic()
+            if interval is not None and now - self._index_probe_at >= interval:
+                self._index_probe_at = now
+                if not self._probe_index():
+                    with self._index_lock:
+                        self._index_resyncs += 1
+                    self.logger.info("Objects changed outside runtime, resync object index")
+                    self._rebuild_index()
+                    self._evict_unindexed()
+
+    def sync_missing(self) -> int:
+        """Load objects that exist in DB but are not yet in runtime cache."""
+        self._rebuild_index()
+        loaded = self._load_unloaded()
         if loaded:
             self.logger.debug("Synced %s missing object(s) into runtime cache", loaded)
         return loaded
 
     def sync_removed(self) -> int:
         """Evict cached objects that were deleted from DB."""
-        with session_scope() as session:
-            db_names = {name for (name,) in session.query(Object.name).all()}
-        removed = 0
-        for name in list(dict.keys(self.objects)):
-            if name not in db_names:
-                self.remove_object(name)
-                removed += 1
+        self._rebuild_index()
+        removed = self._evict_unindexed()
         if removed:
             self.logger.debug("Evicted %s stale object(s) from runtime cache", removed)
         return removed
@@ -510,13 +1332,18 @@ class ObjectStorage():
 
     def reload_objects_by_class(self, class_id):
         self.logger.debug(f"Reload objects by class - id:{class_id}")
+        self.bump_class_revision()
         with session_scope() as session:
-            objs = session.query(Object).filter(Object.class_id == class_id).order_by(Object.name).all()
+            children = defaultdict(list)
+            for cls_id, parent_id in session.query(Class.id, Class.parent_id).all():
+                children[parent_id].append(cls_id)
+            class_ids = [class_id]
+            for cls_id in class_ids:
+                class_ids.extend(child for child in children.get(cls_id, []) if child not in class_ids)
+            objs = session.query(Object).filter(Object.class_id.in_(class_ids)).order_by(Object.name).all()
+            managers = self._createObjectManagers(session, objs)
             for obj in objs:
-                self._load_or_reload_object(session, obj)
-            childs = session.query(Class).filter(Class.parent_id == class_id).all()
-            for child in childs:
-                self.reload_objects_by_class(child.id)
+                self._load_or_reload_object(session, obj, managers[obj.name])
 
     # preload all storage objects
     def preload_objects(self):
@@ -542,39 +1369,357 @@ class ObjectStorage():
         if thread and thread.is_alive():
             thread.join(timeout=5.0)
 
+    def _preload_order(self, session) -> list:
+        """Object names not yet loaded, as (priority, name) in preload order."""
+        classes = {cls_id: (parent_id, template) for cls_id, parent_id, template in
+                   session.query(Class.id, Class.parent_id, Class.template).all()}
+        bound_classes = {cls_id for (cls_id,) in session.query(Property.class_id).filter(
+            Property.method_id.isnot(None), Property.class_id.isnot(None)).distinct().all()}
+        bound_objects = {obj_id for (obj_id,) in session.query(Property.object_id).filter(
+            Property.method_id.isnot(None), Property.object_id.isnot(None)).distinct().all()}
+        linked_objects = {obj_id for (obj_id,) in session.query(Value.object_id).filter(
+            Value.linked.isnot(None), Value.linked != '').distinct().all()}
+
+        class_flags = {}
+
+        def flags(class_id):
+            # (есть методы на свойствах, есть шаблон) по цепочке классов
+            if class_id in class_flags:
+                return class_flags[class_id]
+            bound, rendered = False, False
+            seen = set()
+            current = class_id
+            while current and current in classes and current not in seen:
+                seen.add(current)
+                parent_id, template = classes[current]
+                bound = bound or current in bound_classes
+                rendered = rendered or bool(template)
+                current = parent_id
+            class_flags[class_id] = (bound, rendered)
+            return class_flags[class_id]
+
+        dashboard = set()
+        system_var = dict.get(self.objects, "SystemVar")
+        if system_var is not None and "control_panel_objects" in system_var.properties:
+            try:
+                dashboard = set(system_var.properties["control_panel_objects"].getValue(track_stats=False) or [])
+            except Exception:
+                dashboard = set()
+        recent = {name: item.get('last_get') for name, item in list(self.stats.items())}
+
+        order = []
+        for obj_id, name, class_id, template in session.query(Object.id, Object.name, Object.class_id, Object.template).all():
+            if dict.__contains__(self.objects, name) or name in self._evicted:
+                continue
+            class_bound, class_rendered = flags(class_id)
+            if name in recent:
+                priority = self.PRELOAD_PRIORITY_RECENT
+            elif class_bound or obj_id in bound_objects or obj_id in linked_objects:
+                priority = self.PRELOAD_PRIORITY_REACTIVE
+            elif class_rendered or template or name in dashboard:
+                priority = self.PRELOAD_PRIORITY_RENDERED
+            else:
+                priority = self.PRELOAD_PRIORITY_OTHER
+            order.append((priority, name))
+        order.sort(key=lambda item: (
+            item[0],
+            -(recent[item[1]].timestamp() if item[0] == self.PRELOAD_PRIORITY_RECENT and recent.get(item[1]) else 0),
+            item[1],
+        ))
+        return order
+
+    def _preload_yield(self) -> None:
+        """Wait while foreground object loads are running (bounded)."""
+        deadline = time.monotonic() + 2.0
+        yielded = False
+        while self._foreground_loads > 0 and time.monotonic() < deadline:
+            yielded = True
+            if self._preload_stop_event.wait(0.01):
+                break
+        if yielded:
+            with self._preload_lock:
+                self._preload_stats['yields'] += 1
+
+    def _preload_batches(self, app, batches: queue.Queue) -> None:
+        ctx = app.app_context() if app is not None else nullcontext()
+        interval = Config.OBJECT_PRELOAD_INTERVAL_SEC or 0
+        with ctx:
+            while not self._preload_stop_event.is_set():
+                try:
+                    priority, batch = batches.get_nowait()
+                except queue.Empty:
+                    break
+                self._preload_yield()
+                started = time.perf_counter()
+                loaded = 0
+                names = [name for name in batch if not dict.__contains__(self.objects, name)]
+                try:
+                    if names:
+                        with session_scope() as session:
+                            objs = session.query(Object).filter(Object.name.in_(names)).order_by(Object.name).all()
+                            for om in self._createObjectManagers(session, objs).values():
+                                if self._publish_object_manager(om) is om:
+                                    loaded += 1
+                except Exception:
+                    self.logger.exception("Background preload batch failed")
+                seconds = time.perf_counter() - started
+                with self._preload_lock:
+                    stats = self._preload_stats
+                    stats['processed'] += len(batch)
+                    stats['loaded'] += loaded
+                    stats['batches_done'] += 1
+                    stats['batch_seconds_total'] += seconds
+                    stats['last_batches'].append({
+                        'priority': self._PRELOAD_PRIORITY_NAMES.get(priority, priority),
+                        'size': len(batch),
+                        'loaded': loaded,
+                        'seconds': round(seconds, 4),
+                    })
+                    processed, total = stats['processed'], stats['total']
+                    self.preload_progress = {"loaded": processed, "total": total}
+                self.logger.info("Preloaded %s/%s objects", processed, total)
+                if self._over_budget():
+                    # остальное загрузится по требованию
+                    self.logger.info("Object memory budget reached, background preload stopped")
+                    self._preload_stop_event.set()
+                    break
+                if interval and self._preload_stop_event.wait(interval):
+                    break
+
     def _background_preload_worker(self, app) -> None:
         ctx = app.app_context() if app is not None else nullcontext()
-        batch_size = Config.OBJECT_PRELOAD_BATCH_SIZE or 10
-        interval = Config.OBJECT_PRELOAD_INTERVAL_SEC or 0.5
+        batch_size = max(1, Config.OBJECT_PRELOAD_BATCH_SIZE or 10)
+        workers = max(1, Config.OBJECT_PRELOAD_WORKERS or 1)
         try:
             with ctx:
                 with session_scope() as session:
-                    names = [o.name for o in session.query(Object).order_by(Object.name).all()]
-                total = len(names)
-                for i in range(0, total, batch_size):
-                    if self._preload_stop_event.is_set():
-                        break
-                    batch = names[i:i + batch_size]
-                    for name in batch:
-                        if self._preload_stop_event.is_set():
-                            break
-                        if name in self.objects:
-                            continue
-                        self.getObjectByName(name)
-                    preloaded = sum(1 for n in names if n in self.objects)
-                    self.preload_progress = {"loaded": preloaded, "total": total}
-                    self.logger.info("Preloaded %s/%s objects", preloaded, total)
-                    if self._preload_stop_event.wait(interval):
-                        break
-                self.preload_progress = None
+                    order = self._preload_order(session)
+            batches = queue.Queue()
+            by_priority = defaultdict(int)
+            for priority, _ in order:
+                by_priority[self._PRELOAD_PRIORITY_NAMES[priority]] += 1
+            # батчи не смешивают приоритеты, очередь отдаёт их в порядке приоритета
+            for i in range(0, len(order), batch_size):
+                chunk = order[i:i + batch_size]
+                priority = chunk[0][0]
+                batch = [name for item_priority, name in chunk if item_priority == priority]
+                rest = [name for item_priority, name in chunk if item_priority != priority]
+                batches.put((priority, batch))
+                if rest:
+                    batches.put((chunk[-1][0], rest))
+            with self._preload_lock:
+                self._preload_stats = {
+                    'state': 'running',
+                    'started': time.time(),
+                    'finished': None,
+                    'workers': workers,
+                    'batch_size': batch_size,
+                    'total': len(order),
+                    'processed': 0,
+                    'loaded': 0,
+                    'batches_total': batches.qsize(),
+                    'batches_done': 0,
+                    'batch_seconds_total': 0.0,
+                    'yields': 0,
+                    'by_priority': dict(by_priority),
+                    'last_batches': deque(maxlen=20),
+                }
+                self.preload_progress = {"loaded": 0, "total": len(order)}
+            threads = [
+                threading.Thread(target=self._preload_batches, args=(app, batches), daemon=True, name=f"ObjectPreload-{i}")
+                for i in range(min(workers, max(1, batches.qsize())))
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            with self._preload_lock:
+                self._preload_stats['state'] = 'stopped' if self._preload_stop_event.is_set() else 'done'
+                self._preload_stats['finished'] = time.time()
+            self.preload_progress = None
         except Exception:
             self.logger.exception("Background object preload failed")
+            with self._preload_lock:
+                if self._preload_stats is not None:
+                    self._preload_stats['state'] = 'failed'
+                    self._preload_stats['finished'] = time.time()
             self.preload_progress = None
 
+    def getPreloadStats(self) -> dict:
+        """Progress, ETA and batch timings of the background preload (None if never started)."""
+        with self._preload_lock:
+            stats = self._preload_stats
+            if stats is None:
+                return None
+            result = {key: value for key, value in stats.items() if key != 'last_batches'}
+            result['last_batches'] = list(stats['last_batches'])
+        end = result['finished'] or time.time()
+        elapsed = end - result['started']
+        processed, total = result['processed'], result['total']
+        result['elapsed_sec'] = round(elapsed, 3)
+        result['percent'] = round(processed / total * 100, 2) if total else 100.0
+        result['eta_sec'] = round(elapsed / processed * (total - processed), 3) if processed and result['state'] == 'running' else 0
+        result['avg_batch_sec'] = round(result['batch_seconds_total'] / result['batches_done'], 4) if result['batches_done'] else 0
+        result['batch_seconds_total'] = round(result['batch_seconds_total'], 4)
+        return result
+
+    def write_snapshot(self, path: str = None, managers=None) -> dict:
+        """Write warm-start snapshot of hydrated objects (atomic replace)
+
+        Args:
+        path (str): Snapshot file (default - OBJECT_SNAPSHOT_PATH)
+        managers (list[ObjectManager]): Managers to store (default - runtime cache)
+        Returns:
+        dict: Write report (path, objects, properties, bytes, seconds)
+        """
+        path = path or Config.OBJECT_SNAPSHOT_PATH
+        started = time.perf_counter()
+        with self._snapshot_lock:
+            try:
+                if managers is None:
+                    managers = list(dict.values(self.objects))
+                with session_scope() as session:
+                    markers = snapshot.db_markers(session)
+                    hashes = snapshot.structure_hashes(session)
+                entries = [snapshot.dump_manager(om) for om in managers]
+                header = {
+                    'created': str(get_now_to_utc()),
+                    'objects': len(entries),
+                    'properties': sum(len(entry['properties']) for entry in entries),
+                    'schema_hash': snapshot.schema_hash(hashes),
+                    'markers': markers,
+                }
+                size = snapshot.write_snapshot_file(path, header, {'objects': entries})
+            except Exception:
+                self._snapshot_stats['errors'] += 1
+                raise
+            report = {
+                'path': path,
+                'created': header['created'],
+                'objects': header['objects'],
+                'properties': header['properties'],
+                'bytes': size,
+                'seconds': round(time.perf_counter() - started, 4),
+            }
+            self._snapshot_stats['writes'] += 1
+            self._snapshot_stats['last_write'] = report
+        self.logger.info("Object snapshot written: %s objects, %s bytes, %.3fs",
+                         report['objects'], report['bytes'], report['seconds'])
+        return report
+
+    def restore_snapshot(self, path: str = None) -> dict:
+        """Warm start: fill runtime cache from the snapshot file
+
+        Entries whose structure hash differs from the DB (or whose Value rows are
+        gone) are hydrated from the DB; values whose (changed, source, linked)
+        differ from the DB are re-read. Objects absent from the snapshot are left
+        to background preload / lazy load.
+
+        Returns:
+        dict: Restore report, None if there is no usable snapshot
+        """
+        path = path or Config.OBJECT_SNAPSHOT_PATH
+        if not os.path.exists(path):
+            return None
+        started = time.perf_counter()
+        try:
+            header, payload = snapshot.read_snapshot_file(path)
+        except (OSError, ValueError) as ex:
+            self.logger.warning("Object snapshot ignored: %s", ex)
+            return None
+
+        with session_scope() as session:
+            hashes = snapshot.structure_hashes(session)
+            states = snapshot.value_states(session)
+        entries, rehydrate, stale_ids, dropped = snapshot.reconcile(payload.get('objects', []), hashes, states)
+
+        fresh = {}
+        managers = []
+        chunk_size = max(1, self.HYDRATE_CHUNK_SIZE)
+        with session_scope() as session:
+            stale_list = list(stale_ids)
+            for i in range(0, len(stale_list), chunk_size):
+                for row in session.query(Value).filter(Value.id.in_(stale_list[i:i + chunk_size])).all():
+                    fresh[row.id] = _detach_row(row)
+            for i in range(0, len(rehydrate), chunk_size):
+                objs = session.query(Object).filter(Object.id.in_(rehydrate[i:i + chunk_size])).order_by(Object.name).all()
+                managers.extend(self._createObjectManagers(session, objs).values())
+        managers.extend(snapshot.restore_manager(entry, fresh) for entry in entries)
+
+        # _permissions публикуем первым: от него зависят права остальных объектов
+        managers.sort(key=lambda om: om.name != '_permissions')
+        restored = 0
+        for om in managers:
+            om.set_permission(self.get_permissions(om))
+            if self._publish_object_manager(om) is om:
+                restored += 1
+        report = {
+            'path': path,
+            'created': header.get('created'),
+            'objects': restored,
+            'from_snapshot': len(entries),
+            'rehydrated': len(rehydrate),
+            'dropped': dropped,
+            'values_refreshed': len(stale_ids),
+            'seconds': round(time.perf_counter() - started, 4),
+        }
+        with self._snapshot_lock:
+            self._snapshot_stats['last_restore'] = report
+        self.logger.info(
+            "Object snapshot restored: %s objects (%s rehydrated, %s values refreshed) in %.3fs",
+            restored, report['rehydrated'], report['values_refreshed'], report['seconds'])
+        return report
+
+    def start_snapshot_writer(self, app=None) -> None:
+        """Periodic snapshot writer (OBJECT_SNAPSHOT_INTERVAL_SEC)"""
+        if not Config.OBJECT_SNAPSHOT_ENABLED or not Config.OBJECT_SNAPSHOT_INTERVAL_SEC:
+            return
+        if self._snapshot_thread and self._snapshot_thread.is_alive():
+            return
+        self._snapshot_stop_event.clear()
+
+        def worker():
+            ctx = app.app_context() if app is not None else nullcontext()
+            with ctx:
+                while not self._snapshot_stop_event.wait(Config.OBJECT_SNAPSHOT_INTERVAL_SEC):
+                    try:
+                        self.write_snapshot()
+                    except Exception:
+                        self.logger.exception("Periodic object snapshot failed")
+
+        self._snapshot_thread = threading.Thread(target=worker, daemon=True, name="ObjectSnapshot")
+        self._snapshot_thread.start()
+
+    def stop_snapshot_writer(self, write: bool = True) -> None:
+        """Stop periodic writer; write final snapshot on shutdown"""
+        self._snapshot_stop_event.set()
+        thread = self._snapshot_thread
+        if thread and thread.is_alive():
+            thread.join(timeout=5.0)
+        if write and Config.OBJECT_SNAPSHOT_ENABLED:
+            try:
+                # значения в снимке должны совпасть с БД, иначе restore перечитает их
+                _batch_writer.flush_sync()
+                self.write_snapshot()
+            except Exception:
+                self.logger.exception("Object snapshot on shutdown failed")
+
+    def getSnapshotStats(self) -> dict:
+        with self._snapshot_lock:
+            return {
+                'enabled': Config.OBJECT_SNAPSHOT_ENABLED,
+                'path': Config.OBJECT_SNAPSHOT_PATH,
+                'interval_sec': Config.OBJECT_SNAPSHOT_INTERVAL_SEC,
+                'writes': self._snapshot_stats['writes'],
+                'errors': self._snapshot_stats['errors'],
+                'last_write': self._snapshot_stats['last_write'],
+                'last_restore': self._snapshot_stats['last_restore'],
+            }
+
     def clear(self):
         self.logger.info("Clear storage")
         dict.clear(self.objects)
-        self.stats.clear()
+        self._stats.clear()
         self.sync_cache()
 
     def changeObject(self, event, object_name, property_name, method_name, new_value):
@@ -0,0 +1,312 @@
+"""
+Compiled permission decision tables.
+
+Permission dicts stored in the `_permissions` object
+({"get": {"denied_users": [...], "access_users": [...], "denied_roles": [...], "access_roles": [...]}, ...})
+are compiled once into rules. Decisions for (member, action, user, role) are memoized in a table per
+object (ObjectManager._check_permissions) and in one table for pages (check_page_access), so a repeated
+check is a single dict lookup.
+
+Every change of the `_permissions` object bumps `permission_tables.revision`; tables built for an older
+revision are dropped and rebuilt on next use (objects also re-merge their class/object permissions).
+"""
+import json
+import threading
+import time
+from collections import deque
+
+from app.logging_config import getLogger
+
+_logger = getLogger("permissions")
+
+# роли, которым разрешено всё, что не запрещено явно
+DEFAULT_ALLOWED_ROLES = frozenset({"user", "editor", "admin"})
+
+# свойства объектов класса Users, которые admin может менять всегда
+USERS_ADMIN_SET_PROPERTIES = frozenset({
+    'role', 'password', 'apikey', 'home_page', 'timezone', 'image', 'lastLogin',
+})
+
+# каждая N-я проверка измеряется (для перцентилей в диагностике)
+_SAMPLE_EVERY = 64
+_SAMPLE_SIZE = 2048
+# защита от роста таблиц при переборе пользователей/ролей
+_MAX_DECISIONS = 50000
+
+
+def _members(value):
+    """Compiled list of users/roles: (set or original value, has '*')"""
+    if not value:
+        return None
+    if isinstance(value, (list, tuple, set, frozenset)):
+        try:
+            return frozenset(value), "*" in value
+        except TypeError:
+            pass
+    # строка или нехешируемые элементы - проверка через in, как раньше
+    return value, "*" in value
+
+
+class Rule():
+    """Compiled permissions of one action: denied users → access users → denied roles → access roles."""
+    __slots__ = ("denied_users", "access_users", "denied_roles", "access_roles")
+
+    def __init__(self, source: dict):
+        self.denied_users = _members(source.get("denied_users"))
+        self.access_users = _members(source.get("access_users"))
+        self.denied_roles = _members(source.get("denied_roles"))
+        self.access_roles = _members(source.get("access_roles"))
+
+    @staticmethod
+    def _match(members, value) -> bool:
+        return members is not None and (members[1] or value in members[0])
+
+    def decide(self, username, role):
+        """True - allowed, False - denied, None - no decision (fall through)"""
+        if self._match(self.denied_users, username):
+            return False
+        if self._match(self.access_users, username):
+            return True
+        if self._match(self.denied_roles, role):
+            return False
+        if self._match(self.access_roles, role):
+            return True
+        return None
+
+
+def compile_actions(permissions) -> dict:
+    """{action: Rule} from {"get": {...}, "set": {...}, ...}; non-dict entries are ignored"""
+    if not permissions or not isinstance(permissions, dict):
+        return {}
+    return {action: Rule(item) for action, item in permissions.items() if item and isinstance(item, dict)}
+
+
+class ObjectPermissions():
+    """Decision table of one object, built from its merged permissions dict."""
+    __slots__ = ("revision", "name", "parents", "raw", "self_rules", "properties", "methods", "decisions")
+
+    def __init__(self, name: str, parents, permissions, revision: int):
+        self.revision = revision
+        self.name = name
+        self.parents = frozenset(parents or ())
+        self.raw = permissions
+        self.decisions = {}
+        self.self_rules = None
+        self.properties = {}
+        self.methods = {}
+        if isinstance(permissions, dict):
+            if "self" in permissions:
+                self.self_rules = compile_actions(permissions["self"])
+            for name_, item in (permissions.get("properties") or {}).items():
+                self.properties[name_] = compile_actions(item)
+            for name_, item in (permissions.get("methods") or {}).items():
+                self.methods[name_] = compile_actions(item)
+
+    def __len__(self):
+        return len(self.decisions)
+
+    def decide(self, key):
+        """Decision for (operation, property_name, method_name, username, role): True or error message"""
+        decision = self.decisions.get(key)
+        if decision is None:
+            decision = self._compute(*key)
+            if len(self.decisions) >= _MAX_DECISIONS:
+                self.decisions.clear()
+            self.decisions[key] = decision
+        return decision
+
+    def _compute(self, operation, property_name, method_name, username, role):
+        name = self.name
+        if property_name and 'Users' in self.parents:
+            sensitive = (f"User {username}({role}) don't have permission to {operation.name} "
+                         f"obj:{name} property:{property_name} (sensitive)")
+            if property_name == 'password' and operation.value == "get":
+                return sensitive
+            if operation.value == "set" and role == 'admin':
+                if property_name in USERS_ADMIN_SET_PROPERTIES:
+                    return True
+            if property_name == 'password' and operation.value == "set" and role != 'admin':
+                return sensitive
+            if property_name == 'apikey' and operation.value in ("get", "set"):
+                if role != 'admin' and username != name:
+                    return sensitive
+
+        if self.raw is None:
+            if role in DEFAULT_ALLOWED_ROLES:
+                return True
+            return (f"User {username}({role}) don't have permission to {operation.name} obj:{name} "
+                    f"property:{property_name} method:{method_name} permissions:None")
+
+        actions = self.self_rules
+        if property_name and property_name in self.properties:
+            actions = self.properties[property_name]
+        if method_name and method_name in self.methods:
+            actions = self.methods[method_name]
+
+        rule = actions.get(operation.value) if actions else None
+        if rule is not None:
+            decision = rule.decide(username, role)
+            if decision is True:
+                return True
+            if decision is False:
+                return self._denied(operation, property_name, method_name, username, role)
+
+        if role in DEFAULT_ALLOWED_ROLES:
+            return True
+        return self._denied(operation, property_name, method_name, username, role)
+
+    def _denied(self, operation, property_name, method_name, username, role) -> str:
+        """Error message with the permissions entry that was applied (as before compilation)"""
+        raw = self.raw
+        permissions = None
+        if "self" in raw:
+            permissions = raw["self"]
+        if property_name and "properties" in raw and property_name in raw["properties"]:
+            permissions = raw["properties"][property_name]
+        if method_name and "methods" in raw and method_name in raw["methods"]:
+            permissions = raw["methods"][method_name]
+        if permissions:
+            permissions = permissions.get(operation.value, None)
+        try:
+            text = json.dumps(permissions)
+        except (TypeError, ValueError):
+            text = str(permissions)
+        return (f"User {username}({role}) don't have permission to {operation.name} obj:{self.name} "
+                f"property:{property_name} method:{method_name} permissions:{text}")
+
+
+class PermissionTables():
+    """Revision counter, page decision table and check statistics."""
+
+    def __init__(self):
+        self.revision = 0
+        self._lock = threading.Lock()
+        self._pages = {}            # "blueprint:<name>" / "<bp>:<endpoint>" -> {method: Rule}
+        self._pages_revision = -1
+        self._page_decisions = {}   # (blueprint, endpoint, method, username, role) -> True/False/None
+        self._checks = 0
+        self._samples = deque(maxlen=_SAMPLE_SIZE)
+        self._rebuilds = 0
+        self._object_tables = 0
+        self._last_bump = None
+
+    def bump(self, reason: str = None) -> int:
+        """Invalidate all compiled tables (permissions changed)"""
+        with self._lock:
+            self.revision += 1
+            self._last_bump = {"at": time.time(), "reason": reason}
+        _logger.debug("Permission tables revision %s (%s)", self.revision, reason)
+        return self.revision
+
+    def object_table(self, name: str, parents, permissions) -> ObjectPermissions:
+        self._object_tables += 1
+        return ObjectPermissions(name, parents, permissions, self.revision)
+
+    # --- pages ---
+
+    def _compile_pages(self) -> dict:
+        """Compile `_permissions` pages; called without `_lock` (loading the object bumps the revision)"""
+        from app.core.main.ObjectsStorage import objects_storage
+        pages = {}
+        om = objects_storage.getObjectByName("_permissions")
+        if om is not None:
+            for key, pm in list(om.properties.items()):
+                value = pm.getValue(track_stats=False)
+                if value and isinstance(value, dict):
+                    pages[key] = compile_actions(value)
+        return pages
+
+    def page_decision(self, blueprint_name: str, endpoint: str, method: str, username, role):
+        """Decision of `_permissions.blueprint:<bp>` / `_permissions.<endpoint>` for a request.
+
+        Returns:
+            True - allowed, False - denied, None - not decided by permissions
+        """
+        key = (blueprint_name, endpoint, method, username, role)
+        revision = self.revision
+        if self._pages_revision != revision:
+            pages = self._compile_pages()
+            with self._lock:
+                # публикуем, если другой поток не опубликовал более новую ревизию;
+                # bump() во время сборки оставит ревизию устаревшей - пересоберём при следующей проверке
+                if self._pages_revision < revision:
+                    self._pages = pages
+                    self._page_decisions = {}
+                    self._pages_revision = revision
+                    self._rebuilds += 1
+        decisions = self._page_decisions
+        if key in decisions:
+            return decisions[key]
+        actions = self._pages.get(endpoint)
+        if actions is None:
+            actions = self._pages.get("blueprint:" + blueprint_name)
+        rule = actions.get(method) if actions else None
+        decision = rule.decide(username, role) if rule is not None else None
+        if len(decisions) >= _MAX_DECISIONS:
+            decisions.clear()
+        decisions[key] = decision
+        return decision
+
+    # --- statistics ---
+
+    def sample_start(self) -> int:
+        """perf_counter_ns() for every N-th check, 0 otherwise"""
+        self._checks += 1
+        if self._checks % _SAMPLE_EVERY:
+            return 0
+        return time.perf_counter_ns()
+
+    def sample_end(self, started: int) -> None:
+        self._samples.append(time.perf_counter_ns() - started)
+
+    def getStats(self, objects=None) -> dict:
+        """Diagnostics: compiled table sizes and check latency percentiles (microseconds)
+
+        Args:
+            objects (iterable, optional): Loaded object managers to count object decision tables
+        """
+        samples = sorted(self._samples)
+
+        def percentile(p):
+            if not samples:
+                return None
+            index = min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))
+            return round(samples[index] / 1000.0, 3)
+
+        object_tables = 0
+        object_decisions = 0
+        object_rules = 0
+        for om in objects or []:
+            table = om.__dict__.get("__decisions")
+            if table is None:
+                continue
+            object_tables += 1
+            object_decisions += len(table.decisions)
+            object_rules += len(table.properties) + len(table.methods) + (1 if table.self_rules else 0)
+        return {
+            "revision": self.revision,
+            "last_bump": self._last_bump,
+            "rebuilds": self._rebuilds,
+            "tables_built": self._object_tables,
+            "objects": {
+                "tables": object_tables,
+                "rules": object_rules,
+                "decisions": object_decisions,
+            },
+            "pages": {
+                "rules": sum(len(actions) for actions in self._pages.values()),
+                "decisions": len(self._page_decisions),
+                "revision": self._pages_revision,
+            },
+            "checks": self._checks,
+            "latency_us": {
+                "samples": len(samples),
+                "p50": percentile(50),
+                "p90": percentile(90),
+                "p99": percentile(99),
+                "max": percentile(100),
+            },
+        }
+
+
+permission_tables = PermissionTables()
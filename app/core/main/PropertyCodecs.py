@@ -0,0 +1,430 @@
+"""
+Per-type value codecs of properties.
+
+Every property type (`PropertyType` value or a type registered by a plugin) has a codec class.
+A codec instance is bound once per class property (PropertyDescriptor) with its params, so
+everything derived from params - numeric bounds and step, decimals, compiled regexp, enum map,
+allowed values, color scales and formats - is prepared at load time instead of on every
+read/write/history decode.
+
+    decode(value, init, current)  string/raw value -> internal value (init - lenient load from DB)
+    validate(value)               constraints for writes (raises ValueError)
+    encode(value)                 internal value -> string stored in Value/History
+    format_output(value)          internal value -> value returned by getProperty/history
+
+Custom types from plugins:
+
+    from app.core.lib.object import PropertyCodec, register_property_type
+
+    class PercentCodec(PropertyCodec):
+        type = "percent"
+
+        def decode(self, value, init=False, current=None):
+            return None if value == '' else float(str(value).rstrip('%'))
+
+        def encode(self, value):
+            return str(value)
+
+    register_property_type(PercentCodec)
+"""
+import json
+import re
+import threading
+
+from dateutil import parser
+
+from app.database import convert_utc_to_local, convert_local_to_utc
+from app.logging_config import getLogger
+from app.core.lib.constants import PropertyType
+from app.core.lib.converters.color_value import (
+    parse as parse_color_value,
+    to_universal as to_universal_color,
+    from_universal as from_universal_color,
+    encode as encode_color_value,
+    decode as decode_color_value,
+    detect_format as detect_color_format,
+    merge_xy_luminance,
+)
+
+_logger = getLogger('object')
+
+_BOOL_TRUE = frozenset(['true', '1', 't', 'y', 'yes', 'on'])
+_BOOL_FALSE = frozenset(['false', '0', 'f', 'n', 'no', 'off'])
+
+
+class PropertyCodec():
+    """Base codec: value is kept as is (untyped properties and unknown types).
+
+    Subclasses set `type` and override decode/encode/validate/format_output;
+    params-derived state is prepared in __init__.
+    """
+    type = PropertyType.Empty.value
+    # allowed_values сравниваются как значения (иначе - как строки)
+    allowed_by_value = False
+    # для enum допустимые значения задаются enum_values
+    uses_allowed_values = True
+
+    def __init__(self, params=None, name: str = None):
+        self.params = params if isinstance(params, dict) else None
+        self.name = name
+        # ошибки параметров обнаруживаются при привязке, запись значения с ними отклоняется
+        self.errors = []
+        self.allowed = None
+        self.allowed_str = None
+        self.allowed_invalid = None
+        params = self.params
+        if self.uses_allowed_values and params and 'allowed_values' in params:
+            allowed = params['allowed_values']
+            if isinstance(allowed, list):
+                self.allowed = allowed
+                self.allowed_str = frozenset(str(v) for v in allowed)
+            else:
+                self.allowed_invalid = type(allowed)
+
+    def _param_number(self, key, cast, default=None):
+        """params[key] converted by cast once; invalid value is remembered as error"""
+        value = self.params.get(key) if self.params else None
+        if value is None:
+            return default
+        try:
+            return cast(value)
+        except (TypeError, ValueError) as ex:
+            self.errors.append(f"Invalid param '{key}' of property '{self.name}': {ex}")
+            return default
+
+    def decode(self, value, init: bool = False, current=None):
+        return value
+
+    def check(self, value) -> None:
+        """Type-specific constraints of a decoded not-None value"""
+
+    def validate(self, value) -> None:
+        if self.errors:
+            raise ValueError(self.errors[0])
+        if value is not None:
+            self.check(value)
+        if self.allowed is not None:
+            if self.allowed_by_value:
+                if value not in self.allowed:
+                    raise ValueError(f"Value {value} is not in allowed values: {self.allowed}")
+            elif str(value) not in self.allowed_str:
+                raise ValueError(f"Value '{value}' is not in allowed values: {self.allowed}")
+        elif self.allowed_invalid is not None:
+            _logger.warning(f"Property {self.name}: allowed_values must be a list, got {self.allowed_invalid}")
+
+    def recover(self, value):
+        """Value kept when decoding from DB failed"""
+        return value
+
+    def encode(self, value):
+        return value
+
+    def format_output(self, value):
+        return value
+
+
+class IntCodec(PropertyCodec):
+    type = PropertyType.Integer.value
+    allowed_by_value = True
+
+    def __init__(self, params=None, name: str = None):
+        super().__init__(params, name)
+        params = self.params or {}
+        # сравнение с min/max без приведения типа (как задано в params)
+        self.min = params.get('min')
+        self.max = params.get('max')
+        self.step = params.get('step') if 'step' in params else None
+        self.step_base = params.get('min', 0)
+
+    def decode(self, value, init: bool = False, current=None):
+        if value == '':
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            if not init:
+                raise
+            return int(float(value))
+
+    def check(self, value) -> None:
+        if self.min is not None and value < self.min:
+            raise ValueError(f"Value {value} is less than minimum {self.min}")
+        if self.max is not None and value > self.max:
+            raise ValueError(f"Value {value} is greater than maximum {self.max}")
+        step = self.step
+        if step is not None and step > 0:
+            base = self.step_base
+            if (value - base) % step != 0:
+                raise ValueError(
+                    f"Value {value} is not aligned with step {step} "
+                    f"(base: {base}). Allowed values: {base}, {base+step}, {base+2*step}..."
+                )
+
+    def encode(self, value):
+        return str(value)
+
+
+class FloatCodec(PropertyCodec):
+    type = PropertyType.Float.value
+    allowed_by_value = True
+
+    def __init__(self, params=None, name: str = None):
+        super().__init__(params, name)
+        self.decimals = self._param_number('decimals', int)
+        self.min = self._param_number('min', float)
+        self.max = self._param_number('max', float)
+        self.min_text = self.params.get('min') if self.params else None
+        self.max_text = self.params.get('max') if self.params else None
+        self.step = self._param_number('step', float)
+        self.step_base = self._param_number('min', float, 0.0)
+
+    def decode(self, value, init: bool = False, current=None):
+        if value == '':
+            return None
+        value = float(value)
+        if self.decimals is not None:
+            value = round(value, self.decimals)
+        return value
+
+    def check(self, value) -> None:
+        if self.min is not None and value < self.min:
+            raise ValueError(f"Value {value} is less than minimum {self.min_text}")
+        if self.max is not None and value > self.max:
+            raise ValueError(f"Value {value} is greater than maximum {self.max_text}")
+        step = self.step
+        if step is not None and step > 0:
+            base = self.step_base
+            remainder = abs((value - base) % step)
+            # Account for floating point precision errors
+            if remainder > 1e-9 and abs(remainder - step) > 1e-9:
+                raise ValueError(f"Value {value} is not aligned with step {step} (base: {base})")
+
+    def encode(self, value):
+        return str(value)
+
+
+class StrCodec(PropertyCodec):
+    type = PropertyType.String.value
+
+    def __init__(self, params=None, name: str = None):
+        super().__init__(params, name)
+        self.pattern = None
+        self.regexp = None
+        if self.params and 'regexp' in self.params:
+            self.pattern = self.params['regexp']
+            try:
+                self.regexp = re.compile(self.pattern)
+            except (re.error, TypeError) as ex:
+                self.errors.append(f"Invalid regexp '{self.pattern}' of property '{self.name}': {ex}")
+
+    def check(self, value) -> None:
+        if self.regexp is not None and not self.regexp.match(str(value)):
+            raise ValueError(f"Value '{value}' does not match pattern '{self.pattern}'")
+
+    def encode(self, value):
+        return str(value)
+
+
+class DatetimeCodec(PropertyCodec):
+    type = PropertyType.Datetime.value
+
+    def decode(self, value, init: bool = False, current=None):
+        if isinstance(value, str):
+            value = parser.parse(value)
+        if value and not init:
+            value = convert_local_to_utc(value)
+        return value
+
+    def encode(self, value):
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+    def format_output(self, value):
+        if value is None:
+            return None
+        try:
+            return convert_utc_to_local(value)
+        except Exception as ex:
+            _logger.exception(ex)
+        return value
+
+
+class DictCodec(PropertyCodec):
+    type = PropertyType.Dictionary.value
+
+    def decode(self, value, init: bool = False, current=None):
+        if isinstance(value, dict):
+            return value
+        return json.loads(value)
+
+    def encode(self, value):
+        return json.dumps(value)
+
+
+class ListCodec(PropertyCodec):
+    type = PropertyType.List.value
+
+    def decode(self, value, init: bool = False, current=None):
+        if isinstance(value, list):
+            return value
+        return json.loads(value)
+
+    def encode(self, value):
+        return json.dumps(value)
+
+
+class BoolCodec(PropertyCodec):
+    type = PropertyType.Bool.value
+    allowed_by_value = True
+
+    def decode(self, value, init: bool = False, current=None):
+        if isinstance(value, str):
+            lowered = value.lower()
+            if lowered in _BOOL_TRUE:
+                return True
+            if lowered in _BOOL_FALSE:
+                return False
+            raise ValueError(f"Invalid boolean value: {value}")
+        return bool(value)
+
+
+class EnumCodec(PropertyCodec):
+    type = PropertyType.Enum.value
+    uses_allowed_values = False
+
+    def __init__(self, params=None, name: str = None):
+        super().__init__(params, name)
+        self.enum_values = None
+        self.enum_invalid = False
+        if self.params and 'enum_values' in self.params:
+            enum_values = self.params['enum_values']
+            if enum_values and isinstance(enum_values, dict):
+                self.enum_values = enum_values
+            else:
+                self.enum_invalid = True
+
+    def check(self, value) -> None:
+        if self.enum_values is not None:
+            if str(value) not in self.enum_values:
+                raise ValueError(f"Value '{value}' is not in allowed enum values: {list(self.enum_values.keys())}")
+        elif self.enum_invalid:
+            _logger.warning(f"Property {self.name}: enum_values is not a dict or empty")
+
+    def encode(self, value):
+        return str(value)
+
+
+class ColorCodec(PropertyCodec):
+    type = PropertyType.Color.value
+
+    def __init__(self, params=None, name: str = None):
+        super().__init__(params, name)
+        params = self.params or {}
+        self.scales = {
+            "hue_scale": params.get("hue_scale", 360),
+            "sat_scale": params.get("sat_scale", 100),
+            "color_temp_unit": params.get("color_temp_unit", "kelvin"),
+        }
+        self.read_format = str(params["read_format"]).lower() if params.get("read_format") else "canonical"
+        self.write_format = str(params["write_format"]).lower() if params.get("write_format") else "auto"
+
+    def ensure_universal(self, value):
+        """Приводит legacy/строковое значение к универсальному dict для type=color."""
+        if value is None or value == "None" or value == "":
+            return None
+        if isinstance(value, dict):
+            try:
+                return to_universal_color(value)
+            except Exception:
+                return value
+        try:
+            return decode_color_value(value)
+        except Exception:
+            parsed_color = parse_color_value(value, write_format="auto", scales=self.scales)
+            return to_universal_color(parsed_color)
+
+    def to_output(self, value, read_format=None):
+        if value is None:
+            return None
+        if isinstance(value, str) or (isinstance(value, dict) and "rgb" not in value and "xy" not in value):
+            value = self.ensure_universal(value)
+        target_format = (read_format or self.read_format or "canonical").lower()
+        return from_universal_color(value, target_format, scales=self.scales)
+
+    def decode(self, value, init: bool = False, current=None):
+        if init:
+            return self.ensure_universal(value)
+        write_format = self.write_format
+        if write_format != "auto":
+            detected = detect_color_format(value)
+            if detected not in ("canonical", write_format):
+                raise ValueError(
+                    f"Color write format mismatch for '{self.name}': expected '{write_format}', got '{detected}'"
+                )
+        parsed_color = parse_color_value(value, write_format=write_format, scales=self.scales)
+        if current not in (None, 'None', ''):
+            try:
+                existing_color = self.ensure_universal(current)
+                parsed_color = merge_xy_luminance(parsed_color, existing_color)
+            except Exception:
+                pass
+        return to_universal_color(parsed_color)
+
+    def recover(self, value):
+        try:
+            return self.ensure_universal(value)
+        except Exception:
+            return value
+
+    def encode(self, value):
+        return encode_color_value(value)
+
+    def format_output(self, value):
+        return self.to_output(value)
+
+
+_registry_lock = threading.Lock()
+_codecs = {
+    codec.type: codec
+    for codec in (PropertyCodec, IntCodec, FloatCodec, StrCodec, DatetimeCodec, DictCodec,
+                  ListCodec, BoolCodec, EnumCodec, ColorCodec)
+}
+_BUILTIN_TYPES = frozenset(_codecs)
+
+
+def bind_codec(type_name: str, params=None, name: str = None) -> PropertyCodec:
+    """Codec instance of a type bound to property params (unknown types keep values as is)"""
+    codec_class = _codecs.get(type_name, PropertyCodec)
+    try:
+        return codec_class(params, name)
+    except Exception as ex:
+        _logger.error(f"Error binding codec '{type_name}' for property '{name}': {ex}")
+        return PropertyCodec(params, name)
+
+
+def register_property_type(codec_class, replace: bool = False) -> None:
+    """Register codec class of a custom property type (`codec_class.type`).
+
+    Loaded properties of this type are rebound immediately.
+
+    Args:
+        codec_class (type): PropertyCodec subclass
+        replace (bool, optional): Allow replacing a built-in type. Defaults to False.
+    """
+    if not isinstance(codec_class, type) or not issubclass(codec_class, PropertyCodec):
+        raise TypeError("codec_class must be a PropertyCodec subclass")
+    type_name = codec_class.type
+    if not type_name or not isinstance(type_name, str):
+        raise ValueError("codec_class.type must be a non-empty string")
+    with _registry_lock:
+        if type_name in _BUILTIN_TYPES and not replace and _codecs.get(type_name) is not codec_class:
+            raise ValueError(f"Property type '{type_name}' is built-in (use replace=True)")
+        _codecs[type_name] = codec_class
+    _logger.info(f"Registered property type '{type_name}' ({codec_class.__name__})")
+    from app.core.main.ObjectManager import PropertyDescriptor
+    PropertyDescriptor.rebind_codecs(type_name)
+
+
+def get_property_types() -> dict:
+    """Registered property types: {type: codec class name}"""
+    with _registry_lock:
+        return {type_name: codec.__name__ for type_name, codec in _codecs.items()}
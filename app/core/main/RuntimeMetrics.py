@@ -0,0 +1,173 @@
+"""
+Core runtime metrics for the `/metrics` endpoint (OpenMetrics / Prometheus text).
+
+Event metrics (property reads/writes, method calls and latency, BatchWriter
+flushes, plugin cycles, DB pool checkouts) are kept in `metrics_registry`;
+state owned by other components is read by the collectors below on every
+scrape, without DB queries and without merging per-object statistics:
+
+    objects_storage   resident/evicted objects, getObjectByName hits and misses
+    thread_pools      MonitoredThreadPool workers, queue depth, active/stuck tasks,
+                      AdaptiveThreadPoolRouter in-flight tasks per owner (plugin)
+    batch_writer      buffer records/bytes, age of last flush, drops/spills, pipelines
+    db_pool           connections of the SQLAlchemy pool
+    code_cache        compiled code of methods/runCode/tasks: hits, compilations, time saved
+
+All names get the prefix `osys_`.
+"""
+import time
+
+from sqlalchemy import event
+
+from app.core.lib.metrics import (
+    MetricFamily,
+    metrics_registry,
+    OPENMETRICS_CONTENT_TYPE,
+    PROMETHEUS_CONTENT_TYPE,
+)
+
+METRICS_PREFIX = "osys_"
+
+_pool_checkouts = metrics_registry.counter("db_pool_checkouts", "Connections checked out of the DB pool")
+_render_ms = metrics_registry.histogram(
+    "metrics_render_ms", "Rendering time of /metrics (ms)", buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25))
+
+
+def collect_objects_storage():
+    from app.core.main.ObjectsStorage import objects_storage
+
+    lookups = objects_storage.getLookupStats()
+    eviction = objects_storage.getEvictionStats()
+    return [
+        MetricFamily("objects_storage_resident_objects", "gauge", "Objects loaded in memory").add(
+            eviction["resident_objects"]),
+        MetricFamily("objects_storage_evicted_objects", "gauge", "Objects unloaded by the memory budget").add(
+            eviction["evicted_objects"]),
+        MetricFamily("objects_storage_evictions", "counter", "Objects unloaded by the memory budget").add(
+            eviction["evicted"]),
+        MetricFamily("objects_storage_lookups", "counter", "getObjectByName calls by result")
+        .add(lookups["hits"], result="hit")
+        .add(lookups["misses"], result="miss"),
+        MetricFamily("objects_storage_hit_ratio", "gauge", "Share of getObjectByName calls served from memory").add(
+            lookups["hits"] / (lookups["hits"] + lookups["misses"]) if lookups["hits"] + lookups["misses"] else 0.0),
+    ]
+
+
+def collect_thread_pools():
+    from app.core.MonitoredThreadPool import get_pools, get_routers
+
+    workers = MetricFamily("pool_max_workers", "gauge", "Worker threads of the pool")
+    active = MetricFamily("pool_active_tasks", "gauge", "Tasks being executed")
+    queued = MetricFamily("pool_queue_depth", "gauge", "Tasks waiting for a worker")
+    stuck = MetricFamily("pool_stuck_tasks", "gauge", "Active tasks running longer than the timeout threshold")
+    tasks = MetricFamily("pool_tasks", "counter", "Finished tasks by result")
+    submitted = MetricFamily("pool_submitted_tasks", "counter", "Tasks submitted to the pool")
+    for pool in get_pools():
+        stats = pool.get_stats()
+        workers.add(pool.max_workers, pool=pool.name)
+        active.add(stats.active_threads, pool=pool.name)
+        queued.add(stats.pending_tasks, pool=pool.name)
+        stuck.add(pool.count_stuck_tasks(), pool=pool.name)
+        tasks.add(stats.completed_tasks, pool=pool.name, result="completed")
+        tasks.add(stats.failed_tasks, pool=pool.name, result="failed")
+        tasks.add(stats.rejected_tasks, pool=pool.name, result="rejected")
+        submitted.add(stats.total_submitted, pool=pool.name)
+    inflight = MetricFamily("pool_owner_inflight_tasks", "gauge", "In-flight tasks of an owner (plugin) in a router")
+    duration = MetricFamily("pool_owner_task_duration_ms", "gauge", "Average task duration of an owner (plugin), ms")
+    for router in get_routers():
+        for owner, (owner_inflight, _, _, avg_ms, _) in router.get_owner_stats().items():
+            inflight.add(owner_inflight, router=router.name, owner=owner)
+            duration.add(round(avg_ms, 3), router=router.name, owner=owner)
+    return [workers, active, queued, stuck, tasks, submitted, inflight, duration]
+
+
+def collect_batch_writer():
+    from app.core.main.ObjectManager import _batch_writer
+
+    stats = _batch_writer.get_metrics()
+    families = [
+        MetricFamily("batch_pending_records", "gauge", "Records waiting in the BatchWriter buffer").add(
+            stats["pending"]),
+        MetricFamily("batch_pending_bytes", "gauge", "Approximate size of the BatchWriter buffer").add(
+            stats["pending_bytes"]),
+        MetricFamily("batch_seconds_since_flush", "gauge", "Seconds since the last successful flush").add(
+            stats["since_flush"]),
+        MetricFamily("batch_flushes", "counter", "Successful BatchWriter flushes").add(stats["flushed"]),
+        MetricFamily("batch_errors", "counter", "Failed BatchWriter flushes").add(stats["errors"]),
+        MetricFamily("batch_overflow_records", "counter", "Records hit by the backpressure policy")
+        .add(stats["dropped"], action="dropped")
+        .add(stats["spilled"], action="spilled"),
+        MetricFamily("batch_producer_wait_seconds", "counter", "Time producers waited on a full buffer").add(
+            stats["block_wait"]),
+    ]
+    if stats["pipelines"]:
+        pending = MetricFamily("batch_pipeline_pending_records", "gauge", "Records queued in a writer pipeline")
+        lag = MetricFamily("batch_pipeline_lag_seconds", "gauge", "Age of the oldest queued part of a pipeline")
+        written = MetricFamily("batch_pipeline_written_records", "counter", "Records written by a pipeline")
+        for name, item in stats["pipelines"].items():
+            pending.add(item["pending"], pipeline=name)
+            lag.add(item["lag_ms"] / 1000.0, pipeline=name)
+            written.add(item["written"], pipeline=name)
+        families.extend((pending, lag, written))
+    return families
+
+
+def collect_db_pool():
+    from app.database import engine
+
+    pool = engine.pool
+    families = []
+    for name, description in (
+        ("size", "Configured size of the DB pool"),
+        ("checkedout", "DB connections in use"),
+        ("checkedin", "Idle DB connections in the pool"),
+        ("overflow", "DB connections above the pool size"),
+    ):
+        method = getattr(pool, name, None)
+        if callable(method):
+            # overflow() QueuePool отрицателен, пока пул не заполнен
+            value = max(0, method()) if name == "overflow" else method()
+            families.append(MetricFamily(f"db_pool_{name}", "gauge", description).add(value))
+    return families
+
+
+def collect_code_cache():
+    from app.core.lib.execute import get_code_cache_stats
+
+    stats = get_code_cache_stats()
+    return [
+        MetricFamily("code_cache_entries", "gauge", "Compiled code objects in the cache").add(stats["entries"]),
+        MetricFamily("code_cache_lookups", "counter", "Compiled code cache lookups by result")
+        .add(stats["hits"], result="hit")
+        .add(stats["misses"], result="miss"),
+        MetricFamily("code_cache_compile_seconds", "counter", "Time spent compiling code").add(
+            stats["compile_ms"] / 1000.0),
+        MetricFamily("code_cache_saved_seconds", "counter", "Compile time saved by cache hits").add(
+            stats["saved_ms"] / 1000.0),
+    ]
+
+
+def _count_pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    _pool_checkouts.inc()
+
+
+def register_runtime_collectors() -> None:
+    """Collectors of the core and DB pool checkout counting (idempotent)"""
+    from app.database import engine
+
+    metrics_registry.register_collector("objects_storage", collect_objects_storage)
+    metrics_registry.register_collector("thread_pools", collect_thread_pools)
+    metrics_registry.register_collector("batch_writer", collect_batch_writer)
+    metrics_registry.register_collector("db_pool", collect_db_pool)
+    metrics_registry.register_collector("code_cache", collect_code_cache)
+    if not event.contains(engine, "checkout", _count_pool_checkout):
+        event.listen(engine, "checkout", _count_pool_checkout)
+
+
+def render_metrics(accept: str = "") -> tuple:
+    """(text, content type): OpenMetrics if the client accepts it, else Prometheus text 0.0.4"""
+    openmetrics = "application/openmetrics-text" in (accept or "")
+    started = time.perf_counter()
+    text = metrics_registry.render(openmetrics=openmetrics, prefix=METRICS_PREFIX)
+    _render_ms.observe((time.perf_counter() - started) * 1000.0)
+    return text, OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE
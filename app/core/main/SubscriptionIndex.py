@@ -0,0 +1,269 @@
+"""
+Index of property change subscriptions of plugins.
+
+Plugins register interest (BasePlugin.subscribeChanges) by:
+
+    pattern="Kitchen.temperature"        exact object and property
+    pattern="Kitchen.*" / object_name    all properties of an object
+    pattern="*.temperature" / property_name
+                                         a property of any object
+    class_name="Sensor" [property_name]  objects of a class and its descendants
+    pattern="Sensor*.temp*"              glob on "object.property"
+
+Subscriptions are compiled into an immutable snapshot (dicts for exact names,
+per-class maps, a prefix trie for globs) which is swapped on every change, so
+`match()` runs without locks in O(matching subscriptions + depth of the class
+chain + length of the name). ChangeDispatcher delivers a change only to matching
+plugins; proxy plugins without subscriptions still receive every change.
+"""
+import re
+import threading
+from fnmatch import translate
+
+from app.logging_config import getLogger
+
+_logger = getLogger('subscriptions')
+
+_GLOB_CHARS = ("*", "?", "[")
+
+
+def _is_glob(text: str) -> bool:
+    return any(char in text for char in _GLOB_CHARS)
+
+
+def parse_subscription(pattern: str = None, object_name: str = None, class_name: str = None,
+                       property_name: str = None) -> tuple:
+    """Canonical subscription key
+
+    Returns:
+        tuple: ("all",) | ("exact", object, property) | ("object", object) | ("property", property)
+            | ("class", class, property or None) | ("glob", pattern)
+    """
+    if pattern is not None:
+        if object_name or class_name or property_name:
+            raise ValueError("pattern can't be combined with object_name, class_name or property_name")
+        pattern = str(pattern).strip()
+        if not pattern:
+            raise ValueError("Empty subscription pattern")
+        object_part, _, property_part = pattern.partition(".")
+        property_part = property_part or "*"
+        if object_part == "*" and property_part == "*":
+            return ("all",)
+        if not _is_glob(object_part):
+            if property_part == "*":
+                return ("object", object_part)
+            if not _is_glob(property_part):
+                return ("exact", object_part, property_part)
+        elif object_part == "*" and not _is_glob(property_part):
+            return ("property", property_part)
+        return ("glob", f"{object_part}.{property_part}")
+    if class_name:
+        if object_name:
+            raise ValueError("class_name can't be combined with object_name")
+        return ("class", class_name, property_name or None)
+    if object_name:
+        return ("exact", object_name, property_name) if property_name else ("object", object_name)
+    if property_name:
+        return ("property", property_name)
+    raise ValueError("Subscription needs pattern, object_name, class_name or property_name")
+
+
+def format_subscription(key: tuple) -> str:
+    kind = key[0]
+    if kind == "all":
+        return "*.*"
+    if kind == "exact":
+        return f"{key[1]}.{key[2]}"
+    if kind == "object":
+        return f"{key[1]}.*"
+    if kind == "property":
+        return f"*.{key[1]}"
+    if kind == "class":
+        return f"class:{key[1]}.{key[2] or '*'}"
+    return key[1]
+
+
+class _TrieNode():
+    __slots__ = ("children", "patterns")
+
+    def __init__(self):
+        self.children = {}
+        self.patterns = []  # [(compiled regexp, plugin name)]
+
+
+class CompiledSubscriptions():
+    """Immutable lookup structures built from all subscriptions"""
+    __slots__ = ("all", "exact", "objects", "properties", "classes", "trie", "has_globs", "plugins")
+
+    def __init__(self, subscriptions: dict):
+        self.all = set()
+        self.exact = {}        # (object, property) -> {plugin}
+        self.objects = {}      # object -> {plugin}
+        self.properties = {}   # property -> {plugin}
+        self.classes = {}      # class -> {property or None -> {plugin}}
+        self.trie = _TrieNode()
+        self.has_globs = False
+        self.plugins = frozenset(name for name, keys in subscriptions.items() if keys)
+        for plugin_name, keys in subscriptions.items():
+            for key in keys:
+                self._add(plugin_name, key)
+
+    def _add(self, plugin_name: str, key: tuple):
+        kind = key[0]
+        if kind == "all":
+            self.all.add(plugin_name)
+        elif kind == "exact":
+            self.exact.setdefault((key[1], key[2]), set()).add(plugin_name)
+        elif kind == "object":
+            self.objects.setdefault(key[1], set()).add(plugin_name)
+        elif kind == "property":
+            self.properties.setdefault(key[1], set()).add(plugin_name)
+        elif kind == "class":
+            self.classes.setdefault(key[1], {}).setdefault(key[2], set()).add(plugin_name)
+        elif kind == "glob":
+            pattern = key[1]
+            node = self.trie
+            for char in pattern:
+                if char in _GLOB_CHARS:
+                    break
+                node = node.children.setdefault(char, _TrieNode())
+            node.patterns.append((re.compile(translate(pattern)), plugin_name))
+            self.has_globs = True
+
+    def match(self, object_name: str, property_name: str, parents=None) -> set:
+        """Names of plugins subscribed to the change"""
+        result = set(self.all)
+        found = self.exact.get((object_name, property_name))
+        if found:
+            result |= found
+        found = self.objects.get(object_name)
+        if found:
+            result |= found
+        found = self.properties.get(property_name)
+        if found:
+            result |= found
+        if parents and self.classes:
+            classes = self.classes
+            for class_name in parents:
+                by_property = classes.get(class_name)
+                if by_property:
+                    found = by_property.get(property_name)
+                    if found:
+                        result |= found
+                    found = by_property.get(None)
+                    if found:
+                        result |= found
+        if self.has_globs:
+            key = f"{object_name}.{property_name}"
+            node = self.trie
+            index = 0
+            while node is not None:
+                for regexp, plugin_name in node.patterns:
+                    if plugin_name not in result and regexp.match(key):
+                        result.add(plugin_name)
+                if index >= len(key):
+                    break
+                node = node.children.get(key[index])
+                index += 1
+        return result
+
+
+class SubscriptionIndex():
+    """Subscriptions of plugins by name; compiled snapshot is rebuilt on every change"""
+
+    def __init__(self):
+        self._subscriptions = {}  # plugin -> set of keys
+        self._lock = threading.Lock()
+        self._compiled = CompiledSubscriptions({})
+        self.version = 0
+        self.matched = 0
+        self.lookups = 0
+
+    def _rebuild(self):
+        self._compiled = CompiledSubscriptions(self._subscriptions)
+        self.version += 1
+
+    def subscribe(self, plugin_name: str, pattern: str = None, object_name: str = None,
+                  class_name: str = None, property_name: str = None) -> str:
+        """Add a subscription of a plugin
+
+        Returns:
+            str: Normalized subscription (as in get_subscriptions)
+        """
+        key = parse_subscription(pattern, object_name, class_name, property_name)
+        with self._lock:
+            keys = self._subscriptions.setdefault(plugin_name, set())
+            if key not in keys:
+                keys.add(key)
+                self._rebuild()
+        return format_subscription(key)
+
+    def unsubscribe(self, plugin_name: str, pattern: str = None, object_name: str = None,
+                    class_name: str = None, property_name: str = None) -> bool:
+        """Remove a subscription; False if it was not registered"""
+        key = parse_subscription(pattern, object_name, class_name, property_name)
+        with self._lock:
+            keys = self._subscriptions.get(plugin_name)
+            if not keys or key not in keys:
+                return False
+            keys.discard(key)
+            if not keys:
+                del self._subscriptions[plugin_name]
+            self._rebuild()
+        return True
+
+    def clear(self, plugin_name: str) -> int:
+        """Remove all subscriptions of a plugin"""
+        with self._lock:
+            keys = self._subscriptions.pop(plugin_name, None)
+            if keys:
+                self._rebuild()
+        return len(keys or ())
+
+    def get_subscriptions(self, plugin_name: str) -> list:
+        with self._lock:
+            return sorted(format_subscription(key) for key in self._subscriptions.get(plugin_name, ()))
+
+    def is_subscribed(self, plugin_name: str) -> bool:
+        """Plugin has subscriptions (gets only matching changes)"""
+        return plugin_name in self._compiled.plugins
+
+    @property
+    def compiled(self) -> CompiledSubscriptions:
+        return self._compiled
+
+    def match(self, object_name: str, property_name: str, parents=None) -> set:
+        """Names of plugins subscribed to a change of object_name.property_name
+
+        Args:
+            object_name (str): Object name
+            property_name (str): Property name
+            parents (list, optional): Class names of the object, own class first
+        """
+        compiled = self._compiled
+        if not compiled.plugins:
+            return set()
+        result = compiled.match(object_name, property_name, parents)
+        self.lookups += 1
+        self.matched += len(result)
+        return result
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            kinds = {}
+            for keys in self._subscriptions.values():
+                for key in keys:
+                    kinds[key[0]] = kinds.get(key[0], 0) + 1
+            plugins = {name: len(keys) for name, keys in self._subscriptions.items()}
+        return {
+            "version": self.version,
+            "plugins": plugins,
+            "subscriptions": sum(plugins.values()),
+            "by_kind": kinds,
+            "lookups": self.lookups,
+            "matched": self.matched,
+            "avg_matched": round(self.matched / self.lookups, 3) if self.lookups else 0,
+        }
+
+
+subscription_index = SubscriptionIndex()
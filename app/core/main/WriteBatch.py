@@ -0,0 +1,125 @@
+"""
+Scoped property writes with deferred, coalesced side effects.
+
+    from app.core.lib.object import batch
+
+    with batch():
+        setProperty("Heater.mode", "auto")
+        setProperty("Heater.target", 21.5)
+        obj.setProperty("power", 1200)
+
+Inside the scope ObjectManager.setProperty checks permissions and validates the
+value immediately, but only buffers the write (last write per property wins);
+getProperty in the same thread returns the pending value. On normal exit the
+buffered values are applied in one pass, their Value/History updates are handed
+to BatchWriter as a single unit, every bound method runs once with the final
+value (OLD_VALUE is the value before the scope), each linked plugin gets one
+pool task with all its changes and proxy plugins get all changes in their
+ChangeDispatcher queues at once. If the body raises, buffered writes
+are discarded. Nested scopes join the outermost one. The scope is per thread.
+"""
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "committed": 0,
+    "discarded": 0,
+    "writes": 0,
+    "coalesced": 0,
+    "applied": 0,
+    "methods": 0,
+    "notifications": 0,
+}
+
+
+class BatchEntry():
+    """Pending write of one property"""
+    __slots__ = ("om", "name", "value", "decoded", "source", "save_history", "changed", "track_stats", "old")
+
+    def __init__(self, om, name, value, decoded, source, save_history, changed, track_stats, old):
+        self.om = om
+        self.name = name
+        self.value = value
+        self.decoded = decoded
+        self.source = source
+        self.save_history = save_history
+        self.changed = changed
+        self.track_stats = track_stats
+        self.old = old
+
+
+class WriteBatch():
+    """Buffered writes of one scope: (object name, property name) -> BatchEntry, in first-write order"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, object_name: str, name: str):
+        return self.entries.get((object_name, name))
+
+    def put(self, entry: BatchEntry) -> None:
+        key = (entry.om.name, entry.name)
+        current = self.entries.get(key)
+        if current is not None:
+            # свойство уже менялось в этом scope - старое значение остаётся от первой записи
+            entry.old = current.old
+            count_stat("coalesced")
+        self.entries[key] = entry
+        count_stat("writes")
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def current_batch():
+    """Active write scope of the current thread or None"""
+    return getattr(_local, "batch", None)
+
+
+def write_collector():
+    """List collecting ValueUpdates while a scope is applied (None outside)"""
+    return getattr(_local, "collector", None)
+
+
+@contextmanager
+def collect_writes(updates: list):
+    _local.collector = updates
+    try:
+        yield updates
+    finally:
+        _local.collector = None
+
+
+@contextmanager
+def batch():
+    """Buffer property writes of the current thread until the end of the block"""
+    current = current_batch()
+    if current is not None:
+        yield current
+        return
+    scope = WriteBatch()
+    _local.batch = scope
+    try:
+        yield scope
+    except BaseException:
+        _local.batch = None
+        count_stat("discarded")
+        raise
+    _local.batch = None
+    if scope.entries:
+        from app.core.main.ObjectManager import applyWriteBatch
+        applyWriteBatch(scope)
+    count_stat("committed")
+
+
+def count_stat(key: str, value: int = 1) -> None:
+    with _stats_lock:
+        _stats[key] += value
+
+
+def getWriteBatchStats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,492 @@
+"""
+Write-ahead journal of BatchWriter.
+
+Pending Value updates and History inserts are appended to a local journal before
+they reach the database, so a crash or power loss between flushes does not lose
+them. The journal is a directory of segment files; every BatchWriter flush seals
+the current segment, and the segment is removed once the flush is committed (a
+failed flush keeps it for replay). Records are written with os.write (they
+survive a killed process at once) and fsync'ed in groups every
+`batch_writer_journal_fsync_interval` seconds (0 - fsync after every append).
+
+Segment layout::
+
+    MAGIC (8 bytes) | version (uint16) | records...
+    record:  payload length (uint32) | crc32 (uint32) | payload
+    payload: value_id (int64) | changed, microseconds since epoch (int64) | flags (uint8)
+             | value | source | [history_value]      (str: length uint32 + utf-8, 0xFFFFFFFF - None)
+
+A torn record at the tail (crash during append) ends reading of the segment.
+Replay on startup (BatchWriter.replay_journal) is idempotent: values are applied
+only when newer than the stored ones, history rows are de-duplicated by
+(value_id, added, source).
+"""
+import datetime
+import os
+import struct
+import threading
+import zlib
+from collections import deque
+from typing import Optional
+
+from app.logging_config import getLogger
+
+_logger = getLogger('batch_journal')
+
+MAGIC = b"OSYSJRNL"
+JOURNAL_VERSION = 1
+_PREFIX = struct.Struct(">H")
+_RECORD = struct.Struct(">II")
+_HEAD = struct.Struct(">qqB")
+_LEN = struct.Struct(">I")
+_NONE = 0xFFFFFFFF
+_SEGMENT_PREFIX = "batch-"
+_SPILL_PREFIX = "spill-"
+_SEGMENT_SUFFIX = ".wal"
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICRO = datetime.timedelta(microseconds=1)
+
+# flags
+_SAVE_HISTORY = 1
+_HISTORY_ONLY = 2
+_EXPLICIT_DATE = 4
+_INTERNAL = 8
+_HAS_HISTORY_VALUE = 16
+_NO_CHANGED = 32
+
+
+def _pack_str(value) -> bytes:
+    if value is None:
+        return _LEN.pack(_NONE)
+    data = str(value).encode("utf-8", "surrogatepass")
+    return _LEN.pack(len(data)) + data
+
+
+def _unpack_str(payload: bytes, offset: int):
+    (length,) = _LEN.unpack_from(payload, offset)
+    offset += _LEN.size
+    if length == _NONE:
+        return None, offset
+    end = offset + length
+    if end > len(payload):
+        raise ValueError("String out of record")
+    return payload[offset:end].decode("utf-8", "surrogatepass"), end
+
+
+def encode_update(update) -> bytes:
+    """One journal record of a ValueUpdate"""
+    changed = update.changed
+    flags = 0
+    if changed is None:
+        flags |= _NO_CHANGED
+        micros = 0
+    else:
+        if changed.tzinfo is not None:
+            changed = changed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        micros = (changed - _EPOCH) // _MICRO
+    if update.save_history:
+        flags |= _SAVE_HISTORY
+    if update.history_only:
+        flags |= _HISTORY_ONLY
+    if update.explicit_date:
+        flags |= _EXPLICIT_DATE
+    if update.internal:
+        flags |= _INTERNAL
+    if update.history_value is not None:
+        flags |= _HAS_HISTORY_VALUE
+    payload = _HEAD.pack(update.value_id, micros, flags) + _pack_str(update.value) + _pack_str(update.source)
+    if update.history_value is not None:
+        payload += _pack_str(update.history_value)
+    return _RECORD.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_update(payload: bytes) -> dict:
+    """ValueUpdate fields of a record payload"""
+    value_id, micros, flags = _HEAD.unpack_from(payload, 0)
+    value, offset = _unpack_str(payload, _HEAD.size)
+    source, offset = _unpack_str(payload, offset)
+    history_value = None
+    if flags & _HAS_HISTORY_VALUE:
+        history_value, offset = _unpack_str(payload, offset)
+    return {
+        "value_id": value_id,
+        "value": value,
+        "changed": None if flags & _NO_CHANGED else _EPOCH + datetime.timedelta(microseconds=micros),
+        "source": source,
+        "save_history": bool(flags & _SAVE_HISTORY),
+        "history_value": history_value,
+        "history_only": bool(flags & _HISTORY_ONLY),
+        "explicit_date": bool(flags & _EXPLICIT_DATE),
+        "internal": bool(flags & _INTERNAL),
+    }
+
+
+def read_segment(path: str):
+    """Records of a segment file
+
+    Returns:
+        tuple: (list of ValueUpdate fields, torn - the segment ends with an incomplete/corrupt record)
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    header = len(MAGIC) + _PREFIX.size
+    if len(data) < header or data[:len(MAGIC)] != MAGIC:
+        return [], bool(data)
+    (version,) = _PREFIX.unpack_from(data, len(MAGIC))
+    if version != JOURNAL_VERSION:
+        raise ValueError(f"Unsupported journal version {version} in {path}")
+    records = []
+    offset = header
+    while offset < len(data):
+        if offset + _RECORD.size > len(data):
+            return records, True
+        length, crc = _RECORD.unpack_from(data, offset)
+        start = offset + _RECORD.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return records, True
+        try:
+            records.append(decode_update(payload))
+        except (ValueError, struct.error, UnicodeDecodeError):
+            return records, True
+        offset = start + length
+    return records, False
+
+
+class Segment():
+    """Sealed segment: records of one BatchWriter flush"""
+    __slots__ = ("path", "fd", "records")
+
+    def __init__(self, path: str, fd: int, records: int):
+        self.path = path
+        self.fd = fd
+        self.records = records
+
+
+class WriteJournal():
+    """Append-only journal of BatchWriter records (directory of segments)"""
+
+    def __init__(self, path: str, fsync_interval: float = 0.05):
+        self.path = path
+        self.fsync_interval = max(0.0, float(fsync_interval or 0.0))
+        os.makedirs(path, exist_ok=True)
+        # сегменты, оставшиеся от предыдущего запуска (BatchWriter.replay_journal)
+        self.recovered = self.segments()
+        self._seq = self._segment_seq(self.recovered[-1]) if self.recovered else 0
+        self._fd = None
+        self._segment_path = None
+        self._segment_records = 0
+        self._dirty = False
+        self._sync_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        # статистика
+        self.appended = 0
+        self.bytes_written = 0
+        self.fsyncs = 0
+        self.sealed = 0
+        self.discarded = 0
+        self.retained = 0
+        self.replayed = 0
+        self.torn = 0
+        self.errors = 0
+        self.last_error = None
+        if self.fsync_interval:
+            self._thread = threading.Thread(target=self._sync_loop, daemon=True, name="BatchJournalSync")
+            self._thread.start()
+
+    @staticmethod
+    def _segment_seq(path: str) -> int:
+        name = os.path.basename(path)
+        try:
+            return int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)])
+        except ValueError:
+            return 0
+
+    def segments(self) -> list:
+        """Segment files in order of writing"""
+        names = [
+            name for name in os.listdir(self.path)
+            if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX)
+        ]
+        return sorted((os.path.join(self.path, name) for name in names), key=self._segment_seq)
+
+    def _open(self):
+        self._seq += 1
+        path = os.path.join(self.path, f"{_SEGMENT_PREFIX}{self._seq:012d}{_SEGMENT_SUFFIX}")
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0), 0o600)
+        os.write(fd, MAGIC + _PREFIX.pack(JOURNAL_VERSION))
+        self._fd = fd
+        self._segment_path = path
+        self._segment_records = 0
+
+    def append(self, updates) -> None:
+        """Append records (called under the BatchWriter lock, in the order of the batch)"""
+        data = b"".join(encode_update(update) for update in updates)
+        if not data:
+            return
+        try:
+            if self._fd is None:
+                self._open()
+            os.write(self._fd, data)
+            self._segment_records += len(updates)
+            self.appended += len(updates)
+            self.bytes_written += len(data)
+            self._dirty = True
+            if not self.fsync_interval:
+                os.fsync(self._fd)
+                self.fsyncs += 1
+                self._dirty = False
+        except OSError as ex:
+            self.errors += 1
+            self.last_error = str(ex)
+            _logger.error("Journal append failed: %s", ex)
+
+    def seal(self) -> Optional[Segment]:
+        """Close the current segment for new records (called at the BatchWriter flush snapshot)"""
+        if self._fd is None:
+            return None
+        segment = Segment(self._segment_path, self._fd, self._segment_records)
+        self._fd = None
+        self._segment_path = None
+        self._segment_records = 0
+        self.sealed += 1
+        return segment
+
+    def _close(self, segment: Segment, sync: bool):
+        with self._sync_lock:
+            if segment.fd is None:
+                return
+            try:
+                if sync:
+                    os.fsync(segment.fd)
+                    self.fsyncs += 1
+            finally:
+                os.close(segment.fd)
+                segment.fd = None
+
+    def discard(self, segment: Optional[Segment]) -> None:
+        """Remove a segment whose records are committed to the database"""
+        if segment is None:
+            return
+        try:
+            self._close(segment, sync=False)
+            os.remove(segment.path)
+            self.discarded += 1
+        except OSError as ex:
+            self.errors += 1
+            self.last_error = str(ex)
+            _logger.error("Journal segment %s was not removed: %s", segment.path, ex)
+
+    def retain(self, segment: Optional[Segment]) -> None:
+        """Keep a segment of a failed flush on disk (replayed on next start)"""
+        if segment is None:
+            return
+        try:
+            self._close(segment, sync=True)
+        except OSError as ex:
+            self.errors += 1
+            self.last_error = str(ex)
+        self.retained += 1
+        _logger.warning("Journal segment %s kept for replay (%s records)", segment.path, segment.records)
+
+    def remove(self, paths) -> None:
+        """Remove replayed segment files"""
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as ex:
+                self.errors += 1
+                self.last_error = str(ex)
+                _logger.error("Journal segment %s was not removed: %s", path, ex)
+
+    def sync(self) -> None:
+        """fsync the current segment if it has unsynced records (group fsync)"""
+        with self._sync_lock:
+            fd = self._fd
+            if fd is None or not self._dirty:
+                return
+            self._dirty = False
+            try:
+                os.fsync(fd)
+                self.fsyncs += 1
+            except OSError as ex:
+                self.errors += 1
+                self.last_error = str(ex)
+
+    def _sync_loop(self):
+        while not self._stop_event.wait(self.fsync_interval):
+            self.sync()
+
+    def close(self) -> None:
+        """Stop group fsync and close the current segment (records stay for replay)"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        segment = self.seal()
+        if segment is not None:
+            self._close(segment, sync=True)
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": True,
+            "path": self.path,
+            "fsync_interval": self.fsync_interval,
+            "segments": len(self.segments()),
+            "current_records": self._segment_records,
+            "appended": self.appended,
+            "bytes_written": self.bytes_written,
+            "fsyncs": self.fsyncs,
+            "sealed": self.sealed,
+            "discarded": self.discarded,
+            "retained": self.retained,
+            "replayed": self.replayed,
+            "torn": self.torn,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+class SpillQueue():
+    """Records moved to disk by the BatchWriter 'spill' backpressure policy (FIFO of segment files).
+
+    Files have the journal segment layout (prefix `spill-`). A file is removed when its records
+    are taken back into the BatchWriter buffer; files left after a crash are replayed on start.
+    """
+
+    def __init__(self, path: str, file_records: int = 5000):
+        self.path = path
+        self.file_records = max(1, int(file_records))
+        self.recovered = self.files() if os.path.isdir(path) else []
+        self._seq = self._file_seq(self.recovered[-1]) if self.recovered else 0
+        self._sealed = deque()  # (path, records)
+        self._fd = None
+        self._file_path = None
+        self._file_count = 0
+        self.pending = 0
+        self.spilled = 0
+        self.taken = 0
+        self.bytes_written = 0
+        self.errors = 0
+        self.last_error = None
+
+    @staticmethod
+    def _file_seq(path: str) -> int:
+        name = os.path.basename(path)
+        try:
+            return int(name[len(_SPILL_PREFIX):-len(_SEGMENT_SUFFIX)])
+        except ValueError:
+            return 0
+
+    def files(self) -> list:
+        """Spill files in order of writing"""
+        names = [
+            name for name in os.listdir(self.path)
+            if name.startswith(_SPILL_PREFIX) and name.endswith(_SEGMENT_SUFFIX)
+        ]
+        return sorted((os.path.join(self.path, name) for name in names), key=self._file_seq)
+
+    def _seal(self):
+        if self._fd is None:
+            return
+        os.close(self._fd)
+        self._sealed.append((self._file_path, self._file_count))
+        self._fd = None
+        self._file_path = None
+        self._file_count = 0
+
+    def append(self, updates) -> bool:
+        """Write records to the current spill file (called under the BatchWriter lock)"""
+        data = b"".join(encode_update(update) for update in updates)
+        try:
+            if self._fd is None:
+                os.makedirs(self.path, exist_ok=True)
+                self._seq += 1
+                self._file_path = os.path.join(self.path, f"{_SPILL_PREFIX}{self._seq:012d}{_SEGMENT_SUFFIX}")
+                self._fd = os.open(self._file_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND
+                                   | getattr(os, "O_BINARY", 0), 0o600)
+                os.write(self._fd, MAGIC + _PREFIX.pack(JOURNAL_VERSION))
+            os.write(self._fd, data)
+        except OSError as ex:
+            self.errors += 1
+            self.last_error = str(ex)
+            _logger.error("Spill write failed: %s", ex)
+            return False
+        self._file_count += len(updates)
+        self.pending += len(updates)
+        self.spilled += len(updates)
+        self.bytes_written += len(data)
+        if self._file_count >= self.file_records:
+            self._seal()
+        return True
+
+    def take(self) -> list:
+        """Records of the oldest spill file (ValueUpdate fields); the file is removed"""
+        if not self._sealed:
+            self._seal()
+        if not self._sealed:
+            return []
+        path, count = self._sealed.popleft()
+        try:
+            records, torn = read_segment(path)
+            os.remove(path)
+        except (OSError, ValueError) as ex:
+            self.errors += 1
+            self.last_error = str(ex)
+            _logger.error("Spill file %s is unreadable: %s", path, ex)
+            records, torn = [], True
+        if torn or len(records) != count:
+            _logger.warning("Spill file %s: %s of %s records read", path, len(records), count)
+        self.pending -= count
+        self.taken += len(records)
+        return records
+
+    def remove(self, paths) -> None:
+        """Remove replayed spill files"""
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as ex:
+                self.errors += 1
+                self.last_error = str(ex)
+                _logger.error("Spill file %s was not removed: %s", path, ex)
+
+    def close(self) -> None:
+        """Close the current file (records stay on disk for replay)"""
+        self._seal()
+
+    def get_stats(self) -> dict:
+        return {
+            "path": self.path,
+            "pending": self.pending,
+            "files": len(self._sealed) + (1 if self._fd is not None else 0),
+            "spilled": self.spilled,
+            "taken": self.taken,
+            "bytes_written": self.bytes_written,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+def open_journal(enabled: bool, path: str, fsync_interval: float) -> Optional[WriteJournal]:
+    """Journal for BatchWriter from config or None if disabled/unavailable"""
+    if not enabled or not path:
+        return None
+    try:
+        return WriteJournal(path, fsync_interval)
+    except OSError as ex:
+        _logger.error("Batch journal %s is unavailable, writing without journal: %s", path, ex)
+        return None
+
+
+def open_spill_queue(backpressure: str, path: str) -> Optional[SpillQueue]:
+    """SpillQueue for the 'spill' policy; with another policy only if files are left from a previous run"""
+    if backpressure == "spill" or (os.path.isdir(path) and any(
+            name.startswith(_SPILL_PREFIX) for name in os.listdir(path))):
+        return SpillQueue(path)
+    return None
@@ -0,0 +1,175 @@
+"""
+Independent write pipelines of BatchWriter.
+
+With `batch_writer_pipelines` a flush of BatchWriter is split into parts: Value
+updates and History inserts, each optionally sharded by `value_id % shards`.
+Every part goes to its pipeline: a worker thread with its own buffer, flush
+cadence, transaction size and DB session (connection), so a slow History insert
+no longer delays current values and shards of one kind write in parallel
+(PostgreSQL/MySQL; SQLite has a single writer).
+
+A value_id always maps to the same shard and a pipeline writes its parts in
+FIFO order, so updates of a value (and its history rows) keep their order.
+A FlushTicket tracks the parts of one flush; when the last part is committed
+the flush is complete (journal segment is released, waiting callers resume).
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from app.logging_config import getLogger
+
+_logger = getLogger('write_pipeline')
+
+
+class FlushTicket():
+    """Parts of one BatchWriter flush spread over pipelines"""
+
+    def __init__(self, records: int, parts: int, on_done: Callable = None):
+        self.records = records
+        self.created = time.monotonic()
+        self.ok = True
+        self._parts = parts
+        self._lock = threading.Lock()
+        self._on_done = on_done
+        self.done = threading.Event()
+        if parts == 0:
+            self._finish()
+
+    def part_done(self, ok: bool) -> None:
+        with self._lock:
+            self.ok = self.ok and ok
+            self._parts -= 1
+            last = self._parts == 0
+        if last:
+            self._finish()
+
+    def _finish(self):
+        try:
+            if self._on_done is not None:
+                self._on_done(self)
+        finally:
+            self.done.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.done.wait(timeout)
+
+
+class WritePipeline():
+    """Worker writing its parts of flushes in FIFO order
+
+    Args:
+        name: Pipeline name (values-0, history-1, ...)
+        write: callable(list of ValueUpdate) -> bool, writes one transaction
+        flush_interval: Max seconds a part waits for more parts (0 - write at once)
+        chunk_size: Max records per transaction (0 - everything taken at once)
+    """
+
+    def __init__(self, name: str, write: Callable, flush_interval: float = 0.0, chunk_size: int = 0):
+        self.name = name
+        self.flush_interval = max(0.0, float(flush_interval or 0.0))
+        self.chunk_size = max(0, int(chunk_size or 0))
+        self._write = write
+        self._lock = threading.Lock()
+        self._parts = deque()  # (ticket, updates, enqueued monotonic)
+        self._rows = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        # Статистика
+        self.enqueued = 0
+        self.written = 0
+        self.transactions = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.last_lag = 0.0  # от постановки части до commit, сек
+        self.max_lag = 0.0
+        self.last_flush: Optional[float] = None
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name=f"BatchWriter-{name}")
+        self._thread.start()
+
+    def submit(self, ticket: FlushTicket, updates: list, urgent: bool = False) -> None:
+        """Queue a part of a flush"""
+        with self._lock:
+            self._parts.append((ticket, updates, time.monotonic()))
+            self._rows += len(updates)
+            self.enqueued += len(updates)
+            full = self.chunk_size and self._rows >= self.chunk_size
+        if urgent or full or not self.flush_interval:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Write queued parts now (asynchronously)"""
+        self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._rows
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self.flush_interval or 1.0)
+            self._wake.clear()
+            self._drain()
+
+    def _drain(self):
+        with self._lock:
+            parts = list(self._parts)
+            self._parts.clear()
+            self._rows = 0
+        if not parts:
+            return
+        updates = [update for _, part, _ in parts for update in part]
+        started = time.monotonic()
+        ok = True
+        chunk_size = self.chunk_size or len(updates)
+        for start in range(0, len(updates), chunk_size):
+            chunk = updates[start:start + chunk_size]
+            try:
+                chunk_ok = self._write(chunk)
+            except Exception as ex:  # noqa: BLE001 - поток пайплайна не должен завершаться
+                _logger.exception("Pipeline %s write failed: %s", self.name, ex)
+                chunk_ok = False
+            self.transactions += 1
+            if chunk_ok:
+                self.written += len(chunk)
+            else:
+                ok = False
+                self.errors += 1
+        now = time.monotonic()
+        self.busy_seconds += now - started
+        self.last_flush = now
+        self.last_lag = now - parts[0][2]
+        self.max_lag = max(self.max_lag, self.last_lag)
+        for ticket, _, _ in parts:
+            ticket.part_done(ok)
+
+    def stop(self, drain: bool = True, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=timeout)
+        if drain:
+            self._drain()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            pending = self._rows
+            oldest = self._parts[0][2] if self._parts else None
+        now = time.monotonic()
+        return {
+            "name": self.name,
+            "flush_interval": self.flush_interval,
+            "chunk_size": self.chunk_size,
+            "pending": pending,
+            "lag_ms": round((now - oldest) * 1000.0, 1) if oldest is not None else 0.0,
+            "last_commit_lag_ms": round(self.last_lag * 1000.0, 1),
+            "max_commit_lag_ms": round(self.max_lag * 1000.0, 1),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "transactions": self.transactions,
+            "errors": self.errors,
+            "rows_per_second": round(self.written / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+            "busy_percent": round(self.busy_seconds / max(now - self._started, 1e-9) * 100.0, 2),
+            "alive": self._thread.is_alive(),
+        }
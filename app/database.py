@@ -81,6 +81,10 @@ DBSession = sessionmaker(bind=engine)
 
 logger = getLogger('session')
 
+def get_engine_dialect() -> str:
+    """Dialect of the application engine (sqlite, postgresql, mysql, ...)"""
+    return engine.dialect.name
+
 def normalize_column_type(column_type, dialect):
     column_type_str = str(column_type).upper()
 
@@ -338,6 +338,8 @@ def initSystemStats():
         ("batch_queue_size", "Current batch queue size", PropertyType.Integer, 30),
         ("batch_total_errors", "Total external batch write errors", PropertyType.Integer, 30),
         ("batch_avg_flush_ms", "Batch flush duration in ms (last flush)", PropertyType.Float, 30),
+        ("batch_rows_per_flush", "Records written by the last batch transaction", PropertyType.Integer, 30),
+        ("batch_producer_wait_ms", "Total time producers waited on a full batch queue (ms)", PropertyType.Float, 30),
         ("batch_values_updated", "External value updates", PropertyType.Integer, 30),
         ("batch_history_inserted", "External history inserts", PropertyType.Integer, 30),
         ("reactive_loops", "Reactive loop counter", PropertyType.Integer, 30),
@@ -0,0 +1,138 @@
+"""
+Benchmark: BatchWriter under a write burst (size-triggered flushes, chunked
+transactions and backpressure).
+
+Burst: `--updates` value updates with history are added as fast as possible
+with a long `--flush-interval`:
+
+  - timer only: the buffer grows until the timer fires and is written by one
+    transaction;
+  - watermark + chunks: an early flush at `--high-watermark` records, at most
+    `--chunk-size` records per transaction.
+
+Reports adds per second, max buffer depth, largest transaction and the longest
+DB write (how long SQLite stays locked).
+
+Backpressure: the same burst with `--max-pending` / `--low-watermark` and each
+policy (block / drop / spill): producer time, producer wait, dropped and spilled
+updates and history rows that reached the database.
+
+    python benchmarks/bench_batch_backpressure.py --updates 100000 --flush-interval 2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, print_table  # noqa: E402
+
+OBJECTS = 20
+
+
+def create_values(prefix):
+    """Objects with one int property and a Value row each; returns value ids"""
+    from app.database import session_scope
+    from app.core.models.Clasess import Class, Object, Property, Value
+
+    ids = []
+    with session_scope() as session:
+        cls = Class(name=f"{prefix}Meter")
+        session.add(cls)
+        session.flush()
+        session.add(Property(class_id=cls.id, name="power", type="int", history=1))
+        for index in range(OBJECTS):
+            obj = Object(name=f"{prefix}Meter{index}", class_id=cls.id)
+            session.add(obj)
+            session.flush()
+            value = Value(object_id=obj.id, name="power", value="0")
+            session.add(value)
+            session.flush()
+            ids.append(value.id)
+    return ids
+
+
+def history_rows(value_ids):
+    from app.database import session_scope
+    from app.core.models.Clasess import History
+
+    with session_scope() as session:
+        return session.query(History).filter(History.value_id.in_(value_ids)).count()
+
+
+def burst(writer, value_ids, updates):
+    """Adds updates as fast as possible; returns add time and time until everything is in the DB"""
+    from app.database import get_now_to_utc
+    from app.core.main.ObjectManager import ValueUpdate
+
+    started = time.perf_counter()
+    for step in range(updates):
+        value = str(step)
+        writer.add(ValueUpdate(value_ids[step % len(value_ids)], value, get_now_to_utc(), "bench", True, value))
+    added = time.perf_counter() - started
+    writer.shutdown(wait=True)
+    return added, time.perf_counter() - started
+
+
+def flush_shape(stats):
+    writes = [entry for entry in stats["flush_history"] if entry["batch_size"]]
+    durations = [entry["duration_seconds"] * 1000 for entry in writes]
+    return (max((entry["batch_size"] for entry in writes), default=0), max(durations, default=0),
+            sum(durations) / len(durations) if durations else 0, stats["total_flushed"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=100000)
+    parser.add_argument("--flush-interval", type=float, default=2.0)
+    parser.add_argument("--high-watermark", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--max-pending", type=int, default=20000)
+    parser.add_argument("--low-watermark", type=int, default=5000)
+    parser.add_argument("--block-timeout", type=float, default=5.0)
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.core.main.ObjectManager import BatchWriter
+    from app.core.main.WriteJournal import SpillQueue
+
+    rows = []
+    modes = [
+        ("timer only", {}),
+        ("watermark + chunks", {"high_watermark": args.high_watermark, "chunk_size": args.chunk_size}),
+    ]
+    for index, (title, options) in enumerate(modes):
+        value_ids = create_values(f"Burst{index}")
+        writer = BatchWriter(flush_interval=args.flush_interval, **options)
+        added, total = burst(writer, value_ids, args.updates)
+        stats = writer.get_stats()
+        largest, longest_ms, average_ms, writes = flush_shape(stats)
+        rows.append([title, f"{args.updates / added:.0f}", f"{total:.2f}", stats["backpressure"]["max_depth"],
+                     stats["backpressure"]["early_flushes"], writes, largest, f"{average_ms:.0f}", f"{longest_ms:.0f}",
+                     history_rows(value_ids)])
+    print_table(f"Burst of {args.updates} updates, flush interval {args.flush_interval} s",
+                ["mode", "adds/s", "in DB after s", "max depth", "early flushes", "transactions",
+                 "max rows/tx", "avg tx ms", "max tx ms", "history rows"], rows)
+
+    rows = []
+    for index, policy in enumerate(("block", "drop", "spill")):
+        value_ids = create_values(f"Policy{index}")
+        spill = SpillQueue(tempfile.mkdtemp(prefix="osys_spill_")) if policy == "spill" else None
+        writer = BatchWriter(flush_interval=args.flush_interval, high_watermark=args.high_watermark,
+                             chunk_size=args.chunk_size, max_pending=args.max_pending,
+                             low_watermark=args.low_watermark, backpressure=policy,
+                             block_timeout=args.block_timeout, spill=spill)
+        added, total = burst(writer, value_ids, args.updates)
+        pressure = writer.get_stats()["backpressure"]
+        rows.append([policy, f"{added:.2f}", f"{total:.2f}", pressure["max_depth"], pressure["blocked"],
+                     f"{pressure['block_wait_total_ms']:.0f}", f"{pressure['block_wait_max_ms']:.0f}",
+                     pressure["block_timeouts"], pressure["dropped"], pressure["spilled"], pressure["refilled"],
+                     history_rows(value_ids)])
+    print_table(f"Backpressure: max pending {args.max_pending}, low watermark {args.low_watermark}",
+                ["policy", "producer s", "in DB after s", "max depth", "blocked", "wait ms", "max wait ms",
+                 "timeouts", "dropped", "spilled", "refilled", "history rows"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: delivering property changes to proxy plugins.
+
+Publishes N changes (over 100 properties) to K proxy plugins, one of which
+overrides changeProperties() to take batches, and compares:
+
+  - pool: the previous path - one `_poolLinkedProperty.submit(plugin.changeProperty, ...)`
+    per change and plugin (futures, rejected submits when the pool queue is full);
+  - dispatcher: `change_dispatcher.publish()` - per-plugin bounded queue and worker.
+
+    python benchmarks/bench_change_dispatcher.py --changes 20000 --plugins 5
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, print_table  # noqa: E402
+
+PROPERTIES = 100
+
+
+class ProxyPlugin:
+    def __init__(self, name):
+        self.name = name
+        self.actions = ["proxy"]
+        self.received = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def changeProperty(self, obj, prop, value):
+        with self._lock:
+            self.received += 1
+            self.calls += 1
+
+
+class BatchProxyPlugin(ProxyPlugin):
+    def changeProperties(self, changes):
+        with self._lock:
+            self.received += len(changes)
+            self.calls += 1
+
+
+def wait_delivered(plugins, expected, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while sum(plugin.received for plugin in plugins) < expected and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--changes", type=int, default=20000)
+    parser.add_argument("--plugins", type=int, default=5)
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.core.main.PluginsHelper import plugins as registry
+    from app.core.main.ObjectManager import _poolLinkedProperty
+    from app.core.main.ChangeDispatcher import change_dispatcher
+
+    subscribers = [ProxyPlugin(f"BenchProxy{i}") for i in range(args.plugins - 1)]
+    subscribers.append(BatchProxyPlugin("BenchBatchProxy"))
+    for plugin in subscribers:
+        registry[plugin.name] = {"instance": plugin}
+    changes = [("Sensor", f"p{i % PROPERTIES}", i) for i in range(args.changes)]
+
+    def reset():
+        for plugin in subscribers:
+            plugin.received = plugin.calls = 0
+
+    rows = []
+
+    # previous path: a pool task per change and plugin
+    reset()
+    futures = rejected = 0
+    started = time.perf_counter()
+    for obj, prop, value in changes:
+        for plugin in subscribers:
+            try:
+                _poolLinkedProperty.submit(plugin.changeProperty, f"proxy_{plugin.name}_{obj}.{prop}",
+                                           f"proxy:{plugin.name}", obj, prop, value, ignore_owner_limit=True)
+                futures += 1
+            except RuntimeError:
+                rejected += 1
+    published = time.perf_counter() - started
+    wait_delivered(subscribers, futures)
+    total = time.perf_counter() - started
+    rows.append(["pool task per change", f"{published:.3f}", f"{total:.3f}", futures, rejected,
+                 sum(p.received for p in subscribers), sum(p.calls for p in subscribers), "-"])
+
+    # dispatcher: per-plugin queues
+    reset()
+    started = time.perf_counter()
+    for obj, prop, value in changes:
+        change_dispatcher.publish(obj, prop, value)
+    published = time.perf_counter() - started
+    change_dispatcher.flush(timeout=60.0)
+    total = time.perf_counter() - started
+    stats = change_dispatcher.get_stats()
+    ours = {plugin.name: stats["subscribers"][plugin.name] for plugin in subscribers}
+    rows.append(["dispatcher queues", f"{published:.3f}", f"{total:.3f}", 0,
+                 sum(item["dropped"] for item in ours.values()),
+                 sum(p.received for p in subscribers), sum(p.calls for p in subscribers),
+                 f"{max(item['max_lag_ms'] for item in ours.values()):.1f}"])
+
+    print_table(f"{args.changes} changes x {args.plugins} proxy plugins",
+                ["path", "publish s", "delivered s", "futures", "rejected/dropped", "received", "handler calls",
+                 "max lag ms"], rows)
+    batch = ours["BenchBatchProxy"]
+    print(f"\nbatch plugin: {batch['delivered']} changes in {batch['batches']} changeProperties() calls "
+          f"(avg {batch['avg_batch']})")
+
+
+if __name__ == "__main__":
+    main()
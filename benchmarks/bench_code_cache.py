@@ -0,0 +1,94 @@
+"""
+Benchmark: compiled code cache of methods, runCode and scheduled task code.
+
+`--objects` objects of a class with a `--lines`-line method (plus an object
+method calling the class method as parent) are called `--calls` times round-robin
+with `code_cache_size` 0 (compile on every call, previous behaviour) and with
+the cache. Reports calls per second, hit rate and compile time saved from
+the method stats, and the same for `runCode` of one task source.
+
+Checks: a traceback of the shared class method names the calling object, and an
+edited method runs its new code.
+
+    python benchmarks/bench_code_cache.py --objects 50 --calls 5000 --lines 60
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, print_table  # noqa: E402
+
+
+def method_source(lines):
+    body = [
+        "total = 0",
+        "values = params or {}",
+    ]
+    for index in range(lines):
+        body.append(f"if values.get('k{index}') is not None:\n    total += values['k{index}'] * {index}")
+    body.append("self.last_total = total")
+    return "\n".join(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=60)
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.configuration import Config
+    from app.core.lib.common import runCode
+    from app.core.lib.execute import get_code_cache_stats, invalidate_code_cache
+    from app.core.lib.object import addClass, addClassMethod, addObject, addObjectMethod, callMethod
+    from app.core.main.ObjectsStorage import objects_storage
+
+    addClass("BenchSensor", "Bench class")
+    addClassMethod("onMotion", "BenchSensor", "Motion handler", method_source(args.lines))
+    names = []
+    for index in range(args.objects):
+        addObject(f"BenchSensor{index}", "BenchSensor", "Bench object")
+        names.append(f"BenchSensor{index}")
+    addObjectMethod("onMotion", names[0], "Own handler", "self.own = True", call_parent=1)
+    task_code = method_source(args.lines).replace("self.last_total = total", "print(total)")
+    params = {"k1": 1, "k7": 2}
+    size = Config.CODE_CACHE_SIZE or 2048
+
+    rows = []
+    for title, cache_size in (("compile every call (0)", 0), (f"code_cache_size {size}", size)):
+        Config.CODE_CACHE_SIZE = cache_size
+        invalidate_code_cache()
+        started = time.perf_counter()
+        for step in range(args.calls):
+            callMethod(f"{names[step % len(names)]}.onMotion", params, source="bench")
+        method_rate = args.calls / (time.perf_counter() - started)
+        started = time.perf_counter()
+        for _ in range(args.calls):
+            runCode(task_code, params)
+        task_rate = args.calls / (time.perf_counter() - started)
+        stats = objects_storage.getObjectByName(names[1]).getStats()["stat_methods"]["onMotion"]
+        totals = get_code_cache_stats()
+        rows.append([title, f"{method_rate:.0f}", f"{task_rate:.0f}", f"{stats['code_cache_hit_rate']}%",
+                     stats["compile_saved_ms"], f"{totals['hit_rate']}%", totals["saved_ms"]])
+    print_table(f"{args.objects} objects, {args.lines}-line class method, {args.calls} calls",
+                ["mode", "callMethod/s", "runCode/s", "method hit rate", "method saved ms",
+                 "total hit rate", "total saved ms"], rows)
+
+    # трассировка общего кода класса указывает на вызвавший объект
+    addClassMethod("onFail", "BenchSensor", "Failing", "raise ValueError('bench')")
+    callMethod(f"{names[1]}.onFail")
+    output = callMethod(f"{names[2]}.onFail") or ""
+    print("traceback names calling object:", f"<Method:{names[2]}.onFail>" in output
+          and f"<Method:{names[1]}.onFail>" not in output)
+    # отредактированный метод исполняет новый код
+    addClassMethod("onMotion", "BenchSensor", code="self.edited = True", update=True)
+    callMethod(f"{names[3]}.onMotion")
+    print("edited method runs new code:",
+          getattr(objects_storage.getObjectByName(names[3]), "edited", None) is True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: ObjectsStorage.getObjectByName hit path under concurrency.
+
+Loads a set of objects, then calls getObjectByName from 1/8/32 threads and
+reports calls per second for the lock-free fast path and for the previous
+locked path (global lock + per-name condition + timestamp per call, emulated
+here on the same storage).
+
+    python benchmarks/bench_get_object.py --threads 1 8 32 --calls 200000
+"""
+import argparse
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, timer, print_table  # noqa: E402
+
+
+def locked_get(storage, name):
+    """Hit path before the fast path was introduced."""
+    from app.database import get_now_to_utc
+    condition = storage._get_name_condition(name)
+    with condition:
+        if name in storage.objects:
+            stat = storage._stats[name]
+            stat['count_get'] = stat['count_get'] + 1
+            stat['last_get'] = get_now_to_utc()
+            return storage.objects[name]
+    return None
+
+
+def run_threads(func, names, threads: int, calls: int) -> float:
+    per_thread = calls // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(offset):
+        count = len(names)
+        barrier.wait()
+        for i in range(per_thread):
+            func(names[(offset + i) % count])
+
+    workers = [threading.Thread(target=worker, args=(i * 7,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    with timer() as elapsed:
+        barrier.wait()
+        for thread in workers:
+            thread.join()
+    return per_thread * threads / elapsed["seconds"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--objects", type=int, default=100)
+    args = parser.parse_args()
+
+    bootstrap()
+    from sqlalchemy import insert
+    from app.database import session_scope
+    from app.core.models.Clasess import Class, Object
+    from app.core.main.ObjectsStorage import objects_storage
+
+    with session_scope() as session:
+        cls = Class(name="BenchClass")
+        session.add(cls)
+        session.flush()
+        session.execute(insert(Object), [{"name": f"Obj{i:04d}", "class_id": cls.id} for i in range(args.objects)])
+    names = [f"Obj{i:04d}" for i in range(args.objects)]
+    for name in names:
+        objects_storage.getObjectByName(name)
+
+    rows = []
+    for threads in args.threads:
+        locked = run_threads(lambda name: locked_get(objects_storage, name), names, threads, args.calls)
+        fast = run_threads(objects_storage.getObjectByName, names, threads, args.calls)
+        rows.append([threads, f"{locked:,.0f}", f"{fast:,.0f}", f"{fast / locked:.1f}x"])
+
+    stats = objects_storage.stats
+    total = sum(item["count_get"] for name, item in stats.items() if name in names)
+    print_table("getObjectByName hit path (calls/sec)", ["threads", "locked", "fast path", "speedup"], rows)
+    print(f"\nmerged count_get for benchmark objects: {total:,}")
+
+
+if __name__ == "__main__":
+    main()
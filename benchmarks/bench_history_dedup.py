@@ -0,0 +1,175 @@
+"""
+Benchmark: History de-duplication in BatchWriter.
+
+History is prefilled with `--history` rows (`--values` values sharing the same
+timestamps and a few sources, plus `--duplicates` duplicate rows). Batches of
+explicit-date records (half of them keys that already exist) are written with:
+
+  - separate IN lists: the previous check
+    `value_id IN (...) AND added IN (...) AND source IN (...)` (matches the
+    cartesian product of the lists), ORM update of matches, bulk insert;
+  - tuple IN: `(value_id, added, source) IN (...)` in chunks, update + insert;
+  - unique index upsert: after `HistoryDedup.migrate()` (timed), one
+    INSERT ... ON CONFLICT DO UPDATE.
+
+Each batch runs in a transaction that is rolled back; reports milliseconds,
+rows fetched by the lookup (extra rows are false positives) and whether the
+write added rows for keys that were already stored.
+
+    python benchmarks/bench_history_dedup.py --sizes 100 1000 10000
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, print_table  # noqa: E402
+
+SOURCES = ("import", "replay", "plugin")
+BASE = datetime.datetime(2024, 1, 1)
+
+
+def prefill(args):
+    from app.database import session_scope
+    from app.core.main.BulkWrite import create_bulk_writer
+
+    strategy = create_bulk_writer("auto")
+    rows = []
+    keys = []
+    per_value = max(1, args.history // args.values)
+    for value_id in range(1, args.values + 1):
+        for step in range(per_value):
+            added = BASE + datetime.timedelta(minutes=step)
+            source = SOURCES[step % len(SOURCES)]
+            rows.append({"value_id": value_id, "value": str(step), "added": added, "source": source})
+            keys.append((value_id, added, source))
+    rows.extend(dict(row, value="dup") for row in random.sample(rows, args.duplicates))
+    with session_scope() as session:
+        for start in range(0, len(rows), 5000):
+            strategy.insert_history(session, rows[start:start + 5000])
+    return keys, per_value
+
+
+def make_batch(keys, per_value, values, size):
+    existing = random.sample(keys, size // 2)
+    fresh = []
+    for index in range(size - len(existing)):
+        value_id = random.randint(1, values)
+        added = BASE + datetime.timedelta(minutes=per_value + index)
+        fresh.append((value_id, added, random.choice(SOURCES)))
+    batch = {key: {"value_id": key[0], "value": "new", "added": key[1], "source": key[2]} for key in existing + fresh}
+    return list(batch.values())
+
+
+def old_check(session, strategy, rows):
+    from app.core.models.Clasess import History
+
+    existing = session.query(History).filter(
+        History.value_id.in_({row["value_id"] for row in rows}),
+        History.added.in_({row["added"] for row in rows}),
+        History.source.in_({row["source"] for row in rows}),
+    ).all()
+    by_key = {(record.value_id, record.added, record.source): record for record in existing}
+    inserts = []
+    for row in rows:
+        record = by_key.get((row["value_id"], row["added"], row["source"]))
+        if record is not None:
+            record.value = row["value"]
+        else:
+            inserts.append(row)
+    if inserts:
+        strategy.insert_history(session, inserts)
+    session.flush()
+    return len(existing)
+
+
+def tuple_check(session, strategy, rows):
+    from app.core.main.HistoryDedup import find_existing
+
+    existing = find_existing(session, ((row["value_id"], row["added"], row["source"]) for row in rows))
+    updates = []
+    inserts = []
+    for row in rows:
+        history_id = existing.get((row["value_id"], row["added"], row["source"]))
+        if history_id is None:
+            inserts.append(row)
+        else:
+            updates.append({"id": history_id, "value": row["value"]})
+    if updates:
+        strategy.update_history(session, updates)
+    if inserts:
+        strategy.insert_history(session, inserts)
+    return len(existing)
+
+
+def upsert(session, strategy, rows):
+    strategy.upsert_history(session, rows)
+    return 0
+
+
+def duplicates(session, rows):
+    """Keys of the batch stored more than once"""
+    from app.core.main.HistoryDedup import find_existing
+    from app.core.models.Clasess import History
+    from sqlalchemy import func, tuple_
+
+    keys = [(row["value_id"], row["added"], row["source"]) for row in rows]
+    found = 0
+    for start in range(0, len(keys), 500):
+        found += session.query(func.count(History.id)).filter(
+            tuple_(History.value_id, History.added, History.source).in_(keys[start:start + 500])).scalar()
+    return found - len(find_existing(session, keys))
+
+
+def run(title, method, batches, strategy):
+    from app.database import DBSession
+
+    row = [title]
+    for rows in batches:
+        session = DBSession()
+        try:
+            before = duplicates(session, rows)
+            started = time.perf_counter()
+            fetched = method(session, strategy, rows)
+            elapsed = (time.perf_counter() - started) * 1000
+            extra = duplicates(session, rows) - before
+        finally:
+            session.rollback()
+            session.close()
+        row.append(f"{elapsed:.1f} ms / {fetched} / {'ok' if extra == 0 else f'{extra} dup'}")
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--history", type=int, default=200000)
+    parser.add_argument("--values", type=int, default=2000)
+    parser.add_argument("--duplicates", type=int, default=1000)
+    args = parser.parse_args()
+    random.seed(1)
+
+    bootstrap()
+    from app.core.main.BulkWrite import create_bulk_writer
+    from app.core.main import HistoryDedup
+
+    keys, per_value = prefill(args)
+    strategy = create_bulk_writer("auto")
+    batches = [make_batch(keys, per_value, args.values, size) for size in args.sizes]
+    rows = [
+        run("separate IN lists (previous)", old_check, batches, strategy),
+        run("tuple IN", tuple_check, batches, strategy),
+    ]
+    migration = HistoryDedup.migrate()
+    rows.append(run("unique index upsert", upsert, batches, strategy))
+    print_table(f"{strategy.name}: history {len(keys) + args.duplicates} rows, half of each batch already stored "
+                "(time / rows fetched by lookup / duplicates added)",
+                ["method"] + [f"{size} rows" for size in args.sizes], rows)
+    print(f"\nmigration: {migration}")
+
+
+if __name__ == "__main__":
+    main()
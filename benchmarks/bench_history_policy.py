@@ -0,0 +1,78 @@
+"""
+Benchmark: history rows written with per-property persistence policies.
+
+Simulates a power meter reporting every second (~1 kW with jitter in the last
+decimal and a load step every 10 minutes) into properties with history
+enabled and different policies in params, then counts History rows that
+reached the database.
+
+    python benchmarks/bench_history_policy.py --samples 3600
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, timer, print_table  # noqa: E402
+
+POLICIES = {
+    "none": None,
+    "deadband 5 W": {"history_deadband": 5},
+    "deadband 1%": {"history_deadband_percent": 1},
+    "min interval 60 s": {"history_min_interval": 60},
+    "deadband 1% + heartbeat 300 s": {"history_deadband_percent": 1, "history_heartbeat": 300},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=3600)
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.database import session_scope
+    from app.core.models.Clasess import Class, Object, Property, History
+    from app.core.main.ObjectsStorage import objects_storage
+    from app.core.main.ObjectManager import _batch_writer
+
+    with session_scope() as session:
+        cls = Class(name="BenchMeter")
+        session.add(cls)
+        session.flush()
+        for index, params in enumerate(POLICIES.values()):
+            session.add(Property(class_id=cls.id, name=f"power{index}", type="float", history=1,
+                                 params=json.dumps(params) if params else None))
+        session.add(Object(name="Meter", class_id=cls.id))
+    meter = objects_storage.getObjectByName("Meter")
+
+    rnd = random.Random(7)
+    start = datetime.now().replace(microsecond=0) - timedelta(seconds=args.samples)
+    readings = []
+    load = 1000.0
+    for second in range(args.samples):
+        if second % 600 == 0:
+            load = rnd.choice([400.0, 1000.0, 1800.0, 2500.0])
+        readings.append((start + timedelta(seconds=second), round(load + rnd.uniform(-3, 3), 1)))
+
+    rows = []
+    for index, (title, params) in enumerate(POLICIES.items()):
+        prop = meter.properties[f"power{index}"]
+        with timer() as elapsed:
+            for changed, value in readings:
+                prop.setValue(value, "bench", changed=changed)
+            _batch_writer.flush_sync()
+        with session_scope() as session:
+            written = session.query(History).filter(History.value_id == prop.value_id).count()
+        state = prop.history_state
+        rows.append([title, args.samples, written, state[3] if state else 0,
+                     f"{1 - written / args.samples:.1%}", f"{elapsed['seconds']:.2f}"])
+
+    print_table("History rows per property", ["policy", "updates", "history rows", "suppressed", "reduction", "seconds"], rows)
+    print(f"\nBatchWriter history_policy: {_batch_writer.get_stats()['history_policy']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: a fast-changing property linked to a slow plugin.
+
+The property is written every `--period` ms for `--seconds`; the linked plugin
+needs `--handler-ms` per changeLinkedProperty call. Compares the default delivery
+(a pool task per write) with `linked_delivery: latest` (and an optional
+`linked_min_interval`): handler calls, pool rejections, coalesced updates, how long
+after the last write the plugin sees the final value and whether the last call it
+gets carries the final value (concurrent tasks may deliver out of order).
+
+    python benchmarks/bench_linked_coalescing.py --seconds 2 --period 1 --handler-ms 50
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, print_table  # noqa: E402
+
+
+class SlowPlugin:
+    def __init__(self, name, handler_seconds):
+        self.name = name
+        self.actions = []
+        self.handler_seconds = handler_seconds
+        self.calls = 0
+        self.last_value = None
+        self.seen = {}
+        self._lock = threading.Lock()
+
+    def changeLinkedProperty(self, obj, prop, value):
+        time.sleep(self.handler_seconds)
+        with self._lock:
+            self.calls += 1
+            self.last_value = value
+            self.seen[value] = time.monotonic()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--period", type=float, default=1.0, help="ms between writes")
+    parser.add_argument("--handler-ms", type=float, default=50.0)
+    parser.add_argument("--min-interval", type=float, default=0.2, help="seconds, for the throttled run")
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.database import session_scope
+    from app.core.models.Clasess import Class, Object, Property
+    from app.core.main.PluginsHelper import plugins
+    from app.core.main.ObjectsStorage import objects_storage
+    from app.core.main.ObjectManager import _poolLinkedProperty
+
+    modes = [
+        ("all (task per write)", None),
+        ("latest", {"linked_delivery": "latest"}),
+        (f"latest, min interval {args.min_interval}s", {"linked_delivery": "latest",
+                                                         "linked_min_interval": args.min_interval}),
+    ]
+    with session_scope() as session:
+        cls = Class(name="BenchMeter")
+        session.add(cls)
+        session.flush()
+        for index, (_, params) in enumerate(modes):
+            session.add(Property(class_id=cls.id, name=f"power{index}", type="int",
+                                 params=json.dumps(params) if params else None))
+        session.add(Object(name="Meter", class_id=cls.id))
+
+    meter = objects_storage.getObjectByName("Meter")
+    rows = []
+    for index, (title, _) in enumerate(modes):
+        plugin = SlowPlugin(f"BenchSlow{index}", args.handler_ms / 1000.0)
+        plugins[plugin.name] = {"instance": plugin}
+        meter.properties[f"power{index}"].linked = [plugin.name]
+        latest_before = _poolLinkedProperty.get_latest_stats()["owners"].get(plugin.name, {})
+
+        writes = rejected = 0
+        deadline = time.monotonic() + args.seconds
+        while time.monotonic() < deadline:
+            writes += 1
+            try:
+                meter.setProperty(f"power{index}", writes, "bench")
+            except RuntimeError:
+                rejected += 1
+            time.sleep(args.period / 1000.0)
+        last_write = time.monotonic()
+
+        wait_until = last_write + 60.0
+        while writes not in plugin.seen and time.monotonic() < wait_until:
+            time.sleep(0.005)
+        while _poolLinkedProperty.get_stats()["owners"].get(plugin.name, {}).get("inflight") and \
+                time.monotonic() < wait_until:
+            time.sleep(0.005)
+        latest = _poolLinkedProperty.get_latest_stats()["owners"].get(plugin.name, {})
+        rows.append([
+            title, writes, rejected, plugin.calls,
+            latest.get("coalesced", 0) - latest_before.get("coalesced", 0),
+            latest.get("throttled", 0) - latest_before.get("throttled", 0),
+            f"{(plugin.seen[writes] - last_write) * 1000:.0f}" if writes in plugin.seen else "never",
+            "yes" if plugin.last_value == writes else f"no ({plugin.last_value})",
+        ])
+
+    print_table(f"Writes every {args.period} ms for {args.seconds} s, handler {args.handler_ms} ms",
+                ["delivery", "writes", "rejected", "handler calls", "coalesced", "throttled", "final value after ms", "ends with final"], rows)
+    stats = _poolLinkedProperty.get_stats()["latest"]
+    print(f"\nrouter latest stats: { {key: value for key, value in stats.items() if key != 'owners'} }")
+
+
+if __name__ == "__main__":
+    main()
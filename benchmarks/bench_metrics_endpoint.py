@@ -0,0 +1,66 @@
+"""
+Benchmark: rendering time of the `/metrics` exposition.
+
+The core collectors (objects storage, thread pools, BatchWriter, DB pool) are
+registered as in the application; `--plugins` plugins add a labelled cycle
+histogram and an owner in the linkedProperty router, `--objects` objects are
+loaded. Reports series (sample lines), body size and median / p95 render time
+over `--renders` renders, for OpenMetrics and Prometheus text.
+
+    python benchmarks/bench_metrics_endpoint.py --plugins 5 20 50 --renders 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, print_table  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plugins", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--objects", type=int, default=1000)
+    parser.add_argument("--renders", type=int, default=500)
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.core.lib.object import addObject, addObjectProperty, getProperty, setProperty
+    from app.core.main.RuntimeMetrics import register_runtime_collectors, render_metrics
+    from app.core.main.BasePlugin import _cycle_duration_ms
+    from app.core.main.ObjectManager import _poolLinkedProperty
+
+    register_runtime_collectors()
+    for index in range(args.objects):
+        addObject(f"Bench{index}", None, "Bench object")
+    addObjectProperty("value", "Bench0", "Value", 0)
+    for step in range(100):
+        setProperty("Bench0.value", step)
+        getProperty("Bench0.value")
+
+    rows = []
+    plugins = 0
+    for count in sorted(args.plugins):
+        for index in range(plugins, count):
+            for duration in (0.4, 3, 40):
+                _cycle_duration_ms.observe(duration, plugin=f"Plugin{index}")
+            _poolLinkedProperty.submit(lambda: None, f"bench:{index}", f"Plugin{index}").result()
+        plugins = count
+        for accept, title in (("application/openmetrics-text", "OpenMetrics"), ("", "Prometheus 0.0.4")):
+            timings = []
+            for _ in range(args.renders):
+                started = time.perf_counter()
+                text, _ = render_metrics(accept)
+                timings.append((time.perf_counter() - started) * 1000.0)
+            timings.sort()
+            series = sum(1 for line in text.splitlines() if line and not line.startswith("#"))
+            rows.append([count, title, series, len(text), f"{statistics.median(timings):.3f}",
+                         f"{timings[int(len(timings) * 0.95) - 1]:.3f}"])
+    print_table(f"/metrics rendering, {args.objects} objects",
+                ["plugins", "format", "series", "bytes", "median ms", "p95 ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
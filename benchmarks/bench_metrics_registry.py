@@ -0,0 +1,149 @@
+"""
+Benchmark: core metrics in the in-memory registry projected to SystemStats.
+
+Hot path: nanoseconds per `incrementCoreSystemStatsMetric` (in-memory counter)
+from 1 and `--threads` threads.
+
+DB load: with `SystemVar.system_stats` enabled, `--threads` threads read and
+write a property for `--seconds`; the projection interval is the BatchWriter
+flush interval (the cadence of the previous per-tick flush of buffered
+counters), `system_stats_projection_interval` (default 60 s) and 0 (off).
+Reports property operations per second, SQL statements issued for SystemStats
+(SELECT ... FOR UPDATE / UPDATE of its values, its history rows) and whether
+the projected counters match the registry after a final projection.
+
+    python benchmarks/bench_metrics_registry.py --seconds 5 --threads 4
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, print_table  # noqa: E402
+
+
+def hot_path(threads, calls):
+    from app.core.lib.common import incrementCoreSystemStatsMetric
+
+    def work():
+        for _ in range(calls):
+            incrementCoreSystemStatsMetric("bench_hot_path", 1)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    return elapsed * 1e9 / (threads * calls)
+
+
+def load(args, interval):
+    from sqlalchemy import event
+    from app.configuration import Config
+    from app.database import engine, session_scope
+    from app.core.lib.object import getProperty, setProperty
+    from app.core.lib.common import projectCoreSystemStats, flushBufferedCoreSystemStatsMetrics
+    from app.core.lib.metrics import metrics_registry
+    from app.core.main.ObjectsStorage import objects_storage
+    from app.core.main.ObjectManager import _batch_writer
+    from app.core.models.Clasess import History
+
+    stats = objects_storage.getObjectByName("SystemStats")
+    value_ids = {prop.value_id for prop in stats.properties.values()}
+    flushBufferedCoreSystemStatsMetrics()
+    _batch_writer.flush_sync()
+    base_registry = metrics_registry.get("property_writes").value() or 0
+    base_projected = stats.properties["property_writes"].getValue(track_stats=False) or 0
+    Config.SYSTEM_STATS_PROJECTION_INTERVAL = interval
+    statements = {"count": 0}
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if '"values"' in statement or "values " in statement.lower():
+            params = parameters if isinstance(parameters, (list, tuple)) else list((parameters or {}).values())
+            flat = params if not executemany else [item for row in params for item in row]
+            if any(item in value_ids for item in flat if isinstance(item, int)):
+                statements["count"] += 1
+
+    with session_scope() as session:
+        history_before = session.query(History).filter(History.value_id.in_(value_ids)).count()
+    stop = threading.Event()
+    operations = [0] * args.threads
+
+    def work(index):
+        step = 0
+        while not stop.is_set():
+            setProperty(f"BenchSensor{index}.temp", step, source="bench")
+            getProperty(f"BenchSensor{index}.temp")
+            operations[index] += 2
+            step += 1
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    workers = [threading.Thread(target=work, args=(index,)) for index in range(args.threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    _batch_writer.flush_sync()
+    event.remove(engine, "before_cursor_execute", on_execute)
+    with session_scope() as session:
+        history_rows = session.query(History).filter(History.value_id.in_(value_ids)).count() - history_before
+
+    # финальная проекция: в SystemStats должен оказаться весь прирост реестра
+    Config.SYSTEM_STATS_PROJECTION_INTERVAL = 60.0
+    projectCoreSystemStats(force=True)
+    _batch_writer.flush_sync()
+    registry_growth = metrics_registry.get("property_writes").value() - base_registry
+    projected_growth = stats.properties["property_writes"].getValue(track_stats=False) - base_projected
+    return [f"{sum(operations) / elapsed:.0f}", statements["count"], history_rows,
+            f"{projected_growth == registry_growth} ({projected_growth})"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.utils import initSystemStats
+    from app.core.lib.object import addObject, addObjectProperty, setProperty
+    from app.core.lib.constants import PropertyType
+    from app.core.lib.common import invalidateSystemStatsEnabledCache
+    from app.core.main.ObjectManager import _batch_writer
+
+    addObject("SystemVar", None, "System variables")
+    addObjectProperty("system_stats", "SystemVar", "Local system statistics", 0, PropertyType.Bool)
+    setProperty("SystemVar.system_stats", True)
+    invalidateSystemStatsEnabledCache()
+    initSystemStats()
+    for index in range(args.threads):
+        addObject(f"BenchSensor{index}", None, "Bench sensor")
+        addObjectProperty("temp", f"BenchSensor{index}", "Temperature", 30, PropertyType.Integer)
+
+    print_table("incrementCoreSystemStatsMetric (registry counter)", ["threads", "ns per call"],
+                [[threads, f"{hot_path(threads, args.calls // threads):.0f}"] for threads in (1, args.threads)])
+
+    rows = []
+    modes = [
+        (f"every BatchWriter tick ({_batch_writer.flush_interval} s, previous cadence)", _batch_writer.flush_interval),
+        ("system_stats_projection_interval 60 s", 60.0),
+        ("off (0)", 0.0),
+    ]
+    for title, interval in modes:
+        rows.append([title] + load(args, interval))
+    print_table(f"{args.threads} threads x {args.seconds} s of setProperty + getProperty",
+                ["projection", "ops/s", "SystemStats value statements", "SystemStats history rows",
+                 "counters match after final projection"], rows)
+
+
+if __name__ == "__main__":
+    main()
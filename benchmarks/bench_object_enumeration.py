@@ -0,0 +1,71 @@
+"""
+Benchmark: enumeration of the runtime object map (objects_storage.items()).
+
+Loads N objects, then enumerates the storage repeatedly and reports SQL
+statements and time per enumeration; finally inserts rows behind the
+storage's back and shows that the periodic probe resyncs the index.
+
+    python benchmarks/bench_object_enumeration.py --sizes 1000 10000
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, QueryCounter, timer, print_table  # noqa: E402
+
+
+def run(count: int, rounds: int) -> list:
+    from sqlalchemy import insert
+    from app.configuration import Config
+    from app.database import session_scope, engine
+    from app.core.models.Clasess import Object, Class
+    from app.core.main.ObjectsStorage import objects_storage
+
+    with session_scope() as session:
+        session.query(Object).delete(synchronize_session=False)
+        session.query(Class).delete(synchronize_session=False)
+        cls = Class(name="EnumClass")
+        session.add(cls)
+        session.flush()
+        session.execute(insert(Object), [
+            {"name": f"Enum{i:06d}", "class_id": cls.id} for i in range(count)
+        ])
+    objects_storage.clear()
+
+    rows = []
+    with QueryCounter(engine) as counter, timer() as elapsed:
+        for _ in range(rounds):
+            total = sum(1 for _ in objects_storage.items())
+    rows.append([count, "enumerate (warm)", rounds, counter.count, f"{elapsed['seconds'] / rounds * 1000:.3f}", total])
+
+    # out-of-band insert: visible after the next probe
+    with session_scope() as session:
+        session.execute(insert(Object), [{"name": f"External{count}", "class_id": None}])
+    interval = Config.OBJECT_INDEX_PROBE_INTERVAL_SEC
+    Config.OBJECT_INDEX_PROBE_INTERVAL_SEC = 0
+    with QueryCounter(engine) as counter, timer() as elapsed:
+        total = len(objects_storage.objects)
+    Config.OBJECT_INDEX_PROBE_INTERVAL_SEC = interval
+    rows.append([count, "probe + resync", 1, counter.count, f"{elapsed['seconds'] * 1000:.3f}", total])
+    stats = objects_storage.getStorageStats()["index"]
+    print(f"objects={count}: index probes={stats['probes']} resyncs={stats['resyncs']}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--rounds", type=int, default=100)
+    args = parser.parse_args()
+
+    bootstrap({"object_index_probe_interval_sec": 3600})
+    rows = []
+    for count in args.sizes:
+        rows.extend(run(count, args.rounds))
+    print_table("Runtime object map enumeration (SQLite)",
+                ["objects", "case", "rounds", "queries", "ms/round", "items"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Benchmark: ObjectManager hydration - per-object vs set-based bulk path.
+
+Seeds a 3-level class hierarchy with properties, bound methods and N objects
+(half of them without Value rows), then reports SQL statement count and wall
+time for building all ObjectManagers with the previous per-object loader (a copy
+of the code before bulk hydration: class chain walked and values queried per
+property), with the current single-object path (`_createObjectManager`, a bulk
+chunk of one) and in one bulk call.
+
+    python benchmarks/bench_object_hydration.py --sizes 1000 10000
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, QueryCounter, timer, print_table  # noqa: E402
+
+
+def seed(count: int) -> int:
+    """Create synthetic classes/objects. Returns max Value id after seeding."""
+    from sqlalchemy import insert, func
+    from app.database import session_scope
+    from app.core.models.Clasess import Class, Object, Property, Method, Value
+
+    with session_scope() as session:
+        base = Class(name="BenchBase", description="Base")
+        session.add(base)
+        session.flush()
+        device = Class(name="BenchDevice", description="Device", parent_id=base.id, template="<b>{{ name }}</b>")
+        session.add(device)
+        session.flush()
+        sensor = Class(name="BenchSensor", description="Sensor", parent_id=device.id)
+        session.add(sensor)
+        session.flush()
+
+        on_change = Method(name="onChange", class_id=device.id, code="pass", call_parent=None)
+        session.add(on_change)
+        session.add(Method(name="onChange", class_id=sensor.id, code="pass", call_parent=1))
+        session.add(Method(name="refresh", class_id=base.id, code="pass"))
+        session.flush()
+
+        props = [
+            Property(name="online", class_id=base.id, type="bool", history=0),
+            Property(name="updated", class_id=base.id, type="datetime", history=0),
+            Property(name="battery", class_id=device.id, type="int", history=7),
+            Property(name="linkquality", class_id=device.id, type="int", history=0),
+            Property(name="temperature", class_id=sensor.id, type="float", history=30, method_id=on_change.id),
+            Property(name="humidity", class_id=sensor.id, type="float", history=30),
+            Property(name="online", class_id=sensor.id, type="bool", history=1),
+        ]
+        session.add_all(props)
+        session.flush()
+
+        session.execute(insert(Object), [
+            {"name": f"Sensor{i:06d}", "description": f"Sensor {i}", "class_id": sensor.id}
+            for i in range(count)
+        ])
+        objects = session.query(Object.id, Object.name).order_by(Object.id).all()
+        session.execute(insert(Property), [
+            {"name": "room", "object_id": obj_id, "type": "str", "history": 0}
+            for obj_id, _ in objects
+        ])
+        prop_names = ["online", "updated", "battery", "linkquality", "temperature", "humidity", "room"]
+        session.execute(insert(Value), [
+            {"object_id": obj_id, "name": name, "value": "1"}
+            for idx, (obj_id, _) in enumerate(objects) if idx % 2 == 0
+            for name in prop_names
+        ])
+        session.commit()
+        return session.query(func.max(Value.id)).scalar() or 0
+
+
+def legacy_object_manager(storage, session, obj):
+    """Previous ObjectStorage._createObjectManager (per-object queries), kept as the baseline"""
+    from app.database import row2dict
+    from app.core.main.ObjectManager import ObjectManager, PropertyManager, MethodManager
+    from app.core.models.Clasess import Class, Property, Method, Value
+
+    def class_chain(class_id):
+        chain = []
+        while class_id:
+            cls = session.query(Class).filter(Class.id == class_id).one_or_none()
+            if cls is None:
+                break
+            chain.append(cls)
+            class_id = cls.parent_id
+        return chain
+
+    def class_properties(class_id, properties):
+        if class_id:
+            properties = properties + session.query(Property).filter(Property.class_id == class_id).all()
+            cls = session.query(Class).filter(Class.id == class_id).one_or_none()
+            if cls and cls.parent_id:
+                return class_properties(cls.parent_id, properties)
+        return properties
+
+    def class_methods(class_id, methods):
+        if class_id:
+            methods = session.query(Method).filter(Method.class_id == class_id).all() + methods
+            cls = session.query(Class).filter(Class.id == class_id).one_or_none()
+            if cls and cls.parent_id:
+                return class_methods(cls.parent_id, methods)
+        return methods
+
+    om = ObjectManager(obj)
+    properties = class_properties(obj.class_id, []) + session.query(Property).filter(Property.object_id == obj.id).all()
+    for prop in properties:
+        values = session.query(Value).filter(Value.object_id == obj.id, Value.name == prop.name).all()
+        pm = PropertyManager(obj.id, prop, values[0] if values else None, obj.name)
+        if prop.method_id:
+            method = session.query(Method).filter(Method.id == prop.method_id).one_or_none()
+            if method:
+                pm.bindMethod(method.name)
+        om._addProperty(pm)
+    methods = class_methods(obj.class_id, []) + session.query(Method).filter(Method.object_id == obj.id).all()
+    group_methods = {}
+    for method in methods:
+        group_methods.setdefault(method.name, []).append(method)
+    for _, group in group_methods.items():
+        if len(group) > 1:
+            group = storage.methodsSort(group)
+        group = [row2dict(item) for item in group]
+        for item in group:
+            if item['class_id']:
+                cls = session.query(Class).filter(Class.id == item['class_id']).one_or_none()
+                if cls:
+                    item['owner'] = cls.name
+            else:
+                item['owner'] = obj.name
+        om._addMethod(MethodManager(group))
+    templates = {cls.name: cls.template for cls in class_chain(obj.class_id)}
+    templates[obj.name] = obj.template
+    om._setTemplates(templates)
+    om.parents = [cls.name for cls in class_chain(obj.class_id)]
+    om.set_permission(storage.get_permissions(om))
+    return om
+
+
+def reset_created_values(max_seed_id: int) -> None:
+    from app.database import session_scope
+    from app.core.models.Clasess import Value
+    with session_scope() as session:
+        session.query(Value).filter(Value.id > max_seed_id).delete(synchronize_session=False)
+
+
+def run(count: int) -> list:
+    from app.database import session_scope, engine
+    from app.core.models.Clasess import Object, Class, Property, Method, Value
+    from app.core.main.ObjectsStorage import objects_storage
+
+    with session_scope() as session:
+        for model in (Value, Property, Method, Object, Class):
+            session.query(model).delete(synchronize_session=False)
+    max_seed_id = seed(count)
+    rows = []
+
+    with session_scope() as session:
+        objs = session.query(Object).order_by(Object.name).all()
+        with QueryCounter(engine) as counter, timer() as elapsed:
+            managers = {obj.name: legacy_object_manager(objects_storage, session, obj) for obj in objs}
+    rows.append([count, "per-object (previous)", counter.count, f"{elapsed['seconds']:.3f}", len(managers)])
+
+    reset_created_values(max_seed_id)
+    with session_scope() as session:
+        objs = session.query(Object).order_by(Object.name).all()
+        with QueryCounter(engine) as counter, timer() as elapsed:
+            managers = {obj.name: objects_storage._createObjectManager(session, obj) for obj in objs}
+    rows.append([count, "bulk, chunk of one", counter.count, f"{elapsed['seconds']:.3f}", len(managers)])
+
+    reset_created_values(max_seed_id)
+    with session_scope() as session:
+        objs = session.query(Object).order_by(Object.name).all()
+        with QueryCounter(engine) as counter, timer() as elapsed:
+            managers = objects_storage._createObjectManagers(session, objs)
+    rows.append([count, "bulk", counter.count, f"{elapsed['seconds']:.3f}", len(managers)])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    bootstrap()
+    rows = []
+    for count in args.sizes:
+        rows.extend(run(count))
+    print_table("ObjectManager hydration (SQLite)", ["objects", "mode", "queries", "seconds", "managers"], rows)
+
+
+if __name__ == "__main__":
+    main()
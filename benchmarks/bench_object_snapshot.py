@@ -0,0 +1,94 @@
+"""
+Benchmark: cold boot (hydration from DB) vs warm boot from the object snapshot.
+
+Seeds N objects (see bench_object_hydration.seed), loads them from the DB,
+writes a snapshot and restores the runtime cache from it. The last scenario
+changes 1% of values behind the storage's back before restoring, to show that
+only differing rows are re-read.
+
+    python benchmarks/bench_object_snapshot.py --sizes 1000 10000
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, QueryCounter, timer, print_table  # noqa: E402
+from bench_object_hydration import seed  # noqa: E402
+
+
+def reset_runtime() -> None:
+    from app.core.main.ObjectsStorage import objects_storage
+    dict.clear(objects_storage.objects)
+    objects_storage.stats.clear()
+    objects_storage.bump_class_revision()
+
+
+def snapshot_view() -> dict:
+    from app.core.main.ObjectsStorage import objects_storage
+    return {
+        (name, prop): (pm.value_id, pm.changed, pm.source, pm._PropertyManager__value)
+        for name, om in dict.items(objects_storage.objects)
+        for prop, pm in om.properties.items()
+    }
+
+
+def run(count: int, path: str) -> list:
+    from app.database import session_scope, engine, get_now_to_utc
+    from app.core.models.Clasess import Object, Class, Property, Method, Value
+    from app.core.main.ObjectsStorage import objects_storage
+
+    with session_scope() as session:
+        for model in (Value, Property, Method, Object, Class):
+            session.query(model).delete(synchronize_session=False)
+    seed(count)
+    reset_runtime()
+    rows = []
+
+    with QueryCounter(engine) as counter, timer() as elapsed:
+        objects_storage.sync_missing()
+    rows.append([count, "cold (DB hydration)", counter.count, f"{elapsed['seconds']:.3f}", "-", "-"])
+    cold = snapshot_view()
+
+    with timer() as elapsed:
+        report = objects_storage.write_snapshot(path)
+    rows.append([count, "write snapshot", "-", f"{elapsed['seconds']:.3f}", report["bytes"], "-"])
+
+    reset_runtime()
+    with QueryCounter(engine) as counter, timer() as elapsed:
+        report = objects_storage.restore_snapshot(path)
+    rows.append([count, "warm (snapshot)", counter.count, f"{elapsed['seconds']:.3f}", "-", report["values_refreshed"]])
+    assert snapshot_view() == cold, "restored runtime differs from DB hydration"
+
+    # 1% of values changed outside the runtime
+    with session_scope() as session:
+        ids = [value_id for (value_id,) in session.query(Value.id).order_by(Value.id).all()][::100]
+        session.query(Value).filter(Value.id.in_(ids)).update(
+            {Value.value: "0", Value.changed: get_now_to_utc()}, synchronize_session=False)
+    reset_runtime()
+    with QueryCounter(engine) as counter, timer() as elapsed:
+        report = objects_storage.restore_snapshot(path)
+    rows.append([count, "warm, 1% values changed", counter.count, f"{elapsed['seconds']:.3f}", "-", report["values_refreshed"]])
+    restored = snapshot_view()
+    reset_runtime()
+    objects_storage.sync_missing()
+    assert restored == snapshot_view(), "reconciled runtime differs from DB hydration"
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    workdir = bootstrap()
+    path = os.path.join(workdir, "objects.snapshot")
+    rows = []
+    for count in args.sizes:
+        rows.extend(run(count, path))
+    print_table("Object runtime boot (SQLite)",
+                ["objects", "mode", "queries", "seconds", "bytes", "values re-read"], rows)
+
+
+if __name__ == "__main__":
+    main()
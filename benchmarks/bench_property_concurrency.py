@@ -0,0 +1,146 @@
+"""
+Benchmark: getProperty throughput from many threads with per-thread counter cells.
+
+Counter: nanoseconds per increment of one shared counter from 1..N threads, the
+previous lock-protected dict counter vs `ShardedCounter` (per-thread cells,
+summed on read).
+
+getProperty: reads per second of `--properties` properties (a template reading
+the same values) from 1..N threads for `--seconds` each, with
+`SystemVar.system_stats` enabled and disabled, and enabled with the previous
+lock-protected counter behind `property_reads`.
+
+    python benchmarks/bench_property_concurrency.py --threads 1 2 4 8 16 32 --seconds 1
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, print_table  # noqa: E402
+
+
+class LockedCounter():
+    """Previous registry counter: dict of values under one lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def add(self, amount=1, key=()):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, key=()):
+        with self._lock:
+            return self._values.get(key)
+
+    def totals(self):
+        with self._lock:
+            return dict(self._values)
+
+
+def run_threads(threads, work):
+    """Starts `threads` threads of work(index) together, returns elapsed seconds"""
+    barrier = threading.Barrier(threads + 1)
+
+    def target(index):
+        barrier.wait()
+        work(index)
+
+    workers = [threading.Thread(target=target, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started
+
+
+def counter_ns(cls, threads, calls):
+    counter = cls()
+    per_thread = calls // threads
+
+    def work(index):
+        add = counter.add
+        for _ in range(per_thread):
+            add(1)
+
+    elapsed = run_threads(threads, work)
+    assert counter.value() == per_thread * threads
+    return elapsed * 1e9 / (per_thread * threads)
+
+
+def property_reads(threads, seconds, names):
+    from app.core.lib.object import getProperty
+
+    stop = threading.Event()
+    reads = [0] * threads
+
+    def work(index):
+        count = 0
+        offset = index
+        while not stop.is_set():
+            for step in range(100):
+                getProperty(names[(offset + step) % len(names)])
+            count += 100
+            offset += 100
+        reads[index] = count
+
+    timer = threading.Timer(seconds, stop.set)
+    timer.start()
+    elapsed = run_threads(threads, work)
+    return sum(reads) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--properties", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=640000)
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.core.lib.object import addObject, addObjectProperty, getProperty, setProperty
+    from app.core.lib.constants import PropertyType
+    from app.core.lib.common import invalidateSystemStatsEnabledCache
+    from app.core.lib.metrics import ShardedCounter, metrics_registry
+
+    rows = [[threads, f"{counter_ns(LockedCounter, threads, args.calls):.0f}",
+             f"{counter_ns(ShardedCounter, threads, args.calls):.0f}"] for threads in args.threads]
+    print_table("Shared counter increment", ["threads", "lock + dict ns/inc", "ShardedCounter ns/inc"], rows)
+
+    addObject("SystemVar", None, "System variables")
+    addObjectProperty("system_stats", "SystemVar", "Local system statistics", 0, PropertyType.Bool)
+    addObject("BenchTemplate", None, "Bench object")
+    names = []
+    for index in range(args.properties):
+        addObjectProperty(f"p{index}", "BenchTemplate", "Value", index, PropertyType.Integer)
+        names.append(f"BenchTemplate.p{index}")
+
+    getProperty(names[0])
+    reads = metrics_registry.get("property_reads")
+    sharded = reads._cells
+    modes = [("system_stats on", True, sharded), ("system_stats off", False, sharded),
+             ("on, lock + dict counter", True, LockedCounter())]
+    results = {}
+    for title, enabled, cells in modes:
+        setProperty("SystemVar.system_stats", enabled)
+        invalidateSystemStatsEnabledCache()
+        reads._cells = cells
+        for threads in args.threads:
+            results[(title, threads)] = property_reads(threads, args.seconds, names)
+    reads._cells = sharded
+    print_table(f"getProperty reads/s over {args.properties} properties, {args.seconds} s per point",
+                ["threads"] + [title for title, _, _ in modes],
+                [[threads] + [f"{results[(title, threads)]:.0f}" for title, _, _ in modes]
+                 for threads in args.threads])
+    print(f"property_reads: {reads.value()}, per-thread shards: {sharded.shards}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: resident memory of PropertyManager instances.
+
+Builds N property managers (objects x properties of one class, every value
+set) with the previous per-instance __dict__ layout, where each manager kept
+its own copy of name/type/history/parsed params, and with the current layout
+(shared PropertyDescriptor + __slots__ state), and reports bytes per property
+measured with tracemalloc.
+
+    python benchmarks/bench_property_memory.py --properties 100000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, timer, print_table  # noqa: E402
+
+PROPS_PER_OBJECT = 10
+
+_DECODE = {"int": int, "float": float, "str": str}
+
+
+class LegacyPropertyManager():
+    """Per-instance layout of PropertyManager before shared descriptors."""
+
+    def __init__(self, object_id, property, value, object_name=None, method=None):
+        from app.database import get_now_to_utc
+        self.property_id = property.id
+        self.value_id = value.id if value else None
+        self.name = property.name
+        self.description = property.description
+        self.object_id = object_id
+        self.object_name = object_name or 'Unknown'
+        self.history = property.history or 0
+        self.changed = value.changed if value else None
+        self.method = method
+        self.linked = None
+        self.source = value.source if value else None
+        self.__value = None
+        self.type = property.type
+        self.params = json.loads(property.params) if property.params else None
+        self.icon = None
+        self.color = None
+        self.sort_order = None
+        self.default_value = None
+        self.read_only = False
+        if self.params and isinstance(self.params, dict):
+            self.icon = self.params.get('icon')
+            self.color = self.params.get('color')
+            self.sort_order = self.params.get('sort_order')
+            self.default_value = self.params.get('default_value')
+            self.read_only = self.params.get('read_only', False)
+        if value:
+            self.__value = _DECODE[self.type](value.value)
+        self.count_read = 0
+        self.count_write = 0
+        self.readed = get_now_to_utc()
+
+
+def class_properties():
+    types = ["int", "float", "str"]
+    result = []
+    for i in range(PROPS_PER_OBJECT):
+        params = json.dumps({"icon": "fa-bolt", "min": 0, "max": 1000, "decimals": 2}) if i % 2 else None
+        result.append(SimpleNamespace(id=i + 1, name=f"prop{i}", description=f"Property {i}",
+                                      history=7 if i % 3 == 0 else 0, type=types[i % 3], params=params))
+    return result
+
+
+def build(factory, count: int, props, now) -> list:
+    managers = []
+    objects = count // len(props)
+    for object_id in range(objects):
+        object_name = f"Sensor{object_id:06d}"
+        for prop in props:
+            value = SimpleNamespace(id=object_id * len(props) + prop.id, changed=now, source="bench", linked=None,
+                                    value=str(object_id % 1000))
+            managers.append(factory(object_id, prop, value, object_name, "onChange" if prop.id == 1 else None))
+    return managers
+
+
+def measure(factory, count: int, props, now):
+    gc.collect()
+    tracemalloc.start()
+    with timer() as elapsed:
+        managers = build(factory, count, props, now)
+    gc.collect()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return managers, current / len(managers), elapsed["seconds"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--properties", type=int, default=100000)
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.database import get_now_to_utc
+    from app.core.main.ObjectManager import PropertyManager, PropertyDescriptor
+
+    props = class_properties()
+    now = get_now_to_utc()
+    rows = []
+    legacy, legacy_bytes, legacy_sec = measure(LegacyPropertyManager, args.properties, props, now)
+    rows.append(["per-instance __dict__ (before)", len(legacy), f"{legacy_bytes:.0f}", f"{legacy_sec:.3f}", "-"])
+    del legacy
+    compact, compact_bytes, compact_sec = measure(PropertyManager, args.properties, props, now)
+    rows.append(["descriptor + __slots__ (after)", len(compact), f"{compact_bytes:.0f}", f"{compact_sec:.3f}",
+                 PropertyDescriptor.cache_size()])
+
+    sample = compact[-1]
+    assert sample.getValue(track_stats=False) == 999 and sample.type == "int" and sample.method is None
+    print_table("PropertyManager memory", ["layout", "properties", "bytes/property", "build sec", "descriptors"], rows)
+    print(f"\nsaved: {legacy_bytes - compact_bytes:.0f} bytes/property ({1 - compact_bytes / legacy_bytes:.0%})")
+
+
+if __name__ == "__main__":
+    main()
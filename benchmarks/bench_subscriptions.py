@@ -0,0 +1,134 @@
+"""
+Benchmark: broadcast vs indexed delivery of property changes.
+
+`--plugins` plugins are interested in a few of `--objects` x `--properties`
+properties each (exact names, whole objects, a class, a glob or a property of
+every object). Every property changes `--rounds` times and is published via
+ChangeDispatcher:
+
+  - broadcast: all plugins are proxy plugins and filter every change in Python
+    (changeProperty with the same filter the plugin would need);
+  - indexed: plugins call subscribeChanges() and the SubscriptionIndex routes
+    each change only to matching plugins.
+
+Reports publish/drain time, queued deliveries and handler work per change.
+
+    python benchmarks/bench_subscriptions.py --plugins 50 --objects 1000 --properties 10
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, print_table  # noqa: E402
+
+CLASSES = 5
+
+
+class FilteringPlugin:
+    """Proxy plugin receiving all changes and filtering them itself"""
+
+    def __init__(self, name, keys, classes):
+        from app.core.main.SubscriptionIndex import CompiledSubscriptions
+        self.name = name
+        self.actions = ["proxy"]
+        self.keys = keys
+        self._filter = CompiledSubscriptions({name: keys})
+        self._classes = classes
+        self.received = 0
+        self.accepted = 0
+        self._lock = threading.Lock()
+
+    def changeProperty(self, obj, prop, value):
+        # прежний путь: плагин сам отбрасывает лишние изменения
+        matched = bool(self._filter.match(obj, prop, self._classes.get(obj)))
+        with self._lock:
+            self.received += 1
+            if matched:
+                self.accepted += 1
+
+    def executedMethod(self, obj, method):
+        pass
+
+
+class SubscribedPlugin(FilteringPlugin):
+    """Plugin with subscriptions: receives only matching changes"""
+
+    def changeProperty(self, obj, prop, value):
+        with self._lock:
+            self.received += 1
+            self.accepted += 1
+
+
+def plugin_keys(index, objects, properties):
+    """Mixed subscriptions: exact, object, class, glob, property"""
+    kind = index % 5
+    if kind == 0:
+        return [("exact", f"Obj{(index * 37 + step) % objects}", f"p{step % properties}") for step in range(20)]
+    if kind == 1:
+        return [("object", f"Obj{(index * 53 + step) % objects}") for step in range(3)]
+    if kind == 2:
+        return [("class", f"Type{index % CLASSES}", f"p{index % properties}")]
+    if kind == 3:
+        return [("glob", f"Obj{index % 10}?.p[12]")]
+    return [("property", f"p{index % properties}")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plugins", type=int, default=50)
+    parser.add_argument("--objects", type=int, default=1000)
+    parser.add_argument("--properties", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=2)
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.core.main.PluginsHelper import plugins as registry
+    from app.core.main.ChangeDispatcher import change_dispatcher
+    from app.core.main.SubscriptionIndex import subscription_index, format_subscription
+
+    classes = {f"Obj{i}": [f"Type{i % CLASSES}", "Device"] for i in range(args.objects)}
+    changes = [(f"Obj{i}", f"p{j}") for i in range(args.objects) for j in range(args.properties)]
+    total = len(changes) * args.rounds
+
+    def run(title, plugin_class):
+        registry.clear()
+        subscribers = []
+        for index in range(args.plugins):
+            keys = plugin_keys(index, args.objects, args.properties)
+            plugin = plugin_class(f"Bench{plugin_class.__name__}{index}", keys, classes)
+            registry[plugin.name] = {"instance": plugin}
+            if plugin_class is SubscribedPlugin:
+                for key in keys:
+                    if key[0] == "class":
+                        subscription_index.subscribe(plugin.name, class_name=key[1], property_name=key[2])
+                    else:
+                        subscription_index.subscribe(plugin.name, format_subscription(key))
+            subscribers.append(plugin)
+        started = time.perf_counter()
+        for value in range(args.rounds):
+            for obj, prop in changes:
+                change_dispatcher.publish(obj, prop, value, classes[obj])
+        published = time.perf_counter() - started
+        change_dispatcher.flush(timeout=600.0)
+        drained = time.perf_counter() - started
+        received = sum(plugin.received for plugin in subscribers)
+        accepted = sum(plugin.accepted for plugin in subscribers)
+        for plugin in subscribers:
+            subscription_index.clear(plugin.name)
+        return [title, f"{published:.3f}", f"{drained:.3f}", f"{total / drained:.0f}", received,
+                f"{received / total:.2f}", accepted]
+
+    rows = [
+        run("broadcast + filter in plugin", FilteringPlugin),
+        run("subscription index", SubscribedPlugin),
+    ]
+    print_table(f"{args.plugins} plugins, {len(changes)} properties, {total} changes",
+                ["delivery", "publish s", "delivered s", "changes/s", "queued deliveries", "per change",
+                 "accepted"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: updating 10 properties of an object with and without `with batch():`.
+
+Every property has a bound method and a linked plugin, and one proxy plugin
+is registered. Each update writes every property `--repeat` times (an
+intermediate value, then the final one). Reports per update: thread pool
+submissions, method executions, BatchWriter hand-offs and plugin deliveries.
+
+    python benchmarks/bench_write_batch.py --updates 200 --repeat 2
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, timer, print_table  # noqa: E402
+
+PROPERTIES = 10
+
+
+class FakePlugin:
+    def __init__(self, name, actions):
+        self.name = name
+        self.actions = actions
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def changeLinkedProperty(self, obj, prop, value):
+        with self._lock:
+            self.calls += 1
+
+    def changeProperty(self, obj, prop, value):
+        with self._lock:
+            self.calls += 1
+
+    def executedMethod(self, obj, method):
+        pass
+
+
+class Counter:
+    """Counts calls of a wrapped function"""
+
+    def __init__(self, func):
+        self.func = func
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+        return self.func(*args, **kwargs)
+
+
+def wait_idle(plugins, expected, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while sum(plugin.calls for plugin in plugins) < expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=2, help="writes of every property per update")
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.database import session_scope
+    from app.core.models.Clasess import Class, Object, Property, Method
+    from app.core.main.PluginsHelper import plugins
+    from app.core.main.ObjectsStorage import objects_storage
+    from app.core.main import ObjectManager as om_module
+    from app.core.lib.object import batch
+    from app.core.main.WriteBatch import getWriteBatchStats
+
+    with session_scope() as session:
+        cls = Class(name="BenchThermostat")
+        session.add(cls)
+        session.flush()
+        method = Method(class_id=cls.id, name="onChange", code="pass")
+        session.add(method)
+        session.flush()
+        for index in range(PROPERTIES):
+            session.add(Property(class_id=cls.id, name=f"p{index}", type="int", method_id=method.id))
+        session.add(Object(name="Thermostat", class_id=cls.id))
+
+    linked = FakePlugin("BenchLink", [])
+    proxy = FakePlugin("BenchProxy", ["proxy"])
+    plugins["BenchLink"] = {"instance": linked}
+    plugins["BenchProxy"] = {"instance": proxy}
+
+    thermostat = objects_storage.getObjectByName("Thermostat")
+    for prop in thermostat.properties.values():
+        prop.linked = ["BenchLink"]
+    method_manager = thermostat.methods["onChange"]
+
+    submits = Counter(om_module._poolLinkedProperty.submit)
+    om_module._poolLinkedProperty.submit = submits
+    writer_add = Counter(om_module._batch_writer.add)
+    writer_add_many = Counter(om_module._batch_writer.add_many)
+    om_module._batch_writer.add = writer_add
+    om_module._batch_writer.add_many = writer_add_many
+
+    def write(step):
+        for repeat in range(args.repeat):
+            for index in range(PROPERTIES):
+                thermostat.setProperty(f"p{index}", step * 1000 + repeat * 100 + index, "bench")
+
+    def update(step, scoped):
+        if scoped:
+            with batch():
+                write(step)
+        else:
+            write(step)
+
+    rows = []
+    writes = PROPERTIES * args.repeat
+    for title, scoped in ((f"setProperty x{writes}", False), (f"with batch(): setProperty x{writes}", True)):
+        submits.count = writer_add.count = writer_add_many.count = 0
+        linked.calls = proxy.calls = 0
+        executed = method_manager.count_executed
+        with timer() as elapsed:
+            for step in range(args.updates):
+                update(step + (args.updates if scoped else 0), scoped)
+        wait_idle((linked, proxy), args.updates * (PROPERTIES if scoped else writes) * 2)
+        om_module._batch_writer.flush_sync()
+        n = args.updates
+        rows.append([
+            title,
+            f"{submits.count / n:.1f}",
+            f"{(method_manager.count_executed - executed) / n:.1f}",
+            f"{writer_add.count / n:.1f}",
+            f"{writer_add_many.count / n:.1f}",
+            f"{(linked.calls + proxy.calls) / n:.1f}",
+            f"{elapsed['seconds'] / n * 1000:.2f}",
+        ])
+
+    print_table(f"Per {PROPERTIES}-property update ({args.updates} updates, {args.repeat} writes per property, "
+                "bound method + linked plugin + proxy plugin)",
+                ["mode", "pool submits", "method runs", "writer add", "writer add_many", "deliveries", "ms"], rows)
+    print(f"\nwrite batch stats: {getWriteBatchStats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark: BatchWriter write-ahead journal (throughput and crash replay).
+
+Throughput: `--updates` value updates with history go through BatchWriter.add()
+(the setProperty hot path) with the journal off, with group fsync and with
+fsync after every record; reports adds per second, total time until the
+database has everything, journal bytes and fsync calls.
+
+Crash replay: a child process writes `--crash-updates` values with a huge
+flush interval and kills itself with SIGKILL mid-batch (nothing reached the
+database). The parent replays the journal (as on startup) and checks that every
+final value and every history row is in the database, then replays the same
+segments again to check that replay is idempotent.
+
+    python benchmarks/bench_write_journal.py --updates 20000 --crash-updates 2000
+"""
+import argparse
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, print_table  # noqa: E402
+
+OBJECTS = 20
+
+
+def create_values(session_scope, Class, Object, Property, Value, prefix):
+    """Objects with one int property and a Value row each; returns value ids"""
+    ids = []
+    with session_scope() as session:
+        cls = Class(name=f"{prefix}Meter")
+        session.add(cls)
+        session.flush()
+        prop = Property(class_id=cls.id, name="power", type="int", history=1)
+        session.add(prop)
+        session.flush()
+        for index in range(OBJECTS):
+            obj = Object(name=f"{prefix}Meter{index}", class_id=cls.id)
+            session.add(obj)
+            session.flush()
+            value = Value(object_id=obj.id, name="power", value="0")
+            session.add(value)
+            session.flush()
+            ids.append(value.id)
+    return ids
+
+
+def child(args):
+    """Writes values through the journaled BatchWriter and dies without a flush"""
+    bootstrap(application={
+        "batch_writer_flush_interval": 3600,
+        "batch_writer_journal_enabled": True,
+        "batch_writer_journal_path": args.journal,
+        "batch_writer_journal_fsync_interval": 0.05,
+    }, database_url=args.database)
+    from app.database import get_now_to_utc
+    from app.core.main.ObjectManager import _batch_writer, ValueUpdate
+
+    value_ids = [int(item) for item in args.value_ids.split(",")]
+    for step in range(args.crash_updates):
+        changed = get_now_to_utc()
+        value = str(step)
+        _batch_writer.add(ValueUpdate(value_ids[step % len(value_ids)], value, changed, "bench", True, value))
+    time.sleep(0.1)  # group fsync
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def throughput(args, ValueUpdate, BatchWriter, WriteJournal, value_ids, get_now_to_utc):
+    rows = []
+    modes = [("journal off", None), ("journal, group fsync 0.05 s", 0.05), ("journal, fsync every record", 0.0)]
+    for title, fsync_interval in modes:
+        journal = None
+        if fsync_interval is not None:
+            journal = WriteJournal(tempfile.mkdtemp(prefix="osys_journal_"), fsync_interval)
+        writer = BatchWriter(flush_interval=args.flush_interval, journal=journal)
+        updates = args.updates if fsync_interval != 0.0 else min(args.updates, 2000)
+        started = time.perf_counter()
+        for step in range(updates):
+            value = str(step)
+            writer.add(ValueUpdate(value_ids[step % len(value_ids)], value, get_now_to_utc(), "bench", True, value))
+        added = time.perf_counter() - started
+        writer.flush_sync()
+        total = time.perf_counter() - started
+        writer.shutdown(wait=False)
+        stats = journal.get_stats() if journal else {}
+        rows.append([title, updates, f"{updates / added:.0f}", f"{updates / total:.0f}",
+                     stats.get("bytes_written", 0), stats.get("fsyncs", 0), stats.get("segments", 0)])
+    print_table(f"BatchWriter.add() throughput, flush interval {args.flush_interval} s",
+                ["mode", "updates", "adds/s", "end-to-end/s", "journal bytes", "fsyncs", "segments left"], rows)
+
+
+def crash_replay(args, value_ids, workdir, BatchWriter, WriteJournal):
+    from app.database import session_scope
+    from app.core.models.Clasess import Value, History
+
+    journal_path = os.path.join(workdir, "crash.journal")
+    database = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", "--journal", journal_path, "--database", database,
+         "--value-ids", ",".join(map(str, value_ids)), "--crash-updates", str(args.crash_updates)],
+        cwd=workdir, capture_output=True, text=True,
+    )
+    killed = process.returncode == -signal.SIGKILL
+
+    def db_state():
+        with session_scope() as session:
+            values = {row.id: row.value for row in session.query(Value).filter(Value.id.in_(value_ids))}
+            history = session.query(History).filter(History.value_id.in_(value_ids)).count()
+        return values, history
+
+    before = db_state()
+    # копия сегментов для проверки повторного replay
+    again_path = tempfile.mkdtemp(prefix="osys_journal_again_")
+    for name in os.listdir(journal_path):
+        shutil.copy(os.path.join(journal_path, name), again_path)
+
+    writer = BatchWriter(flush_interval=3600, journal=WriteJournal(journal_path, 0.05))
+    started = time.perf_counter()
+    result = writer.replay_journal()
+    elapsed = time.perf_counter() - started
+    writer.shutdown(wait=False)
+    values, history = db_state()
+    expected = {value_ids[step % len(value_ids)]: str(step) for step in range(args.crash_updates)}
+
+    writer = BatchWriter(flush_interval=3600, journal=WriteJournal(again_path, 0.05))
+    again = writer.replay_journal()
+    writer.shutdown(wait=False)
+    values_again, history_again = db_state()
+
+    print(f"\nchild killed by SIGKILL: {killed}; before replay: "
+          f"{sum(value != '0' for value in before[0].values())} values changed, {before[1]} history rows")
+    print(f"replay: {result} in {elapsed * 1000:.1f} ms, segments left: {len(os.listdir(journal_path))}")
+    print(f"values match: {values == expected}; history rows {history} of {args.crash_updates}")
+    print(f"second replay of the same segments: {again}; "
+          f"unchanged: {values_again == values and history_again == history}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    parser.add_argument("--crash-updates", type=int, default=2000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--journal", help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    parser.add_argument("--value-ids", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args)
+        return
+
+    workdir = bootstrap()
+    from app.database import session_scope, get_now_to_utc
+    from app.core.models.Clasess import Class, Object, Property, Value
+    from app.core.main.ObjectManager import BatchWriter, ValueUpdate
+    from app.core.main.WriteJournal import WriteJournal
+
+    value_ids = create_values(session_scope, Class, Object, Property, Value, "Bench")
+    throughput(args, ValueUpdate, BatchWriter, WriteJournal, value_ids, get_now_to_utc)
+    crash_ids = create_values(session_scope, Class, Object, Property, Value, "Crash")
+    crash_replay(args, crash_ids, workdir, BatchWriter, WriteJournal)
+
+
+if __name__ == "__main__":
+    main()
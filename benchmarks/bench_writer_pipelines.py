@@ -0,0 +1,123 @@
+"""
+Benchmark: BatchWriter with one combined writer vs independent value/history
+pipelines and shards.
+
+Throughput: `--updates` value updates with history (over `--values` values) are
+added and flushed; total rows per second (Value + History) for the combined
+writer and for pipelines with 1, 2 and 4 shards, with per-pipeline throughput.
+
+Isolation: the same load while every History insert statement takes an extra
+`--slow-history-ms` (simulated index maintenance on a large table); reports when
+all current values reached the database and when all history did.
+
+Shards write in parallel on PostgreSQL/MySQL (--database-url); SQLite has one
+writer, so there shards only show the locking overhead.
+
+    python benchmarks/bench_writer_pipelines.py --updates 50000 --shards 1 2 4
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import bootstrap, print_table  # noqa: E402
+
+
+def create_values(count, prefix):
+    from app.database import session_scope
+    from app.core.models.Clasess import Value
+
+    with session_scope() as session:
+        rows = [Value(object_id=0, name=f"{prefix}{index}", value="0") for index in range(count)]
+        session.add_all(rows)
+        session.flush()
+        return [row.id for row in rows]
+
+
+def load(writer, value_ids, updates):
+    """Adds updates, returns (seconds until values are written, until history is written)"""
+    from app.database import get_now_to_utc
+    from app.core.main.ObjectManager import ValueUpdate
+
+    done = {}
+    started = time.perf_counter()
+
+    def watch():
+        # момент, когда пайплайны значений/истории записали всё
+        while len(done) < 2 and time.perf_counter() - started < 600:
+            stats = writer.get_stats()["pipelines"]
+            for kind in ("values", "history"):
+                written = sum(item["written"] for name, item in stats.items() if name.startswith(kind))
+                if kind not in done and written >= updates:
+                    done[kind] = time.perf_counter() - started
+            time.sleep(0.002)
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    for step in range(updates):
+        value = str(step)
+        writer.add(ValueUpdate(value_ids[step % len(value_ids)], value, get_now_to_utc(), "bench", True, value))
+    writer.flush_sync()
+    total = time.perf_counter() - started
+    watcher.join(timeout=1.0)
+    writer.shutdown(wait=False)
+    return done.get("values", total), done.get("history", total), total
+
+
+def pipeline_rates(writer_stats):
+    """Rows per second of busy time, summed over shards of each pipeline kind"""
+    rates = {}
+    for name, item in writer_stats["pipelines"].items():
+        kind = name.split("-")[0]
+        rates[kind] = rates.get(kind, 0) + item["rows_per_second"]
+    return ", ".join(f"{kind} {rate:.0f}/s" for kind, rate in rates.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=50000)
+    parser.add_argument("--values", type=int, default=5000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--slow-history-ms", type=float, default=20.0)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    bootstrap(database_url=args.database_url)
+    from sqlalchemy import event
+    from app.database import engine, get_engine_dialect
+    from app.core.main.ObjectManager import BatchWriter
+
+    modes = [("combined writer", {})] + [
+        (f"pipelines, {shards} shard(s)", {"pipelines": True, "shards": shards}) for shards in args.shards
+    ]
+
+    def run(title, options):
+        value_ids = create_values(args.values, title.replace(" ", "_"))
+        writer = BatchWriter(flush_interval=0.2, chunk_size=args.chunk_size, **options)
+        values_at, history_at, total = load(writer, value_ids, args.updates)
+        stats = writer.get_stats()
+        return [title, f"{values_at:.2f}", f"{history_at:.2f}", f"{total:.2f}",
+                f"{args.updates * 2 / total:.0f}", pipeline_rates(stats) or "-"]
+
+    headers = ["mode", "values in DB s", "history in DB s", "total s", "rows/s", "pipeline rows/s (sum of shards)"]
+    rows = [run(title, options) for title, options in modes]
+    print_table(f"{get_engine_dialect()}: {args.updates} updates with history over {args.values} values",
+                headers, rows)
+
+    def slow_history(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO HISTORY"):
+            time.sleep(args.slow_history_ms / 1000.0)
+
+    event.listen(engine, "before_cursor_execute", slow_history)
+    try:
+        rows = [run(title, options) for title, options in modes[:2]]
+    finally:
+        event.remove(engine, "before_cursor_execute", slow_history)
+    print_table(f"Isolation: +{args.slow_history_ms} ms per History insert statement", headers, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Shared bootstrap for standalone benchmarks.
+
+Benchmarks are run as plain scripts from the repository root, e.g.::
+
+    python benchmarks/bench_object_hydration.py --sizes 1000 10000
+
+`bootstrap()` must be called before any ``app.*`` import: ``Config`` is loaded
+from ``config.yaml`` in the current directory at import time, so the harness
+creates a temporary working directory with its own config and SQLite database.
+"""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import yaml
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def bootstrap(application: dict = None, database_url: str = None) -> str:
+    """Prepare temporary workdir with config.yaml and empty database.
+
+    Args:
+        application (dict): Overrides for the ``application`` config section.
+        database_url (str): Connection string (default - SQLite file in workdir).
+
+    Returns:
+        str: Path of the working directory.
+    """
+    workdir = tempfile.mkdtemp(prefix="osys_bench_")
+    app_section = {
+        "secret_key": "bench",
+        "debug": False,
+        "object_preload_enabled": False,
+    }
+    app_section.update(application or {})
+    config = {
+        "application": app_section,
+        "database": {
+            "connection_string": database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        },
+    }
+    with open(os.path.join(workdir, "config.yaml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f)
+    os.chdir(workdir)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    from app.extensions import db
+    from app.database import engine
+    import app.core.models.Clasess  # noqa: F401
+    import app.core.models.Tasks  # noqa: F401
+    db.metadata.create_all(bind=engine)
+    return workdir
+
+
+class QueryCounter:
+    """Counts SQL statements executed by the engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        from sqlalchemy import event
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@contextmanager
+def timer():
+    """Yields dict with ``seconds`` filled on exit."""
+    result = {"seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+
+def print_table(title: str, header: list, rows: list) -> None:
+    """Prints a simple aligned text table."""
+    widths = [len(str(h)) for h in header]
+    for row in rows:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], len(str(cell)))
+    print(f"\n{title}")
+    print("  ".join(str(h).ljust(widths[i]) for i, h in enumerate(header)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(cell).ljust(widths[i]) for i, cell in enumerate(row)))
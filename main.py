@@ -5,6 +5,8 @@ from app import createApp
 from app.utils import initSystemVar, startSystemVar, init_analytics_scheduler, get_current_version
 from app.core.main.PluginsHelper import start_plugins, stop_plugins
 from app.core.main.ObjectsStorage import objects_storage
+from app.core.main.ChangeDispatcher import change_dispatcher
+from app.core.main.ObjectManager import replay_batch_journal, shutdown_batch_writer
 from app.logging_config import getLogger
 
 _logger = getLogger('main')
@@ -19,15 +21,22 @@ if __name__ == '__main__':
             "Review config.yaml and store secret_key safely."
         )
 
+    with app.app_context():
+        # записи BatchWriter, не попавшие в БД до сбоя - до загрузки объектов
+        replay_batch_journal()
+
     _logger.info("Init SystemVar")
     with app.app_context():
         initSystemVar()
+        if Config.OBJECT_SNAPSHOT_ENABLED:
+            objects_storage.restore_snapshot()
 
     _logger.info("Start plugins")
     start_plugins()
 
     with app.app_context():
         objects_storage.start_background_preload(app)
+        objects_storage.start_snapshot_writer(app)
 
     startSystemVar()
 
@@ -47,6 +56,13 @@ if __name__ == '__main__':
     with app.app_context():
         objects_storage.stop_background_preload()
         objects_storage.invoke_lifecycle_all("onStop")
+        objects_storage.stop_snapshot_writer()
+
+    # доставить proxy-плагинам изменения, оставшиеся в очередях
+    change_dispatcher.shutdown()
 
     _logger.info("Stop plugins")
     stop_plugins()
+
+    # записать оставшиеся значения и закрыть журнал
+    shutdown_batch_writer()